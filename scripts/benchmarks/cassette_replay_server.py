@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Healthcare AI V2 - Cassette Replay Server
+OpenAI-compatible /chat/completions stub that answers from an LLM cassette
+recorded with LLM_CASSETTE_MODE=record, with synthetic latency.
+
+Point the app at it to run the full stack offline, network code included:
+
+    python scripts/benchmarks/cassette_replay_server.py --latency lognormal:900,0.4
+    OPENROUTER_BASE_URL=http://localhost:9100/v1/chat/completions  (OpenRouter client)
+    LLM_STUB_PROVIDER_URL=http://localhost:9100/v1                  (LLM gateway stub provider)
+
+The client still needs an API key in the OpenRouter format; any dummy
+"sk-or-v1-..." value works. GET /stats reports match counts.
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+from aiohttp import web
+
+# Add project root to path for imports
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from src.ai.cassette import Cassette, CassettePlayer, LatencyModel
+
+
+def create_app(player: CassettePlayer) -> web.Application:
+    """aiohttp application serving a cassette"""
+
+    async def chat_completions(request: web.Request) -> web.Response:
+        status, data = await player.play(await request.json())
+        if status == 200:
+            return web.json_response(data)
+        return web.json_response({"error": {"code": status, "message": data}}, status=status)
+
+    async def stats(request: web.Request) -> web.Response:
+        return web.json_response(player.get_stats())
+
+    app = web.Application()
+    app.router.add_post("/v1/chat/completions", chat_completions)
+    app.router.add_post("/api/v1/chat/completions", chat_completions)
+    app.router.add_get("/stats", stats)
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve an LLM cassette over HTTP")
+    parser.add_argument("--cassette", default="data/cassettes/openrouter.jsonl.gz", help="Cassette file")
+    parser.add_argument("--latency", default="recorded", help="Latency spec (see src/ai/cassette.py)")
+    parser.add_argument("--on-miss", default="synthesize", choices=["error", "synthesize"])
+    parser.add_argument("--seed", type=int, default=0, help="Latency random seed")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    args = parser.parse_args()
+
+    player = CassettePlayer(Cassette.load(args.cassette), LatencyModel(args.latency, seed=args.seed), args.on_miss)
+    print(f"Replaying {len(player.cassette.interactions)} calls on http://{args.host}:{args.port}/v1")
+    web.run_app(create_app(player), host=args.host, port=args.port, print=None)
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Healthcare AI V2 - Emergency Card Latency Benchmark
+Times the Safety Guardian fast path (emergency classification plus localized
+card build) that runs before the LLM call, across English and Chinese
+messages, emergency types and districts.
+
+Exits with status 1 when the p99 card latency exceeds --max-p99-ms, so the
+check can gate CI.
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+# Add project root to path for imports
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from src.agents.base_agent import AgentContext
+from src.agents.emergency_card import emergency_card_builder
+from src.agents.safety_guardian import SafetyGuardianAgent
+from src.core.metrics import LatencyHistogram
+
+
+SAMPLE_MESSAGES = [
+    ("I have chest pain and can't breathe", "en", "adult"),
+    ("救命！我媽咪跌倒起唔到身", "zh-HK", "elderly"),
+    ("I want to kill myself, nobody gets me", "en", "teen"),
+    ("我想自殺，好辛苦", "zh-HK", "teen"),
+    ("someone hurt me at home", "en", "child"),
+    ("medical emergency help me", "en", "adult"),
+    ("我爸爸中風，唔識郁", "zh-HK", "elderly"),
+]
+
+DISTRICTS = [None, "Southern", "Sha Tin", "Kwun Tong"]
+
+
+def build_context(language: str, age_group: str, district) -> AgentContext:
+    """Build a minimal agent context."""
+    profile = {"age_group": age_group}
+    if district:
+        profile["district"] = district
+    return AgentContext(
+        user_id="benchmark",
+        session_id="benchmark",
+        conversation_history=[],
+        user_profile=profile,
+        cultural_context={"region": "hong_kong"},
+        language_preference=language,
+        timestamp=datetime.now(),
+    )
+
+
+async def run(iterations: int, max_p99_ms: float) -> int:
+    """Run the benchmark and return the exit status."""
+    await emergency_card_builder.refresh()
+    agent = SafetyGuardianAgent(ai_service=None)
+
+    histogram = LatencyHistogram(min_ms=0.001)
+    for i in range(iterations):
+        message, language, age_group = SAMPLE_MESSAGES[i % len(SAMPLE_MESSAGES)]
+        context = build_context(language, age_group, DISTRICTS[i % len(DISTRICTS)])
+        # Vary the text so every message is a cold keyword scan
+        started = time.perf_counter()
+        card = agent.build_emergency_card(f"{message} #{i}", context)
+        histogram.record((time.perf_counter() - started) * 1000)
+        assert card["hotlines"], "card without hotlines"
+
+    stats = histogram.snapshot()
+    print(f"Cards built:       {stats['count']}")
+    print(f"Builder stats:     {emergency_card_builder.get_stats()['facilities']} facilities cached")
+    print(f"Mean per card:     {histogram.mean * 1000:.1f} µs")
+    print(f"p50 per card:      {histogram.percentile(50) * 1000:.1f} µs")
+    print(f"p99 per card:      {histogram.percentile(99) * 1000:.1f} µs")
+    print(f"Max per card:      {(histogram.max or 0.0) * 1000:.1f} µs")
+
+    p99 = histogram.percentile(99)
+    if p99 > max_p99_ms:
+        print(f"FAIL: p99 {p99:.3f} ms exceeds {max_p99_ms:.3f} ms")
+        return 1
+    print(f"OK: p99 {p99:.3f} ms within {max_p99_ms:.3f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Emergency card latency benchmark")
+    parser.add_argument("--iterations", type=int, default=5000, help="Cards to build")
+    parser.add_argument("--max-p99-ms", type=float, default=5.0, help="Fail when p99 exceeds this")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(run(args.iterations, args.max_p99_ms)))
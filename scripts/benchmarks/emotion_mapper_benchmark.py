@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Healthcare AI V2 - Emotion Mapper Benchmark
+Checks that the precomputed, vectorized emotion scoring picks the same
+emotion as the per-candidate reference scorer (EmotionMapper._score_emotion)
+on a generated corpus, then compares their speed, single and batched.
+
+Exits with status 1 when any response maps differently.
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+# Add project root to path for imports
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from src.agents.emotion_mapper import EmotionMapper
+
+
+FILLER = [
+    "Let me help you with that.",
+    "Here is what I suggest for today.",
+    "多謝你話俾我知。",
+    "I understand how you feel about this situation.",
+    "我哋一齊慢慢嚟。",
+    "Please keep an eye on how things change over the next few days.",
+]
+
+URGENCIES = ["low", "medium", "high", "emergency", "critical"]
+LANGUAGES = ["en", "zh-HK", "zh"]
+CONFIDENCES = [0.3, 0.59, 0.6, 0.75, 0.8, 0.95, 1.0]
+
+
+def build_corpus(mapper: EmotionMapper, size: int, seed: int) -> List[Dict[str, Any]]:
+    """Responses mixing trigger and sentiment keywords, across every call state"""
+    rng = random.Random(seed)
+    keywords = [trigger for emotion in mapper.emotion_library.values() for trigger in emotion.triggers]
+    for tables in (mapper.positive_keywords, mapper.negative_keywords, mapper.neutral_keywords):
+        for table in tables.values():
+            keywords.extend(table)
+
+    agents = list(mapper.agent_tables) + ["unknown_agent"]
+    corpus = []
+    for index in range(size):
+        words = rng.sample(keywords, rng.randint(0, 6)) + rng.sample(FILLER, 2)
+        rng.shuffle(words)
+        corpus.append({
+            "agent_type": rng.choice(agents),
+            "response": f"{' '.join(words)} ({index})",
+            "urgency": rng.choice(URGENCIES),
+            "confidence": rng.choice(CONFIDENCES),
+            "language": rng.choice(LANGUAGES)
+        })
+    return corpus
+
+
+def reference_map(mapper: EmotionMapper, item: Dict[str, Any]) -> str:
+    """The per-candidate scoring loop the tables replace"""
+    candidates = mapper._get_agent_emotions(item["agent_type"])
+    if not candidates:
+        return "neutral"
+    scores = {
+        emotion.emotion_id: mapper._score_emotion(
+            emotion, item["response"], item["urgency"], item["confidence"], item["language"], None
+        )
+        for emotion in candidates
+    }
+    return max(scores.items(), key=lambda x: x[1])[0]
+
+
+def run(size: int, seed: int) -> int:
+    """Run the check and benchmark, returning the exit status."""
+    mapper = EmotionMapper()
+    corpus = build_corpus(mapper, size, seed)
+
+    expected = [reference_map(mapper, item) for item in corpus]
+    mapper.clear_cache()
+    single = [mapper.map_agent_to_emotion(**item) for item in corpus]
+    batch = mapper.map_batch(corpus)
+
+    mismatches = [
+        (item, want, got_single, got_batch)
+        for item, want, got_single, got_batch in zip(corpus, expected, single, batch)
+        if not want == got_single == got_batch
+    ]
+    for item, want, got_single, got_batch in mismatches[:10]:
+        print(f"MISMATCH {item}: reference {want}, single {got_single}, batch {got_batch}")
+
+    # Timings; responses are already analysed, so keyword scans hit the engine cache
+    reference_us, single_us = [], []
+    for item in corpus:
+        start = time.perf_counter()
+        reference_map(mapper, item)
+        reference_us.append((time.perf_counter() - start) * 1_000_000)
+    mapper.clear_cache()
+    for item in corpus:
+        start = time.perf_counter()
+        mapper.map_agent_to_emotion(**item)
+        single_us.append((time.perf_counter() - start) * 1_000_000)
+    start = time.perf_counter()
+    mapper.map_batch(corpus)
+    batch_us = (time.perf_counter() - start) * 1_000_000 / len(corpus)
+
+    print(f"Responses:            {len(corpus)}")
+    print(f"Matching reference:   {len(corpus) - len(mismatches)}/{len(corpus)}")
+    print(f"Reference scorer:     mean {statistics.mean(reference_us):.1f} µs")
+    print(f"Precomputed tables:   mean {statistics.mean(single_us):.1f} µs")
+    print(f"Batch (per response): {batch_us:.1f} µs")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Emotion mapper equivalence check and benchmark")
+    parser.add_argument("--responses", type=int, default=5000, help="Generated responses")
+    parser.add_argument("--seed", type=int, default=0, help="Corpus random seed")
+    args = parser.parse_args()
+    sys.exit(run(args.responses, args.seed))
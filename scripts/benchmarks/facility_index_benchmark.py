@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Healthcare AI V2 - Facility Spatial Index Benchmark
+Builds the nearest-facility index over a synthetic set of facilities spread
+across Hong Kong, checks k-nearest and within-radius answers (with type,
+emergency and open-now filters) against a linear haversine scan, and times
+both, plus incremental updates.
+
+Exits with status 1 when any query answers differently from the scan.
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+# Add project root to path for imports
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from src.data.storage.facility_index import (
+    HK_TIMEZONE, FacilityGeoIndex, haversine_km, minute_of_week, parse_operating_hours
+)
+
+
+# Hong Kong bounding box
+LAT_RANGE = (22.15, 22.56)
+LON_RANGE = (113.83, 114.44)
+
+FACILITY_TYPES = ["hospital", "clinic", "health_center", "emergency", "specialist", "dental", "mental_health"]
+HOURS = [
+    None,
+    "24 hours",
+    {"weekdays": "09:00-13:00, 14:00-17:00", "sat": "09:00-13:00", "sun": "closed"},
+    {"daily": "08:00-22:00"},
+    {"mon": "19:00-02:00", "tue": "19:00-02:00", "fri": "18:00-23:30"},
+]
+
+
+def build_facilities(count: int, seed: int) -> List[Dict[str, Any]]:
+    """Synthetic facility rows, clustered like urban Hong Kong"""
+    rng = random.Random(seed)
+    centers = [(22.28, 114.16), (22.32, 114.17), (22.38, 114.19), (22.37, 114.11), (22.45, 114.03), (22.50, 114.13)]
+    facilities = []
+    for index in range(count):
+        if rng.random() < 0.8:
+            lat, lon = rng.choice(centers)
+            lat, lon = rng.gauss(lat, 0.02), rng.gauss(lon, 0.02)
+        else:
+            lat, lon = rng.uniform(*LAT_RANGE), rng.uniform(*LON_RANGE)
+        facility_type = rng.choice(FACILITY_TYPES)
+        facilities.append({
+            "facility_id": f"F{index:05d}",
+            "name_en": f"Facility {index}",
+            "facility_type": facility_type,
+            "emergency_services": facility_type in ("hospital", "emergency") and rng.random() < 0.1,
+            "latitude": round(lat, 6),
+            "longitude": round(lon, 6),
+            "operating_hours": rng.choice(HOURS),
+            "is_active": True
+        })
+    return facilities
+
+
+def scan(
+    facilities: Dict[str, Dict[str, Any]],
+    schedules: Dict[str, Optional[List[Tuple[int, int]]]],
+    query: Dict[str, Any],
+    minute: int
+) -> List[Tuple[float, str]]:
+    """Linear reference: every facility passing the filters, by (distance, facility_id)"""
+    results = []
+    for facility_id, facility in facilities.items():
+        if query["facility_types"] and facility["facility_type"] not in query["facility_types"]:
+            continue
+        if query["emergency_only"] and not facility["emergency_services"]:
+            continue
+        if query["open_now"]:
+            schedule = schedules[facility_id]
+            if schedule is None:
+                if not facility["emergency_services"]:
+                    continue
+            elif not any(start <= minute < end for start, end in schedule):
+                continue
+        distance = haversine_km(query["latitude"], query["longitude"], facility["latitude"], facility["longitude"])
+        results.append((distance, facility["facility_id"]))
+    results.sort()
+    return results
+
+
+def build_queries(count: int, seed: int) -> List[Dict[str, Any]]:
+    rng = random.Random(seed + 1)
+    queries = []
+    for _ in range(count):
+        kind = rng.random()
+        queries.append({
+            "latitude": rng.uniform(*LAT_RANGE),
+            "longitude": rng.uniform(*LON_RANGE),
+            "k": rng.choice([1, 3, 5, 10]),
+            "radius_km": rng.choice([0.5, 1.0, 2.0, 5.0]),
+            "facility_types": rng.choice([None, None, ["clinic"], ["hospital", "emergency"]]),
+            "emergency_only": kind < 0.3,
+            "open_now": 0.2 < kind < 0.6
+        })
+    return queries
+
+
+def run(count: int, queries_count: int, seed: int) -> int:
+    """Run the check and benchmark, returning the exit status."""
+    facilities = build_facilities(count, seed)
+    index = FacilityGeoIndex()
+    started = time.perf_counter()
+    index.build(facilities)
+    build_ms = (time.perf_counter() - started) * 1000
+
+    # Incremental updates: move, close and reopen a sample of facilities
+    rng = random.Random(seed + 2)
+    by_id = {facility["facility_id"]: facility for facility in facilities}
+    updates = []
+    for facility in rng.sample(facilities, 200):
+        changed = {**facility, "latitude": facility["latitude"] + rng.uniform(-0.01, 0.01)}
+        if rng.random() < 0.2:
+            changed["is_active"] = False
+        updates.append(changed)
+    started = time.perf_counter()
+    index.upsert_many(updates)
+    update_us = (time.perf_counter() - started) * 1_000_000 / len(updates)
+    for changed in updates:
+        if changed["is_active"]:
+            by_id[changed["facility_id"]] = changed
+        else:
+            del by_id[changed["facility_id"]]
+
+    now = datetime(2026, 10, 19, 21, 30, tzinfo=HK_TIMEZONE) + timedelta(minutes=rng.randint(0, 7 * 24 * 60))
+    minute = minute_of_week(now)
+    schedules = {facility_id: parse_operating_hours(row["operating_hours"]) for facility_id, row in by_id.items()}
+    queries = build_queries(queries_count, seed)
+    mismatches = 0
+    scan_us, nearest_us, radius_us = [], [], []
+    for query in queries:
+        filters = {
+            "facility_types": query["facility_types"],
+            "emergency_only": query["emergency_only"],
+            "open_now": query["open_now"],
+            "now": now
+        }
+        started = time.perf_counter()
+        expected = scan(by_id, schedules, query, minute)
+        scan_us.append((time.perf_counter() - started) * 1_000_000)
+
+        started = time.perf_counter()
+        nearest = index.nearest(query["latitude"], query["longitude"], k=query["k"], **filters)
+        nearest_us.append((time.perf_counter() - started) * 1_000_000)
+        started = time.perf_counter()
+        within = index.within_radius(query["latitude"], query["longitude"], query["radius_km"], **filters)
+        radius_us.append((time.perf_counter() - started) * 1_000_000)
+
+        want_nearest = [facility_id for _, facility_id in expected[:query["k"]]]
+        want_within = [facility_id for distance, facility_id in expected if distance <= query["radius_km"]]
+        got_nearest = [record["facility_id"] for _, record in nearest]
+        got_within = [record["facility_id"] for _, record in within]
+        if got_nearest != want_nearest or got_within != want_within:
+            mismatches += 1
+            if mismatches <= 5:
+                print(f"MISMATCH {query}: nearest {got_nearest} vs {want_nearest}, "
+                      f"within {len(got_within)} vs {len(want_within)}")
+
+    stats = index.get_stats()
+    print(f"Facilities:           {len(by_id)} indexed in {stats['occupied_cells']} cells (build {build_ms:.0f} ms)")
+    print(f"Incremental upsert:   {update_us:.1f} µs per row")
+    print(f"Queries:              {len(queries)} at {now:%a %H:%M}")
+    print(f"Matching linear scan: {len(queries) - mismatches}/{len(queries)}")
+    print(f"Linear scan:          mean {statistics.mean(scan_us):.0f} µs")
+    print(f"k-nearest:            mean {statistics.mean(nearest_us):.0f} µs, "
+          f"p99 {statistics.quantiles(nearest_us, n=100)[98]:.0f} µs")
+    print(f"Within radius:        mean {statistics.mean(radius_us):.0f} µs, "
+          f"p99 {statistics.quantiles(radius_us, n=100)[98]:.0f} µs")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Facility spatial index check and benchmark")
+    parser.add_argument("--facilities", type=int, default=10_000, help="Synthetic facilities")
+    parser.add_argument("--queries", type=int, default=2000, help="Random queries")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+    sys.exit(run(args.facilities, args.queries, args.seed))
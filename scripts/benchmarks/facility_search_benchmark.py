@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Healthcare AI V2 - Facility Search Index Benchmark
+Builds the bilingual facility search index over a synthetic catalogue,
+checks that every query returns the same facilities as a reference scan with
+the same matching rules (English word prefixes, Chinese substrings, type /
+district / service / emergency filters), and times the index against that
+scan and against the old substring loop.
+
+Exits with status 1 when any query answers differently from the scan.
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+# Add project root to path for imports
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from src.data.storage.facility_search import CJK_PATTERN, FacilitySearchIndex, word_tokens
+
+
+DISTRICTS = [
+    ("Central and Western", "中西區"), ("Wan Chai", "灣仔"), ("Eastern", "東區"), ("Southern", "南區"),
+    ("Yau Tsim Mong", "油尖旺"), ("Sham Shui Po", "深水埗"), ("Kowloon City", "九龍城"),
+    ("Wong Tai Sin", "黃大仙"), ("Kwun Tong", "觀塘"), ("Sha Tin", "沙田"), ("Tai Po", "大埔"),
+    ("Tuen Mun", "屯門"), ("Yuen Long", "元朗"), ("Tsuen Wan", "荃灣"), ("Sai Kung", "西貢"),
+]
+KINDS = [
+    ("hospital", "Hospital", "醫院"), ("clinic", "Clinic", "診所"), ("health_center", "Health Centre", "健康中心"),
+    ("specialist", "Specialist Clinic", "專科診所"), ("dental", "Dental Clinic", "牙科診所"),
+    ("mental_health", "Mental Health Centre", "精神健康中心"),
+]
+NAMES = [
+    ("Queen Mary", "瑪麗"), ("Prince of Wales", "威爾斯親王"), ("Tung Wah", "東華"), ("Kwong Wah", "廣華"),
+    ("Caritas", "明愛"), ("Yan Chai", "仁濟"), ("Pok Oi", "博愛"), ("United Christian", "基督教聯合"),
+    ("St. Paul", "聖保祿"), ("Baptist", "浸信會"), ("Evangel", "播道"), ("Union", "仁安"),
+]
+SERVICES = ["emergency", "general_outpatient", "maternity", "paediatrics", "dental", "physiotherapy",
+            "vaccination", "counselling", "x-ray", "orthopaedics"]
+
+
+def build_catalogue(count: int, seed: int) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    facilities = []
+    for index in range(count):
+        district_en, district_zh = rng.choice(DISTRICTS)
+        facility_type, kind_en, kind_zh = rng.choice(KINDS)
+        name_en, name_zh = rng.choice(NAMES)
+        facilities.append({
+            "facility_id": f"F{index:05d}",
+            "name_en": f"{name_en} {district_en} {kind_en} {index}",
+            "name_zh_hant": f"{name_zh}{district_zh}{kind_zh}",
+            "facility_type": facility_type,
+            "district": district_en,
+            "services_offered": rng.sample(SERVICES, rng.randint(1, 4)),
+            "emergency_services": facility_type == "hospital" and rng.random() < 0.3,
+            "is_active": True
+        })
+    return facilities
+
+
+def build_queries(catalogue: List[Dict[str, Any]], count: int, seed: int) -> List[Dict[str, Any]]:
+    rng = random.Random(seed + 1)
+    queries = []
+    for _ in range(count):
+        facility = rng.choice(catalogue)
+        text_kind = rng.random()
+        if text_kind < 0.3:
+            words = facility["name_en"].split()
+            query = " ".join(rng.sample(words[:-1], min(2, len(words) - 1)))
+        elif text_kind < 0.5:
+            query = rng.choice(word_tokens(facility["name_en"]))[:rng.randint(3, 6)]
+        elif text_kind < 0.75:
+            zh = facility["name_zh_hant"]
+            start = rng.randrange(len(zh) - 1)
+            query = zh[start:start + rng.randint(1, 4)]
+        elif text_kind < 0.85:
+            query = rng.choice(SERVICES)
+        else:
+            query = None
+        queries.append({
+            "query": query,
+            "facility_type": rng.choice([None, None, None, facility["facility_type"]]),
+            "district": rng.choice([None, None, facility["district"]]),
+            "services": rng.choice([None, None, None, facility["services_offered"][:1]]),
+            "has_emergency": rng.choice([None, None, None, True, False]),
+            "limit": rng.choice([10, 50])
+        })
+    return queries
+
+
+def reference_matches(facility: Dict[str, Any], query: Dict[str, Any]) -> bool:
+    """Same matching rules as the index, evaluated row by row"""
+    if query["facility_type"] and facility["facility_type"] != query["facility_type"]:
+        return False
+    if query["district"] and facility["district"].lower() != query["district"].lower():
+        return False
+    offered = {service.lower() for service in facility["services_offered"]}
+    if query["services"] and not all(service.lower() in offered for service in query["services"]):
+        return False
+    if query["has_emergency"] is not None and facility["emergency_services"] != query["has_emergency"]:
+        return False
+    fields = [facility["name_en"], facility["name_zh_hant"], facility["district"], *facility["services_offered"]]
+    tokens = {token for field in fields for token in word_tokens(field)}
+    text = "\n".join(fields)
+    for word in word_tokens(query["query"] or ""):
+        if not any(token.startswith(word) for token in tokens):
+            return False
+    return all(run in text for run in CJK_PATTERN.findall(query["query"] or ""))
+
+
+def substring_scan(catalogue: List[Dict[str, Any]], text: str) -> List[Dict[str, Any]]:
+    """The loop search_facilities used to run"""
+    text_lower = text.lower()
+    return [
+        f for f in catalogue
+        if text_lower in f.get("name_en", "").lower()
+        or text_lower in f.get("name_zh_hant", "")
+        or text_lower in f.get("district", "").lower()
+    ]
+
+
+def run(count: int, queries_count: int, seed: int) -> int:
+    """Run the check and benchmark, returning the exit status."""
+    catalogue = build_catalogue(count, seed)
+    index = FacilitySearchIndex()
+    started = time.perf_counter()
+    index.build(catalogue)
+    build_ms = (time.perf_counter() - started) * 1000
+
+    queries = build_queries(catalogue, queries_count, seed)
+    mismatches = 0
+    index_us, reference_us, substring_us, result_sizes = [], [], [], []
+    for query in queries:
+        started = time.perf_counter()
+        found = index.search(**query)
+        index_us.append((time.perf_counter() - started) * 1_000_000)
+
+        started = time.perf_counter()
+        expected = {f["facility_id"] for f in catalogue if reference_matches(f, query)}
+        reference_us.append((time.perf_counter() - started) * 1_000_000)
+        if query["query"]:
+            started = time.perf_counter()
+            substring_scan(catalogue, query["query"])
+            substring_us.append((time.perf_counter() - started) * 1_000_000)
+
+        got = [f["facility_id"] for f in found]
+        result_sizes.append(len(expected))
+        # Ranking only decides which matches make the cut, so compare membership and count
+        if len(set(got)) != len(got) or not set(got) <= expected or len(got) != min(len(expected), query["limit"]):
+            mismatches += 1
+            if mismatches <= 5:
+                print(f"MISMATCH {query}: got {len(got)}, expected {len(expected)} matches")
+
+    stats = index.get_stats()
+    print(f"Facilities:            {stats['facilities']} ({stats['terms']} terms, build {build_ms:.0f} ms)")
+    print(f"Queries:               {len(queries)} (median {statistics.median(result_sizes):.0f} matches)")
+    print(f"Matching reference:    {len(queries) - mismatches}/{len(queries)}")
+    print(f"Reference scan:        mean {statistics.mean(reference_us):.0f} µs")
+    print(f"Old substring loop:    mean {statistics.mean(substring_us):.0f} µs")
+    print(f"Index:                 mean {statistics.mean(index_us):.0f} µs, "
+          f"p99 {statistics.quantiles(index_us, n=100)[98]:.0f} µs")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Facility search index check and benchmark")
+    parser.add_argument("--facilities", type=int, default=10_000, help="Synthetic facilities")
+    parser.add_argument("--queries", type=int, default=1000, help="Random queries")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+    sys.exit(run(args.facilities, args.queries, args.seed))
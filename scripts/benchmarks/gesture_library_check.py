@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Healthcare AI V2 - Gesture Library Index Check
+Checks the indexed GestureLibrary lookups against the linear scans they
+replaced on a randomized corpus: candidate selection, the trigger and
+Cantonese match counts used for scoring, gestures by agent, and Cantonese
+phrase search, then compares their speed.
+
+search_gestures_by_cantonese now matches expression words; the old scan
+matched any single character of an expression. Phrase search is checked
+against a word-level linear scan, and the number of phrases the old
+character-level scan answered differently is reported for information.
+
+Exits with status 1 when any lookup differs from its reference.
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+# Add project root to path for imports
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from src.agents.gesture_library import CulturalContext, GestureLibrary, GestureMapping
+
+
+FILLER = [
+    "please", "today", "thank you", "我哋", "慢慢嚟", "the", "doctor", "多謝",
+    "HELP", "Stress", "好", "係", "唔該",
+]
+
+URGENCIES = ["emergency", "high", "medium", "low", "critical", ""]
+AGE_GROUPS = [None, "child", "teen", "adult", "elderly", "unknown"]
+
+
+def build_corpus(library: GestureLibrary, size: int, seed: int) -> List[Dict[str, Any]]:
+    """Contexts mixing trigger contexts, expression words and filler, across every criterion"""
+    rng = random.Random(seed)
+    gestures = list(library.gesture_library.values())
+    keywords = sorted({trigger for g in gestures for trigger in g.trigger_contexts})
+    words = sorted({word for g in gestures for expr in g.cantonese_expressions for word in expr.split()})
+    agents = sorted({agent for g in gestures for agent in g.agent_types}) + ["unknown_agent"]
+    cultures = [context.value for context in CulturalContext] + ["unknown"]
+
+    corpus = []
+    for index in range(size):
+        parts = (
+            rng.sample(keywords, rng.randint(0, 3))
+            + rng.sample(words, rng.randint(0, 3))
+            + rng.sample(FILLER, rng.randint(0, 3))
+        )
+        rng.shuffle(parts)
+        if rng.random() < 0.3:
+            parts = [part.upper() for part in parts]
+        corpus.append({
+            "agent_type": rng.choice(agents),
+            "context": f"{' '.join(parts)} ({index})",
+            "urgency": rng.choice(URGENCIES),
+            "user_age_group": rng.choice(AGE_GROUPS),
+            "cultural_preference": rng.choice(cultures)
+        })
+    return corpus
+
+
+def reference_candidates(library: GestureLibrary, item: Dict[str, Any]) -> List[str]:
+    """The linear candidate scan the indexes replace"""
+    context_lower = item["context"].lower()
+    candidates = []
+    for gesture in library.gesture_library.values():
+        if item["agent_type"] not in gesture.agent_types:
+            continue
+        if item["cultural_preference"] not in [ctx.value for ctx in gesture.cultural_context]:
+            continue
+        if (
+            any(trigger in context_lower for trigger in gesture.trigger_contexts)
+            and library._is_urgency_appropriate(gesture, item["urgency"])
+            and library._is_age_appropriate(gesture, item["user_age_group"])
+        ):
+            candidates.append(gesture.gesture_id)
+    return candidates
+
+
+def reference_match_counts(gesture: GestureMapping, context: str) -> Tuple[int, int]:
+    """Trigger and Cantonese expression matches as the old scorer counted them"""
+    context_lower = context.lower()
+    triggers = sum(1 for trigger in gesture.trigger_contexts if trigger in context_lower)
+    expressions = sum(
+        1 for expr in gesture.cantonese_expressions
+        if any(word in context_lower for word in expr.split())
+    )
+    return triggers, expressions
+
+
+def indexed_match_counts(library: GestureLibrary, gesture: GestureMapping, context: str) -> Tuple[int, int]:
+    """The same counts from the keyword engine's matched set, as the scorer now computes them"""
+    matched = library._matched_keywords(context)
+    triggers = sum(1 for trigger in gesture.trigger_contexts if trigger in matched)
+    expressions = sum(
+        1 for words in library._expression_words[gesture.gesture_id]
+        if any(word in matched for word in words)
+    )
+    return triggers, expressions
+
+
+def reference_phrase_search(library: GestureLibrary, text: str, by_character: bool = False) -> List[str]:
+    """Linear Cantonese phrase search, by expression word or (old behaviour) by character"""
+    text_lower = text.lower()
+    results = []
+    for gesture in library.gesture_library.values():
+        for expression in gesture.cantonese_expressions:
+            tokens = expression if by_character else expression.split()
+            if any(token in text_lower for token in tokens):
+                results.append(gesture.gesture_id)
+                break
+    return results
+
+
+def timed(fn, items) -> float:
+    """Mean call time in microseconds"""
+    samples = []
+    for item in items:
+        start = time.perf_counter()
+        fn(item)
+        samples.append((time.perf_counter() - start) * 1_000_000)
+    return statistics.mean(samples)
+
+
+def run(size: int, seed: int) -> int:
+    """Run the check and benchmark, returning the exit status."""
+    library = GestureLibrary()
+    corpus = build_corpus(library, size, seed)
+    gestures = list(library.gesture_library.values())
+    mismatches: List[Tuple[str, Any, Any, Any]] = []
+
+    for item in corpus:
+        want = reference_candidates(library, item)
+        got = [gesture.gesture_id for gesture in library._get_candidate_gestures(**item)]
+        if want != got:
+            mismatches.append(("candidates", item, want, got))
+
+        for gesture in gestures:
+            want_counts = reference_match_counts(gesture, item["context"])
+            got_counts = indexed_match_counts(library, gesture, item["context"])
+            if want_counts != got_counts:
+                mismatches.append(("match counts", (gesture.gesture_id, item["context"]), want_counts, got_counts))
+
+        want = reference_phrase_search(library, item["context"])
+        got = library.search_gestures_by_cantonese(item["context"])
+        if want != got:
+            mismatches.append(("phrase search", item["context"], want, got))
+
+    for agent_type in sorted({agent for g in gestures for agent in g.agent_types}) + ["unknown_agent"]:
+        want = [g.gesture_id for g in gestures if agent_type in g.agent_types]
+        got = [g.gesture_id for g in library.get_gestures_by_agent(agent_type)]
+        if want != got:
+            mismatches.append(("by agent", agent_type, want, got))
+
+    for kind, key, want, got in mismatches[:10]:
+        print(f"MISMATCH {kind} {key}: reference {want}, indexed {got}")
+
+    character_changes = sum(
+        1 for item in corpus
+        if reference_phrase_search(library, item["context"], by_character=True)
+        != library.search_gestures_by_cantonese(item["context"])
+    )
+
+    reference_us = timed(lambda item: reference_candidates(library, item), corpus)
+    indexed_us = timed(lambda item: library._get_candidate_gestures(**item), corpus)
+
+    print(f"Contexts:                      {len(corpus)}")
+    print(f"Mismatches:                    {len(mismatches)}")
+    print(f"Phrase results changed by word matching (was per character): {character_changes}/{len(corpus)}")
+    print(f"Linear candidate scan:         mean {reference_us:.1f} µs")
+    print(f"Indexed candidates:            mean {indexed_us:.1f} µs")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gesture library index equivalence check and benchmark")
+    parser.add_argument("--contexts", type=int, default=20000, help="Generated contexts")
+    parser.add_argument("--seed", type=int, default=0, help="Corpus random seed")
+    args = parser.parse_args()
+    sys.exit(run(args.contexts, args.seed))
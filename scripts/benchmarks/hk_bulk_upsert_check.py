@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Healthcare AI V2 - HK Facility Bulk Upsert Check
+Runs the database HKDataRepository's bulk_upsert_facilities and
+store_data_updates against the PostgreSQL database in TEST_DATABASE_URL, on a
+sync and on an async session, and checks:
+
+- New facilities are inserted, each with one change row holding the record
+- Sending the same rows again writes nothing (content hash skip)
+- Changed fields are updated and get one HKHealthcareUpdate row each
+- Columns left out of a row keep their stored value
+- store_data_updates stores every update and resolves facility codes
+
+The facility and update tables are created if missing; the check deletes its
+own rows afterwards. Without TEST_DATABASE_URL the check is skipped (exit
+status 0). Exits with status 1 when a check fails.
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from sqlalchemy import create_engine, delete, func, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import Session
+
+# Add project root to path for imports
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from src.config import settings
+from src.database.models_hk_data import Base, HKDataRecord, HKHealthcareFacility, HKHealthcareUpdate, UpdateType
+from src.database.repositories.hk_data_repository import HKDataRepository
+
+
+FACILITIES = HKHealthcareFacility.__table__
+UPDATES = HKHealthcareUpdate.__table__
+
+
+def facility_rows(prefix: str, count: int) -> List[Dict[str, Any]]:
+    return [
+        {
+            "facility_id": f"{prefix}-{index:05d}",
+            "name_en": f"Check Clinic {index}",
+            "name_zh_hant": f"測試診所{index}",
+            "facility_type": "clinic",
+            "district": "Wan Chai",
+            "latitude": 22.27 + index / 100000,
+            "longitude": 114.17 + index / 100000,
+            "services_offered": ["general_outpatient", "vaccination"],
+            "waiting_time_info": {"minutes": 30},
+            "phone_main": "2000 0000",
+            "is_active": True
+        }
+        for index in range(count)
+    ]
+
+
+async def check_session(repository: HKDataRepository, count: int, batch_size: int) -> List[Tuple[str, bool, str]]:
+    """Run every check on the repository's session; the rows written are deleted afterwards"""
+    prefix = f"CHK{uuid.uuid4().hex[:8]}"
+    source = f"{prefix}-check"
+    rows = facility_rows(prefix, count)
+    checks: List[Tuple[str, bool, str]] = []
+
+    async def change_rows() -> List[Tuple[Any, ...]]:
+        result = await repository._execute(
+            select(UPDATES.c.field_name, UPDATES.c.update_type, UPDATES.c.old_value, UPDATES.c.new_value)
+            .where(UPDATES.c.data_source == source)
+            .order_by(UPDATES.c.id)
+        )
+        return [tuple(row) for row in result.all()]
+
+    async def upsert(facilities: List[Dict[str, Any]]) -> Tuple[Dict[str, int], float]:
+        started = time.perf_counter()
+        counts = await repository.bulk_upsert_facilities(facilities, data_source=source, batch_size=batch_size)
+        return counts, (time.perf_counter() - started) * 1000
+
+    try:
+        # 1. Inserts: one change row holding the whole record per facility
+        counts, elapsed_ms = await upsert(rows)
+        result = await repository._execute(
+            select(func.count()).select_from(FACILITIES).where(FACILITIES.c.facility_id.like(f"{prefix}-%"))
+        )
+        stored = result.scalar()
+        changes = await change_rows()
+        checks.append(("inserts", counts == {"inserted": count, "updated": 0, "unchanged": 0, "changes": count}
+                       and stored == count and [change[0] for change in changes] == ["facility"] * count,
+                       f"{counts['inserted']} inserted, {stored} stored in {elapsed_ms:.0f}ms "
+                       f"({count / elapsed_ms * 1000:.0f} rows/s)"))
+
+        # 2. The same rows again are skipped by content hash
+        counts, elapsed_ms = await upsert(rows)
+        checks.append(("hash skip", counts == {"inserted": 0, "updated": 0, "unchanged": count, "changes": 0}
+                       and len(await change_rows()) == count,
+                       f"{counts['unchanged']} unchanged in {elapsed_ms:.0f}ms "
+                       f"({count / elapsed_ms * 1000:.0f} rows/s)"))
+
+        # 3. Two edited fields on ten facilities: two change rows each
+        edited = [{**row, "waiting_time_info": {"minutes": 90}, "phone_main": "2999 9999"} for row in rows[:10]]
+        counts, _ = await upsert(edited)
+        field_changes = (await change_rows())[count:]
+        expected = sorted([
+            ("phone_main", UpdateType.STATUS.value, "2000 0000", "2999 9999"),
+            ("waiting_time_info", UpdateType.WAITING_TIME.value, '{"minutes": 30}', '{"minutes": 90}')
+        ] * 10)
+        checks.append(("per-field change rows",
+                       counts == {"inserted": 0, "updated": 10, "unchanged": 0, "changes": 20}
+                       and sorted(field_changes) == expected,
+                       f"{counts['updated']} updated, {len(field_changes)} change rows"))
+
+        # 4. A partial row updates its columns only
+        counts, _ = await upsert([{"facility_id": rows[0]["facility_id"], "district": "Central"}])
+        result = await repository._execute(
+            select(FACILITIES.c.name_en, FACILITIES.c.district, FACILITIES.c.phone_main)
+            .where(FACILITIES.c.facility_id == rows[0]["facility_id"])
+        )
+        stored_row = tuple(result.one())
+        checks.append(("partial row", counts["updated"] == 1 and stored_row == ("Check Clinic 0", "Central", "2999 9999"),
+                       f"stored {stored_row}"))
+
+        # 5. store_data_updates resolves facility codes; unknown and missing codes store no facility
+        now = datetime.now(timezone.utc)
+        updates = [
+            HKDataRecord(f"{source}-updates", rows[1]["facility_id"], UpdateType.WAITING_TIME.value, {"minutes": 45}, now),
+            HKDataRecord(f"{source}-updates", f"{prefix}-missing", UpdateType.CAPACITY.value, {"beds": 3}, now),
+            HKDataRecord(f"{source}-updates", None, UpdateType.ENVIRONMENTAL.value, {"aqhi": 4}, now),
+        ]
+        stored = await repository.store_data_updates(updates, batch_size=2)
+        result = await repository._execute(
+            select(FACILITIES.c.id).where(FACILITIES.c.facility_id == rows[1]["facility_id"])
+        )
+        facility_key = result.scalar()
+        result = await repository._execute(
+            select(UPDATES.c.facility_id, UPDATES.c.new_value)
+            .where(UPDATES.c.data_source == f"{source}-updates")
+            .order_by(UPDATES.c.id)
+        )
+        written = [tuple(row) for row in result.all()]
+        checks.append(("store_data_updates", stored == 3 and written == [
+            (facility_key, '{"minutes": 45}'), (None, '{"beds": 3}'), (None, '{"aqhi": 4}')
+        ], f"{stored} stored, facilities {[facility_id for facility_id, _ in written]}"))
+
+    finally:
+        await repository._rollback()
+        await repository._execute(delete(UPDATES).where(UPDATES.c.data_source.in_([source, f"{source}-updates"])))
+        await repository._execute(delete(FACILITIES).where(FACILITIES.c.facility_id.like(f"{prefix}-%")))
+        await repository._commit()
+    return checks
+
+
+async def run(database_url: str, count: int, batch_size: int) -> int:
+    """Run the checks on a sync and an async session and return the exit status."""
+    url = make_url(database_url)
+    sync_engine = create_engine(url.set(drivername="postgresql+psycopg2"))
+    async_engine = create_async_engine(url.set(drivername="postgresql+asyncpg"))
+    Base.metadata.create_all(sync_engine, tables=[FACILITIES, UPDATES])
+
+    checks: List[Tuple[str, bool, str]] = []
+    try:
+        with Session(sync_engine) as session:
+            for name, passed, detail in await check_session(HKDataRepository(session), count, batch_size):
+                checks.append((f"sync {name}", passed, detail))
+        async with AsyncSession(async_engine) as session:
+            for name, passed, detail in await check_session(HKDataRepository(session), count, batch_size):
+                checks.append((f"async {name}", passed, detail))
+    finally:
+        await async_engine.dispose()
+        sync_engine.dispose()
+
+    status = 0
+    for name, passed, detail in checks:
+        print(f"{'OK  ' if passed else 'FAIL'} {name:<28} {detail}")
+        status |= 0 if passed else 1
+    return status
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="HK facility bulk upsert check on a PostgreSQL test database")
+    parser.add_argument("--facilities", type=int, default=2000, help="Facilities upserted per session")
+    parser.add_argument("--batch-size", type=int, default=500, help="Facilities per transaction")
+    args = parser.parse_args()
+    if not settings.test_database_url:
+        print("SKIP TEST_DATABASE_URL is not set")
+        sys.exit(0)
+    sys.exit(asyncio.run(run(settings.test_database_url, args.facilities, args.batch_size)))
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Healthcare AI V2 - HK Data Ingestion Check
+Runs the HK open-data ingestion engine against local fixture HTTP servers
+and checks:
+
+- First run: every feed is streamed, parsed and published, clinic rows reach
+  the facility search index
+- Second run: ETag and Last-Modified feeds answer 304, a feed without
+  validators is recognized as unchanged by its content hash
+- An edited feed publishes only the changed and removed records
+- Feeds are fetched concurrently, each paced to its request budget, and
+  parsing, diffing and publishing a large feed never stalls the event loop
+- Failing feeds are retried, then reported; every run reaches the status
+  recorder
+- Large bodies with quoted multi-line CSV fields and Chinese text survive
+  small network chunks
+
+No network access is needed. Exits with status 1 when a check fails.
+"""
+
+import argparse
+import asyncio
+import csv
+import gc
+import hashlib
+import io
+import json
+import sys
+import time
+from email.utils import formatdate
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from aiohttp import web
+
+# Add project root to path for imports
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from src.data.ingestion import IngestionEngine
+from src.data.sources.hk_open_data import (
+    AEWaitingTimesSource, AirQualitySource, ClinicListingSource, HealthAdvisorySource
+)
+from src.data.storage.facility_index import FacilityGeoIndex
+from src.data.storage.facility_search import FacilitySearchIndex
+from src.data.storage.hk_data_repository import HKDataRepository
+
+
+class Feed:
+    """One fixture feed: a body, its validator mode and scripted behaviour"""
+
+    def __init__(self, body: bytes, validators: str, latency_ms: float = 0.0, write_size: int = 4096):
+        self.body = body
+        self.validators = validators  # "etag", "last_modified" or "none"
+        self.latency_ms = latency_ms
+        self.write_size = write_size
+        self.failures_left = 0  # Answer this many requests with 500
+        self.modified = formatdate(time.time() - 60, usegmt=True)
+        self.requests: List[Tuple[float, Dict[str, str]]] = []
+
+    def set_body(self, body: bytes):
+        self.body = body
+        self.modified = formatdate(time.time(), usegmt=True)
+
+    @property
+    def etag(self) -> str:
+        return f'"{hashlib.md5(self.body).hexdigest()}"'
+
+
+class FixtureServer:
+    """Local HTTP server serving the feeds with conditional request support"""
+
+    def __init__(self, feeds: Dict[str, Feed]):
+        self.feeds = feeds
+        self.runner: Optional[web.AppRunner] = None
+        self.url = ""
+
+    async def handle(self, request: web.Request) -> web.StreamResponse:
+        feed = self.feeds[request.match_info["name"]]
+        feed.requests.append((time.monotonic(), dict(request.headers)))
+        await asyncio.sleep(feed.latency_ms / 1000.0)
+        if feed.failures_left > 0:
+            feed.failures_left -= 1
+            return web.Response(status=500, text="upstream failure")
+
+        headers = {}
+        if feed.validators == "etag":
+            headers["ETag"] = feed.etag
+            if request.headers.get("If-None-Match") == feed.etag:
+                return web.Response(status=304, headers=headers)
+        elif feed.validators == "last_modified":
+            headers["Last-Modified"] = feed.modified
+            if request.headers.get("If-Modified-Since") == feed.modified:
+                return web.Response(status=304, headers=headers)
+
+        response = web.StreamResponse(headers=headers)
+        await response.prepare(request)
+        for start in range(0, len(feed.body), feed.write_size):
+            await response.write(feed.body[start:start + feed.write_size])
+        await response.write_eof()
+        return response
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/{name}", self.handle)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}"
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+
+class LoopLagMonitor:
+    """Largest delay of a periodic event-loop tick past its due time"""
+
+    def __init__(self, interval_ms: float = 5.0):
+        self.interval = interval_ms / 1000.0
+        self.max_lag_ms = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    async def _tick(self):
+        while True:
+            due = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            self.max_lag_ms = max(self.max_lag_ms, (time.perf_counter() - due) * 1000)
+
+    def start(self):
+        self.max_lag_ms = 0.0
+        self._task = asyncio.create_task(self._tick())
+
+    async def stop(self):
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+
+
+def ae_body(hospitals: int, waits: Dict[int, str]) -> bytes:
+    return json.dumps({
+        "waitTime": [
+            {"hospName": f"Hospital {index}", "topWait": waits.get(index, "Over 1 hour")}
+            for index in range(hospitals)
+        ],
+        "updateTime": "19/10/2026 9:15am"
+    }).encode()
+
+
+def clinics_body(count: int, skip: Tuple[int, ...] = (), renamed: Tuple[int, ...] = ()) -> bytes:
+    """Clinic CSV with BOM, quoted multi-line notes and Chinese names"""
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(["facility_id", "name_en", "name_zh_hant", "district", "lat", "lng", "services", "notes"])
+    for index in range(count):
+        if index in skip:
+            continue
+        name = f"Renamed Clinic {index}" if index in renamed else f"Harbour Clinic {index}"
+        writer.writerow([
+            f"C{index:05d}", name, f"海港診所{index}", "Wan Chai",
+            22.27 + (index % 100) / 10000, 114.17 + (index // 100) / 10000,
+            "general_outpatient;vaccination", f'Line one, "quoted"\nline two {index}'
+        ])
+    return ("﻿" + output.getvalue()).encode("utf-8")
+
+
+def advisories_body(count: int) -> bytes:
+    return json.dumps({
+        "generated": "2026-10-19",
+        "advisories": [
+            {"alert_id": f"A{index}", "title_en": f"Advisory {index}", "title_zh": "衞生警告", "severity": "High",
+             "affected_districts": ["Sha Tin"], "details": {"nested": [1, {"deep": "]}"}]}}
+            for index in range(count)
+        ]
+    }, ensure_ascii=False).encode("utf-8")
+
+
+def air_quality_body(stations: int) -> bytes:
+    return json.dumps([
+        {"station": f"Station {index}", "aqhi": 3 + index % 5, "health_risk": "Low"}
+        for index in range(stations)
+    ]).encode()
+
+
+async def run(clinics: int, latency_ms: float, chunk_size: int, max_lag_ms: float) -> int:
+    """Run every check and return the exit status."""
+    feeds = {
+        "ae": Feed(ae_body(18, {}), "etag", latency_ms),
+        "clinics": Feed(clinics_body(clinics), "last_modified", latency_ms, write_size=997),
+        "advisories": Feed(advisories_body(40), "none", latency_ms, write_size=333),
+        "aqhi": Feed(air_quality_body(18), "etag", latency_ms),
+    }
+    server = FixtureServer(feeds)
+    await server.start()
+
+    recorded: List[Tuple[str, bool, Optional[int], Optional[str]]] = []
+
+    async def recorder(source_name, is_success, response_time_ms=None, error=None):
+        recorded.append((source_name, is_success, response_time_ms, error))
+
+    repository = HKDataRepository(index=FacilityGeoIndex(), search_index=FacilitySearchIndex())
+    sources = [
+        # The production budgets (2-6 a minute) would pace the repeated runs 10-30s apart
+        AEWaitingTimesSource(f"{server.url}/ae", requests_per_minute=120),
+        ClinicListingSource(f"{server.url}/clinics", requests_per_minute=120),
+        HealthAdvisorySource(f"{server.url}/advisories", requests_per_minute=120),
+        AirQualitySource(f"{server.url}/aqhi", requests_per_minute=120),
+    ]
+    engine = IngestionEngine(
+        sources, repository=repository, status_recorder=recorder,
+        max_concurrency=4, retry_attempts=3, retry_backoff_seconds=0.05, chunk_size=chunk_size
+    )
+    checks: List[Tuple[str, bool, str]] = []
+    # Keep the imported modules and fixture bodies out of the collector, so a
+    # full collection over them is not counted as a stall of the engine
+    gc.freeze()
+
+    try:
+        # 1. First run loads everything, concurrently
+        monitor = LoopLagMonitor()
+        monitor.start()
+        started = time.perf_counter()
+        runs = await engine.run()
+        wall_ms = (time.perf_counter() - started) * 1000
+        await monitor.stop()
+        feed_ms = sum(run.duration_ms for run in runs.values())
+        counts = {name: run.records for name, run in runs.items()}
+        expected = {"ae_waiting_times": 18, "clinics": clinics, "health_advisories": 40, "air_quality": 18}
+        found = await repository.search_facilities(query="海港診所", district="Wan Chai", limit=clinics)
+        checks.append(("first run parsed", counts == expected and all(r.status == "updated" for r in runs.values()),
+                       f"records {counts}"))
+        checks.append(("clinics indexed", len(found) == clinics and "C00007" in repository.facility_index.entries,
+                       f"{len(found)} search hits, {len(repository.facility_index.entries)} facilities near-searchable"))
+        clinic = repository.data_cache["clinics"]["records"][1]
+        checks.append(("multi-line CSV fields", clinic["name_zh_hant"] == "海港診所1" and
+                       repository.data_cache["ae_waiting_times"]["records"][0]["wait_minutes"] == 60,
+                       f"clinic {clinic['facility_id']} {clinic['name_zh_hant']}"))
+        # Sequential fetches would take the sum of the per-feed times
+        checks.append(("concurrent fetch", wall_ms < 0.75 * feed_ms,
+                       f"{wall_ms:.0f}ms wall for {feed_ms:.0f}ms of per-feed time "
+                       f"(4 feeds at {latency_ms:.0f}ms latency)"))
+        checks.append(("event loop responsive", monitor.max_lag_ms < max_lag_ms,
+                       f"longest stall {monitor.max_lag_ms:.0f}ms (limit {max_lag_ms:.0f}ms)"))
+
+        # 2. Nothing changed: conditional requests and content hash
+        runs = await engine.run()
+        statuses = {name: run.status for name, run in runs.items()}
+        checks.append(("conditional requests", statuses == {
+            "ae_waiting_times": "not_modified", "clinics": "not_modified",
+            "health_advisories": "unchanged", "air_quality": "not_modified"
+        } and feeds["clinics"].requests[-1][1].get("If-Modified-Since") == feeds["clinics"].modified,
+            f"statuses {statuses}"))
+
+        # 3. Edits publish only what changed
+        feeds["clinics"].set_body(clinics_body(clinics, skip=(3,), renamed=(5,)))
+        feeds["ae"].body = ae_body(18, {2: "Over 3 hours"})
+        runs = await engine.run(["clinics", "ae_waiting_times"])
+        clinic_run, ae_run = runs["clinics"], runs["ae_waiting_times"]
+        renamed = await repository.search_facilities(query="renamed", limit=5)
+        checks.append(("incremental publish",
+                       (clinic_run.changed, clinic_run.removed, ae_run.changed) == (1, 1, 1)
+                       and [f["facility_id"] for f in renamed] == ["C00005"]
+                       and "C00003" not in repository.facility_index.entries
+                       and "C00003" not in repository.search_index.by_facility_id,
+                       f"clinics changed {clinic_run.changed} removed {clinic_run.removed}, "
+                       f"A&E changed {ae_run.changed}"))
+
+        # 4. Request pacing: air quality allows one request per 0.5s
+        await engine.run(["air_quality"])
+        times = [at for at, _ in feeds["aqhi"].requests]
+        gaps = [later - earlier for earlier, later in zip(times, times[1:])]
+        checks.append(("per-source pacing", min(gaps) >= 0.45, f"min gap {min(gaps) * 1000:.0f}ms"))
+
+        # 5. Failures are retried, then reported
+        feeds["advisories"].failures_left = 1
+        feeds["aqhi"].failures_left = 10
+        recorded.clear()
+        runs = await engine.run(["health_advisories", "air_quality"])
+        outcome = {name: (run.status, run.attempts) for name, run in runs.items()}
+        checks.append(("retry and failure", outcome == {
+            "health_advisories": ("unchanged", 2), "air_quality": ("failed", 3)
+        } and sorted((name, ok) for name, ok, _, _ in recorded) == [
+            ("air_quality", False), ("health_advisories", True)
+        ], f"outcome {outcome}, recorded {[(name, ok) for name, ok, _, _ in recorded]}"))
+
+    finally:
+        await engine.close()
+        await server.stop()
+
+    status = 0
+    for name, passed, detail in checks:
+        print(f"{'OK  ' if passed else 'FAIL'} {name:<24} {detail}")
+        status |= 0 if passed else 1
+    stats = engine.get_stats()
+    print(f"Requests {stats['requests']}, {stats['bytes_read']} bytes read, "
+          f"{stats['not_modified']} not modified, {stats['unchanged']} unchanged")
+    return status
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="HK data ingestion check on local fixture servers")
+    parser.add_argument("--clinics", type=int, default=5000, help="Rows in the clinic CSV")
+    parser.add_argument("--latency", type=float, default=200.0, help="Fixture response latency in ms")
+    parser.add_argument("--chunk-size", type=int, default=1024, help="Engine read chunk size in bytes")
+    parser.add_argument("--max-lag", type=float, default=100.0, help="Longest allowed event-loop stall in ms")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(run(args.clinics, args.latency, args.chunk_size, args.max_lag)))
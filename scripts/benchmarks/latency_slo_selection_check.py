@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Healthcare AI V2 - Latency SLO Model Selection Check
+Drives ModelManager.make_request_with_fallback through the LLM gateway and an
+in-process cassette replay (LLM_CASSETTE_MODE=replay) with a separate
+synthetic latency per model tier, then checks that tier selection follows the
+recent p95 latency: the cheapest tier is used while it meets the urgency SLO,
+traffic moves off it when its tail drifts past the SLO, and returns once the
+drifted samples have aged out of the window.
+
+Latencies and SLOs are scaled down to milliseconds so the run takes seconds.
+No network access or API key is needed. Exits with status 1 when a check
+fails.
+"""
+
+import argparse
+import asyncio
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+# Add project root to path for imports
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from src.config import settings
+from src.ai.cassette import Cassette, CassettePlayer, LatencyModel
+
+
+FAST = {"free": "lognormal:20,0.2", "lite": "lognormal:30,0.2", "premium": "lognormal:45,0.2"}
+DRIFTED = "lognormal:25,1.2"  # Same median range, heavy tail: p95 around 180ms
+SLO_MS = {"emergency": 80.0, "critical": 80.0, "high": 80.0, "medium": 80.0, "low": 80.0}
+
+
+class TierPlayers:
+    """Cassette replay with one latency distribution per model tier"""
+
+    def __init__(self, cassette: Cassette, specs: Dict[str, str], seed: int):
+        from src.ai.openrouter_client import OpenRouterClient
+
+        self.cassette = cassette
+        self.seed = seed
+        self.tier_by_model = {spec.model: tier for tier, spec in OpenRouterClient.MODELS.items()}
+        self.players = {tier: self._player(spec) for tier, spec in specs.items()}
+
+    def _player(self, spec: str) -> CassettePlayer:
+        return CassettePlayer(self.cassette, LatencyModel(spec, seed=self.seed), on_miss="synthesize")
+
+    def set_latency(self, tier: str, spec: str):
+        self.players[tier] = self._player(spec)
+
+    async def play(self, payload: Dict[str, Any]) -> Tuple[int, Any]:
+        return await self.players[self.tier_by_model[payload["model"]]].play(payload)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {tier: player.get_stats() for tier, player in self.players.items()}
+
+
+async def drive(manager, players: TierPlayers, calls: int, concurrency: int) -> Dict[str, int]:
+    """Send low-urgency simple requests (cost-optimized chain); returns calls per tier"""
+    from src.ai.model_manager import ModelSelectionCriteria, TaskComplexity, UrgencyLevel
+
+    criteria = ModelSelectionCriteria(
+        agent_type="wellness_coach",
+        content_type="general",
+        urgency_level=UrgencyLevel.LOW,
+        task_complexity=TaskComplexity.SIMPLE
+    )
+    served: Dict[str, int] = {}
+    for start in range(0, calls, concurrency):
+        batch = [
+            manager.make_request_with_fallback(
+                criteria, "You are a Hong Kong wellness coach.", f"How can I sleep better? ({i})"
+            )
+            for i in range(start, min(calls, start + concurrency))
+        ]
+        for response in await asyncio.gather(*batch):
+            tier = players.tier_by_model[response.model]
+            served[tier] = served.get(tier, 0) + 1
+    return served
+
+
+def share(served: Dict[str, int], tier: str) -> float:
+    total = sum(served.values())
+    return served.get(tier, 0) / total if total else 0.0
+
+
+async def run(cassette_path: str, calls: int, concurrency: int, window_seconds: float, seed: int) -> int:
+    """Run every phase and return the exit status."""
+    if not Path(cassette_path).exists():
+        cassette_path = str(Path(tempfile.mkdtemp()) / "empty.jsonl")
+        Path(cassette_path).touch()
+
+    settings.llm_cassette_mode = "replay"
+    settings.llm_cassette_path = cassette_path
+    settings.llm_latency_slo_ms = SLO_MS
+    settings.llm_latency_window_seconds = window_seconds
+
+    from src.ai.gateway import LLMGateway
+    from src.ai.model_manager import ModelManager
+    from src.ai.openrouter_client import OpenRouterClient
+    from src.ai.providers.openrouter import OpenRouterProvider
+
+    client = OpenRouterClient()
+    players = TierPlayers(Cassette.load(cassette_path), FAST, seed)
+    client.player = players
+    manager = ModelManager()
+    manager.gateway = LLMGateway(
+        [OpenRouterProvider(client)],
+        weights={"openrouter": {"free": 1.0, "lite": 1.0, "premium": 1.0}},
+        rate_limits={}
+    )
+    checks: List[Tuple[str, bool, str]] = []
+
+    try:
+        # 1. Every tier fast: the cheapest tier takes the traffic
+        served = await drive(manager, players, calls, concurrency)
+        p95 = manager.performance_metrics["free"].recent_latency.percentile(95)
+        checks.append(("cheapest tier within SLO", share(served, "free") >= 0.9,
+                       f"free share {share(served, 'free'):.0%}, free p95 {p95:.0f}ms"))
+
+        # 2. The free tier's tail drifts past the SLO: traffic moves to the next tier
+        players.set_latency("free", DRIFTED)
+        await drive(manager, players, calls, concurrency)
+        served = await drive(manager, players, calls, concurrency)
+        p95 = manager.performance_metrics["free"].recent_latency.percentile(95)
+        checks.append(("reroute on p95 drift", share(served, "free") <= 0.1 and p95 > SLO_MS["low"],
+                       f"free share {share(served, 'free'):.0%}, free p95 {p95:.0f}ms, "
+                       f"lite share {share(served, 'lite'):.0%}"))
+
+        # 3. The tier recovers; once its drifted samples age out it is used again
+        players.set_latency("free", FAST["free"])
+        await asyncio.sleep(2 * window_seconds)
+        served = await drive(manager, players, calls, concurrency)
+        checks.append(("return after window", share(served, "free") >= 0.9,
+                       f"free share {share(served, 'free'):.0%}"))
+
+        # 4. Decisions are reported
+        report = manager.get_performance_report()["latency_slo"]
+        reroutes = [entry for entry in report["recent_reroutes"] if "free" in entry["skipped_p95_ms"]]
+        checks.append(("decisions reported", report["decisions"].get("rerouted", 0) > 0 and bool(reroutes),
+                       f"decisions {report['decisions']}"))
+
+    finally:
+        await manager.gateway.close()
+
+    status = 0
+    for name, passed, detail in checks:
+        print(f"{'OK  ' if passed else 'FAIL'} {name:<26} {detail}")
+        status |= 0 if passed else 1
+    return status
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Latency SLO model selection check on cassette replay")
+    parser.add_argument("--cassette", default=settings.llm_cassette_path, help="Cassette file")
+    parser.add_argument("--calls", type=int, default=300, help="Calls per phase")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent calls")
+    parser.add_argument("--window", type=float, default=1.0, help="Latency window in seconds")
+    parser.add_argument("--seed", type=int, default=0, help="Latency random seed")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(run(args.cassette, args.calls, args.concurrency, args.window, args.seed)))
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Healthcare AI V2 - Live2D Asset Caching Check
+Checks which static files the Live2D asset server treats as content-hashed
+and serves with immutable one-year caching: hex-hashed names, and files listed
+in a Vite build manifest. A false positive pins a stale file in browser caches
+for a year, so names that merely look like hashes (logo-Animated.svg,
+report-20240115.json) must be rejected; a missed hash only costs a
+revalidation.
+
+Optionally lists the files under the Live2D asset roots that would be served
+as immutable. Exits with status 1 when a check fails.
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+from pathlib import Path
+from typing import List, Tuple
+
+# Add project root to path for imports
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from src.web.live2d.assets import (
+    LIVE2D_FRONTEND_PATH,
+    LIVE2D_SAMPLES_PATH,
+    AssetServer,
+    is_hashed_filename
+)
+
+
+# Hashed by name alone
+HASHED = [
+    "app.3f9a1c2b.js",         # webpack "[name].[contenthash].js"
+    "chunk-3f9a1c2b4d5e.css",  # longer hex hash
+    "vendor-5d41402a.js.map",
+]
+# Not hashed by name (base64url bundler names need the manifest)
+UNHASHED = [
+    "index-B3kq9_aZ.js",
+    "logo-Animated.svg",       # mixed-case word in the hash position
+    "icon-Arrow2Up.svg",
+    "icon-deadbeef.png",       # hex letters only
+    "report-20240115.json",    # dates
+    "backup.20231231.zip",
+    "model3-v2024011.json",
+    "Hiyori-Textures.png",
+    "motion-TapBody.motion3.json",
+    "physics3.json",
+    "Hiyori.model3.json",
+    "live2dcubismcore.min.js",
+    "index.html",
+    "auth-integration.js",
+]
+
+
+def list_immutable() -> List[Path]:
+    """Files under the asset roots that would get immutable caching"""
+    server = AssetServer({"static": [LIVE2D_FRONTEND_PATH, LIVE2D_SAMPLES_PATH]})
+    server.build_index()
+    return sorted(entry.path for entry in server._index["static"].values() if entry.immutable)
+
+
+def check_manifest() -> List[Tuple[str, bool, str]]:
+    """Only files the Vite manifest lists (and their source maps) are immutable"""
+    expected = {
+        "assets/index-B3kq9_aZ.js": True,
+        "assets/index-B3kq9_aZ.js.map": True,
+        "assets/index-Dh-3a_Bx.css": True,
+        "assets/logo-Animated.svg": False,
+        "index.html": False,
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        (root / "assets").mkdir()
+        for name in expected:
+            (root / name).write_text("x")
+        (root / ".vite").mkdir()
+        (root / ".vite" / "manifest.json").write_text(json.dumps({
+            "index.html": {
+                "file": "assets/index-B3kq9_aZ.js",
+                "css": ["assets/index-Dh-3a_Bx.css"],
+                "isEntry": True
+            }
+        }))
+        server = AssetServer({"static": [root]})
+        server.build_index()
+        return [
+            (f"manifest {name}", server.resolve("static", name).immutable == immutable,
+             "immutable" if immutable else "revalidated")
+            for name, immutable in expected.items()
+        ]
+
+
+def run(show_files: bool) -> int:
+    """Run every check and return the exit status."""
+    checks: List[Tuple[str, bool, str]] = []
+    for name in HASHED:
+        checks.append((name, is_hashed_filename(name), "immutable"))
+    for name in UNHASHED:
+        checks.append((name, not is_hashed_filename(name), "revalidated"))
+    checks.extend(check_manifest())
+
+    status = 0
+    for name, passed, expected in checks:
+        print(f"{'OK  ' if passed else 'FAIL'} {name:<40} expected {expected}")
+        status |= 0 if passed else 1
+
+    if show_files:
+        immutable = list_immutable()
+        print(f"\n{len(immutable)} files served as immutable:")
+        for path in immutable:
+            print(f"  {path}")
+    return status
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Live2D asset immutable-caching check")
+    parser.add_argument("--list", action="store_true", help="List asset files served as immutable")
+    args = parser.parse_args()
+    sys.exit(run(args.list))
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Healthcare AI V2 - LLM Gateway Stand-in Benchmark
+Runs the LLM gateway against local OpenAI-compatible stand-in servers and
+checks its routing: weighted split, latency-aware shift, per-provider request
+budgets, and spillover when a provider throttles or starts failing.
+
+No provider quota is used. Exits with status 1 when a check fails, so the
+run can gate CI.
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from aiohttp import web
+
+# Add project root to path for imports
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from src.ai.gateway import LLMGateway
+from src.ai.providers.http_stub import HTTPStubProvider
+
+
+class StandInServer:
+    """Local /v1/chat/completions server with scripted latency and failures"""
+
+    def __init__(self, name: str, latency_ms: float = 5.0):
+        self.name = name
+        self.latency_ms = latency_ms
+        self.error_rate = 0.0  # Share of calls answered with 500
+        self.throttle = False  # Answer every call with 429
+        self.calls = 0
+        self.rng = random.Random(name)
+        self.runner: Optional[web.AppRunner] = None
+        self.url = ""
+
+    async def handle(self, request: web.Request) -> web.Response:
+        payload = await request.json()
+        self.calls += 1
+        await asyncio.sleep(self.latency_ms / 1000.0)
+        if self.throttle:
+            return web.json_response({"error": "rate limited"}, status=429)
+        if self.rng.random() < self.error_rate:
+            return web.json_response({"error": "upstream failure"}, status=500)
+        return web.json_response({
+            "model": payload["model"],
+            "choices": [{"message": {"role": "assistant", "content": f"answer from {self.name}"}}],
+            "usage": {"prompt_tokens": 20, "completion_tokens": 5, "total_tokens": 25}
+        })
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_post("/v1/chat/completions", self.handle)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}/v1"
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+
+def build_gateway(
+    servers: List[StandInServer],
+    weights: Dict[str, float],
+    rate_limits: Optional[Dict[str, int]] = None,
+    cooldown_seconds: float = 60.0
+) -> LLMGateway:
+    """Gateway with one stub provider per stand-in server, serving tier "lite" """
+    return LLMGateway(
+        [HTTPStubProvider(server.url, name=server.name, tiers=["lite"]) for server in servers],
+        weights={name: {"lite": weight} for name, weight in weights.items()},
+        rate_limits=rate_limits or {},
+        error_rate_threshold=0.3,
+        latency_threshold_ms=500.0,
+        window=20,
+        min_requests=5,
+        cooldown_seconds=cooldown_seconds,
+        rng=random.Random(7)
+    )
+
+
+async def drive(gateway: LLMGateway, calls: int, concurrency: int) -> Tuple[Dict[str, int], int]:
+    """Send calls through the gateway; returns answers per provider and failures"""
+    answered: Dict[str, int] = {}
+    failures = 0
+    for start in range(0, calls, concurrency):
+        batch = [
+            gateway.complete("lite", "You are a test assistant.", f"question {i}")
+            for i in range(start, min(calls, start + concurrency))
+        ]
+        for result in await asyncio.gather(*batch, return_exceptions=True):
+            if isinstance(result, Exception):
+                failures += 1
+            else:
+                answered[result.provider] = answered.get(result.provider, 0) + 1
+    return answered, failures
+
+
+def share(answered: Dict[str, int], name: str) -> float:
+    total = sum(answered.values())
+    return answered.get(name, 0) / total if total else 0.0
+
+
+async def run(calls: int, concurrency: int) -> int:
+    """Run every scenario and return the exit status."""
+    primary = StandInServer("primary")
+    secondary = StandInServer("secondary")
+    await primary.start()
+    await secondary.start()
+    checks: List[Tuple[str, bool, str]] = []
+
+    try:
+        # 1. Weighted split between two healthy providers (3:1)
+        gateway = build_gateway([primary, secondary], {"primary": 3.0, "secondary": 1.0})
+        answered, failures = await drive(gateway, calls, concurrency)
+        observed = share(answered, "primary")
+        checks.append(("weighted split 3:1", failures == 0 and 0.65 <= observed <= 0.85,
+                       f"primary share {observed:.0%}, {failures} failures"))
+        await gateway.close()
+
+        # 2. Latency-aware: equal weights, primary four times slower
+        primary.latency_ms, secondary.latency_ms = 40.0, 10.0
+        gateway = build_gateway([primary, secondary], {"primary": 1.0, "secondary": 1.0})
+        answered, failures = await drive(gateway, calls, concurrency)
+        observed = share(answered, "secondary")
+        checks.append(("latency-aware shift", failures == 0 and observed >= 0.65,
+                       f"faster provider share {observed:.0%}, {failures} failures"))
+        await gateway.close()
+        primary.latency_ms = secondary.latency_ms = 5.0
+
+        # 3. Request budget: primary capped at 30 requests per minute
+        gateway = build_gateway(
+            [primary, secondary], {"primary": 10.0, "secondary": 1.0}, rate_limits={"primary": 30}
+        )
+        answered, failures = await drive(gateway, calls, concurrency)
+        checks.append(("per-provider budget", failures == 0 and answered.get("primary", 0) <= 31,
+                       f"primary answered {answered.get('primary', 0)} of {calls}, "
+                       f"{gateway.budget_skips} budget skips"))
+        await gateway.close()
+
+        # 4. Throttling: primary answers 429; calls spill over and primary is rotated out
+        primary.throttle = True
+        primary.calls = 0
+        gateway = build_gateway([primary, secondary], {"primary": 3.0, "secondary": 1.0})
+        answered, failures = await drive(gateway, calls, concurrency)
+        health = gateway.get_stats()["providers"]["primary"]
+        checks.append(("spillover on throttling", failures == 0 and health["state"] == "tripped"
+                       and primary.calls <= concurrency,
+                       f"{primary.calls} calls reached the throttled provider, "
+                       f"{gateway.spillovers} spillovers, {failures} failures"))
+        await gateway.close()
+        primary.throttle = False
+
+        # 5. Error rate: primary fails half its calls; it is rotated out after the window fills
+        primary.error_rate = 0.5
+        primary.calls = 0
+        gateway = build_gateway([primary, secondary], {"primary": 3.0, "secondary": 1.0})
+        answered, failures = await drive(gateway, calls, concurrency)
+        health = gateway.get_stats()["providers"]["primary"]
+        checks.append(("spillover on error rate", failures == 0 and health["state"] == "tripped",
+                       f"trip reason {health['trip_reason']!r}, {primary.calls} calls reached it, "
+                       f"{failures} failures"))
+        await gateway.close()
+        primary.error_rate = 0.0
+
+        # 6. Recovery: after the cooldown a tripped provider rejoins the rotation
+        primary.throttle = True
+        gateway = build_gateway([primary, secondary], {"primary": 3.0, "secondary": 1.0}, cooldown_seconds=0.5)
+        await drive(gateway, concurrency, concurrency)
+        primary.throttle = False
+        await asyncio.sleep(0.6)
+        answered, failures = await drive(gateway, calls, concurrency)
+        checks.append(("recovery after cooldown", failures == 0 and share(answered, "primary") >= 0.5,
+                       f"primary share after cooldown {share(answered, 'primary'):.0%}"))
+        await gateway.close()
+
+    finally:
+        await primary.stop()
+        await secondary.stop()
+
+    status = 0
+    for name, passed, detail in checks:
+        print(f"{'OK  ' if passed else 'FAIL'} {name:<26} {detail}")
+        status |= 0 if passed else 1
+    return status
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="LLM gateway stand-in server benchmark")
+    parser.add_argument("--calls", type=int, default=400, help="Calls per scenario")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent calls")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(run(args.calls, args.concurrency)))
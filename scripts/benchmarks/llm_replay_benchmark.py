@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Healthcare AI V2 - OpenRouter Client Replay Benchmark
+Replays an LLM cassette through OpenRouterClient.make_request in-process.
+With --latency none (the default) the per-call time is the client's own
+overhead: payload build, token budgeting, response parsing and usage
+accounting. No network access or API key is needed.
+
+Without a cassette every call is answered with a synthesized placeholder.
+"""
+
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add project root to path for imports
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from src.config import settings
+from src.core.metrics import LatencyHistogram
+
+
+SAMPLE_PROMPTS = [
+    ("illness_monitor", "I have had a headache and fever since yesterday"),
+    ("mental_health", "考試壓力好大，瞓唔到"),
+    ("wellness_coach", "How to improve my diet and exercise routine?"),
+    ("illness_monitor", "我今日好攰，頭痛同埋發燒"),
+    ("safety_guardian", "I feel dizzy and my chest hurts"),
+]
+
+TIERS = ["free", "lite", "premium"]
+
+
+async def run(cassette: str, latency: str, requests: int, concurrency: int) -> None:
+    """Run the benchmark."""
+    if not Path(cassette).exists():
+        cassette = str(Path(tempfile.mkdtemp()) / "empty.jsonl")
+        Path(cassette).touch()
+        print("No cassette found; every call gets a synthesized response")
+
+    settings.llm_cassette_mode = "replay"
+    settings.llm_cassette_path = cassette
+    settings.llm_replay_latency = latency
+
+    from src.ai.openrouter_client import OpenRouterClient
+
+    client = OpenRouterClient()
+    total = LatencyHistogram(min_ms=0.01)
+    overhead = LatencyHistogram(min_ms=0.01)
+
+    async def one(index: int):
+        agent_type, prompt = SAMPLE_PROMPTS[index % len(SAMPLE_PROMPTS)]
+        started = time.perf_counter()
+        await client.make_request(
+            model_tier=TIERS[index % len(TIERS)],
+            system_prompt="You are a Hong Kong healthcare assistant.",
+            user_prompt=f"{prompt} ({index})",
+            agent_type=agent_type,
+            temperature=0.7
+        )
+        elapsed = (time.perf_counter() - started) * 1000
+        total.record(elapsed)
+        if latency == "none":
+            overhead.record(elapsed)
+
+    started = time.perf_counter()
+    for offset in range(0, requests, concurrency):
+        await asyncio.gather(*(one(i) for i in range(offset, min(requests, offset + concurrency))))
+    wall_seconds = time.perf_counter() - started
+    await client.close()
+
+    print(f"Requests:          {total.count} ({concurrency} concurrent)")
+    print(f"Throughput:        {total.count / wall_seconds:.0f} req/s")
+    print(f"Replay matches:    {client.player.get_stats()['matches']}")
+    print(f"Synthetic latency: {latency}")
+    print(f"p50 per call:      {total.percentile(50):.3f} ms")
+    print(f"p99 per call:      {total.percentile(99):.3f} ms")
+    if overhead.count:
+        print(f"Client overhead:   mean {overhead.mean * 1000:.0f} µs, p99 {overhead.percentile(99) * 1000:.0f} µs")
+    print(f"Usage recorded:    {sum(stats['requests_count'] for stats in client.get_usage_stats().values())} calls")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="OpenRouter client replay benchmark")
+    parser.add_argument("--cassette", default=settings.llm_cassette_path, help="Cassette file")
+    parser.add_argument("--latency", default="none", help="Latency spec; 'none' isolates client overhead")
+    parser.add_argument("--requests", type=int, default=2000, help="Calls to replay")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent calls")
+    args = parser.parse_args()
+    asyncio.run(run(args.cassette, args.latency, args.requests, args.concurrency))
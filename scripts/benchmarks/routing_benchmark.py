@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Healthcare AI V2 - Routing Micro-benchmark
+Measures agent routing cost per message (keyword scan, agent evaluation,
+emergency override and selection) without any LLM calls.
+"""
+
+import asyncio
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+# Add project root to path for imports
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from src.agents.base_agent import AgentContext
+from src.agents.orchestrator import AgentOrchestrator
+from src.agents.routing.keyword_engine import keyword_engine
+
+
+SAMPLE_MESSAGES = [
+    "I have chest pain and can't breathe",
+    "我今日好攰，頭痛同埋發燒",
+    "My grandmother has diabetes and high blood pressure, how can I help her?",
+    "考試壓力好大，瞓唔到",
+    "How to improve my diet and exercise routine?",
+    "I feel sad and lonely at school, nobody gets me",
+    "救命！我媽咪跌倒起唔到身",
+    "What are good tips for staying healthy while working overtime?",
+    "I forgot my medication this morning, is that a problem?",
+    "Hello, just want to chat",
+]
+
+
+def build_context() -> AgentContext:
+    """Build a minimal agent context."""
+    return AgentContext(
+        user_id="benchmark",
+        session_id="benchmark",
+        conversation_history=[],
+        user_profile={"age_group": "adult"},
+        cultural_context={"region": "hong_kong"},
+        language_preference="auto",
+        timestamp=datetime.now(),
+    )
+
+
+async def route_once(orchestrator: AgentOrchestrator, message: str, context: AgentContext) -> None:
+    """Run the routing path for one message."""
+    scores = await orchestrator._evaluate_agents(message, context)
+    if not orchestrator._check_emergency_override(scores, message, context):
+        orchestrator._select_best_agent(scores, message, context)
+
+
+async def run(iterations: int = 2000) -> None:
+    """Run the benchmark."""
+    orchestrator = AgentOrchestrator(ai_service=None)
+    context = build_context()
+
+    timings = []
+    for i in range(iterations):
+        # Vary the text so every message is a cold scan
+        message = f"{SAMPLE_MESSAGES[i % len(SAMPLE_MESSAGES)]} #{i}"
+        start = time.perf_counter()
+        await route_once(orchestrator, message, context)
+        timings.append((time.perf_counter() - start) * 1_000_000)
+
+    timings.sort()
+    print(f"Messages routed:   {iterations}")
+    print(f"Keyword engine:    {keyword_engine.get_stats()}")
+    print(f"Mean per message:  {statistics.mean(timings):.1f} µs")
+    print(f"p50 per message:   {timings[len(timings) // 2]:.1f} µs")
+    print(f"p95 per message:   {timings[int(len(timings) * 0.95)]:.1f} µs")
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
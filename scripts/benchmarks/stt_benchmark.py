@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Healthcare AI V2 - STT Engine CPU Benchmark
+Transcribes sample clips through the STT worker pool, sequentially and with
+concurrent requests, and reports throughput, latency percentiles, real-time
+factor and event-loop lag (which stays near zero now that inference runs on
+worker threads).
+
+Clips are read from --clips (any format ffmpeg decodes). Without clips, a
+set of synthetic 16kHz WAV clips is generated so the decode and inference
+path can still be timed.
+"""
+
+import argparse
+import asyncio
+import io
+import math
+import os
+import struct
+import sys
+import time
+import wave
+from pathlib import Path
+from typing import List, Tuple
+
+# The STT server is a standalone script; import its engine module directly
+sys.path.append(str(Path(__file__).parent.parent.parent / "src" / "web" / "live2d" / "backend"))
+
+from stt_engine import SAMPLE_RATE, TranscriptionEngine, decode_audio
+
+AUDIO_EXTENSIONS = {".wav", ".webm", ".ogg", ".mp3", ".m4a", ".flac"}
+
+
+def synthesize_clip(seconds: float, seed: int) -> bytes:
+    """Generate a WAV clip of gliding harmonic tones with pauses"""
+    frames = bytearray()
+    base = 110 + seed * 17
+    for index in range(int(seconds * SAMPLE_RATE)):
+        t = index / SAMPLE_RATE
+        envelope = 0.0 if (t % 1.2) > 0.9 else math.sin(math.pi * (t % 1.2) / 0.9)
+        pitch = base * (1 + 0.2 * math.sin(2 * math.pi * 0.7 * t))
+        value = sum(math.sin(2 * math.pi * pitch * k * t) / k for k in (1, 2, 3))
+        frames += struct.pack("<h", int(8000 * envelope * value / 1.8))
+
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(SAMPLE_RATE)
+        wav.writeframes(bytes(frames))
+    return buffer.getvalue()
+
+
+def load_clips(directory: str) -> List[Tuple[str, bytes]]:
+    """Load audio clips from a directory, or synthesize a default set"""
+    if directory:
+        clips = [
+            (path.name, path.read_bytes())
+            for path in sorted(Path(directory).iterdir())
+            if path.suffix.lower() in AUDIO_EXTENSIONS
+        ]
+        if clips:
+            return clips
+        print(f"No audio clips found in {directory}, using synthetic clips")
+    return [(f"synthetic_{i}.wav", synthesize_clip(seconds, i)) for i, seconds in enumerate((2, 4, 6, 8))]
+
+
+async def measure_loop_lag(stop: asyncio.Event, samples: List[float]):
+    """Record how late a 10ms timer fires while transcriptions run"""
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(0.01)
+        samples.append((time.perf_counter() - started - 0.01) * 1000)
+
+
+async def run_round(engine: TranscriptionEngine, clips, concurrency: int, repeats: int, language: str):
+    """Transcribe every clip `repeats` times with up to `concurrency` requests in flight"""
+    limiter = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+
+    async def one(name: str, data: bytes):
+        async with limiter:
+            started = time.perf_counter()
+            samples = await decode_audio(data, name)
+            await engine.transcribe(samples, language=language)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    lag: List[float] = []
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(measure_loop_lag(stop, lag))
+
+    started = time.perf_counter()
+    await asyncio.gather(*[one(name, data) for _ in range(repeats) for name, data in clips])
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await lag_task
+    latencies.sort()
+    return elapsed, latencies, max(lag, default=0.0)
+
+
+async def run(args):
+    clips = load_clips(args.clips)
+    audio_seconds = 0.0
+    for name, data in clips:
+        audio_seconds += len(await decode_audio(data, name)) / SAMPLE_RATE
+
+    engine = TranscriptionEngine(
+        model_size=args.model,
+        workers=args.workers,
+        max_pending=args.workers * args.concurrency * 4,
+        cpu_threads=args.cpu_threads
+    )
+    print(f"Loading {args.workers} x '{args.model}' model(s)...")
+    await engine.start()
+
+    # Warm up each worker once
+    warm = await decode_audio(clips[0][1], clips[0][0])
+    await asyncio.gather(*[engine.transcribe(warm, language=args.language) for _ in range(args.workers)])
+
+    print(f"Clips:       {len(clips)} ({audio_seconds:.1f} s of audio)")
+    print(f"Workers:     {engine.workers} ({engine.cpu_threads} threads each)")
+    print()
+
+    for concurrency in sorted({1, args.concurrency}):
+        elapsed, latencies, max_lag = await run_round(
+            engine, clips, concurrency, args.repeats, args.language
+        )
+        total_audio = audio_seconds * args.repeats
+        print(f"Concurrency {concurrency}:")
+        print(f"  Wall time:           {elapsed:.2f} s")
+        print(f"  Throughput:          {total_audio / elapsed:.2f} audio-s per s")
+        print(f"  Latency p50 / p95:   {latencies[len(latencies) // 2]:.0f} / "
+              f"{latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]:.0f} ms")
+        print(f"  Max event-loop lag:  {max_lag:.1f} ms")
+
+    print()
+    print(f"Engine metrics: {engine.get_metrics()}")
+    engine.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clips", default="", help="Directory of sample audio clips")
+    parser.add_argument("--model", default=os.environ.get("WHISPER_MODEL", "tiny"))
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--cpu-threads", type=int, default=None)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--language", default="en")
+    args = parser.parse_args()
+
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
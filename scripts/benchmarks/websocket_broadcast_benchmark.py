@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Healthcare AI V2 - WebSocket Broadcast Benchmark
+Broadcasts to 5,000 simulated sockets (a few of them stalled) through
+ConnectionManager and reports enqueue cost and end-to-end delivery time.
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path for imports
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from src.web.websockets.chat import ConnectionManager
+
+
+class SimulatedWebSocket:
+    """Minimal stand-in for a Starlette WebSocket"""
+
+    def __init__(self, latency: float, stalled: bool = False):
+        self.latency = latency
+        self.stalled = stalled
+        self.received = 0
+        self.scope = {"subprotocols": []}
+        self.query_params = {}
+
+    async def accept(self, subprotocol=None):
+        pass
+
+    async def send_text(self, data: str):
+        if self.stalled:
+            await asyncio.sleep(3600)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self.received += 1
+
+    async def close(self, code: int = 1000, reason: str = ""):
+        pass
+
+
+async def run(connections: int, broadcasts: int, stalled_ratio: float):
+    """Run the benchmark"""
+    manager = ConnectionManager()
+    manager.max_connections_per_ip = connections
+
+    sockets = []
+    for i in range(connections):
+        websocket = SimulatedWebSocket(
+            latency=random.uniform(0, 0.002),
+            stalled=random.random() < stalled_ratio
+        )
+        sockets.append(websocket)
+        await manager.connect(websocket, f"bench_{i}", f"10.0.{i // 250}.{i % 250}")
+
+    healthy = [ws for ws in sockets if not ws.stalled]
+    message = {
+        "type": "system_status",
+        "message": "香港天文台已發出酷熱天氣警告，請多飲水。",
+        "details": {"advisory_id": 1234, "districts": ["Central", "Sha Tin", "Tuen Mun"]}
+    }
+
+    enqueue_times = []
+    start = time.perf_counter()
+    for _ in range(broadcasts):
+        t0 = time.perf_counter()
+        await manager.broadcast_message(message)
+        enqueue_times.append((time.perf_counter() - t0) * 1000)
+
+    while any(ws.received < broadcasts for ws in healthy):
+        await asyncio.sleep(0.01)
+    delivered = time.perf_counter() - start
+
+    print(f"Connections:            {connections} ({connections - len(healthy)} stalled)")
+    print(f"Broadcasts:             {broadcasts}")
+    print(f"Enqueue per broadcast:  {sum(enqueue_times) / len(enqueue_times):.2f} ms")
+    print(f"Delivered to healthy:   {delivered:.2f} s")
+    print(f"Outbound stats:         {manager.get_outbound_stats()}")
+
+    for session_id in manager.get_active_sessions():
+        await manager.disconnect(session_id, "Benchmark complete")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--connections", type=int, default=5000)
+    parser.add_argument("--broadcasts", type=int, default=20)
+    parser.add_argument("--stalled-ratio", type=float, default=0.01)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.connections, args.broadcasts, args.stalled_ratio))
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Healthcare AI V2 - Live2D Asset Precompression
+Writes .br and .gz variants next to compressible Live2D frontend assets so the
+asset server can send them without compressing per request.
+
+Run at image build time (see Dockerfile) or after updating models:
+    python scripts/maintenance/precompress_live2d_assets.py
+
+Brotli variants need the optional `brotli` package; gzip always works.
+Variants are only kept when they save at least --min-saving of the size, and
+are rewritten when the source file is newer.
+"""
+
+import argparse
+import gzip
+import sys
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ROOT = Path(__file__).parent.parent.parent
+LIVE2D_ROOTS = [
+    ROOT / "src" / "web" / "live2d" / "frontend",
+    ROOT / "src" / "web" / "live2d" / "Samples" / "TypeScript" / "Demo" / "dist"
+]
+
+# Textures (png/jpg) and audio are already compressed
+COMPRESSIBLE_EXTENSIONS = {
+    ".js", ".mjs", ".css", ".html", ".json", ".map", ".moc3", ".svg", ".txt", ".wasm", ".ts", ".md"
+}
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=11)
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def precompress_file(path: Path, encodings, min_saving: float) -> dict:
+    """Write missing or stale variants of one file"""
+    results = {}
+    data = None
+    source_mtime = path.stat().st_mtime_ns
+
+    for encoding, suffix in encodings:
+        variant = path.with_name(path.name + suffix)
+        if variant.exists() and variant.stat().st_mtime_ns >= source_mtime:
+            results[encoding] = "fresh"
+            continue
+
+        if data is None:
+            data = path.read_bytes()
+        compressed = compress(data, encoding)
+        if len(compressed) > len(data) * (1 - min_saving):
+            if variant.exists():
+                variant.unlink()
+            results[encoding] = "skipped"
+            continue
+
+        variant.write_bytes(compressed)
+        results[encoding] = f"{len(data)} -> {len(compressed)} bytes"
+    return results
+
+
+def iter_assets(roots, min_size: int):
+    for root in roots:
+        if not root.is_dir():
+            continue
+        for path in sorted(root.rglob("*")):
+            if (
+                path.is_file()
+                and path.suffix.lower() in COMPRESSIBLE_EXTENSIONS
+                and path.stat().st_size >= min_size
+            ):
+                yield path
+
+
+def clean(roots) -> int:
+    removed = 0
+    for root in roots:
+        if not root.is_dir():
+            continue
+        for suffix in (".br", ".gz"):
+            for variant in root.rglob(f"*{suffix}"):
+                source = variant.with_name(variant.name[:-len(suffix)])
+                if source.suffix.lower() in COMPRESSIBLE_EXTENSIONS:
+                    variant.unlink()
+                    removed += 1
+    return removed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--root", action="append", default=None, help="Asset root (default: Live2D frontend)")
+    parser.add_argument("--min-size", type=int, default=1024, help="Skip files smaller than this (bytes)")
+    parser.add_argument("--min-saving", type=float, default=0.05, help="Minimum fractional size saving")
+    parser.add_argument("--clean", action="store_true", help="Remove generated variants and exit")
+    parser.add_argument("--quiet", action="store_true")
+    args = parser.parse_args()
+
+    roots = [Path(root) for root in args.root] if args.root else LIVE2D_ROOTS
+
+    if args.clean:
+        print(f"Removed {clean(roots)} precompressed variants")
+        return 0
+
+    encodings = [("gzip", ".gz")]
+    if brotli is not None:
+        encodings.insert(0, ("br", ".br"))
+    else:
+        print("brotli not installed: writing gzip variants only")
+
+    files = 0
+    for path in iter_assets(roots, args.min_size):
+        results = precompress_file(path, encodings, args.min_saving)
+        files += 1
+        if not args.quiet:
+            summary = ", ".join(f"{encoding}: {result}" for encoding, result in results.items())
+            print(f"{path.relative_to(ROOT) if path.is_relative_to(ROOT) else path}  [{summary}]")
+
+    print(f"Processed {files} files ({', '.join(encoding for encoding, _ in encodings)})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
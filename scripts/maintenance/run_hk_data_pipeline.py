@@ -1,26 +1,36 @@
 #!/usr/bin/env python3
 """
 Healthcare AI V2 - Hong Kong Data Pipeline Runner
-Simple standalone script for HK data collection
+Standalone runner for the HK open-data ingestion engine
+
+Fetches the configured feeds (HK_DATA_SOURCE_URLS) every
+HK_DATA_UPDATE_INTERVAL seconds, or once with --once. Feeds are fetched
+concurrently with conditional requests, and only changed records are
+published; each feed's outcome is recorded in hk_data_source_status when
+the database is reachable.
 """
 
+import argparse
 import asyncio
 import logging
-import time
 from datetime import datetime
 import sys
-import os
+from pathlib import Path
 
-# Add src to path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+# Add project root to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 try:
     from src.config import get_settings
     settings = get_settings()
 except Exception as e:
     print(f"❌ Configuration error: {e}")
-    print("ℹ️  HK Data Pipeline will run in fallback mode")
-    settings = None
+    sys.exit(1)
+
+from src.data.ingestion import IngestionEngine
+from src.database.connection import close_database, init_database
+from src.data.sources.hk_open_data import SOURCE_ADAPTERS, build_default_sources
+from src.data.storage.hk_data_repository import get_hk_data_repository
 
 # Configure logging
 logging.basicConfig(
@@ -29,96 +39,93 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-class SimpleHKDataPipeline:
-    """Simple HK Data Pipeline for basic data collection"""
-    
-    def __init__(self):
+
+class HKDataPipelineRunner:
+    """Runs the ingestion engine on a fixed interval"""
+
+    def __init__(self, engine: IngestionEngine, interval_seconds: int):
+        self.engine = engine
+        self.interval_seconds = interval_seconds
         self.running = True
-        logger.info("🇭🇰 Simple HK Data Pipeline initialized")
-    
-    async def fetch_hk_data(self):
-        """Simulate HK data fetching"""
-        try:
-            logger.info("📊 Fetching Hong Kong healthcare data...")
-            
-            # Simulate data sources
-            data_sources = [
-                "Hospital Authority A&E waiting times",
-                "Government clinic information", 
-                "Health advisory updates",
-                "Emergency service locations"
-            ]
-            
-            for source in data_sources:
-                logger.info(f"  • Processing: {source}")
-                await asyncio.sleep(1)  # Simulate processing time
-            
-            logger.info("✅ HK data fetch completed successfully")
-            return True
-            
-        except Exception as e:
-            logger.error(f"❌ Error fetching HK data: {e}")
-            return False
-    
+        logger.info(f"🇭🇰 HK Data Pipeline initialized with feeds: {', '.join(engine.sources) or 'none'}")
+
+    async def run_cycle(self) -> bool:
+        """Fetch every feed once; returns False if any feed failed"""
+        logger.info("📊 Fetching Hong Kong healthcare data...")
+        runs = await self.engine.run()
+        for name, run in runs.items():
+            if run.succeeded:
+                logger.info(
+                    f"  • {name}: {run.status} ({run.records} records, {run.changed} changed, "
+                    f"{run.removed} removed, {run.bytes_read} bytes, {run.duration_ms:.0f}ms)"
+                )
+            else:
+                logger.error(f"  • {name}: failed after {run.attempts} attempt(s): {run.error}")
+        return all(run.succeeded for run in runs.values())
+
     async def run_pipeline(self):
         """Main pipeline loop"""
         logger.info("🚀 Starting HK Data Pipeline...")
-        
+
         cycle_count = 0
         while self.running:
-            try:
-                cycle_count += 1
-                logger.info(f"🔄 Pipeline cycle #{cycle_count} - {datetime.now().strftime('%H:%M:%S')}")
-                
-                # Fetch data
-                success = await self.fetch_hk_data()
-                
-                if success:
-                    logger.info("📈 Data pipeline cycle completed successfully")
-                else:
-                    logger.warning("⚠️  Data pipeline cycle completed with errors")
-                
-                # Wait before next cycle (1 hour in production, 5 minutes in demo)
-                wait_time = 300 if settings else 300  # 5 minutes for demo
-                logger.info(f"⏰ Waiting {wait_time//60} minutes until next cycle...")
-                
-                await asyncio.sleep(wait_time)
-                
-            except KeyboardInterrupt:
-                logger.info("🛑 Pipeline stopped by user")
-                break
-            except Exception as e:
-                logger.error(f"❌ Pipeline error: {e}")
-                logger.info("🔄 Retrying in 60 seconds...")
-                await asyncio.sleep(60)
-    
+            cycle_count += 1
+            logger.info(f"🔄 Pipeline cycle #{cycle_count} - {datetime.now().strftime('%H:%M:%S')}")
+
+            if await self.run_cycle():
+                logger.info("📈 Data pipeline cycle completed successfully")
+            else:
+                logger.warning("⚠️  Data pipeline cycle completed with errors")
+
+            logger.info(f"⏰ Waiting {self.interval_seconds // 60} minutes until next cycle...")
+            await asyncio.sleep(self.interval_seconds)
+
     def stop(self):
         """Stop the pipeline"""
         self.running = False
         logger.info("🛑 Pipeline stop requested")
 
-async def main():
+
+async def main(args: argparse.Namespace) -> int:
     """Main entry point"""
     logger.info("🏥 Healthcare AI V2 - HK Data Pipeline Starting")
-    
-    pipeline = SimpleHKDataPipeline()
-    
+
+    # Feed runs are recorded in hk_data_source_status when the database is up
+    database_ready = False
     try:
-        await pipeline.run_pipeline()
-    except KeyboardInterrupt:
-        logger.info("🛑 Shutting down HK Data Pipeline...")
+        await init_database()
+        database_ready = True
     except Exception as e:
-        logger.error(f"❌ Fatal pipeline error: {e}")
+        logger.warning(f"⚠️  Database unavailable, feed status will not be recorded: {e}")
+
+    sources = build_default_sources()
+    if args.sources:
+        sources = [source for source in sources if source.name in args.sources]
+    engine = IngestionEngine(sources, repository=await get_hk_data_repository())
+    pipeline = HKDataPipelineRunner(engine, args.interval)
+
+    try:
+        if args.once:
+            return 0 if await pipeline.run_cycle() else 1
+        await pipeline.run_pipeline()
     finally:
         pipeline.stop()
+        await engine.close()
+        if database_ready:
+            await close_database()
         logger.info("👋 HK Data Pipeline shutdown complete")
+    return 0
+
 
 if __name__ == "__main__":
-    # Run the pipeline
+    parser = argparse.ArgumentParser(description="HK open-data ingestion pipeline")
+    parser.add_argument("--once", action="store_true", help="Run one cycle and exit (status 1 if a feed failed)")
+    parser.add_argument("--interval", type=int, default=settings.hk_data_update_interval,
+                        help="Seconds between cycles")
+    parser.add_argument("--sources", nargs="+", choices=sorted(SOURCE_ADAPTERS), help="Only these feeds")
+    args = parser.parse_args()
+
     try:
-        asyncio.run(main())
+        sys.exit(asyncio.run(main(args)))
     except KeyboardInterrupt:
         print("\n🛑 HK Data Pipeline stopped by user")
-    except Exception as e:
-        print(f"❌ Pipeline startup error: {e}")
-        sys.exit(1)
\ No newline at end of file
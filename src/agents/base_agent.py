@@ -13,9 +13,42 @@ from enum import Enum
 import asyncio
 import logging
 from datetime import datetime
+from decimal import Decimal
 
 from ..ai.ai_service import HealthcareAIService, AIRequest, AIResponse
 from ..ai.model_manager import UrgencyLevel, TaskComplexity
+from ..core.exceptions import ServiceOverloadedError
+from .context_builder import context_builder
+from .routing.keyword_engine import keyword_engine, MessageFeatures
+
+
+# Urgency keyword tables shared by all agents
+URGENCY_KEYWORDS = {
+    "critical": [
+        "emergency", "緊急", "urgent", "急", "help", "救命",
+        "chest pain", "胸痛", "can't breathe", "唔可以呼吸",
+        "suicide", "自殺", "kill myself", "hurt myself", "傷害自己",
+        "overdose", "服藥過量", "unconscious", "失去知覺"
+    ],
+    "high": [
+        "severe", "嚴重", "intense", "劇烈", "very worried", "好擔心",
+        "getting worse", "惡化", "can't sleep", "瞓唔到",
+        "haven't eaten", "冇食野", "can't function", "做唔到野"
+    ],
+    "medium": [
+        "concerned", "關心", "worried", "擔心", "uncomfortable", "唔舒服",
+        "pain", "痛", "tired", "攰", "stressed", "壓力"
+    ],
+}
+
+# Complex medical terminology used for complexity detection
+MEDICAL_TERMS = [
+    "diagnosis", "診斷", "medication", "藥物", "treatment", "治療",
+    "chronic", "慢性", "syndrome", "症候群", "disorder", "失調"
+]
+
+keyword_engine.register_groups("urgency", URGENCY_KEYWORDS)
+keyword_engine.register("complexity.medical_terms", MEDICAL_TERMS)
 
 
 class AgentCapability(Enum):
@@ -61,6 +94,7 @@ class AgentContext:
     cultural_context: Dict[str, Any]
     language_preference: str  # "en", "zh", "auto"
     timestamp: datetime
+    conversation_summary: str = ""  # Summary of turns older than conversation_history
 
 
 class BaseAgent(ABC):
@@ -152,6 +186,32 @@ class BaseAgent(ABC):
     
     # Core functionality methods
     
+    def analyze_input(self, text: str) -> MessageFeatures:
+        """
+        Get shared keyword features for a message.
+        
+        The message is scanned once by the global keyword engine; repeated
+        calls for the same text (from other agents or the orchestrator)
+        reuse the cached result.
+        
+        Args:
+            text: Message text
+            
+        Returns:
+            MessageFeatures for the message
+        """
+        return keyword_engine.analyze(text)
+    
+    def _register_keywords(self, groups: Dict[str, List[str]]) -> None:
+        """
+        Register this agent's keyword tables with the keyword engine.
+        
+        Args:
+            groups: Mapping of table name to keywords; registered as
+                "<agent_id>.<table name>"
+        """
+        keyword_engine.register_groups(self.agent_id, groups)
+    
     def detect_urgency(self, user_input: str, context: AgentContext) -> UrgencyLevel:
         """
         Detect urgency level of user input.
@@ -163,36 +223,15 @@ class BaseAgent(ABC):
         Returns:
             Detected urgency level
         """
-        user_input_lower = user_input.lower()
+        features = self.analyze_input(user_input)
         
-        # Emergency keywords
-        emergency_keywords = [
-            "emergency", "緊急", "urgent", "急", "help", "救命",
-            "chest pain", "胸痛", "can't breathe", "唔可以呼吸",
-            "suicide", "自殺", "kill myself", "hurt myself", "傷害自己",
-            "overdose", "服藥過量", "unconscious", "失去知覺"
-        ]
-        
-        if any(keyword in user_input_lower for keyword in emergency_keywords):
+        if features.has("urgency.critical"):
             return UrgencyLevel.CRITICAL
         
-        # High urgency indicators
-        high_urgency_keywords = [
-            "severe", "嚴重", "intense", "劇烈", "very worried", "好擔心",
-            "getting worse", "惡化", "can't sleep", "瞓唔到",
-            "haven't eaten", "冇食野", "can't function", "做唔到野"
-        ]
-        
-        if any(keyword in user_input_lower for keyword in high_urgency_keywords):
+        if features.has("urgency.high"):
             return UrgencyLevel.HIGH
         
-        # Medium urgency indicators
-        medium_urgency_keywords = [
-            "concerned", "關心", "worried", "擔心", "uncomfortable", "唔舒服",
-            "pain", "痛", "tired", "攰", "stressed", "壓力"
-        ]
-        
-        if any(keyword in user_input_lower for keyword in medium_urgency_keywords):
+        if features.has("urgency.medium"):
             return UrgencyLevel.MEDIUM
         
         return UrgencyLevel.LOW
@@ -218,12 +257,7 @@ class BaseAgent(ABC):
             return TaskComplexity.COMPLEX
         
         # Complex medical terminology
-        medical_terms = [
-            "diagnosis", "診斷", "medication", "藥物", "treatment", "治療",
-            "chronic", "慢性", "syndrome", "症候群", "disorder", "失調"
-        ]
-        
-        if sum(1 for term in medical_terms if term in user_input.lower()) > 2:
+        if self.analyze_input(user_input).count("complexity.medical_terms") > 2:
             return TaskComplexity.MODERATE
         
         return TaskComplexity.SIMPLE
@@ -306,19 +340,31 @@ class BaseAgent(ABC):
         urgency = self.detect_urgency(user_input, context)
         complexity = self.detect_complexity(user_input, context)
         
+        # Fit profile, summary and recent turns around the system prompt
+        packed = context_builder.pack(
+            system_prompt=system_prompt,
+            user_input=user_input,
+            history=context.conversation_history,
+            profile=context.user_profile,
+            summary=context.conversation_summary
+        )
+        
         # Ensure no sensitive data (like API keys) gets logged in context
         safe_context = {
-            "history": context.conversation_history[-5:],  # Last 5 exchanges
+            "history": packed.history,
             "user_profile": {k: v for k, v in context.user_profile.items() if not k.lower().endswith('_key')},
-            "cultural_context": context.cultural_context
+            "cultural_context": context.cultural_context,
+            "prompt_tokens_estimate": packed.total_tokens
         }
         
         return AIRequest(
             user_input=user_input,
-            system_prompt=system_prompt,
+            system_prompt=packed.system_prompt,
             agent_type=self.agent_id,
             conversation_context=safe_context,
-            urgency_level=urgency.value if hasattr(urgency, 'value') else str(urgency)
+            urgency_level=urgency.value if hasattr(urgency, 'value') else str(urgency),
+            conversation_history=packed.history,
+            requester_id=context.user_id
         )
     
     async def _generate_ai_response(
@@ -336,17 +382,40 @@ class BaseAgent(ABC):
         """
         try:
             return await self.ai_service.process_request(ai_request)
+        except ServiceOverloadedError as e:
+            self.logger.warning(f"AI request shed ({ai_request.urgency_level}): {e}")
+            return self._fallback_ai_response(ai_request, str(e))
         except Exception as e:
             self.logger.error(f"AI service error: {e}")
-            # Return fallback response
-            return AIResponse(
-                content="I'm experiencing technical difficulties. Please try again or contact support if this persists.",
-                model_used="fallback",
-                tokens_used=0,
-                confidence_score=0.5,
-                processing_time=0.0,
-                cost=0.0
-            )
+            return self._fallback_ai_response(ai_request, str(e))
+    
+    def _fallback_ai_response(self, ai_request: AIRequest, error_message: str) -> AIResponse:
+        """Canned response used when the AI service fails or sheds the request."""
+        return AIResponse(
+            content="I'm experiencing technical difficulties. Please try again or contact support if this persists.",
+            model_used="fallback",
+            model_tier="fallback",
+            agent_type=ai_request.agent_type,
+            processing_time_ms=0,
+            cost=Decimal('0.0'),
+            usage_stats={},
+            success=False,
+            error_message=error_message,
+            confidence_score=0.5
+        )
+    
+    def build_emergency_card(self, user_input: str, context: AgentContext) -> Optional[Dict[str, Any]]:
+        """
+        Build an instant emergency card to send before the full response.
+        
+        Args:
+            user_input: User's message
+            context: Conversation context
+            
+        Returns:
+            Card dictionary, or None for agents without an emergency fast path
+        """
+        return None
     
     def get_activation_message(self, context: AgentContext) -> str:
         """
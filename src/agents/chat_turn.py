@@ -0,0 +1,204 @@
+"""
+Chat Turn Pipeline - Healthcare AI V2
+=====================================
+
+The stages of one chat turn as a TurnPipeline, shared by the REST chat
+endpoint, the /agents/chat/ws endpoint and the Live2D WebSocket handler.
+
+Stage graph (stages without a context manager or Live2D mappers are left out):
+
+    profile ──┐
+              ├──> context ──> route ──┬──> emergency_card
+    memory ───┘                        ├──> gesture
+                                       └──> generate ──┬──> emotion
+                                                       └──> persist
+    hk_data
+
+Profile detection, the conversation history load and the HK facility fetch
+run concurrently; gesture selection overlaps the LLM call, and emotion
+mapping overlaps the history write. The facility fetch only feeds the
+response payload, so the LLM call never waits for it, and it is skipped
+when the user gave no district.
+"""
+
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from .base_agent import AgentContext
+from .turn_pipeline import Stage, TurnPipeline, TurnResult, TurnState
+
+# HK facilities attached to the agent context
+HK_FACILITY_LIMIT = 3
+HK_DATA_TIMEOUT_SECONDS = 2.0
+
+
+class ChatTurnPipeline:
+    """
+    One chat turn: context, routing, response generation and follow-up work.
+
+    Build one per entry point and reuse it; run() is safe to call
+    concurrently.
+    """
+
+    def __init__(
+        self,
+        orchestrator,
+        context_manager=None,
+        emotion_mapper=None,
+        gesture_library=None,
+        name: str = "chat_turn"
+    ):
+        """
+        Initialize the pipeline.
+
+        Args:
+            orchestrator: AgentOrchestrator used for routing
+            context_manager: ConversationContextManager; when omitted, callers
+                pass a ready AgentContext to run() and nothing is persisted
+            emotion_mapper: EmotionMapper for Live2D avatar emotions
+            gesture_library: GestureLibrary for Live2D gestures
+            name: Pipeline name used in traces and metrics
+        """
+        self.orchestrator = orchestrator
+        self.context_manager = context_manager
+        self.emotion_mapper = emotion_mapper
+        self.gesture_library = gesture_library
+
+        stages: List[Stage] = []
+        if context_manager is not None:
+            stages += [
+                Stage("profile", self._profile),
+                Stage("memory", self._memory, blocking=True),
+                Stage("context", self._context, depends_on=("profile", "memory")),
+            ]
+        route_after = ("context",) if context_manager is not None else ()
+        stages += [
+            Stage("hk_data", self._hk_data, optional=True, default=[], timeout=HK_DATA_TIMEOUT_SECONDS),
+            Stage("route", self._route, depends_on=route_after),
+            # Listed before generate so the card is sent before the LLM call starts
+            Stage("emergency_card", self._emergency_card, depends_on=("route",), optional=True),
+            Stage("generate", self._generate, depends_on=("route",)),
+        ]
+        if gesture_library is not None:
+            stages.append(Stage("gesture", self._gesture, depends_on=("route",), optional=True, default="default"))
+        if emotion_mapper is not None:
+            stages.append(Stage("emotion", self._emotion, depends_on=("generate",), optional=True, default="neutral"))
+        if context_manager is not None:
+            stages.append(Stage("persist", self._persist, depends_on=("generate",), blocking=True, optional=True))
+
+        self.pipeline = TurnPipeline(name, stages)
+
+    async def run(
+        self,
+        user_id: str,
+        session_id: str,
+        message: str,
+        language: str = "en",
+        context: Optional[AgentContext] = None,
+        preferred_agent: Optional[str] = None,
+        additional_context: Optional[Dict[str, Any]] = None,
+        district: Optional[str] = None,
+        on_emergency_card: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None
+    ) -> TurnResult:
+        """
+        Run one chat turn.
+
+        Args:
+            user_id: User identifier
+            session_id: Session identifier
+            message: Sanitized user message
+            language: Language of the request
+            context: Ready agent context (required without a context manager)
+            preferred_agent: Manually selected agent type
+            additional_context: Extra attributes set on the agent context
+            district: User's district for the HK facility lookup (no lookup
+                without one)
+            on_emergency_card: Called with the instant emergency card before
+                the LLM response is generated
+
+        Returns:
+            TurnResult; result["route"] is (agent, OrchestrationResult) and
+            result["generate"] the agent response
+        """
+        if self.context_manager is None and context is None:
+            raise ValueError("A context is required when the pipeline has no context manager")
+        return await self.pipeline.run(
+            user_id=user_id,
+            session_id=session_id,
+            message=message,
+            language=language,
+            context=context,
+            preferred_agent=preferred_agent,
+            additional_context=additional_context,
+            district=district,
+            on_emergency_card=on_emergency_card
+        )
+
+    # ------------------------------------------------------------------
+    # Stages
+    # ------------------------------------------------------------------
+
+    def _profile(self, state: TurnState):
+        return self.context_manager.get_or_create_user_profile(state["user_id"], state["message"])
+
+    def _memory(self, state: TurnState):
+        return self.context_manager.load_conversation_memory(
+            state["user_id"], state["session_id"], state["message"]
+        )
+
+    def _context(self, state: TurnState) -> AgentContext:
+        return self.context_manager.build_context(
+            state["user_id"], state["session_id"], state["message"],
+            state["profile"], state["memory"], state["additional_context"]
+        )
+
+    async def _hk_data(self, state: TurnState) -> List[Dict[str, Any]]:
+        if not state["district"]:
+            return []
+        from ..data.storage.hk_data_repository import get_hk_data_repository
+
+        repository = await get_hk_data_repository()
+        return await repository.get_nearest_facilities(district=state["district"], limit=HK_FACILITY_LIMIT)
+
+    async def _route(self, state: TurnState):
+        return await self.orchestrator.route_request(
+            user_input=state["message"],
+            context=state["context"],
+            preferred_agent=state["preferred_agent"]
+        )
+
+    async def _emergency_card(self, state: TurnState) -> Optional[Dict[str, Any]]:
+        agent, _ = state["route"]
+        card = agent.build_emergency_card(state["message"], state["context"])
+        if card and state["on_emergency_card"]:
+            await state["on_emergency_card"](card)
+        return card
+
+    async def _generate(self, state: TurnState):
+        agent, _ = state["route"]
+        return await agent.generate_response(state["message"], state["context"])
+
+    def _gesture(self, state: TurnState) -> str:
+        _, routing_result = state["route"]
+        return self.gesture_library.get_cultural_gesture(
+            agent_type=routing_result.selected_agent,
+            context=state["message"],
+            language=state["language"]
+        )
+
+    def _emotion(self, state: TurnState) -> str:
+        _, routing_result = state["route"]
+        return self.emotion_mapper.map_agent_to_emotion(
+            agent_type=routing_result.selected_agent,
+            response=state["generate"].content,
+            urgency=routing_result.urgency_level,
+            confidence=routing_result.confidence
+        )
+
+    def _persist(self, state: TurnState):
+        _, routing_result = state["route"]
+        self.context_manager.update_conversation_history(
+            state["memory"],
+            state["generate"].content,
+            "assistant",
+            agent_id=routing_result.selected_agent
+        )
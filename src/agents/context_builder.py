@@ -0,0 +1,360 @@
+"""
+Context Builder - Healthcare AI V2
+=================================
+
+Token-aware assembly of the prompt sent to the model for one chat turn.
+
+Key Features:
+- Token estimates per model family (see src/ai/token_estimator.py)
+- Packing of system prompt, user profile, conversation summary and recent
+  turns into a configured token budget, newest turns first
+- Background summarizer that folds older turns into a rolling summary
+  stored with the session
+"""
+
+import asyncio
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from ..ai.token_estimator import token_estimator
+from ..config import settings
+from .conversation_models import ConversationMemory
+
+
+logger = logging.getLogger("agents.context_builder")
+
+# Profile fields worth spending prompt tokens on, with their labels
+PROFILE_FIELDS = (
+    ("age_group", "Age group"),
+    ("health_conditions", "Known conditions"),
+    ("medications", "Medications"),
+    ("allergies", "Allergies"),
+    ("communication_style", "Communication style"),
+)
+
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?。！？])\s*|\n+")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# Optional async summarizer: (previous summary, messages to fold) -> new summary
+SummarizeFn = Callable[[str, List[Dict[str, Any]]], Awaitable[str]]
+
+
+@dataclass
+class PackedContext:
+    """Prompt parts selected for one model request"""
+    system_prompt: str
+    history: List[Dict[str, str]]
+    total_tokens: int
+    budget: int
+    dropped_messages: int = 0
+    section_tokens: Dict[str, int] = field(default_factory=dict)
+
+
+def format_profile(profile: Optional[Dict[str, Any]]) -> str:
+    """Render the useful parts of a user profile as prompt text"""
+    if not profile:
+        return ""
+    lines = []
+    for key, label in PROFILE_FIELDS:
+        value = profile.get(key)
+        if not value:
+            continue
+        if isinstance(value, (list, tuple, set)):
+            value = ", ".join(str(item) for item in value)
+        lines.append(f"- {label}: {value}")
+    return "Known user profile:\n" + "\n".join(lines) if lines else ""
+
+
+class ContextBuilder:
+    """
+    Packs prompt sections into a token budget.
+
+    Required sections (system prompt and current user input) are always kept.
+    Optional sections are added while they fit, in priority order: user
+    profile, conversation summary, then recent turns from newest to oldest.
+    """
+
+    def __init__(
+        self,
+        budget: Optional[int] = None,
+        history_budget: Optional[int] = None,
+        model_family: Optional[str] = None
+    ):
+        """
+        Initialize the builder.
+
+        Args:
+            budget: Prompt token budget (settings.context_token_budget)
+            history_budget: Token budget for the history window selected when
+                the agent is not yet known (settings.context_history_token_budget)
+            model_family: Tokenizer family used when no model is given
+        """
+        self.budget = budget or settings.context_token_budget
+        self.history_budget = history_budget or settings.context_history_token_budget
+        self.model_family = model_family or settings.context_model_family
+
+    def recent_turns(
+        self,
+        history: List[Dict[str, Any]],
+        max_tokens: Optional[int] = None,
+        model: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Newest messages of a history that fit in a token budget.
+
+        Args:
+            history: Messages in chronological order
+            max_tokens: Budget (history_budget if omitted)
+            model: Model id or family for token estimates
+
+        Returns:
+            Chronological suffix of history
+        """
+        remaining = self.history_budget if max_tokens is None else max_tokens
+        model = model or self.model_family
+        start = len(history)
+        while start > 0:
+            tokens = token_estimator.count_message(history[start - 1], model)
+            if tokens > remaining:
+                break
+            remaining -= tokens
+            start -= 1
+        return history[start:]
+
+    def pack(
+        self,
+        system_prompt: str,
+        user_input: str,
+        history: Optional[List[Dict[str, Any]]] = None,
+        profile: Optional[Dict[str, Any]] = None,
+        summary: str = "",
+        model: Optional[str] = None,
+        budget: Optional[int] = None
+    ) -> PackedContext:
+        """
+        Select the prompt sections for one request.
+
+        Args:
+            system_prompt: Agent system prompt
+            user_input: Current user message (sent separately, never dropped)
+            history: Recent messages in chronological order; a trailing copy
+                of user_input is ignored
+            profile: User profile fields
+            summary: Summary of turns older than history
+            model: Model id or family for token estimates
+            budget: Prompt token budget (self.budget if omitted)
+
+        Returns:
+            Packed system prompt and history messages
+        """
+        model = model or self.model_family
+        budget = budget or self.budget
+        history = list(history or [])
+        if history and history[-1].get("role") == "user" and history[-1].get("content") == user_input[:1000]:
+            history.pop()
+
+        sections = {
+            "system": token_estimator.count_message({"content": system_prompt}, model),
+            "user_input": token_estimator.count_message({"content": user_input}, model),
+        }
+        used = sections["system"] + sections["user_input"]
+        system_parts = [system_prompt]
+
+        for name, text in (
+            ("profile", format_profile(profile)),
+            ("summary", f"Summary of the earlier conversation:\n{summary}" if summary else ""),
+        ):
+            if not text:
+                continue
+            tokens = token_estimator.count(text, model) + 2
+            if used + tokens <= budget:
+                system_parts.append(text)
+                sections[name] = tokens
+                used += tokens
+
+        recent = self.recent_turns(history, max(budget - used, 0), model)
+        sections["history"] = sum(token_estimator.count_message(message, model) for message in recent)
+        used += sections["history"]
+
+        return PackedContext(
+            system_prompt="\n\n".join(system_parts),
+            history=[
+                {"role": message.get("role", "user"), "content": message.get("content", "")}
+                for message in recent
+                if message.get("role") in ("user", "assistant")
+            ],
+            total_tokens=used,
+            budget=budget,
+            dropped_messages=len(history) - len(recent),
+            section_tokens=sections
+        )
+
+
+def extractive_summary(
+    previous: str,
+    messages: List[Dict[str, Any]],
+    max_tokens: int,
+    model: Optional[str] = None,
+    max_line_chars: int = 160
+) -> str:
+    """
+    Fold messages into a summary by keeping the first sentence of each turn.
+
+    The oldest lines are dropped once the summary exceeds max_tokens.
+
+    Args:
+        previous: Existing summary (one line per folded turn)
+        messages: Messages to fold, in chronological order
+        max_tokens: Summary token budget
+        model: Model id or family for token estimates
+        max_line_chars: Maximum characters kept per turn
+
+    Returns:
+        Updated summary
+    """
+    lines = previous.splitlines() if previous else []
+    for message in messages:
+        content = _WHITESPACE_RE.sub(" ", str(message.get("content") or "")).strip()
+        if not content:
+            continue
+        first_sentence = _SENTENCE_END_RE.split(content, maxsplit=1)[0] or content
+        if len(first_sentence) > max_line_chars:
+            first_sentence = first_sentence[:max_line_chars - 1] + "…"
+        role = "User" if message.get("role") == "user" else "Assistant"
+        lines.append(f"- {role}: {first_sentence}")
+
+    while len(lines) > 1 and token_estimator.count("\n".join(lines), model) > max_tokens:
+        lines.pop(0)
+    return "\n".join(lines)
+
+
+class ConversationSummarizer:
+    """
+    Folds turns that fall out of the recent window into the session summary.
+
+    Runs as a background task so the chat turn never waits for it; at most
+    one fold per session is in flight.
+    """
+
+    def __init__(
+        self,
+        summarize: Optional[SummarizeFn] = None,
+        keep_recent: Optional[int] = None,
+        batch: Optional[int] = None,
+        max_tokens: Optional[int] = None
+    ):
+        """
+        Initialize the summarizer.
+
+        Args:
+            summarize: Async summarizer (e.g. an LLM call); the extractive
+                summary is used when omitted or when it fails
+            keep_recent: Newest messages never folded
+            batch: Minimum foldable messages before a fold runs
+            max_tokens: Summary token budget
+        """
+        self.summarize = summarize
+        self.keep_recent = keep_recent or settings.context_keep_recent_messages
+        self.batch = batch or settings.context_summarize_batch
+        self.max_tokens = max_tokens or settings.context_summary_max_tokens
+        self._in_flight: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self.folds = 0
+        self.failures = 0
+
+    def pending_messages(self, memory: ConversationMemory) -> List[Dict[str, Any]]:
+        """Unsummarized messages older than the recent window"""
+        start = max(memory.summarized_through - memory.history_offset, 0)
+        end = len(memory.conversation_history) - self.keep_recent
+        return memory.conversation_history[start:end] if end > start else []
+
+    def maybe_schedule(
+        self,
+        memory: ConversationMemory,
+        persist: Optional[Callable[[str, str, str, int], None]] = None
+    ) -> bool:
+        """
+        Start a background fold if enough older turns are waiting.
+
+        Args:
+            memory: Session memory (updated in place when the fold finishes)
+            persist: Stores (user_id, session_id, summary, summarized_through)
+
+        Returns:
+            True if a fold was started
+        """
+        key = f"{memory.user_id}:{memory.session_id}"
+        if key in self._in_flight or len(self.pending_messages(memory)) < self.batch:
+            return False
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+
+        self._in_flight.add(key)
+        if loop is None:
+            # No event loop (scripts, sync callers): the extractive fold is cheap
+            try:
+                messages = self.pending_messages(memory)
+                summary = extractive_summary(memory.conversation_summary, messages, self.max_tokens)
+                self._apply(memory, summary, self._through(memory, messages))
+                if persist is not None:
+                    persist(memory.user_id, memory.session_id, memory.conversation_summary, memory.summarized_through)
+            finally:
+                self._in_flight.discard(key)
+            return True
+
+        task = loop.create_task(self._fold(key, memory, persist))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return True
+
+    def _through(self, memory: ConversationMemory, messages: List[Dict[str, Any]]) -> int:
+        start = max(memory.summarized_through - memory.history_offset, 0)
+        return memory.history_offset + start + len(messages)
+
+    def _apply(self, memory: ConversationMemory, summary: str, through: int) -> None:
+        memory.conversation_summary = summary
+        memory.summarized_through = through
+        self.folds += 1
+
+    async def _fold(self, key: str, memory: ConversationMemory, persist) -> None:
+        try:
+            messages = self.pending_messages(memory)
+            through = self._through(memory, messages)
+            summary = None
+            if self.summarize is not None:
+                try:
+                    summary = await self.summarize(memory.conversation_summary, messages)
+                except Exception as e:
+                    self.failures += 1
+                    logger.warning(f"Summarizer failed for {key}, using extractive summary: {e}")
+            if not summary:
+                summary = extractive_summary(memory.conversation_summary, messages, self.max_tokens)
+
+            self._apply(memory, summary, through)
+            if persist is not None:
+                # Database writes are blocking
+                await asyncio.to_thread(persist, memory.user_id, memory.session_id, summary, through)
+            logger.debug(f"Folded {len(messages)} messages into summary for {key}")
+        except Exception as e:
+            self.failures += 1
+            logger.error(f"Conversation summary failed for {key}: {e}")
+        finally:
+            self._in_flight.discard(key)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Summarizer counters"""
+        return {
+            "folds": self.folds,
+            "failures": self.failures,
+            "in_flight": len(self._in_flight)
+        }
+
+
+# Global instances
+context_builder = ContextBuilder()
+conversation_summarizer = ConversationSummarizer()
@@ -25,7 +25,9 @@ import re
 
 from .base_agent import AgentContext, AgentResponse
 from .conversation_models import ConversationState, LanguagePreference, HealthPattern, UserProfile, ConversationMemory
+from .context_builder import context_builder, conversation_summarizer
 from .db_session_manager import DatabaseSessionManager
+from .routing.keyword_engine import keyword_engine
 
 
 class ConversationContextManager:
@@ -70,6 +72,76 @@ class ConversationContextManager:
             "english": re.compile(r'[a-zA-Z]+'),
             "mixed_language": re.compile(r'[\u4e00-\u9fff].*[a-zA-Z]|[a-zA-Z].*[\u4e00-\u9fff]')
         }
+        
+        # Age group detection
+        self.age_indicators = {
+            "child": [
+                "小學", "primary school", "elementary", "小朋友", "kid", "child",
+                "功課", "homework", "老師", "teacher", "同學", "classmate",
+                "爸爸媽媽", "mommy", "daddy", "父母", "parents"
+            ],
+            "teen": [
+                "中學", "secondary school", "high school", "中四", "中五", "中六",
+                "DSE", "考試", "exam", "升學", "university", "大學",
+                "青少年", "teenager", "teen", "朋友", "boyfriend", "girlfriend"
+            ],
+            "elderly": [
+                "退休", "retired", "養老", "pension", "老人", "elderly", "長者", "senior",
+                "孫", "grandchild", "獨居", "living alone", "老伴", "spouse passed",
+                "關節", "arthritis", "血壓", "blood pressure", "糖尿病", "diabetes"
+            ]
+        }
+        
+        # Living situation detection
+        self.living_indicators = {
+            "alone": ["獨居", "living alone", "by myself", "一個人", "沒有人陪", "lonely"],
+            "family": ["家人", "family", "父母", "parents", "兄弟姐妹", "siblings", "丈夫", "wife", "husband"],
+            "care_facility": ["護老院", "care home", "nursing home", "老人院", "安老院"]
+        }
+        
+        # Health conditions detection
+        self.health_conditions = [
+            "高血壓", "hypertension", "blood pressure",
+            "糖尿病", "diabetes", 
+            "心臟病", "heart disease", "heart condition",
+            "關節炎", "arthritis",
+            "抑鬱", "depression",
+            "焦慮", "anxiety",
+            "自閉症", "autism",
+            "過度活躍", "adhd"
+        ]
+        
+        # Communication style detection
+        self.communication_styles = {
+            "formal": ["please", "thank you", "謝謝", "麻煩", "請問", "您"],
+            "casual": ["hey", "hi", "咩話", "點解", "好嬲", "super"]
+        }
+        
+        # Traditional medicine interest
+        self.tcm_indicators = ["中醫", "tcm", "traditional", "herbal", "草藥", "針灸", "acupuncture"]
+        
+        # Health topic categories
+        self.health_topics = {
+            "physical_symptoms": ["pain", "痛", "headache", "頭痛", "fever", "發燒", "tired", "攰"],
+            "mental_health": ["stress", "壓力", "anxiety", "焦慮", "sad", "傷心", "depressed", "抑鬱"],
+            "medications": ["medication", "藥物", "pills", "藥丸", "dose", "劑量"],
+            "chronic_conditions": ["diabetes", "糖尿病", "hypertension", "高血壓", "arthritis", "關節炎"],
+            "lifestyle": ["exercise", "運動", "diet", "飲食", "sleep", "睡眠"],
+            "preventive_care": ["checkup", "檢查", "screening", "篩檢", "vaccination", "疫苗"]
+        }
+        
+        keyword_engine.register_groups("context.age", self.age_indicators)
+        keyword_engine.register_groups("context.living", self.living_indicators)
+        keyword_engine.register("context.health_conditions", self.health_conditions)
+        keyword_engine.register_groups("context.style", self.communication_styles)
+        keyword_engine.register_groups("context.cultural", self.hk_cultural_indicators)
+        keyword_engine.register("context.cultural.formal", [
+            indicator
+            for category in ["formal_address", "family_respect"]
+            for indicator in self.hk_cultural_indicators[category]
+        ])
+        keyword_engine.register("context.tcm", self.tcm_indicators)
+        keyword_engine.register_groups("context.topics", self.health_topics)
     
     def create_context(
         self, 
@@ -93,20 +165,72 @@ class ConversationContextManager:
         # Get or create user profile
         user_profile = self.get_or_create_user_profile(user_id, user_input)
         
-        # Get or create conversation memory
-        conversation_memory = self.get_or_create_conversation_memory(user_id, session_id)
+        # Get or create conversation memory with the current input appended
+        conversation_memory = self.load_conversation_memory(user_id, session_id, user_input)
+        
+        return self.build_context(
+            user_id, session_id, user_input, user_profile, conversation_memory, additional_context
+        )
+    
+    def load_conversation_memory(self, user_id: str, session_id: str, user_input: str) -> ConversationMemory:
+        """
+        Load conversation memory and record the current user input.
+        
+        Blocks on the session database; async callers should run it in a
+        worker thread.
         
-        # Update conversation memory with current input
+        Args:
+            user_id: User identifier
+            session_id: Session identifier
+            user_input: Current user input
+            
+        Returns:
+            Conversation memory
+        """
+        conversation_memory = self.get_or_create_conversation_memory(user_id, session_id)
         self.update_conversation_history(conversation_memory, user_input, "user")
+        return conversation_memory
+    
+    def build_context(
+        self,
+        user_id: str,
+        session_id: str,
+        user_input: str,
+        user_profile: UserProfile,
+        conversation_memory: ConversationMemory,
+        additional_context: Optional[Dict[str, Any]] = None
+    ) -> AgentContext:
+        """
+        Build the agent context from a loaded profile and conversation memory.
         
+        Args:
+            user_id: User identifier
+            session_id: Session identifier
+            user_input: Current user input
+            user_profile: User profile
+            conversation_memory: Conversation memory including the current input
+            additional_context: Additional context information
+            
+        Returns:
+            AgentContext for agent processing
+        """
         # Extract cultural context
         cultural_context = self.extract_cultural_context(user_input, user_profile)
         
+        # Older turns are folded into the session summary in the background
+        conversation_summarizer.maybe_schedule(
+            conversation_memory, self.db_session_manager.update_conversation_summary
+        )
+        unsummarized = conversation_memory.conversation_history[
+            max(conversation_memory.summarized_through - conversation_memory.history_offset, 0):
+        ]
+        
         # Create agent context
         context = AgentContext(
             user_id=user_id,
             session_id=session_id,
-            conversation_history=conversation_memory.conversation_history[-10:],  # Last 10 exchanges
+            conversation_history=context_builder.recent_turns(unsummarized),  # Newest turns within the history token budget
+            conversation_summary=conversation_memory.conversation_summary,
             user_profile=user_profile.__dict__,
             cultural_context=cultural_context,
             language_preference=user_profile.language_preference.value,
@@ -190,28 +314,11 @@ class ConversationContextManager:
         """
         profile_updates = {}
         input_lower = user_input.lower()
+        features = keyword_engine.analyze(user_input)
         
         # Age group detection
-        age_indicators = {
-            "child": [
-                "小學", "primary school", "elementary", "小朋友", "kid", "child",
-                "功課", "homework", "老師", "teacher", "同學", "classmate",
-                "爸爸媽媽", "mommy", "daddy", "父母", "parents"
-            ],
-            "teen": [
-                "中學", "secondary school", "high school", "中四", "中五", "中六",
-                "DSE", "考試", "exam", "升學", "university", "大學",
-                "青少年", "teenager", "teen", "朋友", "boyfriend", "girlfriend"
-            ],
-            "elderly": [
-                "退休", "retired", "養老", "pension", "老人", "elderly", "長者", "senior",
-                "孫", "grandchild", "獨居", "living alone", "老伴", "spouse passed",
-                "關節", "arthritis", "血壓", "blood pressure", "糖尿病", "diabetes"
-            ]
-        }
-        
-        for age_group, keywords in age_indicators.items():
-            if any(keyword in input_lower for keyword in keywords):
+        for age_group in self.age_indicators:
+            if features.has(f"context.age.{age_group}"):
                 profile_updates["age_group"] = age_group
                 break
         
@@ -240,31 +347,13 @@ class ConversationContextManager:
                 break
         
         # Living situation detection
-        living_indicators = {
-            "alone": ["獨居", "living alone", "by myself", "一個人", "沒有人陪", "lonely"],
-            "family": ["家人", "family", "父母", "parents", "兄弟姐妹", "siblings", "丈夫", "wife", "husband"],
-            "care_facility": ["護老院", "care home", "nursing home", "老人院", "安老院"]
-        }
-        
-        for situation, keywords in living_indicators.items():
-            if any(keyword in input_lower for keyword in keywords):
+        for situation in self.living_indicators:
+            if features.has(f"context.living.{situation}"):
                 profile_updates["living_situation"] = situation
                 break
         
         # Health conditions detection
-        health_conditions = [
-            "高血壓", "hypertension", "blood pressure",
-            "糖尿病", "diabetes", 
-            "心臟病", "heart disease", "heart condition",
-            "關節炎", "arthritis",
-            "抑鬱", "depression",
-            "焦慮", "anxiety",
-            "自閉症", "autism",
-            "過度活躍", "adhd"
-        ]
-        
-        mentioned_conditions = [condition for condition in health_conditions 
-                              if condition in input_lower]
+        mentioned_conditions = features.matches("context.health_conditions")
         
         if mentioned_conditions:
             profile_updates["health_conditions"] = mentioned_conditions
@@ -282,9 +371,9 @@ class ConversationContextManager:
             profile_updates["language_preference"] = LanguagePreference.ENGLISH
         
         # Communication style detection
-        if any(word in input_lower for word in ["please", "thank you", "謝謝", "麻煩", "請問", "您"]):
+        if features.has("context.style.formal"):
             profile_updates["communication_style"] = "formal"
-        elif any(word in input_lower for word in ["hey", "hi", "咩話", "點解", "好嬲", "super"]):
+        elif features.has("context.style.casual"):
             profile_updates["communication_style"] = "casual"
         
         return profile_updates
@@ -338,28 +427,23 @@ class ConversationContextManager:
             "traditional_medicine_interest": False
         }
         
-        input_lower = user_input.lower()
+        features = keyword_engine.analyze(user_input)
         
         # Check for language mixing
         context["language_mixing"] = bool(self.language_patterns["mixed_language"].search(user_input))
         
         # Detect formality level
-        formal_indicators = [ind for category in ["formal_address", "family_respect"] 
-                           for ind in self.hk_cultural_indicators[category]]
-        if any(indicator in input_lower for indicator in formal_indicators):
+        if features.has("context.cultural.formal"):
             context["formality_level"] = "high"
         
         # Family orientation
-        family_indicators = self.hk_cultural_indicators["family_respect"]
-        context["family_orientation"] = any(indicator in input_lower for indicator in family_indicators)
+        context["family_orientation"] = features.has("context.cultural.family_respect")
         
         # Work stress context
-        work_indicators = self.hk_cultural_indicators["work_culture"]
-        context["work_stress_context"] = any(indicator in input_lower for indicator in work_indicators)
+        context["work_stress_context"] = features.has("context.cultural.work_culture")
         
         # Traditional medicine interest
-        tcm_indicators = ["中醫", "tcm", "traditional", "herbal", "草藥", "針灸", "acupuncture"]
-        context["traditional_medicine_interest"] = any(indicator in input_lower for indicator in tcm_indicators)
+        context["traditional_medicine_interest"] = features.has("context.tcm")
         
         return context
     
@@ -405,6 +489,7 @@ class ConversationContextManager:
         
         # Trim history if too long
         if len(memory.conversation_history) > self.max_conversation_history:
+            memory.history_offset += len(memory.conversation_history) - self.max_conversation_history
             memory.conversation_history = memory.conversation_history[-self.max_conversation_history:]
         
         # Extract and track health topics
@@ -419,21 +504,11 @@ class ConversationContextManager:
             memory: Conversation memory
             user_input: User's message
         """
-        input_lower = user_input.lower()
-        
-        # Health topic categories
-        health_topics = {
-            "physical_symptoms": ["pain", "痛", "headache", "頭痛", "fever", "發燒", "tired", "攰"],
-            "mental_health": ["stress", "壓力", "anxiety", "焦慮", "sad", "傷心", "depressed", "抑鬱"],
-            "medications": ["medication", "藥物", "pills", "藥丸", "dose", "劑量"],
-            "chronic_conditions": ["diabetes", "糖尿病", "hypertension", "高血壓", "arthritis", "關節炎"],
-            "lifestyle": ["exercise", "運動", "diet", "飲食", "sleep", "睡眠"],
-            "preventive_care": ["checkup", "檢查", "screening", "篩檢", "vaccination", "疫苗"]
-        }
+        features = keyword_engine.analyze(user_input)
         
         # Track mentioned topics
-        for topic, keywords in health_topics.items():
-            if any(keyword in input_lower for keyword in keywords):
+        for topic in self.health_topics:
+            if features.has(f"context.topics.{topic}"):
                 if topic not in memory.health_topics_discussed:
                     memory.health_topics_discussed.append(topic)
         
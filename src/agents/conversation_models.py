@@ -74,6 +74,9 @@ class ConversationMemory:
     
     # Conversation content
     conversation_history: List[Dict[str, Any]] = field(default_factory=list)
+    history_offset: int = 0  # absolute index of conversation_history[0]
+    conversation_summary: str = ""  # older turns folded by the summarizer
+    summarized_through: int = 0  # absolute index of the first unsummarized message
     health_topics_discussed: List[str] = field(default_factory=list)
     health_patterns: Dict[str, HealthPattern] = field(default_factory=dict)
     concerns_raised: List[str] = field(default_factory=list)
@@ -167,6 +167,11 @@ class DatabaseSessionManager:
         if session_data['health_topics']:
             memory.health_topics_discussed = session_data['health_topics']  # Already parsed as JSONB
         
+        # Load the rolling summary of older turns
+        conversation_data = session_data.get('conversation_data') or {}
+        memory.conversation_summary = conversation_data.get('summary', "")
+        memory.summarized_through = conversation_data.get('summarized_through', 0)
+        
         # Load conversation history
         cursor.execute("""
             SELECT role, content, agent_id, timestamp, metadata
@@ -257,6 +262,30 @@ class DatabaseSessionManager:
         except Exception as e:
             self.logger.error(f"Error updating conversation history: {e}")
     
+    def update_conversation_summary(self, user_id: str, session_id: str, summary: str, summarized_through: int):
+        """Store the rolling summary of older turns and how many messages it covers."""
+        session_key = self.get_session_key(user_id, session_id)
+        
+        try:
+            conn = self._get_connection()
+            cursor = conn.cursor()
+            
+            cursor.execute("""
+                UPDATE conversation_sessions 
+                SET conversation_data = COALESCE(conversation_data, '{}'::jsonb) || %s::jsonb
+                WHERE session_key = %s
+            """, (
+                json.dumps({"summary": summary, "summarized_through": summarized_through}),
+                session_key
+            ))
+            
+            conn.commit()
+            conn.close()
+            self.logger.debug(f"Updated conversation summary for {session_key} through message {summarized_through}")
+            
+        except Exception as e:
+            self.logger.error(f"Error updating conversation summary: {e}")
+    
     def clear_temporary_session(self, user_id: str, session_id: str) -> bool:
         """Clear a temporary session (for anonymous users)."""
         if self.is_authenticated_user(user_id):
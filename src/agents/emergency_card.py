@@ -0,0 +1,387 @@
+"""
+Emergency Card - Healthcare AI V2
+=================================
+
+Instant, templated emergency information for the Safety Guardian fast path.
+The card is sent to the user before the LLM elaboration, so it must never
+wait on I/O: every localized string is precomputed, and hotline and A&E data
+from HKDataRepository.get_emergency_data are cached in memory and refreshed
+in the background.
+
+Features:
+- Localized cards (English and Traditional Chinese / zh-HK)
+- Hotlines per emergency type (999, poison, mental health, child protection)
+- Nearest A&E departments, preferring the user's district when known
+- Pre-rendered cards per (language, emergency type); building one is a dict copy
+- Background refresh of facility data, never on the request path
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..config import settings
+from ..core.metrics import LatencyHistogram
+
+
+logger = logging.getLogger("agents.emergency_card")
+
+LANGUAGES = ("en", "zh")
+EMERGENCY_TYPES = ("medical", "mental_health", "child", "elderly", "general")
+
+# A&E departments listed on a card
+MAX_FACILITIES = 3
+
+# Used until the first repository refresh completes
+DEFAULT_EMERGENCY_DATA: Dict[str, Any] = {
+    "emergency_hotline": "999",
+    "poison_hotline": "2772 9133",
+    "mental_health_hotline": "2466 7350",
+    "hospitals_with_ae": []
+}
+
+TITLES = {
+    "en": {
+        "medical": "🔴 Medical Emergency",
+        "mental_health": "🔴 Mental Health Crisis Support",
+        "child": "🔴 Child Safety Emergency",
+        "elderly": "🔴 Elderly Emergency",
+        "general": "🔴 Emergency Help"
+    },
+    "zh": {
+        "medical": "🔴 醫療緊急情況",
+        "mental_health": "🔴 心理危機支援",
+        "child": "🔴 兒童安全緊急情況",
+        "elderly": "🔴 長者緊急情況",
+        "general": "🔴 緊急求助"
+    }
+}
+
+BANNERS = {
+    "en": "🚨 If this is an emergency, call 999 immediately 🚨",
+    "zh": "🚨 如果這是緊急情況，請立即致電999 🚨"
+}
+
+FOOTERS = {
+    "en": "More detailed guidance follows. This card does not replace professional medical or emergency services.",
+    "zh": "詳細指導隨後提供。此資訊不能替代專業醫療或緊急服務。"
+}
+
+SECTION_LABELS = {
+    "en": {"hotlines": "Hotlines", "facilities": "Nearest A&E", "actions": "Do this now"},
+    "zh": {"hotlines": "求助熱線", "facilities": "最近的急症室", "actions": "立即行動"}
+}
+
+HOTLINE_LABELS = {
+    "en": {
+        "emergency": "Emergency Services (police, fire, ambulance)",
+        "poison": "Poison Information Centre",
+        "mental_health": "Hospital Authority Mental Health Direct",
+        "samaritans": "The Samaritans 24hr hotline",
+        "suicide_prevention": "Suicide Prevention Services",
+        "child_protection": "Social Welfare Department hotline (child protection)"
+    },
+    "zh": {
+        "emergency": "緊急服務（警察、消防、救護車）",
+        "poison": "醫院管理局毒理資訊中心",
+        "mental_health": "醫院管理局精神健康專線",
+        "samaritans": "撒瑪利亞會24小時熱線",
+        "suicide_prevention": "生命熱線",
+        "child_protection": "社會福利署熱線（兒童保護）"
+    }
+}
+
+# Hotlines that do not come from the repository
+STATIC_HOTLINES = {
+    "samaritans": "2896 0000",
+    "suicide_prevention": "2382 0000",
+    "child_protection": "2755 1122"
+}
+
+# Hotline keys per emergency type, in display order; repository keys are
+# resolved from get_emergency_data at refresh time
+HOTLINES_BY_TYPE = {
+    "medical": ("emergency", "poison"),
+    "mental_health": ("emergency", "samaritans", "suicide_prevention", "mental_health"),
+    "child": ("emergency", "child_protection"),
+    "elderly": ("emergency",),
+    "general": ("emergency",)
+}
+
+REPOSITORY_HOTLINE_KEYS = {
+    "emergency": "emergency_hotline",
+    "poison": "poison_hotline",
+    "mental_health": "mental_health_hotline"
+}
+
+EMERGENCY_ACTIONS = {
+    "en": {
+        "medical": [
+            "Call 999 immediately if life-threatening",
+            "Stay calm and stay with the person",
+            "Do not move person if spinal injury suspected",
+            "Gather medical history and current medications",
+            "Prepare for ambulance arrival"
+        ],
+        "mental_health": [
+            "Ensure immediate safety - remove harmful objects",
+            "Stay with the person, do not leave them alone",
+            "Call Samaritans 2896 0000 for crisis support",
+            "Contact parents/guardians if under 18",
+            "Arrange professional mental health evaluation"
+        ],
+        "child": [
+            "Contact parents/guardians immediately",
+            "Ensure child is in safe environment",
+            "Call 999 if immediate medical attention needed",
+            "Contact Child Protection Hotline 2755 1122 if abuse suspected",
+            "Stay calm and reassure the child"
+        ],
+        "general": [
+            "Assess immediate safety of situation",
+            "Call 999 if emergency services needed",
+            "Move to safe location if possible",
+            "Contact emergency contacts or family",
+            "Seek professional help immediately"
+        ]
+    },
+    "zh": {
+        "medical": [
+            "如有生命危險，立即致電999",
+            "保持冷靜，留在傷者身邊",
+            "懷疑脊椎受傷時不要移動傷者",
+            "準備病歷及正在服用的藥物",
+            "準備迎接救護車"
+        ],
+        "mental_health": [
+            "確保即時安全 - 移走危險物品",
+            "留在對方身邊，不要讓他獨處",
+            "致電撒瑪利亞會 2896 0000 尋求危機支援",
+            "如未滿18歲，聯絡家長或監護人",
+            "安排專業精神健康評估"
+        ],
+        "child": [
+            "立即聯絡家長或監護人",
+            "確保兒童處於安全環境",
+            "如需即時醫療援助，致電999",
+            "懷疑虐兒時致電 2755 1122",
+            "保持冷靜，安撫兒童"
+        ],
+        "general": [
+            "評估現場是否安全",
+            "如需緊急服務，致電999",
+            "盡可能移到安全地方",
+            "聯絡緊急聯絡人或家人",
+            "立即尋求專業協助"
+        ]
+    }
+}
+
+
+def normalize_language(language: Optional[str]) -> str:
+    """Map a language preference (en, zh, zh-HK, zh-CN, ...) to a card language"""
+    return "zh" if language and language.lower().startswith("zh") else "en"
+
+
+def emergency_actions(emergency_type: str, language: str = "en") -> List[str]:
+    """
+    Immediate action steps for an emergency type.
+
+    Args:
+        emergency_type: Emergency classification
+        language: Language preference
+
+    Returns:
+        List of actions (general actions for unknown types)
+    """
+    table = EMERGENCY_ACTIONS[normalize_language(language)]
+    return list(table.get(emergency_type, table["general"]))
+
+
+class EmergencyCardBuilder:
+    """
+    Builds localized emergency cards without I/O.
+
+    Cards for every (language, emergency type) are rendered whenever the
+    repository snapshot changes; build() only copies one and, when the user's
+    district is known, swaps in that district's A&E departments.
+    """
+
+    def __init__(self, refresh_interval: Optional[float] = None):
+        """
+        Initialize the builder with the default snapshot.
+
+        Args:
+            refresh_interval: Seconds before the repository snapshot is stale
+                (HK data cache TTL by default)
+        """
+        self.refresh_interval = refresh_interval or settings.hk_data_cache_ttl
+        self._refreshed_at: Optional[float] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._facilities: List[Dict[str, Any]] = []
+        self._facilities_by_district: Dict[str, List[Dict[str, Any]]] = {}
+        self._cards: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self.build_latency = LatencyHistogram(min_ms=0.001)
+        self.stats = {"built": 0, "refreshes": 0, "refresh_errors": 0}
+        self._render(DEFAULT_EMERGENCY_DATA)
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def build(
+        self,
+        emergency_type: str,
+        language: Optional[str] = "en",
+        district: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Build an emergency card.
+
+        Never awaits; schedules a background refresh if the snapshot is stale.
+
+        Args:
+            emergency_type: Emergency classification
+            language: Language preference (en, zh, zh-HK, zh-CN)
+            district: User's district, if known
+
+        Returns:
+            Card dictionary, including a pre-rendered "text" version
+        """
+        started = time.perf_counter()
+        self._schedule_refresh()
+
+        language = normalize_language(language)
+        if emergency_type not in EMERGENCY_TYPES:
+            emergency_type = "general"
+
+        card = dict(self._cards[(language, emergency_type)])
+        if district and district in self._facilities_by_district:
+            card["facilities"] = self._nearest(district, language)
+            card["text"] = self._render_text(card)
+        card["district"] = district
+
+        self.stats["built"] += 1
+        self.build_latency.record((time.perf_counter() - started) * 1000)
+        return card
+
+    async def refresh(self) -> None:
+        """Reload hotlines and A&E departments from the HK data repository"""
+        from ..data.storage.hk_data_repository import get_hk_data_repository
+
+        try:
+            repository = await get_hk_data_repository()
+            data = await repository.get_emergency_data()
+        except Exception as e:
+            self.stats["refresh_errors"] += 1
+            logger.warning(f"Emergency data refresh failed, keeping previous snapshot: {e}")
+            return
+        finally:
+            # Retry after the interval either way; failures must not hammer the repository
+            self._refreshed_at = time.monotonic()
+
+        self._render({**DEFAULT_EMERGENCY_DATA, **data})
+        self.stats["refreshes"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Card build counters and latency"""
+        return {
+            **self.stats,
+            "facilities": len(self._facilities),
+            "snapshot_age_seconds": (
+                round(time.monotonic() - self._refreshed_at, 1) if self._refreshed_at is not None else None
+            ),
+            "build_latency": self.build_latency.snapshot()
+        }
+
+    # ------------------------------------------------------------------
+    # Rendering
+    # ------------------------------------------------------------------
+
+    def _schedule_refresh(self):
+        if self._refreshed_at is not None and time.monotonic() - self._refreshed_at < self.refresh_interval:
+            return
+        if self._refresh_task is not None and not self._refresh_task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._refresh_task = loop.create_task(self.refresh())
+
+    def _render(self, data: Dict[str, Any]):
+        """Pre-render every card from a repository snapshot"""
+        facilities = [f for f in data.get("hospitals_with_ae") or [] if f.get("emergency", True)]
+        by_district: Dict[str, List[Dict[str, Any]]] = {}
+        for facility in facilities:
+            by_district.setdefault(facility.get("district", ""), []).append(facility)
+
+        hotline_numbers = dict(STATIC_HOTLINES)
+        for key, data_key in REPOSITORY_HOTLINE_KEYS.items():
+            if data.get(data_key):
+                hotline_numbers[key] = data[data_key]
+
+        cards = {}
+        for language in LANGUAGES:
+            facility_cards = [self._facility_entry(f, language) for f in facilities[:MAX_FACILITIES]]
+            for emergency_type in EMERGENCY_TYPES:
+                card = {
+                    "type": "emergency_card",
+                    "emergency_type": emergency_type,
+                    "language": language,
+                    "title": TITLES[language][emergency_type],
+                    "banner": BANNERS[language],
+                    "hotlines": [
+                        {"key": key, "label": HOTLINE_LABELS[language][key], "number": hotline_numbers[key]}
+                        for key in HOTLINES_BY_TYPE[emergency_type]
+                    ],
+                    "facilities": facility_cards,
+                    "actions": emergency_actions(emergency_type, language),
+                    "footer": FOOTERS[language]
+                }
+                card["text"] = self._render_text(card)
+                cards[(language, emergency_type)] = card
+
+        # Swap in one step so concurrent builds never see a partial render
+        self._facilities = facilities
+        self._facilities_by_district = by_district
+        self._cards = cards
+
+    def _nearest(self, district: str, language: str) -> List[Dict[str, Any]]:
+        """A&E departments in the district first, then the rest"""
+        local = self._facilities_by_district.get(district, [])
+        others = [f for f in self._facilities if f.get("district") != district]
+        return [self._facility_entry(f, language) for f in (local + others)[:MAX_FACILITIES]]
+
+    @staticmethod
+    def _facility_entry(facility: Dict[str, Any], language: str) -> Dict[str, Any]:
+        name = facility.get("name_zh") if language == "zh" else facility.get("name_en")
+        return {
+            "id": facility.get("id"),
+            "name": name or facility.get("name_en", ""),
+            "district": facility.get("district", ""),
+            "address": facility.get("address", ""),
+            "phone": facility.get("phone", ""),
+            "waiting_time": facility.get("waiting_time")
+        }
+
+    @staticmethod
+    def _render_text(card: Dict[str, Any]) -> str:
+        """Markdown version of a card for clients without card UI"""
+        labels = SECTION_LABELS[card["language"]]
+        lines = [f"**{card['title']}**", "", card["banner"], "", f"📞 **{labels['hotlines']}**"]
+        lines.extend(f"- {hotline['label']}: {hotline['number']}" for hotline in card["hotlines"])
+        if card["facilities"]:
+            lines.extend(["", f"🏥 **{labels['facilities']}**"])
+            for facility in card["facilities"]:
+                detail = ", ".join(part for part in (facility["address"], facility["phone"]) if part)
+                lines.append(f"- {facility['name']} ({facility['district']}): {detail}")
+        lines.extend(["", f"✅ **{labels['actions']}**"])
+        lines.extend(f"{index}. {action}" for index, action in enumerate(card["actions"], 1))
+        lines.extend(["", f"⚠️ {card['footer']}"])
+        return "\n".join(lines)
+
+
+# Global emergency card builder
+emergency_card_builder = EmergencyCardBuilder()
@@ -13,16 +13,23 @@ Features:
 - Cultural emotion adaptation (Hong Kong context)
 - Traditional Chinese language emotion detection
 - Healthcare-specific emotion categories
+- Precomputed per-agent score tables: one keyword pass per response and one
+  NumPy operation to score every candidate emotion, also in batches
 """
 
 import re
+import hashlib
 import logging
-from typing import Dict, List, Optional, Tuple, Any
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple, Any, Iterable
 from enum import Enum
 from dataclasses import dataclass
 from datetime import datetime
 
+import numpy as np
+
 from src.core.logging import get_logger
+from src.agents.routing.keyword_engine import MessageFeatures, keyword_engine
 
 
 logger = get_logger(__name__)
@@ -262,6 +269,64 @@ class EmotionLibrary:
     ]
 
 
+# ============================================================================
+# PRECOMPUTED SCORE TABLES
+# ============================================================================
+
+# Scoring factor weights (see EmotionMapper._score_emotion)
+TRIGGER_WEIGHT = 0.30
+URGENCY_WEIGHT = 0.25
+SENTIMENT_WEIGHT = 0.20
+CONFIDENCE_WEIGHT = 0.15
+CULTURAL_WEIGHT = 0.10
+
+# Rows of the per-agent weight matrix. Every factor except triggers depends
+# only on the emotion category and one small input state, so each state gets
+# a row of pre-weighted scores; an unknown urgency or language maps to the
+# "other" row.
+URGENCY_ROWS = {"emergency": 0, "high": 1, "medium": 2, "low": 3}
+URGENCY_OTHER_ROW = 4
+SENTIMENT_ROWS = {"positive": 5, "negative": 6, "neutral": 7}
+CONFIDENCE_ROWS = {"assertive": 8, "balanced": 9, "cautious": 10}
+CULTURAL_ROWS = {"zh-HK": 11, "en": 12}
+CULTURAL_OTHER_ROW = 13
+WEIGHT_ROWS = 14
+
+# Weighted trigger score by trigger match count (0, 1-2, 3+), followed by the
+# base score of emotions without triggers (see _calculate_trigger_score)
+TRIGGER_LEVELS = np.array([0.0, 0.5, 0.5, 1.0, 0.3, 0.3, 0.3, 0.3]) * TRIGGER_WEIGHT
+
+# Bounded mapping cache
+MAPPING_CACHE_SIZE = 1024
+
+
+def confidence_band(confidence: float) -> str:
+    """Confidence band used by the confidence factor"""
+    if confidence >= 0.8:
+        return "assertive"
+    elif confidence >= 0.6:
+        return "balanced"
+    return "cautious"
+
+
+@dataclass
+class AgentEmotionTable:
+    """Candidate emotions of one agent with their precomputed score rows"""
+    emotion_ids: List[str]
+    trigger_groups: List[str]  # Keyword engine group per candidate
+    trigger_offsets: np.ndarray  # Index offset into TRIGGER_LEVELS (4 without triggers)
+    weights: np.ndarray  # (WEIGHT_ROWS, candidates), already weighted
+
+    def trigger_scores(self, trigger_counts: np.ndarray) -> np.ndarray:
+        """
+        Weighted trigger scores from trigger match counts.
+
+        Args:
+            trigger_counts: Counts per candidate, shape (..., candidates)
+        """
+        return TRIGGER_LEVELS[np.minimum(trigger_counts, 3) + self.trigger_offsets]
+
+
 # ============================================================================
 # EMOTION MAPPER CLASS
 # ============================================================================
@@ -299,8 +364,24 @@ class EmotionMapper:
             "zh-HK": ["正常", "常見", "一般", "普通", "標準", "平時"]
         }
         
-        # Cache for frequently used mappings
-        self.mapping_cache: Dict[str, str] = {}
+        # Cache for frequently used mappings (LRU, keyed by a digest of the
+        # full response)
+        self.mapping_cache: "OrderedDict[str, str]" = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        
+        # Register trigger and sentiment tables with the shared keyword engine
+        for emotion in self.emotion_library.values():
+            keyword_engine.register(f"emotion.trigger.{emotion.emotion_id}", emotion.triggers)
+        for sentiment, tables in (
+            ("positive", self.positive_keywords),
+            ("negative", self.negative_keywords),
+            ("neutral", self.neutral_keywords),
+        ):
+            keyword_engine.register_groups(f"emotion.{sentiment}", tables)
+        
+        # Per-agent candidate tables
+        self.agent_tables: Dict[str, AgentEmotionTable] = self._build_agent_tables()
         
     def _build_emotion_library(self) -> Dict[str, EmotionMapping]:
         """Build comprehensive emotion library"""
@@ -320,6 +401,55 @@ class EmotionMapper:
         self.logger.info(f"Loaded {len(library)} emotions into library")
         return library
     
+    def _build_agent_tables(self) -> Dict[str, AgentEmotionTable]:
+        """
+        Precompute each agent's candidate list and weight matrix.
+        
+        The rows are filled in with the per-emotion scoring methods, so the
+        tables score exactly like _score_emotion.
+        """
+        agent_types: List[str] = []
+        for emotion in self.emotion_library.values():
+            for agent_type in emotion.agent_types:
+                if agent_type not in agent_types:
+                    agent_types.append(agent_type)
+        
+        tables = {}
+        for agent_type in agent_types:
+            candidates = self._get_agent_emotions(agent_type)
+            weights = np.zeros((WEIGHT_ROWS, len(candidates)))
+            for column, emotion in enumerate(candidates):
+                for urgency, row in URGENCY_ROWS.items():
+                    weights[row, column] = self._calculate_urgency_score(emotion, urgency) * URGENCY_WEIGHT
+                weights[URGENCY_OTHER_ROW, column] = self._calculate_urgency_score(emotion, "") * URGENCY_WEIGHT
+                for sentiment, row in SENTIMENT_ROWS.items():
+                    weights[row, column] = self._sentiment_alignment(emotion, sentiment) * SENTIMENT_WEIGHT
+                for band, confidence in (("assertive", 1.0), ("balanced", 0.7), ("cautious", 0.0)):
+                    weights[CONFIDENCE_ROWS[band], column] = (
+                        self._calculate_confidence_score(emotion, confidence) * CONFIDENCE_WEIGHT
+                    )
+                for language, row in CULTURAL_ROWS.items():
+                    weights[row, column] = self._calculate_cultural_score(emotion, language, None) * CULTURAL_WEIGHT
+                weights[CULTURAL_OTHER_ROW, column] = self._calculate_cultural_score(emotion, "", None) * CULTURAL_WEIGHT
+            
+            tables[agent_type] = AgentEmotionTable(
+                emotion_ids=[emotion.emotion_id for emotion in candidates],
+                trigger_groups=[f"emotion.trigger.{emotion.emotion_id}" for emotion in candidates],
+                trigger_offsets=np.array([0 if emotion.triggers else 4 for emotion in candidates]),
+                weights=weights
+            )
+        return tables
+    
+    @staticmethod
+    def _state_rows(urgency: str, confidence: float, language: str, sentiment: str) -> Tuple[int, int, int, int]:
+        """Weight matrix rows for one call's urgency, sentiment, confidence and language"""
+        return (
+            URGENCY_ROWS.get(urgency, URGENCY_OTHER_ROW),
+            SENTIMENT_ROWS[sentiment],
+            CONFIDENCE_ROWS[confidence_band(confidence)],
+            CULTURAL_ROWS.get(language, CULTURAL_OTHER_ROW)
+        )
+    
     def map_agent_to_emotion(
         self,
         agent_type: str,
@@ -344,35 +474,47 @@ class EmotionMapper:
             Emotion ID for Live2D avatar
         """
         try:
-            # Create cache key
-            cache_key = f"{agent_type}:{urgency}:{hash(response[:100])}:{language}"
-            if cache_key in self.mapping_cache:
-                return self.mapping_cache[cache_key]
-            
-            # Get candidate emotions for agent type
-            candidate_emotions = self._get_agent_emotions(agent_type)
-            
-            if not candidate_emotions:
+            table = self.agent_tables.get(agent_type)
+            if table is None:
                 # Fallback to neutral if no agent-specific emotions
                 return "neutral"
             
-            # Score emotions based on multiple factors
-            emotion_scores = {}
+            # Create cache key
+            digest = hashlib.blake2b(response.encode("utf-8"), digest_size=12).hexdigest()
+            cache_key = f"{agent_type}:{urgency}:{confidence_band(confidence)}:{language}:{digest}"
+            selected_emotion = self.mapping_cache.get(cache_key)
+            if selected_emotion is not None:
+                self.mapping_cache.move_to_end(cache_key)
+                self.cache_hits += 1
+                return selected_emotion
+            self.cache_misses += 1
             
-            for emotion in candidate_emotions:
-                score = self._score_emotion(emotion, response, urgency, confidence, language, context)
-                emotion_scores[emotion.emotion_id] = score
+            # One keyword pass, then every candidate is scored at once
+            features = keyword_engine.analyze(response)
+            trigger_counts = np.array([features.count(group) for group in table.trigger_groups])
+            urgency_row, sentiment_row, confidence_row, cultural_row = self._state_rows(
+                urgency, confidence, language, self._detect_sentiment(features, language)
+            )
+            weights = table.weights
+            scores = np.minimum(
+                table.trigger_scores(trigger_counts)
+                + weights[urgency_row] + weights[sentiment_row]
+                + weights[confidence_row] + weights[cultural_row],
+                1.0
+            )
             
-            # Select best emotion
-            best_emotion = max(emotion_scores.items(), key=lambda x: x[1])
-            selected_emotion = best_emotion[0]
+            # Select best emotion (first one on ties)
+            best = int(np.argmax(scores))
+            selected_emotion = table.emotion_ids[best]
             
             # Cache result
             self.mapping_cache[cache_key] = selected_emotion
+            if len(self.mapping_cache) > MAPPING_CACHE_SIZE:
+                self.mapping_cache.popitem(last=False)
             
             self.logger.debug(
                 f"Mapped {agent_type} response to emotion '{selected_emotion}' "
-                f"(score: {best_emotion[1]:.2f}, urgency: {urgency})"
+                f"(score: {scores[best]:.2f}, urgency: {urgency})"
             )
             
             return selected_emotion
@@ -381,6 +523,59 @@ class EmotionMapper:
             self.logger.error(f"Error mapping emotion: {e}")
             return self._get_fallback_emotion(agent_type, urgency)
     
+    def map_batch(self, items: Iterable[Dict[str, Any]]) -> List[str]:
+        """
+        Map many responses at once, e.g. when replaying conversations for
+        analytics. Results match map_agent_to_emotion; the mapping cache is
+        not used.
+        
+        Args:
+            items: Dicts with map_agent_to_emotion arguments ("agent_type" and
+                "response" required; "urgency", "confidence" and "language"
+                optional)
+            
+        Returns:
+            Emotion ID per item, in input order
+        """
+        items = list(items)
+        results: List[str] = ["neutral"] * len(items)
+        
+        # Group by agent so each group is scored as one matrix
+        by_agent: Dict[str, List[int]] = {}
+        for index, item in enumerate(items):
+            by_agent.setdefault(item["agent_type"], []).append(index)
+        
+        for agent_type, indices in by_agent.items():
+            table = self.agent_tables.get(agent_type)
+            if table is None:
+                continue
+            trigger_counts = np.empty((len(indices), len(table.emotion_ids)), dtype=np.int64)
+            rows = np.empty((len(indices), 4), dtype=np.intp)
+            for position, index in enumerate(indices):
+                item = items[index]
+                language = item.get("language", "en")
+                features = keyword_engine.analyze(item["response"])
+                trigger_counts[position] = [features.count(group) for group in table.trigger_groups]
+                rows[position] = self._state_rows(
+                    item.get("urgency", "low"),
+                    item.get("confidence", 1.0),
+                    language,
+                    self._detect_sentiment(features, language)
+                )
+            
+            # Same sum as map_agent_to_emotion, one row per response
+            weights = table.weights
+            scores = np.minimum(
+                table.trigger_scores(trigger_counts)
+                + weights[rows[:, 0]] + weights[rows[:, 1]]
+                + weights[rows[:, 2]] + weights[rows[:, 3]],
+                1.0
+            )
+            for position, best in enumerate(np.argmax(scores, axis=1)):
+                results[indices[position]] = table.emotion_ids[best]
+        
+        return results
+    
     def _get_agent_emotions(self, agent_type: str) -> List[EmotionMapping]:
         """Get emotions available for specific agent type"""
         return [
@@ -400,6 +595,9 @@ class EmotionMapper:
         """
         Score emotion based on multiple factors
         
+        Reference scorer for one candidate; map_agent_to_emotion uses the
+        equivalent precomputed tables built from these methods.
+        
         Args:
             emotion: Emotion to score
             response: Agent response text
@@ -415,23 +613,23 @@ class EmotionMapper:
         
         # 1. Trigger keyword matching (30% weight)
         trigger_score = self._calculate_trigger_score(emotion, response, language)
-        score += trigger_score * 0.30
+        score += trigger_score * TRIGGER_WEIGHT
         
         # 2. Urgency alignment (25% weight)
         urgency_score = self._calculate_urgency_score(emotion, urgency)
-        score += urgency_score * 0.25
+        score += urgency_score * URGENCY_WEIGHT
         
         # 3. Sentiment analysis (20% weight)
         sentiment_score = self._calculate_sentiment_score(emotion, response, language)
-        score += sentiment_score * 0.20
+        score += sentiment_score * SENTIMENT_WEIGHT
         
         # 4. Confidence adjustment (15% weight)
         confidence_score = self._calculate_confidence_score(emotion, confidence)
-        score += confidence_score * 0.15
+        score += confidence_score * CONFIDENCE_WEIGHT
         
         # 5. Cultural context (10% weight)
         cultural_score = self._calculate_cultural_score(emotion, language, context)
-        score += cultural_score * 0.10
+        score += cultural_score * CULTURAL_WEIGHT
         
         return min(score, 1.0)  # Cap at 1.0
     
@@ -440,12 +638,8 @@ class EmotionMapper:
         if not emotion.triggers:
             return 0.3  # Base score if no triggers defined
         
-        response_lower = response.lower()
-        matching_triggers = 0
-        
-        for trigger in emotion.triggers:
-            if trigger.lower() in response_lower:
-                matching_triggers += 1
+        features = keyword_engine.analyze(response)
+        matching_triggers = features.count(f"emotion.trigger.{emotion.emotion_id}")
         
         # Higher score for more trigger matches
         if matching_triggers == 0:
@@ -479,23 +673,16 @@ class EmotionMapper:
     
     def _calculate_sentiment_score(self, emotion: EmotionMapping, response: str, language: str) -> float:
         """Calculate score based on sentiment analysis"""
-        response_lower = response.lower()
-        
+        sentiment = self._detect_sentiment(keyword_engine.analyze(response), language)
+        return self._sentiment_alignment(emotion, sentiment)
+    
+    @staticmethod
+    def _detect_sentiment(features: MessageFeatures, language: str) -> str:
+        """Dominant sentiment of a response: "positive", "negative" or "neutral" """
         # Count sentiment keywords
-        positive_count = sum(
-            1 for keyword in self.positive_keywords.get(language, [])
-            if keyword in response_lower
-        )
-        
-        negative_count = sum(
-            1 for keyword in self.negative_keywords.get(language, [])
-            if keyword in response_lower
-        )
-        
-        neutral_count = sum(
-            1 for keyword in self.neutral_keywords.get(language, [])
-            if keyword in response_lower
-        )
+        positive_count = features.count(f"emotion.positive.{language}")
+        negative_count = features.count(f"emotion.negative.{language}")
+        neutral_count = features.count(f"emotion.neutral.{language}")
         
         # Determine dominant sentiment
         if positive_count > negative_count and positive_count > neutral_count:
@@ -504,8 +691,11 @@ class EmotionMapper:
             sentiment = "negative"
         else:
             sentiment = "neutral"
-        
-        # Score based on emotion-sentiment alignment
+        return sentiment
+    
+    @staticmethod
+    def _sentiment_alignment(emotion: EmotionMapping, sentiment: str) -> float:
+        """Score based on emotion-sentiment alignment"""
         sentiment_emotion_map = {
             "positive": [EmotionCategory.ENCOURAGING, EmotionCategory.PLAYFUL, EmotionCategory.CARING],
             "negative": [EmotionCategory.URGENT, EmotionCategory.SERIOUS, EmotionCategory.SUPPORTIVE],
@@ -608,6 +798,8 @@ class EmotionMapper:
         """Get cache statistics"""
         return {
             "cache_size": len(self.mapping_cache),
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
             "total_emotions": len(self.emotion_library),
             "cache_keys": list(self.mapping_cache.keys())[-10:]  # Last 10 keys
         }
@@ -628,7 +820,6 @@ def get_emotion_display_name(emotion_id: str, language: str = "en") -> str:
     Returns:
         Display name in specified language
     """
-    emotion_mapper = EmotionMapper()
     emotion = emotion_mapper.get_emotion_details(emotion_id)
     
     if not emotion:
@@ -648,8 +839,6 @@ def analyze_response_sentiment(response: str, language: str = "en") -> Tuple[str
     Returns:
         Tuple of (sentiment, confidence)
     """
-    emotion_mapper = EmotionMapper()
-    
     response_lower = response.lower()
     
     # Count sentiment indicators
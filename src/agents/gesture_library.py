@@ -13,16 +13,22 @@ Features:
 - Agent personality-specific gesture sets
 - Traditional and modern HK cultural fusion
 - Accessibility and inclusivity considerations
+- Prebuilt gesture indexes (agent, urgency, age group, cultural context);
+  trigger contexts and Cantonese expressions are matched in one keyword
+  engine pass, so selecting a gesture is a few set intersections
 """
 
+import hashlib
 import logging
 import random
-from typing import Dict, List, Optional, Tuple, Any
+from collections import OrderedDict
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple, Any
 from enum import Enum
 from dataclasses import dataclass
 from datetime import datetime
 
 from src.core.logging import get_logger
+from src.agents.routing.keyword_engine import keyword_engine
 
 
 logger = get_logger(__name__)
@@ -280,7 +286,7 @@ class HKGestureLibrary:
             gesture_id="reassuring_medical",
             display_name="醫療安撫",
             category=GestureCategory.EMOTIONAL_SUPPORT,
-            intensity=GestureIntensity.GENTLE,
+            intensity=GestureIntensity.SUBTLE,
             cultural_context=[CulturalContext.PROFESSIONAL, CulturalContext.ELDERLY_RESPECT],
             agent_types=["illness_monitor", "mental_health"],
             trigger_contexts=["reassurance", "comfort", "anxiety_relief"],
@@ -306,7 +312,7 @@ class HKGestureLibrary:
             description="Slight forward lean, furrowed brow, hands clasped in concern",
             accessibility_notes="Concerned tone of voice conveys caring",
             animation_notes="Subtle forward lean, gentle facial expression change"
-        ]
+        )
     ]
     
     # Emergency and Safety Gestures
@@ -408,7 +414,7 @@ class HKGestureLibrary:
             description="Hands forming heart shape, warm expression, caring gesture",
             accessibility_notes="Warm, caring vocal tone",
             animation_notes="Hands form heart shape above head, gentle smile"
-        ]
+        )
     ]
 
 
@@ -416,6 +422,15 @@ class HKGestureLibrary:
 # GESTURE LIBRARY CLASS
 # ============================================================================
 
+# Urgency levels and age groups with their own index entries; other values
+# share one entry built with the same rules
+URGENCY_LEVELS = ("emergency", "high", "medium", "low")
+AGE_GROUPS = ("child", "teen", "adult", "elderly")
+OTHER = ""
+
+# Bounded gesture selection cache
+SELECTION_CACHE_SIZE = 1024
+
 class GestureLibrary:
     """
     Main gesture library for Live2D avatar cultural expressions
@@ -433,9 +448,10 @@ class GestureLibrary:
         
         # Build comprehensive gesture library
         self.gesture_library = self._build_gesture_library()
+        self._build_indexes()
         
-        # Gesture selection cache
-        self.selection_cache: Dict[str, str] = {}
+        # Gesture selection cache (LRU)
+        self.selection_cache: "OrderedDict[str, str]" = OrderedDict()
         
         # Gesture usage statistics
         self.usage_stats: Dict[str, int] = {}
@@ -461,6 +477,67 @@ class GestureLibrary:
         
         return library
     
+    def _build_indexes(self):
+        """
+        Index gesture ids by every selection criterion.
+        
+        The urgency and age entries are filled in with _is_urgency_appropriate
+        and _is_age_appropriate, so they select exactly what those checks
+        accept. Trigger contexts and the words of Cantonese expressions are
+        registered with the shared keyword engine, whose matching is the same
+        substring test on the lowercased text.
+        """
+        gestures = list(self.gesture_library.values())
+        self._order = {gesture.gesture_id: position for position, gesture in enumerate(gestures)}
+        
+        self._by_agent: Dict[str, Set[str]] = {}
+        self._by_cultural_context: Dict[str, Set[str]] = {}
+        self._by_trigger: Dict[str, Set[str]] = {}
+        self._by_expression_word: Dict[str, Set[str]] = {}
+        self._expression_words: Dict[str, List[Tuple[str, ...]]] = {}
+        
+        for gesture in gestures:
+            gesture_id = gesture.gesture_id
+            for agent_type in gesture.agent_types:
+                self._by_agent.setdefault(agent_type, set()).add(gesture_id)
+            for cultural_context in gesture.cultural_context:
+                self._by_cultural_context.setdefault(cultural_context.value, set()).add(gesture_id)
+            for trigger in gesture.trigger_contexts:
+                self._by_trigger.setdefault(trigger, set()).add(gesture_id)
+            self._expression_words[gesture_id] = [tuple(expr.split()) for expr in gesture.cantonese_expressions]
+            for words in self._expression_words[gesture_id]:
+                for word in words:
+                    self._by_expression_word.setdefault(word, set()).add(gesture_id)
+        
+        self._by_urgency: Dict[str, FrozenSet[str]] = {
+            urgency: frozenset(g.gesture_id for g in gestures if self._is_urgency_appropriate(g, urgency))
+            for urgency in URGENCY_LEVELS + (OTHER,)
+        }
+        self._by_age: Dict[str, FrozenSet[str]] = {
+            age_group: frozenset(g.gesture_id for g in gestures if self._is_age_appropriate(g, age_group))
+            for age_group in AGE_GROUPS
+        }
+        self._all_gestures = frozenset(self._order)
+        self._other_age = frozenset(
+            g.gesture_id for g in gestures if self._is_age_appropriate(g, "unknown")
+        )
+        
+        keyword_engine.register("gesture.trigger", self._by_trigger.keys())
+        keyword_engine.register("gesture.cantonese", self._by_expression_word.keys())
+    
+    def _matched_keywords(self, text: str) -> FrozenSet[str]:
+        """Trigger contexts and Cantonese expression words occurring in a text"""
+        return keyword_engine.analyze(text).matched
+    
+    def _gestures_matching(self, matched: FrozenSet[str], index: Dict[str, Set[str]]) -> Set[str]:
+        """Gesture ids with at least one matched keyword in an index"""
+        found: Set[str] = set()
+        for keyword in matched:
+            gesture_ids = index.get(keyword)
+            if gesture_ids:
+                found |= gesture_ids
+        return found
+    
     def get_cultural_gesture(
         self,
         agent_type: str,
@@ -486,25 +563,30 @@ class GestureLibrary:
         """
         try:
             # Create cache key
-            cache_key = f"{agent_type}:{urgency}:{hash(context[:50])}:{language}:{cultural_preference}"
-            if cache_key in self.selection_cache:
-                gesture_id = self.selection_cache[cache_key]
+            digest = hashlib.blake2b(context.encode("utf-8"), digest_size=12).hexdigest()
+            cache_key = f"{agent_type}:{urgency}:{user_age_group}:{language}:{cultural_preference}:{digest}"
+            gesture_id = self.selection_cache.get(cache_key)
+            if gesture_id is not None:
+                self.selection_cache.move_to_end(cache_key)
                 self._track_usage(gesture_id)
                 return gesture_id
             
             # Get candidate gestures
+            matched = self._matched_keywords(context)
             candidates = self._get_candidate_gestures(
-                agent_type, context, urgency, user_age_group, cultural_preference
+                agent_type, context, urgency, user_age_group, cultural_preference, matched
             )
             
             if not candidates:
                 gesture_id = self._get_fallback_gesture(agent_type, urgency)
             else:
                 # Score and select best gesture
-                gesture_id = self._select_best_gesture(candidates, context, language, urgency)
+                gesture_id = self._select_best_gesture(candidates, context, language, urgency, matched)
             
             # Cache result
             self.selection_cache[cache_key] = gesture_id
+            if len(self.selection_cache) > SELECTION_CACHE_SIZE:
+                self.selection_cache.popitem(last=False)
             self._track_usage(gesture_id)
             
             self.logger.debug(f"Selected gesture '{gesture_id}' for {agent_type} in {cultural_preference} context")
@@ -520,37 +602,36 @@ class GestureLibrary:
         context: str,
         urgency: str,
         user_age_group: Optional[str],
-        cultural_preference: str
+        cultural_preference: str,
+        matched: Optional[FrozenSet[str]] = None
     ) -> List[GestureMapping]:
-        """Get candidate gestures based on criteria"""
-        candidates = []
-        context_lower = context.lower()
+        """
+        Get candidate gestures based on criteria
         
-        for gesture in self.gesture_library.values():
-            # Check agent type compatibility
-            if agent_type not in gesture.agent_types:
-                continue
-            
-            # Check cultural context compatibility
-            cultural_contexts = [ctx.value for ctx in gesture.cultural_context]
-            if cultural_preference not in cultural_contexts:
-                continue
-            
-            # Check trigger context matching
-            context_matches = any(
-                trigger in context_lower for trigger in gesture.trigger_contexts
-            )
-            
-            # Check urgency appropriateness
-            urgency_appropriate = self._is_urgency_appropriate(gesture, urgency)
-            
-            # Check age group appropriateness
-            age_appropriate = self._is_age_appropriate(gesture, user_age_group)
-            
-            if context_matches and urgency_appropriate and age_appropriate:
-                candidates.append(gesture)
+        Candidates must suit the agent, cultural preference, urgency and age
+        group, and have a trigger context occurring in the context text.
         
-        return candidates
+        Returns:
+            Candidates in library order
+        """
+        if matched is None:
+            matched = self._matched_keywords(context)
+        
+        if not user_age_group:
+            age_appropriate = self._all_gestures
+        else:
+            age_appropriate = self._by_age.get(user_age_group, self._other_age)
+        
+        gesture_ids = (
+            self._by_agent.get(agent_type, set())
+            & self._by_cultural_context.get(cultural_preference, set())
+            & self._by_urgency.get(urgency, self._by_urgency[OTHER])
+            & age_appropriate
+        )
+        if gesture_ids:
+            gesture_ids &= self._gestures_matching(matched, self._by_trigger)
+        
+        return [self.gesture_library[gesture_id] for gesture_id in sorted(gesture_ids, key=self._order.get)]
     
     def _is_urgency_appropriate(self, gesture: GestureMapping, urgency: str) -> bool:
         """Check if gesture intensity matches urgency level"""
@@ -584,7 +665,8 @@ class GestureLibrary:
         candidates: List[GestureMapping],
         context: str,
         language: str,
-        urgency: str
+        urgency: str,
+        matched: Optional[FrozenSet[str]] = None
     ) -> str:
         """Select best gesture from candidates"""
         if len(candidates) == 1:
@@ -592,7 +674,8 @@ class GestureLibrary:
         
         # Score candidates
         scores = {}
-        context_lower = context.lower()
+        if matched is None:
+            matched = self._matched_keywords(context)
         
         for gesture in candidates:
             score = 0.0
@@ -600,15 +683,15 @@ class GestureLibrary:
             # Context trigger matching (40% weight)
             trigger_matches = sum(
                 1 for trigger in gesture.trigger_contexts
-                if trigger in context_lower
+                if trigger in matched
             )
             score += (trigger_matches / max(len(gesture.trigger_contexts), 1)) * 0.4
             
             # Cantonese expression matching for zh-HK (30% weight)
             if language == "zh-HK":
                 cantonese_matches = sum(
-                    1 for expr in gesture.cantonese_expressions
-                    if any(word in context_lower for word in expr.split())
+                    1 for words in self._expression_words[gesture.gesture_id]
+                    if any(word in matched for word in words)
                 )
                 score += (cantonese_matches / max(len(gesture.cantonese_expressions), 1)) * 0.3
             else:
@@ -678,10 +761,8 @@ class GestureLibrary:
     
     def get_gestures_by_agent(self, agent_type: str) -> List[GestureMapping]:
         """Get all gestures available for a specific agent"""
-        return [
-            gesture for gesture in self.gesture_library.values()
-            if agent_type in gesture.agent_types
-        ]
+        gesture_ids = self._by_agent.get(agent_type, set())
+        return [self.gesture_library[gesture_id] for gesture_id in sorted(gesture_ids, key=self._order.get)]
     
     def get_cantonese_expressions(self, gesture_id: str) -> List[str]:
         """Get Cantonese expressions associated with a gesture"""
@@ -689,17 +770,17 @@ class GestureLibrary:
         return gesture.cantonese_expressions if gesture else []
     
     def search_gestures_by_cantonese(self, cantonese_text: str) -> List[str]:
-        """Search gestures by Cantonese expression"""
-        results = []
-        text_lower = cantonese_text.lower()
+        """
+        Search gestures by Cantonese expression
         
-        for gesture in self.gesture_library.values():
-            for expression in gesture.cantonese_expressions:
-                if any(word in text_lower for word in expression):
-                    results.append(gesture.gesture_id)
-                    break
+        A gesture matches when a word of one of its Cantonese expressions
+        (the whole expression unless it contains spaces) occurs in the text.
         
-        return results
+        Returns:
+            Matching gesture ids in library order
+        """
+        gesture_ids = self._gestures_matching(self._matched_keywords(cantonese_text), self._by_expression_word)
+        return sorted(gesture_ids, key=self._order.get)
     
     def get_accessibility_notes(self, gesture_id: str) -> str:
         """Get accessibility notes for a gesture"""
@@ -809,7 +890,6 @@ def get_gesture_display_name(gesture_id: str, language: str = "en") -> str:
     Returns:
         Display name
     """
-    gesture_library = GestureLibrary()
     gesture = gesture_library.get_gesture_details(gesture_id)
     
     if not gesture:
@@ -828,7 +908,6 @@ def find_gestures_for_cantonese_phrase(phrase: str) -> List[str]:
     Returns:
         List of gesture IDs
     """
-    gesture_library = GestureLibrary()
     return gesture_library.search_gestures_by_cantonese(phrase)
 
 
@@ -26,6 +26,7 @@ from .base_agent import (
     AgentResponse, 
     AgentContext
 )
+from .prompt_registry import prompt_registry
 from ..ai.model_manager import UrgencyLevel, TaskComplexity
 
 
@@ -95,6 +96,29 @@ class IllnessMonitorAgent(BaseAgent):
             "kidney_disease": ["fluid retention", "水腫", "urination", "小便", "swelling", "腫脹"],
             "copd": ["breathing", "呼吸", "oxygen", "氧氣", "inhaler", "吸入器"]
         }
+        
+        # Contextual references to earlier topics ("it", "this condition", ...)
+        self._contextual_references = [
+            "it", "this", "that", "the condition", "my condition", "her condition", "his condition"
+        ]
+        
+        # Elderly-specific patterns
+        self._elderly_indicators = [
+            "獨居", "living alone", "長者", "elderly", "老人", "senior",
+            "退休", "retired", "孫", "grandchild", "記性", "memory"
+        ]
+        
+        self._register_keywords({
+            "keywords": self._illness_keywords,
+            "primary_symptoms": self._illness_keywords[:10],
+            "emergency_symptoms": self._emergency_symptoms,
+            "contextual_references": self._contextual_references,
+            "elderly_indicators": self._elderly_indicators,
+            **{
+                f"chronic_{condition}": keywords
+                for condition, keywords in self._chronic_conditions.items()
+            },
+        })
     
     def can_handle(self, user_input: str, context: AgentContext) -> Tuple[bool, float]:
         """
@@ -107,11 +131,10 @@ class IllnessMonitorAgent(BaseAgent):
         Returns:
             Tuple of (can_handle: bool, confidence: float)
         """
-        user_input_lower = user_input.lower()
+        features = self.analyze_input(user_input)
         
         # Check for emergency symptoms first
-        emergency_match = any(symptom in user_input_lower for symptom in self._emergency_symptoms)
-        if emergency_match:
+        if features.has("illness_monitor.emergency_symptoms"):
             return False, 0.0  # Defer to Safety Guardian for emergencies
         
         # Check conversation history for health context
@@ -120,28 +143,26 @@ class IllnessMonitorAgent(BaseAgent):
             # Get last few messages for context
             recent_messages = context.conversation_history[-5:]  # Last 5 messages
             conversation_context = " ".join([msg.get('content', '') for msg in recent_messages if msg.get('content')])
-            conversation_context = conversation_context.lower()
         
         # Combine current input with conversation context for analysis
-        full_context = f"{conversation_context} {user_input_lower}"
+        history_features = self.analyze_input(conversation_context)
+        full_features = self.analyze_input(f"{conversation_context} {user_input}")
         
         # Check for illness-related keywords in both current input and context
-        keyword_matches = sum(1 for keyword in self._illness_keywords 
-                            if keyword in full_context)
+        keyword_matches = full_features.count("illness_monitor.keywords")
         
         # Check for chronic condition mentions
-        chronic_matches = 0
-        for condition, keywords in self._chronic_conditions.items():
-            if any(keyword in full_context for keyword in keywords):
-                chronic_matches += 1
+        chronic_matches = sum(
+            1 for condition in self._chronic_conditions
+            if full_features.has(f"illness_monitor.chronic_{condition}")
+        )
         
         # Check for contextual references like "it", "this condition", etc.
-        contextual_references = ["it", "this", "that", "the condition", "my condition", "her condition", "his condition"]
-        has_contextual_ref = any(ref in user_input_lower for ref in contextual_references)
+        has_contextual_ref = features.has("illness_monitor.contextual_references")
         
         # If user is referring to something from context and we found health topics in history
         context_boost = 0
-        if has_contextual_ref and any(keyword in conversation_context for keyword in self._illness_keywords):
+        if has_contextual_ref and history_features.has("illness_monitor.keywords"):
             context_boost = 2  # Boost confidence when referring to health topics from history
         
         # Calculate confidence based on matches
@@ -155,15 +176,9 @@ class IllnessMonitorAgent(BaseAgent):
             return True, confidence
         
         # Check for elderly-specific patterns
-        elderly_indicators = [
-            "獨居", "living alone", "長者", "elderly", "老人", "senior",
-            "退休", "retired", "孫", "grandchild", "記性", "memory"
-        ]
+        elderly_matches = features.count("illness_monitor.elderly_indicators")
         
-        elderly_matches = sum(1 for indicator in elderly_indicators 
-                            if indicator in user_input_lower)
-        
-        if elderly_matches > 0 and any(keyword in user_input_lower for keyword in self._illness_keywords[:10]):
+        if elderly_matches > 0 and features.has("illness_monitor.primary_symptoms"):
             return True, 0.7  # High confidence for elderly health concerns
         
         return False, 0.0
@@ -225,14 +240,28 @@ class IllnessMonitorAgent(BaseAgent):
         """
         Get the system prompt for illness monitoring.
         
+        The long base prompt only depends on language and is sent as a
+        static prefix that providers can cache across users; age-specific
+        guidance follows it as a short suffix.
+        
         Args:
             context: Conversation context
             
         Returns:
             Customized system prompt
         """
+        language = getattr(context, 'language_preference', 'en')
+        age_group = context.user_profile.get("age_group", "adult")
+        return prompt_registry.layout(
+            (self.agent_id, language),
+            lambda: self._build_prompt_prefix(language),
+            [self._age_guidance(age_group)]
+        )
+    
+    def _build_prompt_prefix(self, language: str) -> str:
+        """Assemble the static system prompt prefix for a language"""
         # Check language preference first to provide appropriate base prompt
-        if getattr(context, 'language_preference', 'en') == "zh":
+        if language == "zh":
             base_prompt = """你是慧心助手 (Wise Heart Assistant) - 一個專門為香港居民提供疾病監測和健康管理的AI助手。
 
 ## 你的專業使命：
@@ -321,31 +350,26 @@ You're like a knowledgeable friend who genuinely cares about people's health. Yo
 Remember: You're a bridge between people and professional healthcare, providing caring support while maintaining safety. Be warm, understanding, and genuinely helpful!
 """
         
-        # Add age-specific adaptations
-        age_group = context.user_profile.get("age_group", "adult")
-        
+        return base_prompt
+    
+    def _age_guidance(self, age_group: str) -> str:
+        """Age-specific prompt section (empty for adults)"""
         if age_group == "elderly":
-            base_prompt += """
-
-## 長者專用指導：
+            return """## 長者專用指導：
 - 使用更正式和尊重的語言(您而非你)
 - 關注慢性病管理, 用藥依從性, 跌倒預防
 - 理解獨居長者的社交需求和健康擔憂
 - 提供實用的日常健康管理策略
 - 適當時建議家人參與或社工支援"""
         
-        elif age_group == "child":
-            base_prompt += """
-
-## 兒童專用指導：
+        if age_group == "child":
+            return """## 兒童專用指導：
 - 使用簡單, 友善的語言解釋健康概念
 - 關注生長發育, 疫苗接種, 常見兒童疾病
 - 涉及家長參與決策和護理
 - 提供適齡的健康教育"""
         
-        # Language preference is already handled in the base prompt selection above
-        
-        return base_prompt
+        return ""
     
     def _post_process_response(self, content: str, context: AgentContext) -> str:
         """
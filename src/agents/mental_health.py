@@ -26,6 +26,7 @@ from .base_agent import (
     AgentResponse, 
     AgentContext
 )
+from .prompt_registry import prompt_registry
 from ..ai.model_manager import UrgencyLevel, TaskComplexity
 
 
@@ -111,6 +112,23 @@ class MentalHealthAgent(BaseAgent):
             "living": ["small_flat", "唐樓", "public_housing", "居屋", "privacy", "私隱"],
             "culture": ["collectivist", "hierarchy", "respect_elders", "尊重長輩"]
         }
+        
+        # Age indicators in the message itself
+        self._age_indicators = ["child", "kid", "teen", "student", "school", "exam", "homework"]
+        
+        # School/family stress patterns
+        self._stress_contexts = [
+            "school stress", "學校壓力", "exam anxiety", "考試焦慮",
+            "friend problems", "朋友問題", "family issues", "家庭問題",
+            "can't concentrate", "唔能夠專心", "too much pressure", "太大壓力"
+        ]
+        
+        self._register_keywords({
+            "keywords": self._mental_health_keywords,
+            "crisis": self._crisis_keywords,
+            "age_indicators": self._age_indicators,
+            "stress_contexts": self._stress_contexts,
+        })
     
     def can_handle(self, user_input: str, context: AgentContext) -> Tuple[bool, float]:
         """
@@ -123,23 +141,19 @@ class MentalHealthAgent(BaseAgent):
         Returns:
             Tuple of (can_handle: bool, confidence: float)
         """
-        user_input_lower = user_input.lower()
+        features = self.analyze_input(user_input)
         
         # Check for crisis keywords first - high priority
-        crisis_matches = sum(1 for keyword in self._crisis_keywords 
-                           if keyword in user_input_lower)
+        crisis_matches = features.count("mental_health.crisis")
         
         if crisis_matches > 0:
             return False, 0.0  # Defer to Safety Guardian for crisis situations
         
         # Check for mental health keywords
-        mh_keyword_matches = sum(1 for keyword in self._mental_health_keywords 
-                               if keyword in user_input_lower)
+        mh_keyword_matches = features.count("mental_health.keywords")
         
         # Check for age indicators (prefer younger demographics)
-        age_indicators = ["child", "kid", "teen", "student", "school", "exam", "homework"]
-        age_matches = sum(1 for indicator in age_indicators 
-                         if indicator in user_input_lower)
+        age_matches = features.count("mental_health.age_indicators")
         
         # Check user profile age
         age_group = context.user_profile.get("age_group", "adult")
@@ -154,14 +168,7 @@ class MentalHealthAgent(BaseAgent):
             return True, final_confidence
         
         # Check for school/family stress patterns
-        stress_contexts = [
-            "school stress", "學校壓力", "exam anxiety", "考試焦慮",
-            "friend problems", "朋友問題", "family issues", "家庭問題",
-            "can't concentrate", "唔能夠專心", "too much pressure", "太大壓力"
-        ]
-        
-        stress_matches = sum(1 for context_phrase in stress_contexts 
-                           if context_phrase in user_input_lower)
+        stress_matches = features.count("mental_health.stress_contexts")
         
         if stress_matches > 0:
             return True, 0.8
@@ -232,8 +239,18 @@ class MentalHealthAgent(BaseAgent):
         Returns:
             Customized system prompt with VTuber personality
         """
+        language = context.language_preference
         age_group = context.user_profile.get("age_group", "teen")
-        
+        # The base prompt is the same in every language, so all users share
+        # one cacheable prefix
+        return prompt_registry.layout(
+            (self.agent_id,),
+            self._build_prompt_prefix,
+            [self._age_style(age_group), self._language_instruction(language)]
+        )
+    
+    def _build_prompt_prefix(self) -> str:
+        """Assemble the static system prompt prefix"""
         base_prompt = """你是小星星 (Little Star) - 一個VTuber風格的AI朋友，專門為香港兒童和青少年提供心理健康支援。
 
 ## 你的使命：
@@ -270,11 +287,12 @@ class MentalHealthAgent(BaseAgent):
 - **家庭動態**：孝順、面子、代溝、小空間大家庭
 - **社會壓力**：經濟憂慮、未來擔憂、社交媒體影響"""
         
-        # Age-specific adaptations
+        return base_prompt
+    
+    def _age_style(self, age_group: str) -> str:
+        """Age-specific style section (empty outside child and teen)"""
         if age_group == "child":
-            base_prompt += """
-
-## 兒童專用風格 (6-12歲)：
+            return """## 兒童專用風格 (6-12歲)：
 🌟 "Hello小朋友！我係Little Star，你嘅神奇朋友！✨ 
 想同我講下今日係彩虹日定係打風日？🌈⛈️"
 
@@ -283,10 +301,8 @@ class MentalHealthAgent(BaseAgent):
 - 涉及父母在決策和支援中
 - 提供適齡的情緒調節策略"""
         
-        elif age_group == "teen":
-            base_prompt += """
-
-## 青少年專用風格 (13-18歲)：
+        if age_group == "teen":
+            return """## 青少年專用風格 (13-18歲)：
 🌟 "Hey！我係Little Star！✨ 我知道做香港teen好tough，有DSE壓力。
 想傾計咩？我喺度聽緊，唔會judge你！💙"
 
@@ -295,13 +311,15 @@ class MentalHealthAgent(BaseAgent):
 - 使用青少年俚語和網絡語言
 - 尊重私隱但確保安全"""
         
-        # Add language preference
-        if context.language_preference == "en":
-            base_prompt += "\n\n**CRITICAL: Respond ONLY in English. No Chinese characters allowed.**"
-        elif context.language_preference == "zh":
-            base_prompt += "\n\n**重要：請只使用繁體中文回應。**"
-        
-        return base_prompt
+        return ""
+    
+    def _language_instruction(self, language: str) -> str:
+        """Response language instruction, kept last so it takes precedence"""
+        if language == "en":
+            return "**CRITICAL: Respond ONLY in English. No Chinese characters allowed.**"
+        if language == "zh":
+            return "**重要：請只使用繁體中文回應。**"
+        return ""
     
     def _post_process_response(self, content: str, context: AgentContext) -> str:
         """
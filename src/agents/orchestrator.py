@@ -27,6 +27,7 @@ from .illness_monitor import IllnessMonitorAgent
 from .mental_health import MentalHealthAgent
 from .safety_guardian import SafetyGuardianAgent
 from .wellness_coach import WellnessCoachAgent
+from .routing.keyword_engine import keyword_engine
 from ..ai.ai_service import HealthcareAIService
 from ..ai.model_manager import UrgencyLevel, TaskComplexity
 
@@ -100,6 +101,57 @@ class AgentOrchestrator:
         self.emergency_confidence_threshold = 0.4  # Lower threshold for emergencies
         self.multi_agent_threshold = 0.8  # When multiple agents score high
         
+        # Routing keyword tables
+        self._urgency_indicators = {
+            "critical": [
+                "emergency", "緊急", "urgent", "急", "help", "救命",
+                "can't breathe", "唔可以呼吸", "chest pain", "胸痛",
+                "suicide", "自殺", "dying", "快死"
+            ],
+            "high": [
+                "severe", "嚴重", "very worried", "好擔心", "crisis", "危機",
+                "can't sleep", "瞓唔到", "pain", "痛"
+            ],
+            "medium": [
+                "worried", "擔心", "concerned", "關心", "uncomfortable", "唔舒服"
+            ]
+        }
+        
+        self._critical_keywords = [
+            "emergency", "緊急", "suicide", "自殺", "救命",
+            "can't breathe", "唔可以呼吸", "chest pain", "胸痛",
+            "overdose", "服藥過量", "dying", "快死"
+        ]
+        
+        self._selection_reason_keywords = {
+            "illness_monitor": ["pain", "痛", "sick", "病", "medication", "藥"],
+            "mental_health": ["stress", "壓力", "anxiety", "焦慮", "sad", "傷心"],
+            "safety_guardian": ["emergency", "緊急", "救命", "urgent", "急"],
+            "wellness_coach": ["healthy", "健康", "improve", "改善", "prevent", "預防"]
+        }
+        
+        self._capability_keywords = {
+            AgentCapability.ILLNESS_MONITORING: ["illness", "病", "symptom", "症狀", "health", "健康"],
+            AgentCapability.MENTAL_HEALTH_SUPPORT: ["mental", "心理", "emotion", "情緒", "stress", "壓力"],
+            AgentCapability.EMERGENCY_RESPONSE: ["emergency", "緊急", "crisis", "危機", "urgent", "急"],
+            AgentCapability.WELLNESS_COACHING: ["wellness", "保健", "healthy", "健康", "improve", "改善"],
+            AgentCapability.MEDICATION_GUIDANCE: ["medication", "藥物", "drug", "藥", "prescription", "處方"],
+            AgentCapability.CHRONIC_DISEASE_MANAGEMENT: ["diabetes", "糖尿病", "hypertension", "高血壓", "chronic", "慢性"],
+            AgentCapability.CRISIS_INTERVENTION: ["suicide", "自殺", "crisis", "危機", "self-harm", "自傷"],
+            AgentCapability.EDUCATIONAL_SUPPORT: ["learn", "學習", "understand", "了解", "explain", "解釋"]
+        }
+        
+        keyword_engine.register_groups("orchestrator.urgency", self._urgency_indicators)
+        keyword_engine.register("orchestrator.critical", self._critical_keywords)
+        keyword_engine.register_groups("orchestrator.reasons", self._selection_reason_keywords)
+        keyword_engine.register_groups("orchestrator.capability", {
+            capability.value: keywords
+            for capability, keywords in self._capability_keywords.items()
+        })
+        
+        # All agent tables are registered by now; compile once at startup
+        keyword_engine.compile()
+        
     async def route_request(
         self, 
         user_input: str, 
@@ -177,14 +229,14 @@ class AgentOrchestrator:
         
         agent_evaluations = await asyncio.gather(*evaluation_tasks)
         
+        # Urgency factor depends only on the message, compute it once
+        urgency_factor = self._calculate_urgency_factor(user_input, context)
+        
         # Process results
         for agent_id, evaluation in zip(self.agents.keys(), agent_evaluations):
             can_handle, confidence, reasons, capabilities = evaluation
             
             if can_handle:
-                # Apply urgency factor
-                urgency_factor = self._calculate_urgency_factor(user_input, context)
-                
                 scores.append(AgentScore(
                     agent_id=agent_id,
                     confidence=confidence,
@@ -253,27 +305,28 @@ class AgentOrchestrator:
             List of reasons for selection
         """
         reasons = []
-        user_input_lower = user_input.lower()
+        features = keyword_engine.analyze(user_input)
+        reason_group = f"orchestrator.reasons.{agent.agent_id}"
         
         # Agent-specific reason analysis
         if agent.agent_id == "illness_monitor":
-            if any(word in user_input_lower for word in ["pain", "痛", "sick", "病", "medication", "藥"]):
+            if features.has(reason_group):
                 reasons.append("Physical health symptoms or medication concerns detected")
             if context.user_profile.get("age_group") == "elderly":
                 reasons.append("Elderly user profile matches illness monitoring specialization")
         
         elif agent.agent_id == "mental_health":
-            if any(word in user_input_lower for word in ["stress", "壓力", "anxiety", "焦慮", "sad", "傷心"]):
+            if features.has(reason_group):
                 reasons.append("Mental health or emotional concerns identified")
             if context.user_profile.get("age_group") in ["child", "teen"]:
                 reasons.append("Child/teen profile matches mental health specialization")
         
         elif agent.agent_id == "safety_guardian":
-            if any(word in user_input_lower for word in ["emergency", "緊急", "救命", "urgent", "急"]):
+            if features.has(reason_group):
                 reasons.append("Emergency or crisis keywords detected")
         
         elif agent.agent_id == "wellness_coach":
-            if any(word in user_input_lower for word in ["healthy", "健康", "improve", "改善", "prevent", "預防"]):
+            if features.has(reason_group):
                 reasons.append("Health improvement or prevention focus identified")
         
         # Add capability-based reasons
@@ -319,21 +372,8 @@ class AgentOrchestrator:
         Returns:
             True if input matches capability
         """
-        user_input_lower = user_input.lower()
-        
-        capability_keywords = {
-            AgentCapability.ILLNESS_MONITORING: ["illness", "病", "symptom", "症狀", "health", "健康"],
-            AgentCapability.MENTAL_HEALTH_SUPPORT: ["mental", "心理", "emotion", "情緒", "stress", "壓力"],
-            AgentCapability.EMERGENCY_RESPONSE: ["emergency", "緊急", "crisis", "危機", "urgent", "急"],
-            AgentCapability.WELLNESS_COACHING: ["wellness", "保健", "healthy", "健康", "improve", "改善"],
-            AgentCapability.MEDICATION_GUIDANCE: ["medication", "藥物", "drug", "藥", "prescription", "處方"],
-            AgentCapability.CHRONIC_DISEASE_MANAGEMENT: ["diabetes", "糖尿病", "hypertension", "高血壓", "chronic", "慢性"],
-            AgentCapability.CRISIS_INTERVENTION: ["suicide", "自殺", "crisis", "危機", "self-harm", "自傷"],
-            AgentCapability.EDUCATIONAL_SUPPORT: ["learn", "學習", "understand", "了解", "explain", "解釋"]
-        }
-        
-        keywords = capability_keywords.get(capability, [])
-        return any(keyword in user_input_lower for keyword in keywords)
+        features = keyword_engine.analyze(user_input)
+        return features.has(f"orchestrator.capability.{capability.value}")
     
     def _calculate_urgency_factor(self, user_input: str, context: AgentContext) -> float:
         """
@@ -346,33 +386,18 @@ class AgentOrchestrator:
         Returns:
             Urgency factor (0.0 - 1.0)
         """
-        user_input_lower = user_input.lower()
+        features = keyword_engine.analyze(user_input)
         
         # Critical urgency indicators
-        critical_indicators = [
-            "emergency", "緊急", "urgent", "急", "help", "救命",
-            "can't breathe", "唔可以呼吸", "chest pain", "胸痛",
-            "suicide", "自殺", "dying", "快死"
-        ]
-        
-        if any(indicator in user_input_lower for indicator in critical_indicators):
+        if features.has("orchestrator.urgency.critical"):
             return 1.0
         
         # High urgency indicators
-        high_indicators = [
-            "severe", "嚴重", "very worried", "好擔心", "crisis", "危機",
-            "can't sleep", "瞓唔到", "pain", "痛"
-        ]
-        
-        if any(indicator in user_input_lower for indicator in high_indicators):
+        if features.has("orchestrator.urgency.high"):
             return 0.7
         
         # Medium urgency indicators
-        medium_indicators = [
-            "worried", "擔心", "concerned", "關心", "uncomfortable", "唔舒服"
-        ]
-        
-        if any(indicator in user_input_lower for indicator in medium_indicators):
+        if features.has("orchestrator.urgency.medium"):
             return 0.4
         
         return 0.0
@@ -395,14 +420,7 @@ class AgentOrchestrator:
             Emergency orchestration result if override needed
         """
         # Check for critical emergency keywords
-        critical_keywords = [
-            "emergency", "緊急", "suicide", "自殺", "救命",
-            "can't breathe", "唔可以呼吸", "chest pain", "胸痛",
-            "overdose", "服藥過量", "dying", "快死"
-        ]
-        
-        user_input_lower = user_input.lower()
-        emergency_detected = any(keyword in user_input_lower for keyword in critical_keywords)
+        emergency_detected = keyword_engine.analyze(user_input).has("orchestrator.critical")
         
         if emergency_detected:
             # Check if safety guardian already scored highest
@@ -0,0 +1,465 @@
+"""
+Prompt Template Registry - Healthcare AI V2
+===========================================
+
+Loads every prompt template under ``prompts/`` once, compiles it and serves
+cheap renders to the agents.
+
+Layout:
+
+- prompts/agents/<agent>/<language>.txt: agent prompt for a language
+- prompts/agents/<agent>/<language>.<emergency_type>.txt: optional
+  emergency-specific override of the above
+- prompts/system/<name>.txt: shared system prompts
+
+Templates are Jinja2. Files without template syntax are served as plain
+text. Rendered prompts are memoized per template version and variables, and
+agents that assemble prompts in code memoize the result through compose().
+Files are re-stat'ed at most every ``reload_interval`` seconds and recompiled
+when their mtime changes.
+
+Agent system prompts are laid out for provider prompt caching with
+layout(): a static prefix that depends only on agent and language, followed
+by a short dynamic suffix (age group, conditions, emergency type). Providers
+reuse the prefill of the longest prompt prefix they have seen recently, so
+keeping per-user details out of the prefix lets every user of an agent share
+it. Prefix hashes are tracked so an accidentally varying prefix shows up in
+get_metrics().
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from jinja2 import ChainableUndefined, Environment, Template
+
+
+logger = logging.getLogger("agents.prompt_registry")
+
+PROMPTS_DIR = Path(__file__).parent.parent.parent / "prompts"
+
+# Agent context language -> template language, in lookup order
+LANGUAGE_FALLBACKS = {
+    "en": ("en",),
+    "zh": ("zh-hk", "en"),
+    "zh-hk": ("zh-hk", "en"),
+    "zh-HK": ("zh-hk", "en"),
+    "auto": ("en",),
+}
+
+TemplateKey = Tuple[str, ...]
+
+
+@dataclass
+class PromptStats:
+    """Render counters and rendered-size statistics for one template"""
+    renders: int = 0
+    cache_hits: int = 0
+    last_chars: int = 0
+    max_chars: int = 0
+    total_chars: int = 0
+
+    def record(self, size: int):
+        self.renders += 1
+        self.last_chars = size
+        self.max_chars = max(self.max_chars, size)
+        self.total_chars += size
+
+    def snapshot(self) -> Dict[str, Any]:
+        mean_chars = self.total_chars / self.renders if self.renders else 0
+        return {
+            "renders": self.renders,
+            "cache_hits": self.cache_hits,
+            "last_chars": self.last_chars,
+            "max_chars": self.max_chars,
+            "mean_chars": round(mean_chars, 1),
+            # Rough token estimate (about 4 characters per token)
+            "mean_tokens_estimate": int(mean_chars / 4)
+        }
+
+
+@dataclass
+class PrefixStats:
+    """Content hash and use counters for one static prompt prefix"""
+    prefix_hash: str = ""
+    chars: int = 0
+    uses: int = 0
+    changes: int = 0
+    text: str = field(default="", repr=False)
+
+    def update(self, prefix: str):
+        """Rehash after the prefix was rebuilt; counts changes in content"""
+        prefix_hash = hashlib.sha256(prefix.encode("utf-8")).hexdigest()[:16]
+        if self.prefix_hash and prefix_hash != self.prefix_hash:
+            self.changes += 1
+        self.prefix_hash = prefix_hash
+        self.chars = len(prefix)
+        self.text = prefix
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "hash": self.prefix_hash,
+            "chars": self.chars,
+            "tokens_estimate": int(self.chars / 4),
+            "uses": self.uses,
+            "changes": self.changes
+        }
+
+
+@dataclass
+class PromptTemplate:
+    """A compiled prompt template file"""
+    key: TemplateKey
+    path: Path
+    mtime_ns: int
+    source: str
+    template: Optional[Template]
+    version: int = 0
+    stats: PromptStats = field(default_factory=PromptStats)
+
+    @property
+    def is_static(self) -> bool:
+        """True when the file has no template syntax"""
+        return self.template is None
+
+
+def _freeze(value: Any) -> Hashable:
+    """Hashable form of render variables (for the render cache)"""
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return tuple(_freeze(item) for item in value)
+    hash(value)
+    return value
+
+
+class PromptRegistry:
+    """
+    Compiled prompt templates keyed by agent, language and emergency type.
+
+    The registry is safe to share between agents; renders and reloads are
+    guarded by a lock.
+    """
+
+    def __init__(
+        self,
+        prompts_dir: Path = PROMPTS_DIR,
+        reload_interval: float = 2.0,
+        render_cache_size: int = 512
+    ):
+        """
+        Initialize the registry (templates are loaded on first use).
+
+        Args:
+            prompts_dir: Root of the prompt tree
+            reload_interval: Minimum seconds between mtime checks (0 to check
+                on every lookup, negative to disable reloading)
+            render_cache_size: Maximum memoized renders
+        """
+        self.prompts_dir = Path(prompts_dir)
+        self.reload_interval = reload_interval
+        self.render_cache_size = render_cache_size
+
+        self._env = Environment(
+            autoescape=False,
+            keep_trailing_newline=True,
+            trim_blocks=True,
+            lstrip_blocks=True,
+            undefined=ChainableUndefined
+        )
+        self._templates: Dict[TemplateKey, PromptTemplate] = {}
+        self._render_cache: "OrderedDict[Tuple, str]" = OrderedDict()
+        self._composed: Dict[TemplateKey, str] = {}
+        self._composed_stats: Dict[TemplateKey, PromptStats] = {}
+        self._prefix_stats: Dict[TemplateKey, PrefixStats] = {}
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._last_check = 0.0
+        self.reloads = 0
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    def _scan(self) -> Dict[TemplateKey, Path]:
+        """Map template keys to files currently on disk"""
+        files: Dict[TemplateKey, Path] = {}
+
+        agents_dir = self.prompts_dir / "agents"
+        if agents_dir.is_dir():
+            for agent_dir in os.scandir(agents_dir):
+                if not agent_dir.is_dir():
+                    continue
+                for entry in os.scandir(agent_dir.path):
+                    if not entry.name.endswith(".txt"):
+                        continue
+                    language, _, emergency_type = entry.name[:-4].partition(".")
+                    files[("agents", agent_dir.name, language.lower(), emergency_type)] = Path(entry.path)
+
+        system_dir = self.prompts_dir / "system"
+        if system_dir.is_dir():
+            for entry in os.scandir(system_dir):
+                if entry.name.endswith(".txt"):
+                    files[("system", entry.name[:-4])] = Path(entry.path)
+
+        return files
+
+    def _compile(self, key: TemplateKey, path: Path, previous: Optional[PromptTemplate]) -> PromptTemplate:
+        source = path.read_text(encoding="utf-8")
+        has_syntax = "{{" in source or "{%" in source or "{#" in source
+        template = self._env.from_string(source) if has_syntax else None
+        return PromptTemplate(
+            key=key,
+            path=path,
+            mtime_ns=path.stat().st_mtime_ns,
+            source=source,
+            template=template,
+            version=previous.version + 1 if previous else 0,
+            stats=previous.stats if previous else PromptStats()
+        )
+
+    def load(self) -> int:
+        """
+        Load and compile every template file.
+
+        Returns:
+            Number of templates loaded
+        """
+        with self._lock:
+            templates: Dict[TemplateKey, PromptTemplate] = {}
+            for key, path in self._scan().items():
+                try:
+                    templates[key] = self._compile(key, path, self._templates.get(key))
+                except Exception as e:
+                    logger.error(f"Failed to load prompt template {path}: {e}")
+            self._templates = templates
+            self._render_cache.clear()
+            self._composed.clear()
+            self._loaded = True
+            self._last_check = time.monotonic()
+        logger.info(f"Loaded {len(templates)} prompt templates from {self.prompts_dir}")
+        return len(templates)
+
+    def check_reload(self, force: bool = False) -> List[TemplateKey]:
+        """
+        Recompile templates whose files changed, appeared or disappeared.
+
+        Args:
+            force: Check now regardless of reload_interval
+
+        Returns:
+            Keys of templates that were reloaded or removed
+        """
+        if not self._loaded:
+            self.load()
+            return []
+        now = time.monotonic()
+        if not force and (self.reload_interval < 0 or now - self._last_check < self.reload_interval):
+            return []
+
+        with self._lock:
+            self._last_check = now
+            changed: List[TemplateKey] = []
+            on_disk = self._scan()
+
+            for key in set(self._templates) - set(on_disk):
+                del self._templates[key]
+                changed.append(key)
+
+            for key, path in on_disk.items():
+                current = self._templates.get(key)
+                try:
+                    if current is not None and path.stat().st_mtime_ns == current.mtime_ns:
+                        continue
+                    self._templates[key] = self._compile(key, path, current)
+                    changed.append(key)
+                except Exception as e:
+                    # Keep serving the previous version of a broken template
+                    logger.error(f"Failed to reload prompt template {path}: {e}")
+
+            if changed:
+                self.reloads += 1
+                self._render_cache.clear()
+                self._composed.clear()
+                logger.info(f"Reloaded prompt templates: {['/'.join(filter(None, key)) for key in changed]}")
+            return changed
+
+    # ------------------------------------------------------------------
+    # Lookup and rendering
+    # ------------------------------------------------------------------
+
+    def get_agent_template(
+        self,
+        agent: str,
+        language: str = "en",
+        emergency_type: Optional[str] = None
+    ) -> Optional[PromptTemplate]:
+        """
+        Find the best template for an agent.
+
+        Args:
+            agent: Agent type (directory under prompts/agents)
+            language: Context language ("en", "zh", "zh-hk", "auto")
+            emergency_type: Prefer <language>.<emergency_type>.txt if present
+
+        Returns:
+            Template, or None if the agent has no template for the language
+            or its fallbacks
+        """
+        self.check_reload()
+        for candidate in LANGUAGE_FALLBACKS.get(language, (language.lower(), "en")):
+            if emergency_type:
+                template = self._templates.get(("agents", agent, candidate, emergency_type))
+                if template is not None:
+                    return template
+            template = self._templates.get(("agents", agent, candidate, ""))
+            if template is not None:
+                return template
+        return None
+
+    def get_system_template(self, name: str) -> Optional[PromptTemplate]:
+        """Find a shared system template by file stem"""
+        self.check_reload()
+        return self._templates.get(("system", name))
+
+    def render(self, template: PromptTemplate, **variables: Any) -> str:
+        """
+        Render a template, memoized per template version and variables.
+
+        Args:
+            template: Template from get_agent_template/get_system_template
+            **variables: Template variables
+
+        Returns:
+            Rendered prompt
+        """
+        if template.is_static:
+            if template.stats.renders:
+                template.stats.cache_hits += 1
+            else:
+                template.stats.record(len(template.source))
+            return template.source
+
+        try:
+            cache_key = (template.key, template.version, _freeze(variables))
+        except TypeError:
+            cache_key = None
+
+        with self._lock:
+            if cache_key is not None and cache_key in self._render_cache:
+                self._render_cache.move_to_end(cache_key)
+                template.stats.cache_hits += 1
+                return self._render_cache[cache_key]
+
+            rendered = template.template.render(**variables)
+            template.stats.record(len(rendered))
+            if cache_key is not None:
+                self._render_cache[cache_key] = rendered
+                if len(self._render_cache) > self.render_cache_size:
+                    self._render_cache.popitem(last=False)
+            return rendered
+
+    def compose(self, key: TemplateKey, builder: Callable[[], str]) -> str:
+        """
+        Memoize a prompt assembled in code.
+
+        Args:
+            key: Everything the builder depends on, e.g.
+                (agent, language, age_group, emergency_type)
+            builder: Builds the prompt on a cache miss
+
+        Returns:
+            Assembled prompt
+        """
+        # Composed prompts may embed file templates; drop them when files change
+        if not self._loaded or (0 <= self.reload_interval <= time.monotonic() - self._last_check):
+            self.check_reload()
+
+        prompt = self._composed.get(key)
+        if prompt is not None:
+            self._composed_stats[key].cache_hits += 1
+            return prompt
+
+        with self._lock:
+            prompt = builder()
+            if len(self._composed) >= self.render_cache_size:
+                self._composed.clear()
+            self._composed[key] = prompt
+            self._composed_stats.setdefault(key, PromptStats()).record(len(prompt))
+            return prompt
+
+    def layout(
+        self,
+        prefix_key: TemplateKey,
+        prefix_builder: Callable[[], str],
+        suffix_parts: Iterable[str] = ()
+    ) -> str:
+        """
+        Assemble a prompt as a static prefix followed by a dynamic suffix.
+
+        Args:
+            prefix_key: Everything the prefix depends on, normally
+                (agent, language); per-user details must not affect it
+            prefix_builder: Builds the prefix on a cache miss
+            suffix_parts: Sections appended after the prefix (empty parts
+                are skipped)
+
+        Returns:
+            Prefix and suffix sections joined by blank lines
+        """
+        prefix = self.compose(prefix_key, prefix_builder)
+
+        stats = self._prefix_stats.get(prefix_key)
+        if stats is None:
+            stats = self._prefix_stats.setdefault(prefix_key, PrefixStats())
+        # Hash only when the prefix was rebuilt (cache miss or reload)
+        if stats.text is not prefix:
+            stats.update(prefix)
+        stats.uses += 1
+
+        suffix = "\n\n".join(part for part in suffix_parts if part)
+        return f"{prefix}\n\n{suffix}" if suffix else prefix
+
+    # ------------------------------------------------------------------
+    # Metrics
+    # ------------------------------------------------------------------
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Per-template render counts, rendered sizes and prompt prefix hashes"""
+        with self._lock:
+            templates = {
+                "/".join(filter(None, key)): {
+                    "path": str(template.path.relative_to(self.prompts_dir)),
+                    "version": template.version,
+                    "static": template.is_static,
+                    "source_chars": len(template.source),
+                    **template.stats.snapshot()
+                }
+                for key, template in sorted(self._templates.items())
+            }
+            composed = {
+                "/".join(str(part) for part in key if part): stats.snapshot()
+                for key, stats in sorted(self._composed_stats.items(), key=lambda item: str(item[0]))
+            }
+            prefixes = {
+                "/".join(str(part) for part in key if part): stats.snapshot()
+                for key, stats in sorted(self._prefix_stats.items(), key=lambda item: str(item[0]))
+            }
+            return {
+                "templates": templates,
+                "composed": composed,
+                "prefixes": prefixes,
+                "render_cache_entries": len(self._render_cache),
+                "composed_entries": len(self._composed),
+                "reloads": self.reloads
+            }
+
+
+# Global registry instance
+prompt_registry = PromptRegistry()
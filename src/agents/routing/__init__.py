@@ -0,0 +1,20 @@
+"""
+Agent routing support: shared keyword engine used for agent selection,
+urgency detection and profile detection.
+"""
+
+from .keyword_engine import (
+    KeywordAutomaton,
+    KeywordEngine,
+    MessageFeatures,
+    get_keyword_engine,
+    keyword_engine,
+)
+
+__all__ = [
+    "KeywordAutomaton",
+    "KeywordEngine",
+    "MessageFeatures",
+    "get_keyword_engine",
+    "keyword_engine",
+]
@@ -0,0 +1,287 @@
+"""
+Multilingual Keyword Engine - Healthcare AI V2
+==============================================
+
+Single-pass keyword detection shared by agent routing, urgency detection,
+profile detection and emotion mapping.
+
+Every keyword table in the agent system (English and Cantonese) is
+registered here under a group name and compiled into one Aho-Corasick
+automaton. Each message is scanned exactly once; the resulting
+MessageFeatures object answers every "does this text mention any of ..."
+question that the agents, orchestrator and context manager ask.
+
+Matching semantics are identical to ``keyword in text.lower()``: a keyword
+matches if it occurs anywhere in the lowercased text (keywords themselves
+are used verbatim), and group counts count table entries, so a keyword
+listed twice in a table counts twice.
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+import logging
+import threading
+
+
+logger = logging.getLogger("agents.routing.keyword_engine")
+
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick automaton over a fixed keyword list.
+
+    Finds every keyword occurring in a text in a single left-to-right pass,
+    independent of the number of keywords.
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        """
+        Build the automaton.
+
+        Args:
+            keywords: Keywords to match (already normalised)
+        """
+        self.keywords: List[str] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Tuple[int, ...]] = [()]
+
+        for keyword in keywords:
+            if keyword:
+                self._add(keyword)
+        self._build_failure_links()
+
+    def _add(self, keyword: str) -> None:
+        """Insert a keyword into the trie."""
+        state = 0
+        for char in keyword:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+                self._goto[state][char] = next_state
+            state = next_state
+        self._output[state] = self._output[state] + (len(self.keywords),)
+        self.keywords.append(keyword)
+
+    def _build_failure_links(self) -> None:
+        """Compute failure links breadth-first and merge suffix outputs."""
+        queue = list(self._goto[0].values())
+        head = 0
+        while head < len(queue):
+            state = queue[head]
+            head += 1
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                if self._output[self._fail[next_state]]:
+                    self._output[next_state] = (
+                        self._output[next_state] + self._output[self._fail[next_state]]
+                    )
+
+    def find_all(self, text: str) -> FrozenSet[int]:
+        """
+        Find the indexes of all keywords occurring in text.
+
+        Args:
+            text: Normalised text to scan
+
+        Returns:
+            Set of keyword indexes (into ``self.keywords``)
+        """
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        found = set()
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found.update(output[state])
+        return frozenset(found)
+
+
+@dataclass(frozen=True)
+class MessageFeatures:
+    """Keyword features of one message, shared by every consumer."""
+    text: str
+    matched: FrozenSet[str]
+    group_counts: Dict[str, int]
+    _tables: Dict[str, Tuple[str, ...]] = field(repr=False, compare=False, default_factory=dict)
+
+    def has(self, group: str) -> bool:
+        """True if any keyword of the group occurs in the message."""
+        return self.group_counts.get(group, 0) > 0
+
+    def count(self, group: str) -> int:
+        """Number of group table entries that occur in the message."""
+        return self.group_counts.get(group, 0)
+
+    def matches(self, group: str) -> List[str]:
+        """Matched keywords of the group, in table order."""
+        if not self.has(group):
+            return []
+        return [keyword for keyword in self._tables.get(group, ()) if keyword in self.matched]
+
+    def contains(self, keyword: str) -> bool:
+        """True if a registered keyword occurs in the message."""
+        return keyword in self.matched
+
+
+class KeywordEngine:
+    """
+    Registry of named keyword groups compiled into one automaton.
+
+    Groups are registered by the components that own the tables (agents,
+    context manager, emotion mapper) and compiled once; analysing a message
+    is a single scan whose result is cached for the other consumers of the
+    same message.
+    """
+
+    def __init__(self, cache_size: int = 512):
+        """
+        Initialize keyword engine.
+
+        Args:
+            cache_size: Number of recently analysed messages to keep
+        """
+        self._tables: Dict[str, Tuple[str, ...]] = {}
+        self._automaton: Optional[KeywordAutomaton] = None
+        self._keyword_groups: List[Tuple[Tuple[str, int], ...]] = []
+        self._cache: "OrderedDict[str, MessageFeatures]" = OrderedDict()
+        self._cache_size = cache_size
+        self._lock = threading.Lock()
+
+        # Statistics
+        self.scans = 0
+        self.cache_hits = 0
+
+    def register(self, group: str, keywords: Iterable[str]) -> None:
+        """
+        Register (or replace) a keyword group.
+
+        Args:
+            group: Group name, e.g. "safety_guardian.medical_emergency"
+            keywords: Keywords in the group
+        """
+        table = tuple(keywords)
+        with self._lock:
+            if self._tables.get(group) == table:
+                return
+            self._tables[group] = table
+            self._automaton = None
+            self._cache.clear()
+
+    def register_groups(self, prefix: str, groups: Dict[str, Iterable[str]]) -> None:
+        """
+        Register several groups under a common prefix.
+
+        Args:
+            prefix: Group name prefix
+            groups: Mapping of group suffix to keywords
+        """
+        for name, keywords in groups.items():
+            self.register(f"{prefix}.{name}", keywords)
+
+    def has_group(self, group: str) -> bool:
+        """Check whether a group is registered."""
+        return group in self._tables
+
+    def compile(self) -> KeywordAutomaton:
+        """
+        Compile all registered groups into the shared automaton.
+
+        Returns:
+            The compiled automaton
+        """
+        with self._lock:
+            if self._automaton is None:
+                self._automaton = self._build()
+            return self._automaton
+
+    def _build(self) -> KeywordAutomaton:
+        """Build the automaton and the keyword -> (group, multiplicity) map."""
+        memberships: Dict[str, Dict[str, int]] = {}
+        for group, table in self._tables.items():
+            for keyword in table:
+                groups = memberships.setdefault(keyword, {})
+                groups[group] = groups.get(group, 0) + 1
+
+        automaton = KeywordAutomaton(memberships.keys())
+        self._keyword_groups = [
+            tuple(memberships[keyword].items()) for keyword in automaton.keywords
+        ]
+        logger.info(
+            f"Compiled keyword engine: {len(self._tables)} groups, "
+            f"{len(automaton.keywords)} keywords"
+        )
+        return automaton
+
+    def analyze(self, text: str) -> MessageFeatures:
+        """
+        Scan a message once and return its keyword features.
+
+        Args:
+            text: Raw message text
+
+        Returns:
+            MessageFeatures for the message
+        """
+        text_lower = text.lower()
+
+        cached = self._cache.get(text_lower)
+        if cached is not None:
+            self.cache_hits += 1
+            return cached
+
+        automaton = self._automaton or self.compile()
+        keyword_groups = self._keyword_groups
+        matched = []
+        group_counts: Dict[str, int] = {}
+        for index in automaton.find_all(text_lower):
+            matched.append(automaton.keywords[index])
+            for group, multiplicity in keyword_groups[index]:
+                group_counts[group] = group_counts.get(group, 0) + multiplicity
+
+        features = MessageFeatures(
+            text=text_lower,
+            matched=frozenset(matched),
+            group_counts=group_counts,
+            _tables=self._tables,
+        )
+        self.scans += 1
+
+        with self._lock:
+            self._cache[text_lower] = features
+            if len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+
+        return features
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get engine statistics."""
+        return {
+            "groups": len(self._tables),
+            "keywords": len(self._automaton.keywords) if self._automaton else 0,
+            "scans": self.scans,
+            "cache_hits": self.cache_hits,
+            "cache_size": len(self._cache),
+        }
+
+
+# Global engine shared by all agents
+keyword_engine = KeywordEngine()
+
+
+def get_keyword_engine() -> KeywordEngine:
+    """Get the global keyword engine instance."""
+    return keyword_engine
@@ -26,6 +26,8 @@ from .base_agent import (
     AgentResponse, 
     AgentContext
 )
+from .emergency_card import emergency_actions, emergency_card_builder
+from .prompt_registry import prompt_registry
 from ..ai.model_manager import UrgencyLevel, TaskComplexity
 
 
@@ -127,6 +129,30 @@ class SafetyGuardianAgent(BaseAgent):
             "police": "999",
             "fire": "999"
         }
+        
+        # Common support/family care phrases (not emergencies)
+        self._support_phrases = [
+            "help her", "help him", "help them", "help my", "help grandma", "help grandpa",
+            "want to help", "how to help", "can I help", "ways to help", "support my",
+            "care for", "take care of", "looking after", "manage diabetes", "manage condition"
+        ]
+        
+        # Emergency context words for very short urgent messages
+        self._emergency_context = [
+            "urgent medical", "急症", "medical emergency", "醫療緊急",
+            "help me", "救命", "crisis", "危機"
+        ]
+        
+        self._register_keywords({
+            "medical_emergency": self._medical_emergency_keywords,
+            "mental_health_crisis": self._mental_health_crisis_keywords,
+            "support_phrases": self._support_phrases,
+            "emergency_context": self._emergency_context,
+            **{
+                f"age_crisis_{age_group}": keywords
+                for age_group, keywords in self._age_specific_crises.items()
+            },
+        })
     
     def can_handle(self, user_input: str, context: AgentContext) -> Tuple[bool, float]:
         """
@@ -139,33 +165,21 @@ class SafetyGuardianAgent(BaseAgent):
         Returns:
             Tuple of (can_handle: bool, confidence: float)
         """
-        user_input_lower = user_input.lower()
-        
-        # Exclude common support/family care phrases (not emergencies)
-        support_phrases = [
-            "help her", "help him", "help them", "help my", "help grandma", "help grandpa",
-            "want to help", "how to help", "can I help", "ways to help", "support my",
-            "care for", "take care of", "looking after", "manage diabetes", "manage condition"
-        ]
+        features = self.analyze_input(user_input)
         
         # If it's clearly about helping family/others (not self-emergency), skip
-        for phrase in support_phrases:
-            if phrase in user_input_lower:
-                return False, 0.0
+        if features.has("safety_guardian.support_phrases"):
+            return False, 0.0
         
         # Check for medical emergency keywords
-        medical_matches = sum(1 for keyword in self._medical_emergency_keywords 
-                            if keyword in user_input_lower)
+        medical_matches = features.count("safety_guardian.medical_emergency")
         
         # Check for mental health crisis keywords
-        mental_crisis_matches = sum(1 for keyword in self._mental_health_crisis_keywords 
-                                  if keyword in user_input_lower)
+        mental_crisis_matches = features.count("safety_guardian.mental_health_crisis")
         
         # Check for age-specific crisis patterns
         age_group = context.user_profile.get("age_group", "adult")
-        age_specific_keywords = self._age_specific_crises.get(age_group, [])
-        age_crisis_matches = sum(1 for keyword in age_specific_keywords 
-                               if keyword in user_input_lower)
+        age_crisis_matches = features.count(f"safety_guardian.age_crisis_{age_group}")
         
         # Calculate total emergency indicators
         total_emergency_indicators = medical_matches + mental_crisis_matches + age_crisis_matches
@@ -177,10 +191,9 @@ class SafetyGuardianAgent(BaseAgent):
             return True, 0.85
         
         # Check for emergency context words (more specific)
-        emergency_context = ["urgent medical", "急症", "medical emergency", "醫療緊急", "help me", "救命", "crisis", "危機"]
-        context_matches = sum(1 for word in emergency_context if word in user_input_lower)
+        context_matches = features.count("safety_guardian.emergency_context")
         
-        if context_matches >= 1 and len(user_input_lower) < 30:  # Very short urgent messages only
+        if context_matches >= 1 and len(features.text) < 30:  # Very short urgent messages only
             return True, 0.7
         
         return False, 0.0
@@ -241,6 +254,27 @@ class SafetyGuardianAgent(BaseAgent):
             }
         )
     
+    def build_emergency_card(self, user_input: str, context: AgentContext) -> Optional[Dict[str, Any]]:
+        """
+        Build the instant emergency card sent before the LLM elaboration.
+        
+        Uses only the keyword classification and the precomputed card
+        templates, so it returns in well under a millisecond.
+        
+        Args:
+            user_input: User's message
+            context: Conversation context
+            
+        Returns:
+            Localized emergency card
+        """
+        emergency_type = self._classify_emergency_type(user_input, context)
+        return emergency_card_builder.build(
+            emergency_type,
+            language=getattr(context, 'language_preference', 'en'),
+            district=context.user_profile.get("district")
+        )
+    
     def get_system_prompt(self, context: AgentContext, emergency_type: str = "general") -> str:
         """
         Get emergency-specific system prompt.
@@ -252,8 +286,17 @@ class SafetyGuardianAgent(BaseAgent):
         Returns:
             Emergency response system prompt
         """
+        language = getattr(context, 'language_preference', 'en')
+        return prompt_registry.layout(
+            (self.agent_id, language),
+            lambda: self._build_prompt_prefix(language),
+            [self._emergency_protocol(language, emergency_type), self._language_instruction(language)]
+        )
+    
+    def _build_prompt_prefix(self, language: str) -> str:
+        """Assemble the static system prompt prefix for a language"""
         # Choose language based on context preference
-        if getattr(context, 'language_preference', 'en') == "zh":
+        if language == "zh":
             base_prompt = """你是安全專員 (Safety Guardian) - 香港醫療AI系統的緊急應變專家。
 
 ## 緊急任務：
@@ -316,71 +359,64 @@ class SafetyGuardianAgent(BaseAgent):
 
 IMPORTANT: Only activate for genuine emergencies. For general health questions about family members, refer to wellness_coach agent instead."""
         
-        # Add emergency-specific guidance (adapt to language)
-        if getattr(context, 'language_preference', 'en') == "zh":
+        return base_prompt
+    
+    def _emergency_protocol(self, language: str, emergency_type: str) -> str:
+        """Emergency-type guidance section (empty for general emergencies)"""
+        if language == "zh":
             if emergency_type == "medical":
-                base_prompt += """
-
-## 醫療緊急情況：
+                return """## 醫療緊急情況：
 - 立即評估生命威脅跡象
 - 指導基本急救措施
 - 準備救護車到達
 - 收集重要醫療資訊"""
             
-            elif emergency_type == "mental_health":
-                base_prompt += """
-
-## 心理健康危機：
+            if emergency_type == "mental_health":
+                return """## 心理健康危機：
 - 評估自殺/自傷風險
 - 建立安全聯繫
 - 移除危險物品
 - 通知家長/監護人
 - 安排專業心理支援"""
             
-            elif emergency_type == "child":
-                base_prompt += """
-
-## 兒童緊急情況：
+            if emergency_type == "child":
+                return """## 兒童緊急情況：
 - 使用適合兒童的語言
 - 立即聯繫家長/監護人
 - 確保兒童在安全環境
 - 提供安慰和指導"""
         else:
             if emergency_type == "medical":
-                base_prompt += """
-
-## Medical Emergency Protocol:
+                return """## Medical Emergency Protocol:
 - Immediately assess life-threatening signs
 - Guide basic first aid measures
 - Prepare for ambulance arrival
 - Collect important medical information"""
             
-            elif emergency_type == "mental_health":
-                base_prompt += """
-
-## Mental Health Crisis Protocol:
+            if emergency_type == "mental_health":
+                return """## Mental Health Crisis Protocol:
 - Assess suicide/self-harm risk
 - Establish safe connection
 - Remove dangerous objects
 - Notify parents/guardians
 - Arrange professional mental health support"""
             
-            elif emergency_type == "child":
-                base_prompt += """
-
-## Child Emergency Protocol:
+            if emergency_type == "child":
+                return """## Child Emergency Protocol:
 - Use age-appropriate language
 - Immediately contact parents/guardians
 - Ensure child is in safe environment
 - Provide comfort and guidance"""
         
-        # Add language preference
-        if context.language_preference == "en":
-            base_prompt += "\n\n**CRITICAL: Respond ONLY in English for emergency clarity.**"
-        elif context.language_preference == "zh":
-            base_prompt += "\n\n**重要：緊急情況請使用繁體中文回應。**"
-        
-        return base_prompt
+        return ""
+    
+    def _language_instruction(self, language: str) -> str:
+        """Response language instruction, kept last so it takes precedence"""
+        if language == "en":
+            return "**CRITICAL: Respond ONLY in English for emergency clarity.**"
+        if language == "zh":
+            return "**重要：緊急情況請使用繁體中文回應。**"
+        return ""
     
     def _classify_emergency_type(self, user_input: str, context: AgentContext) -> str:
         """
@@ -393,15 +429,13 @@ IMPORTANT: Only activate for genuine emergencies. For general health questions a
         Returns:
             Emergency type classification
         """
-        user_input_lower = user_input.lower()
+        features = self.analyze_input(user_input)
         
         # Check for medical emergencies
-        medical_count = sum(1 for keyword in self._medical_emergency_keywords 
-                          if keyword in user_input_lower)
+        medical_count = features.count("safety_guardian.medical_emergency")
         
         # Check for mental health crises
-        mental_count = sum(1 for keyword in self._mental_health_crisis_keywords 
-                         if keyword in user_input_lower)
+        mental_count = features.count("safety_guardian.mental_health_crisis")
         
         # Age-specific emergencies
         age_group = context.user_profile.get("age_group", "adult")
@@ -498,45 +532,7 @@ IMPORTANT: Only activate for genuine emergencies. For general health questions a
         Returns:
             List of immediate actions
         """
-        actions = []
-        
-        if emergency_type == "medical":
-            actions.extend([
-                "Call 999 immediately if life-threatening",
-                "Stay calm and stay with the person",
-                "Do not move person if spinal injury suspected", 
-                "Gather medical history and current medications",
-                "Prepare for ambulance arrival"
-            ])
-        
-        elif emergency_type == "mental_health":
-            actions.extend([
-                "Ensure immediate safety - remove harmful objects",
-                "Stay with the person, do not leave them alone",
-                "Call Samaritans 2896 0000 for crisis support",
-                "Contact parents/guardians if under 18",
-                "Arrange professional mental health evaluation"
-            ])
-        
-        elif emergency_type == "child":
-            actions.extend([
-                "Contact parents/guardians immediately",
-                "Ensure child is in safe environment",
-                "Call 999 if immediate medical attention needed",
-                "Contact Child Protection Hotline 2755 1122 if abuse suspected",
-                "Stay calm and reassure the child"
-            ])
-        
-        else:  # general emergency
-            actions.extend([
-                "Assess immediate safety of situation",
-                "Call 999 if emergency services needed",
-                "Move to safe location if possible",
-                "Contact emergency contacts or family",
-                "Seek professional help immediately"
-            ])
-        
-        return actions
+        return emergency_actions(emergency_type, "en")
     
     def _create_emergency_alert(
         self, 
@@ -0,0 +1,284 @@
+"""
+Turn Pipeline - Healthcare AI V2
+================================
+
+Small async DAG runner for the stages of one conversation turn. Stages
+declare the stages they depend on; every stage starts as soon as its
+dependencies have finished, so independent work (profile detection, history
+load, HK data fetch, emotion and gesture selection, persistence) overlaps
+instead of running back to back.
+
+Features:
+- Declared dependencies, validated (unknown names, cycles) at construction
+- Async stages run on the event loop; blocking stages run in worker threads
+- Optional stages: failures are logged and the stage yields its default
+- One trace per turn with start offset, duration and status of every stage
+- Per-stage latency histograms shared by all pipelines with the same name
+"""
+
+import asyncio
+import inspect
+import logging
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from ..core.metrics import LatencyHistogram
+
+
+logger = logging.getLogger("agents.turn_pipeline")
+
+
+@dataclass
+class Stage:
+    """One step of a turn"""
+    name: str
+    func: Callable[["TurnState"], Any]  # Sync or async; receives the turn state
+    depends_on: Tuple[str, ...] = ()
+    blocking: bool = False  # Sync function doing blocking I/O; run in a worker thread
+    optional: bool = False  # Failure does not fail the turn; the result is `default`
+    default: Any = None
+    timeout: Optional[float] = None  # Seconds
+
+
+@dataclass
+class StageTiming:
+    """Timing of one stage within a trace"""
+    name: str
+    status: str  # "ok", "error", "timeout", "cancelled", "skipped" (never started)
+    start_ms: float = 0.0  # Offset from the start of the turn
+    duration_ms: float = 0.0
+    error: Optional[str] = None
+
+
+@dataclass
+class TurnTrace:
+    """Per-stage timings of one turn"""
+    pipeline: str
+    turn_id: str = field(default_factory=lambda: uuid.uuid4().hex[:12])
+    stages: List[StageTiming] = field(default_factory=list)
+    total_ms: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "pipeline": self.pipeline,
+            "turn_id": self.turn_id,
+            "total_ms": round(self.total_ms, 2),
+            "stages": [
+                {
+                    "name": timing.name,
+                    "status": timing.status,
+                    "start_ms": round(timing.start_ms, 2),
+                    "duration_ms": round(timing.duration_ms, 2),
+                    **({"error": timing.error} if timing.error else {})
+                }
+                for timing in self.stages
+            ]
+        }
+
+    def summary(self) -> str:
+        """Compact one-line form for logs"""
+        stages = " ".join(
+            f"{timing.name}={timing.duration_ms:.1f}ms@{timing.start_ms:.1f}"
+            + ("" if timing.status == "ok" else f"({timing.status})")
+            for timing in self.stages
+        )
+        return f"{self.pipeline} turn {self.turn_id} {self.total_ms:.1f}ms: {stages}"
+
+
+class TurnState:
+    """
+    Inputs and stage results of one turn.
+
+    state["name"] returns the result of stage "name", or the turn input of
+    that name when no such stage ran.
+    """
+
+    def __init__(self, inputs: Dict[str, Any]):
+        self.inputs = inputs
+        self.results: Dict[str, Any] = {}
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self.results:
+            return self.results[key]
+        return self.inputs[key]
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.results or key in self.inputs
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self[key] if key in self else default
+
+
+@dataclass
+class TurnResult:
+    """Outcome of a pipeline run"""
+    state: TurnState
+    trace: TurnTrace
+
+    def __getitem__(self, key: str) -> Any:
+        return self.state[key]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.state.get(key, default)
+
+
+class TurnMetrics:
+    """Per-stage latency histograms, keyed by pipeline and stage name"""
+
+    def __init__(self):
+        self._stages: Dict[str, Dict[str, LatencyHistogram]] = {}
+        self._totals: Dict[str, LatencyHistogram] = {}
+        self._errors: Dict[str, Dict[str, int]] = {}
+
+    def record(self, trace: TurnTrace):
+        stages = self._stages.setdefault(trace.pipeline, {})
+        errors = self._errors.setdefault(trace.pipeline, {})
+        for timing in trace.stages:
+            if timing.status in ("skipped", "cancelled"):
+                continue
+            stages.setdefault(timing.name, LatencyHistogram()).record(timing.duration_ms)
+            if timing.status in ("error", "timeout"):
+                errors[timing.name] = errors.get(timing.name, 0) + 1
+        self._totals.setdefault(trace.pipeline, LatencyHistogram()).record(trace.total_ms)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            pipeline: {
+                "total": self._totals[pipeline].snapshot(),
+                "stages": {name: histogram.snapshot() for name, histogram in stages.items()},
+                "errors": dict(self._errors.get(pipeline, {}))
+            }
+            for pipeline, stages in self._stages.items()
+        }
+
+
+class TurnPipeline:
+    """
+    Runs stages as a DAG: each stage starts once all of its dependencies
+    have finished.
+
+    A failing required stage cancels the stages still running and its
+    exception propagates from run(); the trace is logged either way.
+    """
+
+    def __init__(self, name: str, stages: Sequence[Stage], metrics: Optional[TurnMetrics] = None):
+        """
+        Initialize and validate the pipeline.
+
+        Args:
+            name: Pipeline name used in traces and metrics
+            stages: Stages in any order
+            metrics: Metrics sink (the global turn_metrics by default)
+
+        Raises:
+            ValueError: Duplicate stage names, unknown dependencies or cycles
+        """
+        self.name = name
+        self.stages: Dict[str, Stage] = {}
+        for stage in stages:
+            if stage.name in self.stages:
+                raise ValueError(f"Duplicate stage '{stage.name}' in pipeline '{name}'")
+            self.stages[stage.name] = stage
+        for stage in stages:
+            for dependency in stage.depends_on:
+                if dependency not in self.stages:
+                    raise ValueError(f"Stage '{stage.name}' depends on unknown stage '{dependency}'")
+        self.order = self._topological_order()
+        self.metrics = metrics or turn_metrics
+
+    def _topological_order(self) -> List[str]:
+        remaining = {name: set(stage.depends_on) for name, stage in self.stages.items()}
+        order: List[str] = []
+        while remaining:
+            ready = [name for name, deps in remaining.items() if not deps]
+            if not ready:
+                raise ValueError(f"Pipeline '{self.name}' has a dependency cycle: {sorted(remaining)}")
+            for name in ready:
+                order.append(name)
+                del remaining[name]
+            for deps in remaining.values():
+                deps.difference_update(ready)
+        return order
+
+    async def run(self, **inputs: Any) -> TurnResult:
+        """
+        Run one turn.
+
+        Args:
+            **inputs: Turn inputs, readable by stages through the state
+
+        Returns:
+            TurnResult with stage results and the trace
+        """
+        state = TurnState(inputs)
+        trace = TurnTrace(pipeline=self.name)
+        timings = {name: StageTiming(name=name, status="skipped") for name in self.order}
+        finished_stages = set()
+        running: Dict[asyncio.Task, str] = {}
+        origin = time.perf_counter()
+
+        def start_ready():
+            started = set(running.values())
+            for name in self.order:
+                if name in finished_stages or name in started:
+                    continue
+                stage = self.stages[name]
+                if all(dependency in finished_stages for dependency in stage.depends_on):
+                    timings[name].start_ms = (time.perf_counter() - origin) * 1000
+                    running[asyncio.ensure_future(self._call(stage, state))] = name
+
+        try:
+            start_ready()
+            while running:
+                finished, _ = await asyncio.wait(list(running), return_when=asyncio.FIRST_COMPLETED)
+                for task in finished:
+                    name = running.pop(task)
+                    stage = self.stages[name]
+                    timing = timings[name]
+                    timing.duration_ms = (time.perf_counter() - origin) * 1000 - timing.start_ms
+                    finished_stages.add(name)
+                    error = task.exception()
+                    if error is None:
+                        state.results[name] = task.result()
+                        timing.status = "ok"
+                        continue
+
+                    timing.status = "timeout" if isinstance(error, asyncio.TimeoutError) else "error"
+                    timing.error = f"{type(error).__name__}: {error}"
+                    if not stage.optional:
+                        raise error
+                    logger.warning(f"Optional stage '{name}' of {self.name} failed: {timing.error}")
+                    state.results[name] = stage.default
+                start_ready()
+        finally:
+            for task, name in running.items():
+                task.cancel()
+                timings[name].status = "cancelled"
+                timings[name].duration_ms = (time.perf_counter() - origin) * 1000 - timings[name].start_ms
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+            trace.total_ms = (time.perf_counter() - origin) * 1000
+            trace.stages = sorted(timings.values(), key=lambda timing: (timing.status == "skipped", timing.start_ms))
+            self.metrics.record(trace)
+            logger.info(trace.summary())
+
+        return TurnResult(state=state, trace=trace)
+
+    @staticmethod
+    async def _call(stage: Stage, state: TurnState) -> Any:
+        if stage.blocking:
+            call = asyncio.to_thread(stage.func, state)
+        else:
+            result = stage.func(state)
+            if not inspect.isawaitable(result):
+                return result
+            call = result
+        if stage.timeout is not None:
+            return await asyncio.wait_for(call, timeout=stage.timeout)
+        return await call
+
+
+# Global per-stage turn metrics
+turn_metrics = TurnMetrics()
@@ -25,6 +25,7 @@ from .base_agent import (
     AgentResponse, 
     AgentContext
 )
+from .prompt_registry import prompt_registry
 from ..ai.model_manager import UrgencyLevel, TaskComplexity
 
 
@@ -104,6 +105,32 @@ class WellnessCoachAgent(BaseAgent):
             "cultural": ["traditional_medicine", "中醫", "herbal", "草藥", "tai_chi", "太極"],
             "dietary": ["dim_sum", "點心", "congee", "粥", "tea", "茶", "hot_pot", "火鍋"]
         }
+        
+        # Emergency/crisis indicators that defer to specialized agents
+        self._emergency_indicators = [
+            "emergency", "緊急", "crisis", "危機", "urgent", "急",
+            "pain", "痛", "sick", "病", "suicide", "自殺"
+        ]
+        
+        # General health improvement intent
+        self._improvement_indicators = [
+            "how to", "點樣", "want to", "想", "improve", "改善",
+            "better", "更好", "healthy", "健康", "tips", "貼士"
+        ]
+        
+        self._register_keywords({
+            "keywords": self._wellness_keywords,
+            "emergency_indicators": self._emergency_indicators,
+            "improvement_indicators": self._improvement_indicators,
+            **{
+                f"age_{age_group}": focus["keywords"]
+                for age_group, focus in self._age_specific_wellness.items()
+            },
+            **{
+                f"hk_{category}": keywords
+                for category, keywords in self._hk_wellness_context.items()
+            },
+        })
     
     def can_handle(self, user_input: str, context: AgentContext) -> Tuple[bool, float]:
         """
@@ -116,31 +143,23 @@ class WellnessCoachAgent(BaseAgent):
         Returns:
             Tuple of (can_handle: bool, confidence: float)
         """
-        user_input_lower = user_input.lower()
+        features = self.analyze_input(user_input)
         
         # Check for wellness keywords
-        wellness_matches = sum(1 for keyword in self._wellness_keywords 
-                             if keyword in user_input_lower)
+        wellness_matches = features.count("wellness_coach.keywords")
         
         # Check for age-specific wellness concerns
         age_group = context.user_profile.get("age_group", "adult")
-        age_specific = self._age_specific_wellness.get(age_group, {})
-        age_keywords = age_specific.get("keywords", [])
-        age_matches = sum(1 for keyword in age_keywords if keyword in user_input_lower)
+        age_matches = features.count(f"wellness_coach.age_{age_group}")
         
         # Check for Hong Kong specific wellness contexts
-        hk_matches = 0
-        for category, keywords in self._hk_wellness_context.items():
-            hk_matches += sum(1 for keyword in keywords if keyword in user_input_lower)
+        hk_matches = sum(
+            features.count(f"wellness_coach.hk_{category}")
+            for category in self._hk_wellness_context
+        )
         
         # Exclude if emergency/crisis indicators present
-        emergency_indicators = [
-            "emergency", "緊急", "crisis", "危機", "urgent", "急",
-            "pain", "痛", "sick", "病", "suicide", "自殺"
-        ]
-        
-        emergency_present = any(indicator in user_input_lower for indicator in emergency_indicators)
-        if emergency_present:
+        if features.has("wellness_coach.emergency_indicators"):
             return False, 0.0  # Defer to other specialized agents
         
         # Calculate confidence
@@ -154,13 +173,7 @@ class WellnessCoachAgent(BaseAgent):
             return True, confidence
         
         # Check for general health improvement intent
-        improvement_indicators = [
-            "how to", "點樣", "want to", "想", "improve", "改善",
-            "better", "更好", "healthy", "健康", "tips", "貼士"
-        ]
-        
-        improvement_matches = sum(1 for indicator in improvement_indicators 
-                                if indicator in user_input_lower)
+        improvement_matches = features.count("wellness_coach.improvement_indicators")
         
         if improvement_matches >= 2:
             return True, 0.6
@@ -232,14 +245,28 @@ class WellnessCoachAgent(BaseAgent):
         Returns:
             Customized system prompt
         """
-        # Load the proper English healthcare prompt
-        try:
-            import os
-            prompt_file = os.path.join(os.path.dirname(__file__), '../../prompts/agents/wellness_coach/en.txt')
-            with open(prompt_file, 'r', encoding='utf-8') as f:
-                base_prompt = f.read()
-        except Exception as e:
-            # Fallback to proper healthcare prompt if file loading fails
+        language = getattr(context, 'language_preference', 'en')
+        age_group = context.user_profile.get("age_group", "adult")
+        health_conditions = context.user_profile.get("health_conditions") or ()
+        
+        # The template is the same for every user and language, so it is a
+        # cacheable prefix; everything from the profile goes after it
+        suffix = [f"Tailor wellness recommendations specifically for {age_group} age group with appropriate goals and strategies."]
+        if health_conditions:
+            conditions = ", ".join(str(condition) for condition in health_conditions)
+            suffix.append(f"Consider existing health conditions: {conditions} when providing wellness recommendations.")
+        suffix.append(self._age_focus(age_group))
+        suffix.append(self._language_instruction(language))
+        
+        return prompt_registry.layout((self.agent_id,), self._build_prompt_prefix, suffix)
+    
+    def _build_prompt_prefix(self) -> str:
+        """Render the English healthcare prompt template"""
+        template = prompt_registry.get_agent_template(self.agent_id, "en")
+        if template is not None:
+            base_prompt = prompt_registry.render(template)
+        else:
+            # Fallback to proper healthcare prompt if the template file is missing
             base_prompt = """You are the Wellness Coach, the preventive health and lifestyle specialist for the Healthcare AI system. Your mission is to empower users with knowledge, motivation, and practical strategies for optimal health and well-being.
 
 ## Your Wellness Expertise: PREVENTION, EDUCATION & EMPOWERMENT
@@ -267,43 +294,38 @@ You are the health promotion specialist who focuses on preventing illness and op
 
 Remember: Your role is to inspire, educate, and support users in their journey toward optimal health and well-being."""
         
-        # Add age-specific focus
-        age_group = context.user_profile.get("age_group", "adult")
+        return base_prompt
+    
+    def _age_focus(self, age_group: str) -> str:
+        """Age-specific focus section (empty for adults)"""
         if age_group == "child":
-            base_prompt += """
-
-## Child Health Focus:
+            return """## Child Health Focus:
 - Growth and development support with age-appropriate nutrition
 - Building foundation for lifelong healthy habits
 - Importance of physical activity and active play
 - Parent involvement and creating healthy family environments"""
         
-        elif age_group == "teen":
-            base_prompt += """
-
-## Teen Health Focus:
+        if age_group == "teen":
+            return """## Teen Health Focus:
 - Academic stress management and mental wellness
 - Adapting to physical changes and health education
 - Healthy social relationships and peer influence navigation
 - Building independent health decision-making skills"""
         
-        elif age_group == "elderly":
-            base_prompt += """
-
-## Elderly Health Focus:
+        if age_group == "elderly":
+            return """## Elderly Health Focus:
 - Active aging and maintaining functional independence
 - Chronic disease prevention and management
 - Fall prevention and safe living strategies
 - Social connection and mental health maintenance"""
         
-        # Add language preference instruction
-        language = getattr(context, 'language_preference', 'en')
+        return ""
+    
+    def _language_instruction(self, language: str) -> str:
+        """Response language instruction, kept last so it takes precedence"""
         if language == "zh":
-            base_prompt += "\n\n**Important: Respond in Traditional Chinese, providing practical health guidance.**"
-        else:
-            base_prompt += "\n\n**Important: Respond in English, providing clear health guidance and practical wellness advice.**"
-        
-        return base_prompt
+            return "**Important: Respond in Traditional Chinese, providing practical health guidance.**"
+        return "**Important: Respond in English, providing clear health guidance and practical wellness advice.**"
     
     def _post_process_response(self, content: str, context: AgentContext) -> str:
         """
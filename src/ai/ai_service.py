@@ -17,7 +17,7 @@ from src.ai.model_manager import (
 from src.ai.cost_optimizer import CostOptimizer, get_cost_optimizer
 from src.ai.providers.aws_bedrock import BedrockClient, is_bedrock_available
 from src.core.logging import get_logger
-from src.core.exceptions import AgentError, ExternalAPIError
+from src.core.exceptions import AgentError, ExternalAPIError, ServiceOverloadedError
 from src.config import settings
 
 
@@ -36,6 +36,8 @@ class AIRequest:
     conversation_context: Optional[Dict] = None
     cost_constraints: Optional[Dict] = None
     performance_requirements: Optional[Dict] = None
+    conversation_history: Optional[List[Dict[str, str]]] = None  # prior turns sent to the model
+    requester_id: Optional[str] = None  # fair-queuing key for the LLM scheduler
 
 
 @dataclass
@@ -113,6 +115,9 @@ class HealthcareAIService:
             
         Returns:
             AIResponse object with generated content and metadata
+            
+        Raises:
+            ServiceOverloadedError: The request was shed by the LLM scheduler
         """
         if not self._initialized:
             await self.initialize()
@@ -138,14 +143,16 @@ class HealthcareAIService:
                 user_id=request.user_id,
                 conversation_context=request.conversation_context,
                 cost_constraints=request.cost_constraints,
-                performance_requirements=request.performance_requirements
+                performance_requirements=request.performance_requirements,
+                requester_id=request.requester_id
             )
             
             # Make request with fallback handling
             model_response = await self.model_manager.make_request_with_fallback(
                 criteria=criteria,
                 system_prompt=request.system_prompt,
-                user_prompt=request.user_input
+                user_prompt=request.user_input,
+                history=request.conversation_history
             )
             
             # Record usage for cost optimization
@@ -200,6 +207,10 @@ class HealthcareAIService:
             
             return response
             
+        except ServiceOverloadedError:
+            # Load shedding: callers answer with their fallback response
+            raise
+            
         except Exception as e:
             total_processing_time = int((datetime.utcnow() - start_time).total_seconds() * 1000)
             
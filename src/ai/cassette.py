@@ -0,0 +1,331 @@
+"""
+LLM cassettes for Healthcare AI V2
+Record OpenRouter calls once, replay them offline with synthetic latency
+
+Record mode appends one compact JSON line per provider call: request
+fingerprints, status, response text, token usage and latency. Prompts are
+not stored, only their hashes, so cassettes recorded on real conversations
+carry no message text besides the model's answers.
+
+Replay mode answers calls from a cassette instead of the network, either
+in-process (OpenRouterClient with LLM_CASSETTE_MODE=replay) or over HTTP
+(scripts/benchmarks/cassette_replay_server.py, an OpenAI-compatible stub
+for OPENROUTER_BASE_URL or LLM_STUB_PROVIDER_URL). Latency is drawn from a
+configurable distribution so orchestration, persistence and WebSocket
+overhead can be benchmarked in CI without network access.
+
+Latency specs:
+- "none": answer immediately
+- "recorded[:SCALE]": the recorded latency, optionally scaled
+- "fixed:MS", "uniform:LOW,HIGH", "normal:MEAN,STD", "lognormal:MEDIAN,SIGMA"
+"""
+
+import asyncio
+import gzip
+import hashlib
+import json
+import math
+import random
+import statistics
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.ai.token_estimator import token_estimator
+from src.core.logging import get_logger
+
+
+logger = get_logger(__name__)
+
+CASSETTE_MODES = ("off", "record", "replay")
+MISS_POLICIES = ("error", "synthesize")
+
+# Status returned for requests with no recording under the "error" policy
+MISS_STATUS = 404
+
+
+def fingerprint(payload: Dict[str, Any]) -> str:
+    """Hash of everything that determines the answer: model, messages, limits"""
+    canonical = json.dumps(
+        [payload["model"], payload["messages"], payload.get("max_tokens"), payload.get("temperature")],
+        ensure_ascii=False,
+        separators=(",", ":"),
+        sort_keys=True
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:32]
+
+
+def loose_fingerprint(payload: Dict[str, Any]) -> str:
+    """
+    Hash of the model and the last user message only.
+
+    Matches a replayed request whose system prompt or history differs from
+    the recording (timestamps, retrieved context).
+    """
+    last_user = next(
+        (message["content"] for message in reversed(payload["messages"]) if message["role"] == "user"),
+        ""
+    )
+    canonical = json.dumps([payload["model"], last_user], ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:32]
+
+
+@dataclass
+class Interaction:
+    """One recorded provider call"""
+    fingerprint: str
+    loose: str
+    model: str
+    tier: str
+    status: int
+    content: str = ""
+    usage: Dict[str, int] = field(default_factory=dict)
+    latency_ms: float = 0.0
+    error: Optional[str] = None
+    recorded_at: float = 0.0
+
+
+class Cassette:
+    """
+    Recorded interactions in a JSON Lines file (gzip-compressed when the
+    path ends in .gz).
+
+    Every recorded call is appended and closed on its own, as a complete
+    gzip member for .gz paths, so the file is readable at any time even if
+    the process never shuts down cleanly.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.interactions: List[Interaction] = []
+        self._exact: Dict[str, List[Interaction]] = {}
+        self._loose: Dict[str, List[Interaction]] = {}
+        self._cursor: Dict[str, int] = {}
+
+    @classmethod
+    def load(cls, path: str) -> "Cassette":
+        """
+        Read a cassette file.
+
+        A final record cut short by a crash (truncated gzip member or
+        partial line) is skipped with a warning.
+
+        Raises:
+            FileNotFoundError: The cassette does not exist
+        """
+        cassette = cls(path)
+        with cassette._open("rt") as handle:
+            try:
+                for line in handle:
+                    if not line.strip():
+                        continue
+                    try:
+                        cassette._index(Interaction(**json.loads(line)))
+                    except (json.JSONDecodeError, TypeError):
+                        logger.warning(f"Skipping unreadable record in cassette {path}")
+            except EOFError:
+                logger.warning(f"Cassette {path} ends with a truncated record")
+        logger.info(f"Loaded {len(cassette.interactions)} recorded LLM calls from {path}")
+        return cassette
+
+    def _open(self, mode: str):
+        if self.path.suffix == ".gz":
+            return gzip.open(self.path, mode, encoding="utf-8")
+        return open(self.path, mode, encoding="utf-8")
+
+    def _index(self, interaction: Interaction):
+        self.interactions.append(interaction)
+        self._exact.setdefault(interaction.fingerprint, []).append(interaction)
+        self._loose.setdefault(interaction.loose, []).append(interaction)
+
+    def record(
+        self,
+        payload: Dict[str, Any],
+        tier: str,
+        status: int,
+        data: Any,
+        latency_ms: float
+    ) -> Interaction:
+        """
+        Append one provider call.
+
+        Args:
+            payload: Request payload sent to the provider
+            tier: Model tier
+            status: HTTP status
+            data: Decoded JSON body (status 200) or error text
+            latency_ms: Time to the full response
+        """
+        content, usage, error = "", {}, None
+        if status == 200 and isinstance(data, dict):
+            choices = data.get("choices") or [{}]
+            content = choices[0].get("message", {}).get("content") or ""
+            usage = data.get("usage", {})
+        else:
+            error = str(data)[:500]
+
+        interaction = Interaction(
+            fingerprint=fingerprint(payload),
+            loose=loose_fingerprint(payload),
+            model=payload["model"],
+            tier=tier,
+            status=status,
+            content=content,
+            usage=usage,
+            latency_ms=round(latency_ms, 1),
+            error=error,
+            recorded_at=round(time.time(), 3)
+        )
+        self._index(interaction)
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._open("at") as handle:
+            handle.write(json.dumps(asdict(interaction), ensure_ascii=False, separators=(",", ":")) + "\n")
+        return interaction
+
+    def lookup(self, payload: Dict[str, Any]) -> Tuple[Optional[Interaction], str]:
+        """
+        Find the recording for a request.
+
+        Repeated recordings of the same request are returned in recorded
+        order, wrapping around.
+
+        Returns:
+            (interaction or None, match kind: "exact", "loose" or "miss")
+        """
+        for kind, key, index in (
+            ("exact", fingerprint(payload), self._exact),
+            ("loose", loose_fingerprint(payload), self._loose)
+        ):
+            candidates = index.get(key)
+            if candidates:
+                cursor_key = f"{kind}:{key}"
+                position = self._cursor.get(cursor_key, 0)
+                self._cursor[cursor_key] = position + 1
+                return candidates[position % len(candidates)], kind
+        return None, "miss"
+
+    def median_latency_ms(self) -> float:
+        latencies = [interaction.latency_ms for interaction in self.interactions if interaction.status == 200]
+        return statistics.median(latencies) if latencies else 0.0
+
+    def close(self):
+        """Nothing is held open between records; kept for the client shutdown path"""
+
+
+class LatencyModel:
+    """Synthetic latency drawn from a distribution spec (see module docstring)"""
+
+    def __init__(self, spec: str = "recorded", seed: int = 0):
+        """
+        Parse a latency spec.
+
+        Raises:
+            ValueError: Unknown distribution or malformed parameters
+        """
+        self.spec = spec
+        self.rng = random.Random(seed)
+        kind, _, args = spec.partition(":")
+        try:
+            params = [float(value) for value in args.split(",")] if args else []
+        except ValueError:
+            raise ValueError(f"Invalid latency spec: {spec}")
+
+        expected = {"none": (0,), "recorded": (0, 1), "fixed": (1,), "uniform": (2,), "normal": (2,), "lognormal": (2,)}
+        if kind not in expected or len(params) not in expected[kind]:
+            raise ValueError(f"Invalid latency spec: {spec}")
+        self.kind = kind
+        self.params = params
+
+    def sample(self, recorded_ms: float) -> float:
+        """Latency in milliseconds for one replayed call"""
+        if self.kind == "none":
+            return 0.0
+        if self.kind == "recorded":
+            return recorded_ms * (self.params[0] if self.params else 1.0)
+        if self.kind == "fixed":
+            return self.params[0]
+        if self.kind == "uniform":
+            return self.rng.uniform(*self.params)
+        if self.kind == "normal":
+            return max(0.0, self.rng.gauss(*self.params))
+        median, sigma = self.params
+        return self.rng.lognormvariate(math.log(median), sigma)
+
+
+class CassettePlayer:
+    """
+    Answers chat completion payloads from a cassette, with synthetic latency.
+
+    play() returns the same (status, body) pair an HTTP call would, so the
+    client's response handling runs unchanged.
+    """
+
+    def __init__(self, cassette: Cassette, latency: LatencyModel, on_miss: str = "synthesize"):
+        """
+        Initialize the player.
+
+        Args:
+            cassette: Recorded interactions
+            latency: Latency distribution for replayed calls
+            on_miss: "error" answers unrecorded requests with status 404;
+                "synthesize" answers them with a placeholder response
+        """
+        if on_miss not in MISS_POLICIES:
+            raise ValueError(f"Unknown cassette miss policy: {on_miss}")
+        self.cassette = cassette
+        self.latency = latency
+        self.on_miss = on_miss
+        self.fallback_latency_ms = cassette.median_latency_ms()
+        self.stats = {"exact": 0, "loose": 0, "miss": 0}
+
+    async def play(self, payload: Dict[str, Any]) -> Tuple[int, Any]:
+        """
+        Replay one call.
+
+        Returns:
+            (HTTP status, decoded JSON body or error text)
+        """
+        interaction, kind = self.cassette.lookup(payload)
+        self.stats[kind] += 1
+        recorded_ms = interaction.latency_ms if interaction else self.fallback_latency_ms
+        delay_ms = self.latency.sample(recorded_ms)
+        if delay_ms > 0:
+            await asyncio.sleep(delay_ms / 1000.0)
+
+        if interaction is None:
+            if self.on_miss == "error":
+                return MISS_STATUS, f"No recorded response for request {fingerprint(payload)}"
+            return 200, self._synthesize(payload)
+        if interaction.status != 200:
+            return interaction.status, interaction.error or ""
+        return 200, {
+            "model": interaction.model,
+            "choices": [{"message": {"role": "assistant", "content": interaction.content}}],
+            "usage": interaction.usage
+        }
+
+    @staticmethod
+    def _synthesize(payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Placeholder answer with plausible token usage for an unrecorded request"""
+        content = "This is a replayed placeholder response."
+        prompt_tokens = token_estimator.count_messages(payload["messages"], payload["model"])
+        completion_tokens = token_estimator.count(content, payload["model"])
+        return {
+            "model": payload["model"],
+            "choices": [{"message": {"role": "assistant", "content": content}}],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
+            }
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "interactions": len(self.cassette.interactions),
+            "latency": self.latency.spec,
+            "on_miss": self.on_miss,
+            "matches": dict(self.stats)
+        }
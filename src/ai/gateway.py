@@ -0,0 +1,398 @@
+"""
+LLM gateway for Healthcare AI V2
+Weighted, latency-aware routing of model calls across providers
+
+Each model tier (free, lite, premium) can be served by several providers
+(OpenRouter, AWS Bedrock, a local HTTP stub). For every call the gateway:
+
+- Orders the providers of the tier by a weighted random draw; configured
+  weights are scaled down for providers slower than the fastest one
+- Skips providers whose per-minute request budget is spent, so one
+  provider's rate limit is not hit while another has headroom
+- Tries the next provider when a call fails (spillover)
+- Takes a provider out of rotation for a cooldown when it throttles us, or
+  when its recent error rate or latency crosses the configured threshold;
+  after the cooldown it rejoins with a clean record
+"""
+
+import random
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+from src.ai.openrouter_client import ModelResponse
+from src.ai.providers.base import LLMProvider, is_throttled
+from src.config import settings
+from src.core.exceptions import ServiceOverloadedError, ValidationError
+from src.core.logging import get_logger
+from src.core.metrics import LatencyHistogram
+
+
+logger = get_logger(__name__)
+
+# Smoothing factor for the per-provider latency average
+LATENCY_ALPHA = 0.2
+
+
+class RateBudget:
+    """Token bucket holding a provider's requests-per-minute budget"""
+
+    def __init__(self, requests_per_minute: int):
+        self.capacity = float(requests_per_minute)
+        self.tokens = float(requests_per_minute)
+        self.refill_per_second = requests_per_minute / 60.0
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.refill_per_second)
+        self._updated = now
+
+    def try_acquire(self) -> bool:
+        """Take one request from the budget if any is left"""
+        self._refill()
+        if self.tokens < 1.0:
+            return False
+        self.tokens -= 1.0
+        return True
+
+    @property
+    def remaining(self) -> int:
+        self._refill()
+        return int(self.tokens)
+
+
+class ProviderHealth:
+    """Recent outcomes and latency of one provider, with a trip switch"""
+
+    def __init__(self, window: int):
+        self.outcomes: Deque[bool] = deque(maxlen=window)
+        self.latency_ms: Optional[float] = None  # Smoothed latency of successful calls
+        self.latency = LatencyHistogram()
+        self.requests = 0
+        self.failures = 0
+        self.throttled = 0
+        self.trips = 0
+        self.tripped_until = 0.0
+        self.trip_reason: Optional[str] = None
+
+    @property
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+    def is_tripped(self) -> bool:
+        return time.monotonic() < self.tripped_until
+
+    def record_success(self, latency_ms: float, trips_at_start: int):
+        """
+        Record a successful call.
+
+        Args:
+            latency_ms: Call latency
+            trips_at_start: self.trips when the call started; calls that
+                were in flight across a trip do not count toward the new record
+        """
+        self.requests += 1
+        self.latency.record(latency_ms)
+        if trips_at_start != self.trips:
+            return
+        self.outcomes.append(True)
+        self.latency_ms = (
+            latency_ms if self.latency_ms is None
+            else self.latency_ms + LATENCY_ALPHA * (latency_ms - self.latency_ms)
+        )
+
+    def record_failure(self, throttled: bool, trips_at_start: int):
+        """Record a failed call (see record_success)"""
+        self.requests += 1
+        self.failures += 1
+        if throttled:
+            self.throttled += 1
+        if trips_at_start == self.trips:
+            self.outcomes.append(False)
+
+    def trip(self, reason: str, cooldown_seconds: float):
+        """Take the provider out of rotation; it rejoins with a clean record"""
+        self.trips += 1
+        self.trip_reason = reason
+        self.tripped_until = time.monotonic() + cooldown_seconds
+        self.outcomes.clear()
+        self.latency_ms = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        tripped = self.is_tripped()
+        return {
+            "state": "tripped" if tripped else "healthy",
+            "trip_reason": self.trip_reason if tripped else None,
+            "cooldown_remaining_s": round(max(0.0, self.tripped_until - time.monotonic()), 1),
+            "requests": self.requests,
+            "failures": self.failures,
+            "throttled": self.throttled,
+            "trips": self.trips,
+            "error_rate": round(self.error_rate, 3),
+            "latency_ms": round(self.latency_ms, 1) if self.latency_ms is not None else None,
+            "latency": self.latency.snapshot()
+        }
+
+
+class LLMGateway:
+    """
+    Routes a model tier's calls across the providers that serve it.
+
+    Not thread-safe; all calls must come from the same event loop.
+    """
+
+    def __init__(
+        self,
+        providers: List[LLMProvider],
+        weights: Optional[Dict[str, Dict[str, float]]] = None,
+        rate_limits: Optional[Dict[str, int]] = None,
+        error_rate_threshold: Optional[float] = None,
+        latency_threshold_ms: Optional[float] = None,
+        window: Optional[int] = None,
+        min_requests: Optional[int] = None,
+        cooldown_seconds: Optional[float] = None,
+        rng: Optional[random.Random] = None
+    ):
+        """
+        Initialize the gateway.
+
+        Args:
+            providers: Provider adapters
+            weights: Provider name -> {model tier: weight}; a provider only
+                serves the tiers it has a positive weight for
+            rate_limits: Provider name -> requests per minute (no budget if absent)
+            error_rate_threshold: Error rate over the window that trips a provider
+            latency_threshold_ms: Smoothed latency that trips a provider
+            window: Outcomes kept per provider for the error rate
+            min_requests: Outcomes needed before the error rate can trip
+            cooldown_seconds: Time a tripped provider stays out of rotation
+            rng: Random source for the weighted draw
+        """
+        self.providers: Dict[str, LLMProvider] = {provider.name: provider for provider in providers}
+        self.weights = weights if weights is not None else settings.llm_provider_weights
+        rate_limits = rate_limits if rate_limits is not None else settings.llm_provider_rate_limits
+        self.error_rate_threshold = error_rate_threshold or settings.llm_spillover_error_rate
+        self.latency_threshold_ms = latency_threshold_ms or settings.llm_spillover_latency_ms
+        self.min_requests = min_requests or settings.llm_spillover_min_requests
+        self.cooldown_seconds = cooldown_seconds or settings.llm_spillover_cooldown_seconds
+        self.rng = rng or random.Random()
+
+        window = window or settings.llm_spillover_window
+        self.health: Dict[str, ProviderHealth] = {name: ProviderHealth(window) for name in self.providers}
+        self.budgets: Dict[str, RateBudget] = {
+            name: RateBudget(limit) for name, limit in rate_limits.items()
+            if name in self.providers and limit > 0
+        }
+        self.routed: Dict[str, Dict[str, int]] = {}
+        self.spillovers = 0
+        self.budget_skips = 0
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def providers_for(self, model_tier: str) -> List[str]:
+        """Names of the configured providers serving a tier"""
+        return [
+            name for name, provider in self.providers.items()
+            if self.weights.get(name, {}).get(model_tier, 0) > 0
+            and provider.supports(model_tier)
+            and provider.is_available()
+        ]
+
+    async def complete(
+        self,
+        model_tier: str,
+        system_prompt: str,
+        user_prompt: str,
+        history: Optional[List[Dict[str, str]]] = None,
+        agent_type: str = "general",
+        content_type: Optional[str] = None
+    ) -> ModelResponse:
+        """
+        Run a chat completion on the best provider for a tier.
+
+        Args:
+            model_tier: Model tier (free, lite, premium)
+            system_prompt: System prompt
+            user_prompt: Current user message
+            history: Earlier {"role", "content"} turns
+            agent_type: Calling agent
+            content_type: Content type for token budgeting
+
+        Returns:
+            ModelResponse; response.provider names the provider that answered
+
+        Raises:
+            ServiceOverloadedError: Every provider's request budget is spent
+            ExternalAPIError: Every provider failed (the last error)
+            ValidationError: No provider serves the tier
+        """
+        order = self._route(model_tier)
+        if not order:
+            raise ValidationError(f"No LLM provider serves model tier: {model_tier}")
+
+        last_error: Optional[Exception] = None
+        attempted = 0
+        for index, name in enumerate(order):
+            budget = self.budgets.get(name)
+            if budget is not None and not budget.try_acquire():
+                self.budget_skips += 1
+                logger.info(f"Provider {name} request budget spent; spilling {model_tier} call over")
+                continue
+
+            if attempted:
+                self.spillovers += 1
+            attempted += 1
+            has_alternative = index < len(order) - 1
+            provider = self.providers[name]
+            health = self.health[name]
+            trips_at_start = health.trips
+            started = time.monotonic()
+            try:
+                response = await provider.complete(
+                    model_tier=model_tier,
+                    system_prompt=system_prompt,
+                    user_prompt=user_prompt,
+                    history=history,
+                    agent_type=agent_type,
+                    content_type=content_type,
+                    # Fail fast when another provider can take the call
+                    max_retries=1 if has_alternative else 3
+                )
+            except Exception as e:
+                last_error = e
+                throttled = is_throttled(e)
+                health.record_failure(throttled, trips_at_start)
+                self._check_health(name, throttled)
+                logger.warning(f"Provider {name} failed for {model_tier}: {e}")
+                continue
+
+            health.record_success((time.monotonic() - started) * 1000, trips_at_start)
+            self._check_health(name, throttled=False)
+            tier_counts = self.routed.setdefault(model_tier, {})
+            tier_counts[name] = tier_counts.get(name, 0) + 1
+            return response
+
+        if last_error is None:
+            raise ServiceOverloadedError(
+                "All LLM providers are over their request budget",
+                context={"model": model_tier}
+            )
+        raise last_error
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Per-provider health, budgets and traffic split per tier"""
+        return {
+            "providers": {
+                name: {
+                    "weights": dict(self.weights.get(name, {})),
+                    "available": provider.is_available(),
+                    "budget_remaining": self.budgets[name].remaining if name in self.budgets else None,
+                    **self.health[name].snapshot(),
+                    **provider.get_stats()
+                }
+                for name, provider in self.providers.items()
+            },
+            "routed": {tier: dict(counts) for tier, counts in self.routed.items()},
+            "spillovers": self.spillovers,
+            "budget_skips": self.budget_skips
+        }
+
+    async def close(self):
+        for provider in self.providers.values():
+            await provider.close()
+
+    # ------------------------------------------------------------------
+    # Routing
+    # ------------------------------------------------------------------
+
+    def _route(self, model_tier: str) -> List[str]:
+        """
+        Providers to try for a call, in order.
+
+        Healthy providers come first in a weighted random order; tripped
+        providers follow (soonest back first) so a call still has somewhere
+        to go when every provider is cooling down.
+        """
+        names = self.providers_for(model_tier)
+        healthy = [name for name in names if not self.health[name].is_tripped()]
+        tripped = sorted(
+            (name for name in names if name not in healthy),
+            key=lambda name: self.health[name].tripped_until
+        )
+
+        latencies = [self.health[name].latency_ms for name in healthy if self.health[name].latency_ms]
+        fastest = min(latencies) if latencies else None
+        weights = {}
+        for name in healthy:
+            weight = self.weights[name][model_tier]
+            latency = self.health[name].latency_ms
+            if fastest and latency:
+                # Twice as slow as the fastest provider: half the traffic share
+                weight *= fastest / latency
+            weights[name] = weight
+
+        order: List[str] = []
+        while weights:
+            pick = self.rng.uniform(0, sum(weights.values()))
+            for name, weight in weights.items():
+                pick -= weight
+                if pick <= 0:
+                    break
+            order.append(name)
+            del weights[name]
+        return order + tripped
+
+    def _check_health(self, name: str, throttled: bool):
+        """Trip a provider that throttles us or crosses a threshold"""
+        health = self.health[name]
+        if health.is_tripped():
+            return
+        if throttled:
+            reason = "throttled"
+        elif len(health.outcomes) >= self.min_requests and health.error_rate >= self.error_rate_threshold:
+            reason = f"error rate {health.error_rate:.0%}"
+        elif health.latency_ms is not None and health.latency_ms >= self.latency_threshold_ms:
+            reason = f"latency {health.latency_ms:.0f}ms"
+        else:
+            return
+        health.trip(reason, self.cooldown_seconds)
+        logger.warning(f"LLM provider {name} out of rotation for {self.cooldown_seconds:.0f}s: {reason}")
+
+
+def build_providers() -> List[LLMProvider]:
+    """Provider adapters enabled by the settings"""
+    from src.ai.providers.aws_bedrock import BedrockProvider, is_bedrock_available
+    from src.ai.providers.http_stub import HTTPStubProvider
+    from src.ai.providers.openrouter import OpenRouterProvider
+
+    providers: List[LLMProvider] = [OpenRouterProvider()]
+    if is_bedrock_available():
+        providers.append(BedrockProvider())
+    if settings.llm_stub_provider_url:
+        providers.append(HTTPStubProvider(settings.llm_stub_provider_url))
+    return providers
+
+
+# Global gateway instance
+_llm_gateway: Optional[LLMGateway] = None
+
+
+async def get_llm_gateway() -> LLMGateway:
+    """Get or create the global LLM gateway instance"""
+    global _llm_gateway
+    if _llm_gateway is None:
+        _llm_gateway = LLMGateway(build_providers())
+    return _llm_gateway
+
+
+async def cleanup_llm_gateway():
+    """Close the providers of the global LLM gateway"""
+    global _llm_gateway
+    if _llm_gateway:
+        await _llm_gateway.close()
+        _llm_gateway = None
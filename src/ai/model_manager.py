@@ -3,22 +3,32 @@ Smart model selection and management for Healthcare AI V2
 Based on _enhanced_model_selection() patterns from healthcare_ai_system
 """
 
+import hashlib
+import json
 import logging
 import asyncio
-from typing import Dict, List, Optional, Tuple, Any
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple, Any
 from datetime import datetime, timedelta
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
 from decimal import Decimal
 
-from src.ai.openrouter_client import OpenRouterClient, ModelResponse, get_openrouter_client
-from src.core.exceptions import ValidationError, AgentError
+from src.ai.gateway import LLMGateway, get_llm_gateway
+from src.ai.openrouter_client import OpenRouterClient, ModelResponse
+from src.ai.scheduler import llm_scheduler
+from src.ai.single_flight import SingleFlight
+from src.core.exceptions import ValidationError, AgentError, ServiceOverloadedError
 from src.core.logging import get_logger
+from src.core.metrics import RollingLatencyHistogram
 from src.config import settings
 
 
 logger = get_logger(__name__)
 
+# Recent tier selections that moved away from a tier breaching its latency SLO
+SLO_REROUTE_HISTORY = 50
+
 
 class TaskComplexity(Enum):
     """Task complexity levels for model selection"""
@@ -47,6 +57,9 @@ class ModelPerformanceMetrics:
     user_satisfaction_score: float = 0.0
     error_rate: float = 0.0
     last_used: Optional[datetime] = None
+    recent_latency: RollingLatencyHistogram = field(
+        default_factory=lambda: RollingLatencyHistogram(settings.llm_latency_window_seconds)
+    )
     
     def update_metrics(
         self, 
@@ -61,6 +74,10 @@ class ModelPerformanceMetrics:
         if success:
             self.successful_requests += 1
             
+        # Calls that failed before reaching a provider report 0ms and carry no latency signal
+        if response_time_ms > 0:
+            self.recent_latency.record(response_time_ms)
+            
         # Update average response time
         if self.total_requests == 1:
             self.average_response_time_ms = float(response_time_ms)
@@ -104,6 +121,7 @@ class ModelSelectionCriteria:
     conversation_context: Optional[Dict] = None
     cost_constraints: Optional[Dict] = None
     performance_requirements: Optional[Dict] = None
+    requester_id: Optional[str] = None  # fair-queuing key (user or session)
 
 
 class ModelManager:
@@ -113,10 +131,14 @@ class ModelManager:
     """
     
     def __init__(self):
-        self.client: Optional[OpenRouterClient] = None
+        self.gateway: Optional[LLMGateway] = None
         self.performance_metrics: Dict[str, ModelPerformanceMetrics] = {}
         self.usage_rotation: Dict[str, datetime] = {}
         self.fallback_chain: Dict[str, List[str]] = {}
+        self.scheduler = llm_scheduler
+        self.single_flight = SingleFlight()
+        self.slo_decisions: Dict[str, int] = {}
+        self.slo_reroutes: Deque[Dict[str, Any]] = deque(maxlen=SLO_REROUTE_HISTORY)
         self._initialize_performance_tracking()
         self._setup_fallback_chains()
         
@@ -137,11 +159,11 @@ class ModelManager:
             "quality_optimized": ["premium", "lite", "free"]
         }
         
-    async def get_client(self) -> OpenRouterClient:
-        """Get or initialize OpenRouter client"""
-        if self.client is None:
-            self.client = await get_openrouter_client()
-        return self.client
+    async def get_gateway(self) -> LLMGateway:
+        """Get or initialize the LLM gateway (OpenRouter, Bedrock, stub providers)"""
+        if self.gateway is None:
+            self.gateway = await get_llm_gateway()
+        return self.gateway
         
     def analyze_task_complexity(
         self, 
@@ -245,19 +267,24 @@ class ModelManager:
         """
         Select optimal model based on criteria and performance metrics
         Based on _enhanced_model_selection() from healthcare_ai_system
+        
+        Chains give the tier preference; tiers whose recent p95 latency
+        breaches the urgency SLO are passed over (see _select_from_chain).
         """
+        slo_ms = self.latency_slo_for(criteria.urgency_level)
+        
         # Emergency scenarios always use premium models
         if criteria.urgency_level == UrgencyLevel.EMERGENCY:
-            return self._select_from_chain("emergency")
+            return self._select_from_chain("emergency", slo_ms)
             
         # Critical tasks need high-quality models
         if criteria.task_complexity == TaskComplexity.CRITICAL:
-            return self._select_from_chain("critical")
+            return self._select_from_chain("critical", slo_ms)
             
         # Cost-constrained scenarios
         if criteria.cost_constraints and criteria.cost_constraints.get("budget_limit"):
             budget_limit = Decimal(str(criteria.cost_constraints["budget_limit"]))
-            return self._select_cost_optimized_model(budget_limit, criteria)
+            return self._select_cost_optimized_model(budget_limit, criteria, slo_ms)
             
         # Performance-constrained scenarios
         if criteria.performance_requirements:
@@ -266,28 +293,93 @@ class ModelManager:
                 
         # Agent-specific optimizations
         if criteria.agent_type == "safety":
-            return self._select_from_chain("emergency")
+            return self._select_from_chain("emergency", slo_ms)
         elif criteria.agent_type == "mental_health" and criteria.task_complexity == TaskComplexity.COMPLEX:
-            return self._select_from_chain("quality_optimized")
+            return self._select_from_chain("quality_optimized", slo_ms)
         elif criteria.agent_type == "illness_monitor" and criteria.urgency_level in [UrgencyLevel.HIGH, UrgencyLevel.MEDIUM]:
-            return self._select_from_chain("standard")
+            return self._select_from_chain("standard", slo_ms)
             
         # Default selection based on task complexity
         if criteria.task_complexity == TaskComplexity.COMPLEX:
-            return self._select_from_chain("quality_optimized")
+            return self._select_from_chain("quality_optimized", slo_ms)
         elif criteria.task_complexity == TaskComplexity.MODERATE:
-            return self._select_from_chain("standard")
+            return self._select_from_chain("standard", slo_ms)
         else:
-            return self._select_from_chain("cost_optimized")
+            return self._select_from_chain("cost_optimized", slo_ms)
+            
+    def latency_slo_for(self, urgency_level: UrgencyLevel) -> float:
+        """p95 latency SLO in milliseconds for an urgency level"""
+        slos = settings.llm_latency_slo_ms
+        return slos.get(urgency_level.value, slos.get(UrgencyLevel.MEDIUM.value, 15000.0))
+        
+    def _recent_p95(self, model_tier: str) -> Optional[float]:
+        """Recent p95 latency of a tier, or None with too few samples to trust"""
+        metrics = self.performance_metrics.get(model_tier)
+        if metrics is None or metrics.recent_latency.count < settings.llm_latency_min_samples:
+            return None
+        return metrics.recent_latency.percentile(95)
+        
+    def _record_slo_decision(
+        self,
+        outcome: str,
+        path: str,
+        slo_ms: float,
+        selected: str,
+        skipped: Optional[Dict[str, float]] = None
+    ):
+        """
+        Count a tier selection against the latency SLO
+        
+        Args:
+            outcome: "within_slo", "unmeasured", "rerouted" or "no_tier_within_slo"
+            path: Chain type or selection path that made the decision
+            slo_ms: SLO the selection was held to
+            selected: Tier selected
+            skipped: Preferred tiers passed over, with their recent p95
+        """
+        self.slo_decisions[outcome] = self.slo_decisions.get(outcome, 0) + 1
+        if skipped:
+            self.slo_reroutes.append({
+                "timestamp": datetime.utcnow().isoformat(),
+                "outcome": outcome,
+                "path": path,
+                "slo_ms": slo_ms,
+                "selected": selected,
+                "skipped_p95_ms": {tier: round(p95, 1) for tier, p95 in skipped.items()}
+            })
+            logger.info(
+                f"Latency SLO ({slo_ms:.0f}ms p95) moved {path} selection to {selected}; "
+                f"skipped {', '.join(skipped)}"
+            )
             
-    def _select_from_chain(self, chain_type: str) -> str:
-        """Select model from fallback chain considering performance metrics"""
+    def _select_from_chain(self, chain_type: str, slo_ms: Optional[float] = None) -> str:
+        """
+        Select model from fallback chain considering performance metrics
+        
+        Args:
+            chain_type: Fallback chain giving the tier preference
+            slo_ms: p95 latency SLO; tiers whose recent p95 exceeds it are
+                skipped. If every measured tier in the chain breaches it, the
+                one with the lowest p95 is used.
+        """
         chain = self.fallback_chain.get(chain_type, self.fallback_chain["standard"])
         
+        breaching: Dict[str, float] = {}
+        if slo_ms is not None:
+            for model_tier in chain:
+                p95 = self._recent_p95(model_tier)
+                if p95 is not None and p95 > slo_ms:
+                    breaching[model_tier] = p95
+            if len(breaching) == len(chain):
+                fastest = min(breaching, key=breaching.get)
+                self._record_slo_decision("no_tier_within_slo", chain_type, slo_ms, fastest, breaching)
+                return fastest
+        
         # Try each model in the chain, considering performance metrics
+        selected = None
         for model_tier in chain:
             metrics = self.performance_metrics.get(model_tier)
-            if metrics is None:
+            if metrics is None or model_tier in breaching:
                 continue
                 
             # Skip models with high error rates (>20%)
@@ -301,13 +393,31 @@ class ModelManager:
                 continue
                 
             self.usage_rotation[model_tier] = datetime.utcnow()
-            return model_tier
+            selected = model_tier
+            break
+            
+        # If no model is available, return the first one in the chain within the SLO
+        if selected is None:
+            selected = next(tier for tier in chain if tier not in breaching)
             
-        # If no model is available, return the first one in the chain
-        return chain[0]
+        if slo_ms is not None:
+            skipped = {tier: p95 for tier, p95 in breaching.items() if chain.index(tier) < chain.index(selected)}
+            if skipped:
+                outcome = "rerouted"
+            elif self._recent_p95(selected) is None:
+                outcome = "unmeasured"
+            else:
+                outcome = "within_slo"
+            self._record_slo_decision(outcome, chain_type, slo_ms, selected, skipped)
+        return selected
         
-    def _select_cost_optimized_model(self, budget_limit: Decimal, criteria: ModelSelectionCriteria) -> str:
-        """Select model based on budget constraints"""
+    def _select_cost_optimized_model(
+        self,
+        budget_limit: Decimal,
+        criteria: ModelSelectionCriteria,
+        slo_ms: Optional[float] = None
+    ) -> str:
+        """Select model based on budget constraints, preferring tiers within the latency SLO"""
         client = OpenRouterClient()  # Get static access to model specs
         
         # Filter models by cost
@@ -321,8 +431,13 @@ class ModelManager:
             # If no model fits budget, use the cheapest
             return "free"
             
-        # Sort by performance and cost
+        def breaches_slo(tier: str) -> bool:
+            p95 = self._recent_p95(tier)
+            return slo_ms is not None and p95 is not None and p95 > slo_ms
+            
+        # Sort by latency SLO, performance and cost
         suitable_models.sort(key=lambda x: (
+            breaches_slo(x[0]),  # Tiers within the SLO first
             x[2].error_rate if x[2] else 0.0,  # Lower error rate is better
             x[1].cost_per_1k_tokens  # Lower cost is better
         ))
@@ -330,44 +445,63 @@ class ModelManager:
         return suitable_models[0][0]
         
     def _select_fast_model(self, criteria: ModelSelectionCriteria) -> str:
-        """Select model based on response time requirements"""
-        max_response_time = criteria.performance_requirements.get("max_response_time_ms", 5000)
+        """
+        Select the cheapest model whose recent p95 latency fits the response
+        time requirement (the urgency SLO if it is tighter)
+        """
+        max_response_time = min(
+            criteria.performance_requirements.get("max_response_time_ms", 5000),
+            self.latency_slo_for(criteria.urgency_level)
+        )
         
-        # Filter models by average response time
-        suitable_models = []
-        for tier, metrics in self.performance_metrics.items():
-            if metrics.total_requests > 0 and metrics.average_response_time_ms <= max_response_time:
-                suitable_models.append((tier, metrics))
+        measured: Dict[str, float] = {}
+        for tier in self.performance_metrics:
+            p95 = self._recent_p95(tier)
+            if p95 is not None:
+                measured[tier] = p95
                 
-        if not suitable_models:
-            # If no model meets requirements, use lite (usually fastest)
+        if not measured:
+            # Without latency data, use lite (usually fastest)
+            self._record_slo_decision("unmeasured", "fast", max_response_time, "lite")
             return "lite"
             
-        # Sort by response time
-        suitable_models.sort(key=lambda x: x[1].average_response_time_ms)
-        return suitable_models[0][0]
+        suitable_models = [tier for tier, p95 in measured.items() if p95 <= max_response_time]
+        if not suitable_models:
+            fastest = min(measured, key=measured.get)
+            self._record_slo_decision("no_tier_within_slo", "fast", max_response_time, fastest, measured)
+            return fastest
+            
+        # Cheapest first, lower p95 breaks ties
+        suitable_models.sort(key=lambda tier: (OpenRouterClient.MODELS[tier].cost_per_1k_tokens, measured[tier]))
+        selected = suitable_models[0]
+        self._record_slo_decision("within_slo", "fast", max_response_time, selected)
+        return selected
         
     async def make_request_with_fallback(
         self,
         criteria: ModelSelectionCriteria,
         system_prompt: str,
         user_prompt: str,
-        max_retries: int = 3
+        max_retries: int = 3,
+        history: Optional[List[Dict[str, str]]] = None
     ) -> ModelResponse:
         """
         Make request with automatic fallback on failure
         """
-        client = await self.get_client()
+        gateway = await self.get_gateway()
         primary_model = self.select_optimal_model(criteria)
         
+        # Every attempt is admitted by the scheduler under one deadline
+        urgency = criteria.urgency_level.value
+        requester = criteria.requester_id or (str(criteria.user_id) if criteria.user_id else None)
+        deadline = self.scheduler.deadline_for(urgency, criteria.performance_requirements)
+        shed_error: Optional[ServiceOverloadedError] = None
+        
         # Try primary model first
         try:
-            response = await client.make_request(
-                model_tier=primary_model,
-                system_prompt=system_prompt,
-                user_prompt=user_prompt,
-                agent_type=criteria.agent_type,
-                content_type=criteria.content_type
+            response = await self._admitted_call(
+                gateway, primary_model, urgency, requester, deadline,
+                criteria, system_prompt, user_prompt, history
             )
             
             # Update performance metrics
@@ -381,6 +515,10 @@ class ModelManager:
                 logger.info(f"Request successful with primary model: {primary_model}")
                 return response
                 
+        except ServiceOverloadedError as e:
+            # Shed before reaching the provider; a less busy fallback may still fit
+            shed_error = e
+            
         except Exception as e:
             logger.warning(f"Primary model {primary_model} failed: {e}")
             self.performance_metrics[primary_model].update_metrics(
@@ -396,12 +534,9 @@ class ModelManager:
                 continue
                 
             try:
-                response = await client.make_request(
-                    model_tier=model_tier,
-                    system_prompt=system_prompt,
-                    user_prompt=user_prompt,
-                    agent_type=criteria.agent_type,
-                    content_type=criteria.content_type
+                response = await self._admitted_call(
+                    gateway, model_tier, urgency, requester, deadline,
+                    criteria, system_prompt, user_prompt, history
                 )
                 
                 # Update performance metrics
@@ -415,6 +550,10 @@ class ModelManager:
                     logger.info(f"Request successful with fallback model: {model_tier}")
                     return response
                     
+            except ServiceOverloadedError as e:
+                shed_error = e
+                continue
+                
             except Exception as e:
                 logger.warning(f"Fallback model {model_tier} failed: {e}")
                 self.performance_metrics[model_tier].update_metrics(
@@ -424,12 +563,83 @@ class ModelManager:
                 )
                 continue
                 
+        # Shed calls go to the agent fallback response
+        if shed_error is not None:
+            raise shed_error
+            
         # If all models failed, raise error
         raise AgentError(
             f"All models failed for agent_type: {criteria.agent_type}",
             agent_type=criteria.agent_type
         )
         
+    async def _admitted_call(
+        self,
+        gateway: LLMGateway,
+        model_tier: str,
+        urgency: str,
+        requester: Optional[str],
+        deadline: float,
+        criteria: ModelSelectionCriteria,
+        system_prompt: str,
+        user_prompt: str,
+        history: Optional[List[Dict[str, str]]]
+    ) -> ModelResponse:
+        """
+        One gateway call under a scheduler slot
+        
+        Identical concurrent calls are coalesced before admission: callers
+        joining an in-flight call wait on it without taking a slot.
+        """
+        async def call() -> ModelResponse:
+            async with self.scheduler.slot(model_tier, urgency, requester, deadline):
+                return await gateway.complete(
+                    model_tier=model_tier,
+                    system_prompt=system_prompt,
+                    user_prompt=user_prompt,
+                    history=history,
+                    agent_type=criteria.agent_type,
+                    content_type=criteria.content_type
+                )
+        
+        key = self._coalesce_key(model_tier, urgency, criteria, system_prompt, user_prompt, history)
+        if key is None:
+            return await call()
+        return await self.single_flight.run(key, call)
+    
+    def _coalesce_key(
+        self,
+        model_tier: str,
+        urgency: str,
+        criteria: ModelSelectionCriteria,
+        system_prompt: str,
+        user_prompt: str,
+        history: Optional[List[Dict[str, str]]]
+    ) -> Optional[str]:
+        """
+        Key identifying interchangeable calls, or None if the call must not
+        be shared (coalescing disabled or the tier samples at a temperature
+        too high for answers to be interchangeable)
+        
+        The urgency lane is part of the key so an urgent caller never waits
+        behind a shared call queued in a lower lane.
+        """
+        model_spec = OpenRouterClient.MODELS.get(model_tier)
+        if (
+            not settings.llm_coalesce_requests
+            or model_spec is None
+            or model_spec.temperature > settings.llm_coalesce_max_temperature
+        ):
+            return None
+        system_prompt_hash = hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()
+        rest = json.dumps(
+            [model_tier, urgency, criteria.agent_type, criteria.content_type, history or [], user_prompt],
+            ensure_ascii=False,
+            separators=(",", ":"),
+            default=str
+        )
+        return f"{system_prompt_hash}:{hashlib.sha256(rest.encode('utf-8')).hexdigest()}"
+    
     def _get_fallback_chain_for_criteria(self, criteria: ModelSelectionCriteria) -> List[str]:
         """Get appropriate fallback chain based on criteria"""
         if criteria.urgency_level == UrgencyLevel.EMERGENCY:
@@ -468,11 +678,28 @@ class ModelManager:
                     "success_rate": (metrics.successful_requests / metrics.total_requests) * 100,
                     "error_rate": metrics.error_rate * 100,
                     "average_response_time_ms": metrics.average_response_time_ms,
+                    "recent_latency": metrics.recent_latency.snapshot(),
                     "average_cost": float(metrics.average_cost),
                     "user_satisfaction_score": metrics.user_satisfaction_score,
                     "last_used": metrics.last_used.isoformat() if metrics.last_used else None
                 }
                 
+        # Latency SLOs and how tier selection was held to them
+        report["latency_slo"] = {
+            "slo_ms": dict(settings.llm_latency_slo_ms),
+            "window_seconds": settings.llm_latency_window_seconds,
+            "min_samples": settings.llm_latency_min_samples,
+            "decisions": dict(self.slo_decisions),
+            "recent_reroutes": list(self.slo_reroutes)
+        }
+        
+        # Admission control and queue-wait metrics
+        report["scheduler"] = self.scheduler.get_stats()
+        report["coalescing"] = self.single_flight.get_stats()
+        if self.gateway is not None:
+            # Per-provider health, budgets and traffic split
+            report["providers"] = self.gateway.get_stats()
+        
         # Generate recommendations
         report["recommendations"] = self._generate_recommendations()
         
@@ -504,12 +731,22 @@ class ModelManager:
                     "Consider using for non-urgent requests only."
                 )
                 
+            p95 = self._recent_p95(tier)
+            loosest_slo = max(settings.llm_latency_slo_ms.values(), default=0.0)
+            if p95 is not None and p95 > loosest_slo:
+                recommendations.append(
+                    f"Model '{tier}' recent p95 latency ({p95:.0f}ms) exceeds every urgency SLO. "
+                    "Selection passes it over while it stays this slow."
+                )
+                
         return recommendations
         
     def reset_performance_metrics(self):
         """Reset all performance metrics"""
         self._initialize_performance_tracking()
         self.usage_rotation.clear()
+        self.slo_decisions.clear()
+        self.slo_reroutes.clear()
         logger.info("Performance metrics reset")
 
 
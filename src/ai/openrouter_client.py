@@ -15,6 +15,8 @@ from datetime import datetime, timedelta
 from decimal import Decimal
 import aiohttp
 
+from src.ai.cassette import Cassette, CassettePlayer, LatencyModel
+from src.ai.token_estimator import token_estimator
 from src.config import settings
 from src.core.exceptions import ExternalAPIError, ValidationError
 from src.core.logging import get_logger
@@ -42,22 +44,53 @@ class ModelSpec:
         return data
 
 
+def cached_token_counts(usage: Dict[str, Any]) -> Tuple[int, int]:
+    """
+    Prompt-cache token counts from a provider usage block.
+    
+    OpenRouter reports prompt_tokens_details.cached_tokens (and
+    cache_write_tokens for providers that bill cache writes); Anthropic-style
+    usage uses cache_read_input_tokens and cache_creation_input_tokens.
+    
+    Returns:
+        (prompt tokens read from the cache, prompt tokens written to it)
+    """
+    details = usage.get("prompt_tokens_details") or {}
+    cached = details.get("cached_tokens") or usage.get("cache_read_input_tokens") or 0
+    written = details.get("cache_write_tokens") or usage.get("cache_creation_input_tokens") or 0
+    return int(cached), int(written)
+
+
 @dataclass
 class UsageStats:
     """Token usage and cost tracking"""
     total_tokens: int = 0
     prompt_tokens: int = 0
     completion_tokens: int = 0
+    cached_tokens: int = 0
+    cache_write_tokens: int = 0
     cost: Decimal = Decimal('0.0')
     requests_count: int = 0
+    cache_hit_requests: int = 0
     
-    def add_usage(self, prompt_tokens: int, completion_tokens: int, cost: Decimal):
+    def add_usage(
+        self,
+        prompt_tokens: int,
+        completion_tokens: int,
+        cost: Decimal,
+        cached_tokens: int = 0,
+        cache_write_tokens: int = 0
+    ):
         """Add usage data"""
         self.prompt_tokens += prompt_tokens
         self.completion_tokens += completion_tokens
         self.total_tokens += (prompt_tokens + completion_tokens)
+        self.cached_tokens += cached_tokens
+        self.cache_write_tokens += cache_write_tokens
         self.cost += cost
         self.requests_count += 1
+        if cached_tokens:
+            self.cache_hit_requests += 1
 
 
 @dataclass
@@ -70,6 +103,7 @@ class ModelResponse:
     processing_time_ms: int
     success: bool = True
     error_message: Optional[str] = None
+    provider: str = "openrouter"
 
 
 class OpenRouterClient:
@@ -112,6 +146,10 @@ class OpenRouterClient:
         )
     }
     
+    # Prompt tokens served from the provider's prompt cache are billed at
+    # this fraction of the normal price (Gemini implicit caching: 25%)
+    CACHED_TOKEN_PRICE_RATIO = Decimal('0.25')
+    
     # Token calculation multipliers based on content type
     CONTENT_TOKEN_MULTIPLIERS = {
         "emergency_response": 2.5,
@@ -125,8 +163,19 @@ class OpenRouterClient:
     }
     
     def __init__(self):
-        self.api_key = self._load_api_key()
-        self.base_url = "https://openrouter.ai/api/v1/chat/completions"
+        self.base_url = settings.openrouter_base_url
+        # Offline record/replay (LLM_CASSETTE_MODE); replay needs no network or key
+        self.cassette: Optional[Cassette] = None
+        self.player: Optional[CassettePlayer] = None
+        if settings.llm_cassette_mode == "record":
+            self.cassette = Cassette(settings.llm_cassette_path)
+        elif settings.llm_cassette_mode == "replay":
+            self.player = CassettePlayer(
+                Cassette.load(settings.llm_cassette_path),
+                LatencyModel(settings.llm_replay_latency, seed=settings.llm_replay_seed),
+                on_miss=settings.llm_replay_on_miss
+            )
+        self.api_key = self._load_api_key() if self.player is None else ""
         self.usage_stats: Dict[str, UsageStats] = {tier: UsageStats() for tier in self.MODELS.keys()}
         self.request_count = 0
         self.last_request_time = 0.0
@@ -171,22 +220,29 @@ class OpenRouterClient:
         return self._session
     
     async def close(self):
-        """Close the aiohttp session"""
+        """Close the aiohttp session and the cassette being recorded"""
         if self._session and not self._session.closed:
             await self._session.close()
+        if self.cassette is not None:
+            self.cassette.close()
     
     def calculate_dynamic_tokens(
         self, 
         content_type: str, 
-        prompt_length: int, 
+        prompt_tokens: int, 
         agent_type: str = "general"
     ) -> int:
         """
         Calculate dynamic token allocation based on content complexity
         Based on _calculate_dynamic_tokens() from healthcare_ai_system
+        
+        Args:
+            content_type: Detected content type
+            prompt_tokens: Estimated prompt tokens (see token_estimator)
+            agent_type: Agent making the request
         """
-        # Base calculation from prompt length
-        base_tokens = max(int(prompt_length * 0.7), 200)  # Conservative token estimation
+        # Base calculation from prompt size
+        base_tokens = max(prompt_tokens, 200)
         
         # Apply content type multiplier
         multiplier = self.CONTENT_TOKEN_MULTIPLIERS.get(content_type, 1.0)
@@ -272,10 +328,19 @@ class OpenRouterClient:
             
         return "conversational"
     
-    def _calculate_cost(self, prompt_tokens: int, completion_tokens: int, model_spec: ModelSpec) -> Decimal:
-        """Calculate cost based on token usage"""
-        total_tokens = prompt_tokens + completion_tokens
-        return (Decimal(total_tokens) / Decimal('1000')) * model_spec.cost_per_1k_tokens
+    def _calculate_cost(
+        self,
+        prompt_tokens: int,
+        completion_tokens: int,
+        model_spec: ModelSpec,
+        cached_tokens: int = 0
+    ) -> Decimal:
+        """Calculate cost based on token usage (cached prompt tokens at the cache price)"""
+        billed_tokens = (
+            Decimal(prompt_tokens - cached_tokens + completion_tokens)
+            + Decimal(cached_tokens) * self.CACHED_TOKEN_PRICE_RATIO
+        )
+        return (billed_tokens / Decimal('1000')) * model_spec.cost_per_1k_tokens
     
     async def make_request(
         self,
@@ -285,11 +350,18 @@ class OpenRouterClient:
         max_tokens: Optional[int] = None,
         temperature: Optional[float] = None,
         agent_type: str = "general",
-        content_type: Optional[str] = None
+        content_type: Optional[str] = None,
+        history: Optional[List[Dict[str, str]]] = None,
+        max_retries: int = 3
     ) -> ModelResponse:
         """
         Make request to OpenRouter API with comprehensive error handling
         Based on post_openrouter() pattern from healthcare_ai_system
+        
+        history holds earlier {"role", "content"} turns placed between the
+        system prompt and the user prompt. max_retries bounds the attempts on
+        rate limits and transport errors; the LLM gateway passes 1 when
+        another provider can take the call instead.
         """
         start_time = time.time()
         
@@ -303,10 +375,16 @@ class OpenRouterClient:
         if content_type is None:
             content_type = self.detect_content_type(user_prompt, agent_type)
             
+        messages = [
+            {"role": "system", "content": system_prompt},
+            *(history or []),
+            {"role": "user", "content": user_prompt}
+        ]
+        
         # Calculate optimal token allocation
         if max_tokens is None:
-            prompt_length = len(system_prompt) + len(user_prompt)
-            max_tokens = self.calculate_dynamic_tokens(content_type, prompt_length, agent_type)
+            estimated_prompt_tokens = token_estimator.count_messages(messages, model_spec.model)
+            max_tokens = self.calculate_dynamic_tokens(content_type, estimated_prompt_tokens, agent_type)
         
         # Use model defaults or override
         final_temperature = temperature if temperature is not None else model_spec.temperature
@@ -314,92 +392,127 @@ class OpenRouterClient:
         # Prepare payload
         payload = {
             "model": model_spec.model,
-            "messages": [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
+            "messages": messages,
             "max_tokens": min(max_tokens, model_spec.max_tokens),
             "temperature": final_temperature,
-            "stream": False
+            "stream": False,
+            # Ask for detailed usage, including prompt-cache token counts
+            "usage": {"include": True}
         }
         
+        return await self._send_request(
+            model_tier, model_spec, payload, start_time, content_type, agent_type, max_retries
+        )
+    
+    async def _post(self, model_tier: str, payload: Dict[str, Any]) -> Tuple[int, Any]:
+        """
+        Send a payload to the provider, or to the cassette player in replay mode.
+        
+        Returns:
+            (HTTP status, decoded JSON body on 200, error text otherwise)
+        """
+        if self.player is not None:
+            return await self.player.play(payload)
+        
+        session = await self.get_session()
+        started = time.perf_counter()
+        async with session.post(self.base_url, json=payload) as response:
+            status = response.status
+            data = await response.json() if status == 200 else await response.text()
+        
+        if self.cassette is not None:
+            self.cassette.record(payload, model_tier, status, data, (time.perf_counter() - started) * 1000)
+        return status, data
+    
+    async def _send_request(
+        self,
+        model_tier: str,
+        model_spec: ModelSpec,
+        payload: Dict[str, Any],
+        start_time: float,
+        content_type: str,
+        agent_type: str,
+        max_retries: int = 3
+    ) -> ModelResponse:
+        """POST a prepared payload with retries and record usage"""
         # Retry logic for transient failures
-        max_retries = 3
         base_delay = 1.0
         
         for attempt in range(max_retries):
             try:
-                session = await self.get_session()
+                status, data = await self._post(model_tier, payload)
                 
-                async with session.post(self.base_url, json=payload) as response:
-                    if response.status == 429:  # Rate limit
-                        if attempt < max_retries - 1:
-                            delay = base_delay * (2 ** attempt)
-                            logger.warning(f"Rate limited, retrying in {delay}s (attempt {attempt + 1})")
-                            await asyncio.sleep(delay)
-                            continue
-                        else:
-                            raise ExternalAPIError(
-                                f"Rate limit exceeded after {max_retries} attempts",
-                                service="openrouter"
-                            )
-                    
-                    if response.status != 200:
-                        error_text = await response.text()
+                if status == 429:  # Rate limit
+                    if attempt < max_retries - 1:
+                        delay = base_delay * (2 ** attempt)
+                        logger.warning(f"Rate limited, retrying in {delay}s (attempt {attempt + 1})")
+                        await asyncio.sleep(delay)
+                        continue
+                    else:
                         raise ExternalAPIError(
-                            f"OpenRouter API error {response.status}: {error_text}",
-                            service="openrouter"
+                            f"Rate limit exceeded after {max_retries} attempts",
+                            service="openrouter",
+                            context={"status_code": 429}
                         )
-                    
-                    data = await response.json()
-                    
-                    # Validate response structure
-                    if "choices" not in data or not data["choices"]:
-                        raise ValidationError("Invalid API response: missing choices")
-                    
-                    choice = data["choices"][0]
-                    if "message" not in choice or "content" not in choice["message"]:
-                        raise ValidationError("Invalid API response: missing message content")
-                    
-                    content = choice["message"]["content"].strip()
-                    
-                    # Extract usage information
-                    usage = data.get("usage", {})
-                    prompt_tokens = usage.get("prompt_tokens", 0)
-                    completion_tokens = usage.get("completion_tokens", 0)
-                    
-                    # Calculate cost
-                    cost = self._calculate_cost(prompt_tokens, completion_tokens, model_spec)
-                    
-                    # Update usage statistics
-                    self.usage_stats[model_tier].add_usage(prompt_tokens, completion_tokens, cost)
-                    self.request_count += 1
-                    
-                    processing_time_ms = int((time.time() - start_time) * 1000)
-                    
-                    logger.info(
-                        f"OpenRouter request successful",
-                        extra={
-                            "model": model_spec.model,
-                            "tier": model_tier,
-                            "prompt_tokens": prompt_tokens,
-                            "completion_tokens": completion_tokens,
-                            "cost": float(cost),
-                            "processing_time_ms": processing_time_ms,
-                            "content_type": content_type,
-                            "agent_type": agent_type
-                        }
-                    )
-                    
-                    return ModelResponse(
-                        content=content,
-                        model=model_spec.model,
-                        usage=usage,
-                        cost=cost,
-                        processing_time_ms=processing_time_ms,
-                        success=True
+                
+                if status != 200:
+                    raise ExternalAPIError(
+                        f"OpenRouter API error {status}: {data}",
+                        service="openrouter",
+                        context={"status_code": status}
                     )
-                    
+                
+                # Validate response structure
+                if "choices" not in data or not data["choices"]:
+                    raise ValidationError("Invalid API response: missing choices")
+                
+                choice = data["choices"][0]
+                if "message" not in choice or "content" not in choice["message"]:
+                    raise ValidationError("Invalid API response: missing message content")
+                
+                content = choice["message"]["content"].strip()
+                
+                # Extract usage information
+                usage = data.get("usage", {})
+                prompt_tokens = usage.get("prompt_tokens", 0)
+                completion_tokens = usage.get("completion_tokens", 0)
+                cached_tokens, cache_write_tokens = cached_token_counts(usage)
+                
+                # Calculate cost
+                cost = self._calculate_cost(prompt_tokens, completion_tokens, model_spec, cached_tokens)
+                
+                # Update usage statistics
+                self.usage_stats[model_tier].add_usage(
+                    prompt_tokens, completion_tokens, cost, cached_tokens, cache_write_tokens
+                )
+                self.request_count += 1
+                
+                processing_time_ms = int((time.time() - start_time) * 1000)
+                
+                logger.info(
+                    f"OpenRouter request successful",
+                    extra={
+                        "model": model_spec.model,
+                        "tier": model_tier,
+                        "prompt_tokens": prompt_tokens,
+                        "completion_tokens": completion_tokens,
+                        "cached_tokens": cached_tokens,
+                        "cost": float(cost),
+                        "processing_time_ms": processing_time_ms,
+                        "content_type": content_type,
+                        "agent_type": agent_type
+                    }
+                )
+                
+                return ModelResponse(
+                    content=content,
+                    model=model_spec.model,
+                    usage=usage,
+                    cost=cost,
+                    processing_time_ms=processing_time_ms,
+                    success=True
+                )
+                
             except (aiohttp.ClientError, asyncio.TimeoutError) as e:
                 if attempt < max_retries - 1:
                     delay = base_delay * (2 ** attempt)
@@ -413,6 +526,10 @@ class OpenRouterClient:
                         service="openrouter"
                     )
             
+            except ExternalAPIError:
+                # Status errors carry the status code for the LLM gateway
+                raise
+            
             except Exception as e:
                 logger.error(f"Unexpected error in OpenRouter request: {e}")
                 return ModelResponse(
@@ -432,10 +549,21 @@ class OpenRouterClient:
         """Get usage statistics for all model tiers"""
         stats = {}
         for tier, usage in self.usage_stats.items():
+            # What the cached prompt tokens would have cost at the full price
+            cache_savings = (
+                Decimal(usage.cached_tokens) / Decimal('1000')
+                * self.MODELS[tier].cost_per_1k_tokens
+                * (1 - self.CACHED_TOKEN_PRICE_RATIO)
+            )
             stats[tier] = {
                 "total_tokens": usage.total_tokens,
                 "prompt_tokens": usage.prompt_tokens,
                 "completion_tokens": usage.completion_tokens,
+                "cached_tokens": usage.cached_tokens,
+                "cache_write_tokens": usage.cache_write_tokens,
+                "cached_token_ratio": round(usage.cached_tokens / usage.prompt_tokens, 3) if usage.prompt_tokens > 0 else 0.0,
+                "cache_hit_requests": usage.cache_hit_requests,
+                "cache_savings": float(cache_savings),
                 "cost": float(usage.cost),
                 "requests_count": usage.requests_count,
                 "average_cost_per_request": float(usage.cost / usage.requests_count) if usage.requests_count > 0 else 0.0
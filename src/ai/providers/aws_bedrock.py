@@ -1,22 +1,38 @@
 """
-AWS Bedrock integration for Healthcare AI V2 (Future Implementation)
-This module provides placeholders and configuration for future AWS Bedrock integration
+AWS Bedrock integration for Healthcare AI V2
+Bedrock runtime client and the LLM gateway provider adapter
+
+boto3 is optional: without it (or with AWS_BEDROCK_ENABLED off) the client
+reports itself unavailable and the gateway routes around it.
 """
 
-from typing import Dict, List, Optional, Any
+import asyncio
+import json
+import time
+from typing import Dict, List, Optional, Any, Tuple
 from dataclasses import dataclass
 from decimal import Decimal
 import logging
 
-# Commented out AWS imports for future implementation
-# import boto3
-# from botocore.exceptions import ClientError, NoCredentialsError
+try:
+    import boto3
+    from botocore.config import Config as BotoConfig
+    from botocore.exceptions import BotoCoreError, ClientError, NoCredentialsError
+except ImportError:
+    boto3 = None
 
+from src.ai.openrouter_client import ModelResponse, OpenRouterClient
+from src.ai.providers.base import LLMProvider
+from src.ai.token_estimator import token_estimator
+from src.core.exceptions import ExternalAPIError
 from src.core.logging import get_logger
 from src.config import settings
 
 logger = get_logger(__name__)
 
+# Bedrock error codes reported to the gateway as throttling (HTTP 429)
+THROTTLING_ERROR_CODES = ("ThrottlingException", "TooManyRequestsException", "ServiceQuotaExceededException")
+
 
 @dataclass
 class BedrockModelSpec:
@@ -48,13 +64,13 @@ class BedrockModelSpec:
 
 class BedrockClient:
     """
-    AWS Bedrock client for Healthcare AI V2 (Future Implementation)
+    AWS Bedrock runtime client for Healthcare AI V2
     
-    This class provides the structure for future AWS Bedrock integration.
-    All methods are currently commented out and return placeholder responses.
+    Calls run in a worker thread (boto3 is synchronous). Without boto3 or
+    credentials, invoke_model returns an unsuccessful result.
     """
     
-    # Future AWS Bedrock model catalog
+    # AWS Bedrock model catalog
     BEDROCK_MODELS: Dict[str, BedrockModelSpec] = {
         "claude_3_sonnet": BedrockModelSpec(
             model_id="anthropic.claude-3-sonnet-20240229-v1:0",
@@ -110,31 +126,40 @@ class BedrockClient:
     
     def __init__(self, region: str = "us-east-1"):
         """
-        Initialize Bedrock client (Future Implementation)
+        Initialize Bedrock client
         
         Args:
             region: AWS region for Bedrock service
         """
         self.region = region
-        self.client = None  # Will be boto3.client('bedrock-runtime') in future
-        self.session = None  # Will be boto3.Session() in future
+        self.client = None
+        self.session = None
         
-        logger.info(f"BedrockClient initialized for region: {region} (placeholder)")
+        if boto3 is None:
+            logger.info("boto3 not installed; Bedrock client disabled")
+            return
         
-        # Future implementation will initialize actual AWS client:
-        # try:
-        #     self.session = boto3.Session()
-        #     self.client = self.session.client(
-        #         'bedrock-runtime',
-        #         region_name=region
-        #     )
-        #     logger.info(f"AWS Bedrock client initialized for region: {region}")
-        # except NoCredentialsError:
-        #     logger.error("AWS credentials not found for Bedrock client")
-        #     raise
-        # except Exception as e:
-        #     logger.error(f"Failed to initialize Bedrock client: {e}")
-        #     raise
+        timeouts = BEDROCK_CONFIG["timeout_config"]
+        try:
+            self.session = boto3.Session()
+            # Retries are done by the caller so throttled calls can spill over
+            self.client = self.session.client(
+                "bedrock-runtime",
+                region_name=region,
+                config=BotoConfig(
+                    connect_timeout=timeouts["connect_timeout"],
+                    read_timeout=timeouts["read_timeout"],
+                    retries={"total_max_attempts": 1, "mode": "standard"}
+                )
+            )
+            logger.info(f"AWS Bedrock client initialized for region: {region}")
+        except (BotoCoreError, NoCredentialsError) as e:
+            logger.error(f"Failed to initialize Bedrock client: {e}")
+            self.client = None
+    
+    @property
+    def available(self) -> bool:
+        return self.client is not None
     
     def get_available_models(self) -> Dict[str, BedrockModelSpec]:
         """Get available Bedrock models"""
@@ -146,144 +171,167 @@ class BedrockClient:
         prompt: str,
         max_tokens: int = 1000,
         temperature: float = 0.7,
+        system_prompt: Optional[str] = None,
+        history: Optional[List[Dict[str, str]]] = None,
         **kwargs
     ) -> Dict[str, Any]:
         """
-        Invoke Bedrock model (Future Implementation)
+        Invoke a Bedrock model
         
-        Currently returns placeholder response.
-        Future implementation will make actual Bedrock API calls.
+        Args:
+            model_id: Catalog key from BEDROCK_MODELS (e.g. "claude_3_haiku")
+            prompt: Current user message
+            max_tokens: Output token limit
+            temperature: Sampling temperature
+            system_prompt: System prompt
+            history: Earlier {"role", "content"} turns
+        
+        Returns:
+            Dict with success, response, usage, cost, error and, on API
+            errors, status_code (429 for throttling)
         """
+        if model_id not in self.BEDROCK_MODELS:
+            return self._error_result(model_id, f"Model {model_id} not available")
+        if self.client is None:
+            return self._error_result(model_id, "AWS Bedrock client not available")
+        
+        model_spec = self.BEDROCK_MODELS[model_id]
+        max_tokens = min(max_tokens, model_spec.max_tokens)
+        body = self._request_body(model_spec, prompt, max_tokens, temperature, system_prompt, history or [])
+        
+        try:
+            response = await asyncio.to_thread(
+                self.client.invoke_model,
+                modelId=model_spec.model_id,
+                body=json.dumps(body),
+                contentType="application/json",
+                accept="application/json"
+            )
+            response_body = json.loads(response["body"].read())
+        except ClientError as e:
+            error = e.response.get("Error", {})
+            status_code = e.response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+            if error.get("Code") in THROTTLING_ERROR_CODES:
+                status_code = 429
+            logger.error(f"AWS Bedrock API error: {e}")
+            return self._error_result(model_id, str(e), status_code)
+        except BotoCoreError as e:
+            logger.error(f"AWS Bedrock transport error: {e}")
+            return self._error_result(model_id, str(e))
         
-        # Placeholder response for future implementation
-        logger.warning(f"BedrockClient.invoke_model called with model_id: {model_id} (placeholder)")
+        completion, input_tokens, output_tokens = self._parse_response(
+            model_spec, response_body, body
+        )
+        cost = self.calculate_estimated_cost(model_id, input_tokens, output_tokens)
         
         return {
-            "success": False,
-            "error": "AWS Bedrock integration not yet implemented",
+            "success": True,
+            "response": completion.strip(),
             "model_id": model_id,
-            "response": "",
             "usage": {
-                "input_tokens": 0,
-                "output_tokens": 0
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens
             },
-            "cost": 0.0
+            "cost": float(cost)
         }
+    
+    @staticmethod
+    def _request_body(
+        model_spec: BedrockModelSpec,
+        prompt: str,
+        max_tokens: int,
+        temperature: float,
+        system_prompt: Optional[str],
+        history: List[Dict[str, str]]
+    ) -> Dict[str, Any]:
+        """Request body in the model family's native format"""
+        if model_spec.provider == "anthropic":
+            body = {
+                "anthropic_version": "bedrock-2023-05-31",
+                "messages": [*history, {"role": "user", "content": prompt}],
+                "max_tokens": max_tokens,
+                "temperature": temperature
+            }
+            if system_prompt:
+                body["system"] = system_prompt
+            return body
+        
+        # Text-completion families get the conversation flattened into one prompt
+        lines = [system_prompt] if system_prompt else []
+        lines += [f"{turn['role'].capitalize()}: {turn['content']}" for turn in history]
+        lines += [f"User: {prompt}", "Assistant:"]
+        text = "\n\n".join(lines)
         
-        # Future implementation:
-        # try:
-        #     if model_id not in self.BEDROCK_MODELS:
-        #         raise ValueError(f"Model {model_id} not available")
-        #     
-        #     model_spec = self.BEDROCK_MODELS[model_id]
-        #     
-        #     # Prepare request based on provider
-        #     if model_spec.provider == "anthropic":
-        #         body = {
-        #             "prompt": f"\n\nHuman: {prompt}\n\nAssistant:",
-        #             "max_tokens_to_sample": max_tokens,
-        #             "temperature": temperature,
-        #             "stop_sequences": ["\n\nHuman:"]
-        #         }
-        #     elif model_spec.provider == "amazon":
-        #         body = {
-        #             "inputText": prompt,
-        #             "textGenerationConfig": {
-        #                 "maxTokenCount": max_tokens,
-        #                 "temperature": temperature
-        #             }
-        #         }
-        #     elif model_spec.provider == "ai21":
-        #         body = {
-        #             "prompt": prompt,
-        #             "maxTokens": max_tokens,
-        #             "temperature": temperature
-        #         }
-        #     elif model_spec.provider == "cohere":
-        #         body = {
-        #             "prompt": prompt,
-        #             "max_tokens": max_tokens,
-        #             "temperature": temperature
-        #         }
-        #     else:
-        #         raise ValueError(f"Unsupported provider: {model_spec.provider}")
-        #     
-        #     response = self.client.invoke_model(
-        #         modelId=model_spec.model_id,
-        #         body=json.dumps(body),
-        #         contentType="application/json",
-        #         accept="application/json"
-        #     )
-        #     
-        #     response_body = json.loads(response['body'].read())
-        #     
-        #     # Parse response based on provider
-        #     if model_spec.provider == "anthropic":
-        #         completion = response_body.get("completion", "")
-        #         input_tokens = len(prompt.split()) * 1.3  # Rough estimation
-        #         output_tokens = len(completion.split()) * 1.3
-        #     elif model_spec.provider == "amazon":
-        #         completion = response_body.get("outputText", "")
-        #         input_tokens = response_body.get("inputTextTokenCount", 0)
-        #         output_tokens = response_body.get("outputTextTokenCount", 0)
-        #     # ... handle other providers
-        #     
-        #     # Calculate cost
-        #     input_cost = (input_tokens / 1000) * model_spec.cost_per_1k_input_tokens
-        #     output_cost = (output_tokens / 1000) * model_spec.cost_per_1k_output_tokens
-        #     total_cost = input_cost + output_cost
-        #     
-        #     return {
-        #         "success": True,
-        #         "response": completion.strip(),
-        #         "model_id": model_id,
-        #         "usage": {
-        #             "input_tokens": int(input_tokens),
-        #             "output_tokens": int(output_tokens)
-        #         },
-        #         "cost": float(total_cost)
-        #     }
-        #     
-        # except ClientError as e:
-        #     logger.error(f"AWS Bedrock API error: {e}")
-        #     return {
-        #         "success": False,
-        #         "error": str(e),
-        #         "model_id": model_id,
-        #         "response": "",
-        #         "usage": {"input_tokens": 0, "output_tokens": 0},
-        #         "cost": 0.0
-        #     }
-        # except Exception as e:
-        #     logger.error(f"Unexpected error in Bedrock invoke_model: {e}")
-        #     return {
-        #         "success": False,
-        #         "error": str(e),
-        #         "model_id": model_id,
-        #         "response": "",
-        #         "usage": {"input_tokens": 0, "output_tokens": 0},
-        #         "cost": 0.0
-        #     }
+        if model_spec.provider == "amazon":
+            return {
+                "inputText": text,
+                "textGenerationConfig": {
+                    "maxTokenCount": max_tokens,
+                    "temperature": temperature
+                }
+            }
+        if model_spec.provider == "ai21":
+            return {"prompt": text, "maxTokens": max_tokens, "temperature": temperature}
+        if model_spec.provider == "cohere":
+            return {"prompt": text, "max_tokens": max_tokens, "temperature": temperature}
+        raise ValueError(f"Unsupported provider: {model_spec.provider}")
+    
+    @staticmethod
+    def _parse_response(
+        model_spec: BedrockModelSpec,
+        response_body: Dict[str, Any],
+        request_body: Dict[str, Any]
+    ) -> Tuple[str, int, int]:
+        """Completion text, input tokens and output tokens from a response body"""
+        if model_spec.provider == "anthropic":
+            completion = "".join(
+                block.get("text", "") for block in response_body.get("content", [])
+                if block.get("type") == "text"
+            )
+            usage = response_body.get("usage", {})
+            return completion, usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+        
+        if model_spec.provider == "amazon":
+            result = (response_body.get("results") or [{}])[0]
+            return (
+                result.get("outputText", ""),
+                response_body.get("inputTextTokenCount", 0),
+                result.get("tokenCount", 0)
+            )
+        
+        if model_spec.provider == "ai21":
+            completion = (response_body.get("completions") or [{}])[0].get("data", {}).get("text", "")
+        else:
+            completion = (response_body.get("generations") or [{}])[0].get("text", "")
+        # These families do not report usage; estimate it
+        return (
+            completion,
+            token_estimator.count(request_body["prompt"]),
+            token_estimator.count(completion)
+        )
+    
+    @staticmethod
+    def _error_result(model_id: str, error: str, status_code: Optional[int] = None) -> Dict[str, Any]:
+        result = {
+            "success": False,
+            "error": error,
+            "model_id": model_id,
+            "response": "",
+            "usage": {"input_tokens": 0, "output_tokens": 0},
+            "cost": 0.0
+        }
+        if status_code is not None:
+            result["status_code"] = status_code
+        return result
     
     async def list_foundation_models(self) -> List[Dict[str, Any]]:
         """
-        List available foundation models from Bedrock (Future Implementation)
+        List foundation models
         
-        Currently returns placeholder data.
+        Returns the local catalog; listing the account's models needs the
+        "bedrock" control-plane client rather than the runtime client.
         """
-        
-        logger.warning("BedrockClient.list_foundation_models called (placeholder)")
-        
-        # Return placeholder model list
         return [model.to_dict() for model in self.BEDROCK_MODELS.values()]
-        
-        # Future implementation:
-        # try:
-        #     response = self.client.list_foundation_models()
-        #     return response.get('modelSummaries', [])
-        # except ClientError as e:
-        #     logger.error(f"Error listing Bedrock models: {e}")
-        #     return []
     
     def get_model_pricing(self, model_id: str) -> Optional[Dict[str, Any]]:
         """Get pricing information for a specific model"""
@@ -373,9 +421,9 @@ class BedrockModelManager:
         }
 
 
-# Configuration for future AWS Bedrock integration
+# Configuration for AWS Bedrock integration
 BEDROCK_CONFIG = {
-    "enabled": False,  # Set to True when ready to implement
+    "enabled": settings.aws_bedrock_enabled,
     "default_region": "us-east-1",
     "preferred_models": {
         "emergency": "claude_3_sonnet",
@@ -395,22 +443,97 @@ BEDROCK_CONFIG = {
 
 
 def get_bedrock_client(region: str = "us-east-1") -> BedrockClient:
-    """
-    Get Bedrock client instance (Future Implementation)
-    
-    Currently returns placeholder client.
-    """
+    """Get Bedrock client instance"""
     return BedrockClient(region)
 
 
 def is_bedrock_available() -> bool:
-    """Check if Bedrock integration is available and configured"""
-    return BEDROCK_CONFIG["enabled"]
+    """Check if Bedrock integration is enabled and boto3 is installed"""
+    return BEDROCK_CONFIG["enabled"] and boto3 is not None
+
+
+class BedrockProvider(LLMProvider):
+    """Bedrock adapter for the LLM gateway; tiers map to catalog models"""
+    
+    name = "bedrock"
+    
+    def __init__(self, client: Optional[BedrockClient] = None, tier_models: Optional[Dict[str, str]] = None):
+        """
+        Initialize the provider.
+        
+        Args:
+            client: Bedrock client (one for settings.aws_bedrock_region by default)
+            tier_models: Model tier -> BEDROCK_MODELS key
+                (settings.aws_bedrock_tier_models by default)
+        """
+        self.client = client or BedrockClient(settings.aws_bedrock_region)
+        self.tier_models = dict(tier_models or settings.aws_bedrock_tier_models)
+    
+    def supports(self, model_tier: str) -> bool:
+        return self.tier_models.get(model_tier) in BedrockClient.BEDROCK_MODELS
+    
+    def is_available(self) -> bool:
+        return self.client.available
+    
+    async def complete(
+        self,
+        model_tier: str,
+        system_prompt: str,
+        user_prompt: str,
+        history: Optional[List[Dict[str, str]]] = None,
+        agent_type: str = "general",
+        content_type: Optional[str] = None,
+        max_retries: int = 3
+    ) -> ModelResponse:
+        model_key = self.tier_models[model_tier]
+        max_tokens = BedrockClient.BEDROCK_MODELS[model_key].max_tokens
+        # Same sampling temperature as the OpenRouter model of the tier
+        temperature = OpenRouterClient.MODELS[model_tier].temperature if model_tier in OpenRouterClient.MODELS else 0.3
+        retry = BEDROCK_CONFIG["retry_config"]
+        start_time = time.time()
+        
+        for attempt in range(max_retries):
+            result = await self.client.invoke_model(
+                model_key,
+                user_prompt,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                system_prompt=system_prompt,
+                history=history
+            )
+            if result["success"]:
+                break
+            status_code = result.get("status_code")
+            retryable = status_code is None or status_code == 429 or status_code >= 500
+            if not retryable or attempt == max_retries - 1:
+                raise ExternalAPIError(
+                    f"Bedrock {model_key} failed: {result['error']}",
+                    service=self.name,
+                    context={"status_code": status_code} if status_code else None
+                )
+            delay = min(retry["backoff_factor"] ** attempt, retry["max_backoff"])
+            logger.warning(f"Bedrock {model_key} failed, retrying in {delay}s: {result['error']}")
+            await asyncio.sleep(delay)
+        
+        usage = result["usage"]
+        return ModelResponse(
+            content=result["response"],
+            model=BedrockClient.BEDROCK_MODELS[model_key].model_id,
+            usage={
+                "prompt_tokens": usage["input_tokens"],
+                "completion_tokens": usage["output_tokens"],
+                "total_tokens": usage["input_tokens"] + usage["output_tokens"]
+            },
+            cost=Decimal(str(result["cost"])),
+            processing_time_ms=int((time.time() - start_time) * 1000),
+            success=True,
+            provider=self.name
+        )
 
 
 # Example configuration for deployment
 DEPLOYMENT_NOTES = """
-To enable AWS Bedrock integration in the future:
+To enable AWS Bedrock integration:
 
 1. Install AWS SDK:
    pip install boto3
@@ -426,17 +549,15 @@ To enable AWS Bedrock integration in the future:
    - bedrock:GetFoundationModel
 
 4. Enable in configuration:
-   BEDROCK_CONFIG["enabled"] = True
-
-5. Update imports:
-   Uncomment boto3 imports in this file
+   AWS_BEDROCK_ENABLED=true
 
-6. Implement actual API calls:
-   Replace placeholder methods with real Bedrock API calls
+5. Route traffic to Bedrock:
+   Give "bedrock" a weight per tier in LLM_PROVIDER_WEIGHTS and a request
+   budget in LLM_PROVIDER_RATE_LIMITS (see src/ai/gateway.py)
 
-7. Test integration:
-   Run integration tests with actual AWS credentials
+6. Check routing:
+   GET /agents/prompts/metrics shows per-provider health and traffic
 
-8. Monitor costs:
+7. Monitor costs:
    Implement cost tracking with AWS Cost Explorer integration
 """
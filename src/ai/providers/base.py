@@ -0,0 +1,81 @@
+"""
+LLM provider interface for Healthcare AI V2
+Common contract for the backends the LLM gateway balances across
+"""
+
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
+
+from src.ai.openrouter_client import ModelResponse
+from src.core.exceptions import ExternalAPIError
+
+
+# HTTP status codes that mean "slow down" rather than "broken"
+THROTTLE_STATUS_CODES = (429, 503)
+
+
+class LLMProvider(ABC):
+    """
+    One LLM backend serving some of the model tiers (free, lite, premium).
+
+    Adapters translate a chat completion for a tier into the backend's own
+    model and wire format and return a ModelResponse. Failures are raised as
+    ExternalAPIError with context["status_code"] when the backend returned
+    one, so the gateway can tell throttling from outages.
+    """
+
+    name: str = "provider"
+
+    @abstractmethod
+    def supports(self, model_tier: str) -> bool:
+        """Whether this provider can serve a model tier"""
+
+    @abstractmethod
+    async def complete(
+        self,
+        model_tier: str,
+        system_prompt: str,
+        user_prompt: str,
+        history: Optional[List[Dict[str, str]]] = None,
+        agent_type: str = "general",
+        content_type: Optional[str] = None,
+        max_retries: int = 3
+    ) -> ModelResponse:
+        """
+        Run one chat completion.
+
+        Args:
+            model_tier: Model tier (free, lite, premium)
+            system_prompt: System prompt
+            user_prompt: Current user message
+            history: Earlier {"role", "content"} turns
+            agent_type: Calling agent, for token budgeting and logs
+            content_type: Content type, for token budgeting
+            max_retries: Attempts on transient errors; 1 when the gateway
+                has another provider to spill over to
+
+        Returns:
+            ModelResponse with provider set to this provider's name
+
+        Raises:
+            ExternalAPIError: The backend failed or throttled the call
+        """
+
+    def is_available(self) -> bool:
+        """Whether the provider is configured and reachable in principle"""
+        return True
+
+    async def close(self):
+        """Release network resources"""
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Provider-specific counters"""
+        return {}
+
+
+def is_throttled(error: BaseException) -> bool:
+    """Whether an error is a provider rate limit rather than a failure"""
+    return (
+        isinstance(error, ExternalAPIError)
+        and error.context.get("status_code") in THROTTLE_STATUS_CODES
+    )
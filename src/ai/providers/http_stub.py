@@ -0,0 +1,124 @@
+"""
+HTTP stub provider for Healthcare AI V2
+Any OpenAI-compatible /chat/completions endpoint, e.g. a local stand-in server
+
+Used to exercise the LLM gateway (weights, rate budgets, spillover) against
+local servers without spending provider quota, and to point development
+setups at a self-hosted model server.
+"""
+
+import asyncio
+import time
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+import aiohttp
+
+from src.ai.openrouter_client import ModelResponse, OpenRouterClient
+from src.ai.providers.base import LLMProvider
+from src.core.exceptions import ExternalAPIError
+from src.core.logging import get_logger
+
+
+logger = get_logger(__name__)
+
+
+class HTTPStubProvider(LLMProvider):
+    """
+    Provider speaking the OpenAI chat completions schema to a base URL.
+
+    Requests carry the OpenRouter model name of the tier, so a stand-in
+    server can answer per tier. Calls are free (cost 0).
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        name: str = "stub",
+        tiers: Optional[List[str]] = None,
+        timeout_seconds: float = 30.0
+    ):
+        """
+        Initialize the provider.
+
+        Args:
+            base_url: Server root; requests go to {base_url}/chat/completions
+            name: Provider name used for weights, budgets and stats
+            tiers: Tiers served (all OpenRouter tiers by default)
+            timeout_seconds: Total timeout per call
+        """
+        self.name = name
+        self.url = f"{base_url.rstrip('/')}/chat/completions"
+        self.tiers = set(tiers or OpenRouterClient.MODELS)
+        self.timeout_seconds = timeout_seconds
+        self.session: Optional[aiohttp.ClientSession] = None
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=self.timeout_seconds)
+            )
+        return self.session
+
+    def supports(self, model_tier: str) -> bool:
+        return model_tier in self.tiers
+
+    async def complete(
+        self,
+        model_tier: str,
+        system_prompt: str,
+        user_prompt: str,
+        history: Optional[List[Dict[str, str]]] = None,
+        agent_type: str = "general",
+        content_type: Optional[str] = None,
+        max_retries: int = 3
+    ) -> ModelResponse:
+        model_spec = OpenRouterClient.MODELS[model_tier]
+        payload = {
+            "model": model_spec.model,
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                *(history or []),
+                {"role": "user", "content": user_prompt}
+            ],
+            "max_tokens": model_spec.max_tokens,
+            "temperature": model_spec.temperature,
+            "stream": False
+        }
+
+        start_time = time.time()
+        for attempt in range(max_retries):
+            try:
+                session = await self.get_session()
+                async with session.post(self.url, json=payload) as response:
+                    if response.status != 200:
+                        error_text = await response.text()
+                        raise ExternalAPIError(
+                            f"{self.name} error {response.status}: {error_text[:200]}",
+                            service=self.name,
+                            context={"status_code": response.status}
+                        )
+                    data = await response.json()
+                break
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt == max_retries - 1:
+                    raise ExternalAPIError(f"{self.name} request failed: {e}", service=self.name)
+                logger.warning(f"{self.name} request failed, retrying: {e}")
+
+        choices = data.get("choices") or []
+        if not choices or "content" not in choices[0].get("message", {}):
+            raise ExternalAPIError(f"{self.name} returned no message content", service=self.name)
+
+        return ModelResponse(
+            content=choices[0]["message"]["content"].strip(),
+            model=data.get("model", model_spec.model),
+            usage=data.get("usage", {}),
+            cost=Decimal('0.0'),
+            processing_time_ms=int((time.time() - start_time) * 1000),
+            success=True,
+            provider=self.name
+        )
+
+    async def close(self):
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
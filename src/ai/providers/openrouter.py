@@ -0,0 +1,64 @@
+"""
+OpenRouter provider for Healthcare AI V2
+Adapts OpenRouterClient to the LLM gateway provider interface
+"""
+
+from typing import Any, Dict, List, Optional
+
+from src.ai.openrouter_client import ModelResponse, OpenRouterClient, get_openrouter_client
+from src.ai.providers.base import LLMProvider
+from src.core.exceptions import ExternalAPIError
+
+
+class OpenRouterProvider(LLMProvider):
+    """OpenRouter through the shared OpenRouterClient (keeps its usage stats)"""
+
+    name = "openrouter"
+
+    def __init__(self, client: Optional[OpenRouterClient] = None):
+        self.client = client
+
+    async def get_client(self) -> OpenRouterClient:
+        if self.client is None:
+            self.client = await get_openrouter_client()
+        return self.client
+
+    def supports(self, model_tier: str) -> bool:
+        return model_tier in OpenRouterClient.MODELS
+
+    async def complete(
+        self,
+        model_tier: str,
+        system_prompt: str,
+        user_prompt: str,
+        history: Optional[List[Dict[str, str]]] = None,
+        agent_type: str = "general",
+        content_type: Optional[str] = None,
+        max_retries: int = 3
+    ) -> ModelResponse:
+        client = await self.get_client()
+        response = await client.make_request(
+            model_tier=model_tier,
+            system_prompt=system_prompt,
+            user_prompt=user_prompt,
+            history=history,
+            agent_type=agent_type,
+            content_type=content_type,
+            max_retries=max_retries
+        )
+        if not response.success:
+            raise ExternalAPIError(response.error_message or "OpenRouter request failed", service=self.name)
+        return response
+
+    async def close(self):
+        """Close the client's aiohttp session and cassette"""
+        if self.client is not None:
+            await self.client.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        if self.client is None:
+            return {}
+        stats = {}
+        if self.client.player is not None:
+            stats["replay"] = self.client.player.get_stats()
+        return stats
@@ -0,0 +1,309 @@
+"""
+LLM request scheduler for Healthcare AI V2
+Admission control, priority lanes and deadlines for outbound model calls
+
+Every outbound model call takes a slot from the scheduler first:
+
+- A global cap and a per-model cap bound concurrent calls, so traffic spikes
+  queue here instead of turning into provider 429s and retry storms
+- Waiting calls are queued in lanes keyed by UrgencyLevel value and served in
+  strict lane order (emergency first)
+- Within a lane, users are served round-robin so one chatty client cannot
+  starve the others
+- Each call has a deadline; a call that cannot be answered in time is shed
+  with ServiceOverloadedError and the agent falls back to its canned response
+"""
+
+import asyncio
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Deque, Dict, Optional
+
+from src.config import settings
+from src.core.exceptions import ServiceOverloadedError
+from src.core.logging import get_logger
+from src.core.metrics import LatencyHistogram
+
+
+logger = get_logger(__name__)
+
+# UrgencyLevel values, highest priority first
+LANES = ("emergency", "critical", "high", "medium", "low")
+DEFAULT_LANE = "medium"
+
+# Smoothing factor for the per-model service time average
+SERVICE_TIME_ALPHA = 0.2
+
+
+@dataclass
+class _Waiter:
+    """A queued call waiting for a slot"""
+    model: str
+    lane: str
+    user: str
+    deadline: float
+    enqueued_at: float
+    future: asyncio.Future
+
+
+@dataclass
+class LaneStats:
+    """Queueing counters for one priority lane"""
+    admitted: int = 0
+    queued: int = 0
+    shed: int = 0
+    cancelled: int = 0
+    queue_wait: LatencyHistogram = field(default_factory=LatencyHistogram)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "shed": self.shed,
+            "cancelled": self.cancelled,
+            "queue_wait": self.queue_wait.snapshot()
+        }
+
+
+class LLMScheduler:
+    """
+    Priority- and deadline-aware admission control for model calls.
+
+    Use slot() around each provider call. The scheduler is not thread-safe;
+    all calls must come from the same event loop.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: Optional[int] = None,
+        max_concurrency_per_model: Optional[int] = None,
+        deadlines: Optional[Dict[str, float]] = None
+    ):
+        """
+        Initialize the scheduler.
+
+        Args:
+            max_concurrency: Concurrent calls across all models
+            max_concurrency_per_model: Concurrent calls per model tier
+            deadlines: Default deadline in seconds per lane
+        """
+        self.max_concurrency = max_concurrency or settings.llm_max_concurrency
+        self.max_concurrency_per_model = max_concurrency_per_model or settings.llm_max_concurrency_per_model
+        self.deadlines = dict(deadlines or settings.llm_deadline_seconds)
+
+        self._active_total = 0
+        self._active: Dict[str, int] = {}
+        self._lanes: Dict[str, "OrderedDict[str, Deque[_Waiter]]"] = {lane: OrderedDict() for lane in LANES}
+        self._queued = 0
+        self._service_ms: Dict[str, float] = {}
+        self.lane_stats: Dict[str, LaneStats] = {lane: LaneStats() for lane in LANES}
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def deadline_for(self, urgency: str, performance_requirements: Optional[Dict] = None) -> float:
+        """
+        Absolute deadline (time.monotonic()) for a call.
+
+        Args:
+            urgency: UrgencyLevel value
+            performance_requirements: May override the lane default with
+                "deadline_ms"
+
+        Returns:
+            Monotonic deadline
+        """
+        if performance_requirements and performance_requirements.get("deadline_ms"):
+            seconds = performance_requirements["deadline_ms"] / 1000.0
+        else:
+            seconds = self.deadlines.get(urgency, self.deadlines.get(DEFAULT_LANE, 45.0))
+        return time.monotonic() + seconds
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        model: str,
+        urgency: str = DEFAULT_LANE,
+        user: Optional[str] = None,
+        deadline: Optional[float] = None
+    ) -> AsyncIterator[None]:
+        """
+        Hold a call slot for a model.
+
+        Args:
+            model: Model tier the call goes to
+            urgency: UrgencyLevel value (priority lane)
+            user: Fair-queuing key (user or session id)
+            deadline: Monotonic deadline (deadline_for(urgency) if omitted)
+
+        Raises:
+            ServiceOverloadedError: The call cannot be admitted in time
+        """
+        lane = urgency if urgency in self._lanes else DEFAULT_LANE
+        deadline = deadline if deadline is not None else self.deadline_for(lane)
+
+        await self._acquire(model, lane, user or "anonymous", deadline)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._record_service_time(model, (time.monotonic() - started) * 1000)
+            self._release(model)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Concurrency, queue depth and queue-wait metrics"""
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_concurrency_per_model": self.max_concurrency_per_model,
+            "active": self._active_total,
+            "active_by_model": dict(self._active),
+            "queued": self._queued,
+            "service_time_ms": {model: round(value, 1) for model, value in self._service_ms.items()},
+            "lanes": {lane: stats.snapshot() for lane, stats in self.lane_stats.items()}
+        }
+
+    # ------------------------------------------------------------------
+    # Admission
+    # ------------------------------------------------------------------
+
+    def _has_capacity(self, model: str) -> bool:
+        return (
+            self._active_total < self.max_concurrency
+            and self._active.get(model, 0) < self.max_concurrency_per_model
+        )
+
+    def _grant(self, model: str):
+        self._active_total += 1
+        self._active[model] = self._active.get(model, 0) + 1
+
+    def _release(self, model: str):
+        self._active_total -= 1
+        self._active[model] -= 1
+        self._dispatch()
+
+    def _record_service_time(self, model: str, elapsed_ms: float):
+        previous = self._service_ms.get(model)
+        self._service_ms[model] = (
+            elapsed_ms if previous is None
+            else previous + SERVICE_TIME_ALPHA * (elapsed_ms - previous)
+        )
+
+    def _expected_wait(self, lane: str) -> float:
+        """Rough queueing delay (seconds) for a new call in a lane"""
+        if self._active_total < self.max_concurrency or not self._service_ms:
+            return 0.0
+        ahead = 0
+        for name in LANES:
+            ahead += sum(len(queue) for queue in self._lanes[name].values())
+            if name == lane:
+                break
+        mean_service = sum(self._service_ms.values()) / len(self._service_ms)
+        return (ahead + 1) / self.max_concurrency * mean_service / 1000.0
+
+    async def _acquire(self, model: str, lane: str, user: str, deadline: float):
+        stats = self.lane_stats[lane]
+        now = time.monotonic()
+
+        # Fast path: nothing queued and capacity available
+        if self._queued == 0 and self._has_capacity(model):
+            self._grant(model)
+            stats.admitted += 1
+            stats.queue_wait.record(0.0)
+            return
+
+        service = self._service_ms.get(model, 0.0) / 1000.0
+        budget = deadline - now - service
+        if budget <= 0 or self._expected_wait(lane) > budget:
+            stats.shed += 1
+            logger.warning(f"Shedding {lane} LLM call for {model}: cannot be served before its deadline")
+            raise ServiceOverloadedError(
+                "AI service is busy; request cannot be answered in time",
+                context={"model": model, "urgency": lane}
+            )
+
+        waiter = _Waiter(
+            model=model, lane=lane, user=user, deadline=deadline,
+            enqueued_at=now, future=asyncio.get_running_loop().create_future()
+        )
+        self._lanes[lane].setdefault(user, deque()).append(waiter)
+        self._queued += 1
+        stats.queued += 1
+        self._dispatch()
+
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), timeout=budget)
+        except asyncio.TimeoutError:
+            if not self._abandon(waiter):
+                # Granted at the last moment; use the slot
+                stats.admitted += 1
+                stats.queue_wait.record((time.monotonic() - now) * 1000)
+                return
+            stats.shed += 1
+            logger.warning(f"Shedding {lane} LLM call for {model}: deadline reached while queued")
+            raise ServiceOverloadedError(
+                "AI service is busy; request cannot be answered in time",
+                context={"model": model, "urgency": lane}
+            )
+        except asyncio.CancelledError:
+            if not self._abandon(waiter):
+                self._release(model)
+            stats.cancelled += 1
+            raise
+
+        stats.admitted += 1
+        stats.queue_wait.record((time.monotonic() - now) * 1000)
+
+    def _abandon(self, waiter: _Waiter) -> bool:
+        """
+        Withdraw a waiter that gave up.
+
+        Returns:
+            False if the waiter had already been granted a slot
+        """
+        if waiter.future.done():
+            return False
+        waiter.future.cancel()
+        queue = self._lanes[waiter.lane].get(waiter.user)
+        if queue is not None:
+            try:
+                queue.remove(waiter)
+                self._queued -= 1
+            except ValueError:
+                pass
+            if not queue:
+                del self._lanes[waiter.lane][waiter.user]
+        return True
+
+    def _dispatch(self):
+        """Grant free slots to waiters: lanes in priority order, users round-robin"""
+        while self._queued and self._active_total < self.max_concurrency:
+            waiter = self._next_waiter()
+            if waiter is None:
+                return
+            self._grant(waiter.model)
+            waiter.future.set_result(True)
+
+    def _next_waiter(self) -> Optional[_Waiter]:
+        for lane in LANES:
+            users = self._lanes[lane]
+            for user in list(users):
+                queue = users[user]
+                waiter = queue[0]
+                if not self._has_capacity(waiter.model):
+                    # Model saturated; later users may be waiting on another model
+                    continue
+                queue.popleft()
+                self._queued -= 1
+                # Rotate the user to the back of the lane
+                del users[user]
+                if queue:
+                    users[user] = queue
+                return waiter
+        return None
+
+
+# Global scheduler instance
+llm_scheduler = LLMScheduler()
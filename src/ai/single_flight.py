@@ -0,0 +1,64 @@
+"""
+Single-flight coalescing for Healthcare AI V2
+Concurrent identical LLM calls share one scheduler slot and one provider call
+
+The model manager wraps each admitted call (scheduler slot plus gateway
+call) in SingleFlight.run, so callers that join an in-flight call never
+queue for a slot of their own.
+"""
+
+import asyncio
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict
+
+
+@dataclass
+class _InFlightCall:
+    """A call shared by concurrent identical requests"""
+    task: asyncio.Future
+    waiters: int = 0
+
+
+class SingleFlight:
+    """Runs one call per key at a time and hands its result to every caller"""
+
+    def __init__(self):
+        self._inflight: Dict[str, _InFlightCall] = {}
+        self.stats = {"shared_calls": 0, "coalesced": 0, "cancelled_waiters": 0}
+
+    async def run(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run factory() once for all concurrent callers with the same key.
+
+        The shared call runs as its own task: a caller that is cancelled
+        (e.g. its client disconnected) only stops waiting, and the call is
+        cancelled only when every caller has gone.
+        """
+        entry = self._inflight.get(key)
+        if entry is None or entry.task.cancelled():
+            entry = _InFlightCall(task=asyncio.ensure_future(factory()))
+            self._inflight[key] = entry
+            self.stats["shared_calls"] += 1
+            entry.task.add_done_callback(lambda _task, entry=entry: self._forget(key, entry))
+        else:
+            self.stats["coalesced"] += 1
+
+        entry.waiters += 1
+        try:
+            return await asyncio.shield(entry.task)
+        except asyncio.CancelledError:
+            if not entry.task.done():
+                self.stats["cancelled_waiters"] += 1
+            raise
+        finally:
+            entry.waiters -= 1
+            if entry.waiters == 0 and not entry.task.done():
+                entry.task.cancel()
+
+    def _forget(self, key: str, entry: _InFlightCall):
+        if self._inflight.get(key) is entry:
+            del self._inflight[key]
+
+    def get_stats(self) -> Dict[str, int]:
+        """Shared calls, callers that joined one, and calls in flight"""
+        return {**self.stats, "in_flight": len(self._inflight)}
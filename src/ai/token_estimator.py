@@ -0,0 +1,198 @@
+"""
+Token estimation for Healthcare AI V2
+Per-model-family token counts for budgeting prompts and responses
+
+Character counts badly misjudge mixed Chinese/English text: one Han character
+is roughly one token while English averages about four characters per token.
+The estimator counts CJK, ASCII and other characters separately and applies
+per-family ratios. OpenAI-family models use tiktoken when it is installed and
+its encodings can be loaded. Counts are cached by text, so repeated history
+messages and system prompts are only measured once.
+"""
+
+import math
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from src.core.logging import get_logger
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+
+logger = get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class TokenizerProfile:
+    """Approximate tokenizer behaviour of a model family"""
+    family: str
+    chars_per_token: float  # ASCII text
+    tokens_per_cjk_char: float  # Han, kana, hangul and full-width punctuation
+    tokens_per_other_char: float  # Accented letters, emoji, other scripts
+    message_overhead: int = 4  # Role and separator tokens per chat message
+
+
+TOKENIZER_PROFILES: Dict[str, TokenizerProfile] = {
+    # Gemini/Gemma share a 256k SentencePiece vocabulary with many Han tokens
+    "gemini": TokenizerProfile("gemini", 4.0, 0.85, 1.0),
+    "openai": TokenizerProfile("openai", 4.0, 1.2, 1.0, message_overhead=3),
+    "claude": TokenizerProfile("claude", 3.5, 1.4, 1.2),
+    "llama": TokenizerProfile("llama", 3.8, 1.1, 1.0),
+    "mistral": TokenizerProfile("mistral", 3.6, 1.5, 1.2),
+    "qwen": TokenizerProfile("qwen", 3.8, 0.7, 1.0),
+    # Unknown models: err on the high side
+    "default": TokenizerProfile("default", 3.6, 1.3, 1.2),
+}
+
+# Model id fragment -> family, checked in order
+MODEL_FAMILY_PATTERNS: Tuple[Tuple[str, str], ...] = (
+    ("gemini", "gemini"),
+    ("gemma", "gemini"),
+    ("google/", "gemini"),
+    ("claude", "claude"),
+    ("anthropic", "claude"),
+    ("gpt", "openai"),
+    ("openai/", "openai"),
+    ("llama", "llama"),
+    ("mistral", "mistral"),
+    ("mixtral", "mistral"),
+    ("qwen", "qwen"),
+    ("deepseek", "qwen"),
+)
+
+_CJK_RE = re.compile(
+    r"[\u3000-\u303f\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff"
+    r"\uac00-\ud7af\uf900-\ufaff\uff00-\uffef]"
+)
+_NON_ASCII_RE = re.compile(r"[^\x00-\x7f]")
+
+
+class TokenEstimator:
+    """
+    Cached token counter keyed by model family.
+
+    Safe to share between agents; the cache is guarded by a lock.
+    """
+
+    def __init__(self, cache_size: int = 8192, default_family: str = "gemini"):
+        """
+        Initialize the estimator.
+
+        Args:
+            cache_size: Maximum cached (family, text) counts
+            default_family: Family used when no model is given
+        """
+        self.cache_size = cache_size
+        self.default_family = default_family
+        self._cache: "OrderedDict[Tuple[str, str], int]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._tiktoken_encoding: Any = None
+        self._tiktoken_failed = tiktoken is None
+        self.hits = 0
+        self.misses = 0
+
+    def family_for(self, model: Optional[str]) -> str:
+        """Map a model id (or family name) to a tokenizer family"""
+        if not model:
+            return self.default_family
+        model = model.lower()
+        if model in TOKENIZER_PROFILES:
+            return model
+        for fragment, family in MODEL_FAMILY_PATTERNS:
+            if fragment in model:
+                return family
+        return "default"
+
+    def _get_tiktoken(self):
+        if self._tiktoken_failed:
+            return None
+        if self._tiktoken_encoding is None:
+            try:
+                self._tiktoken_encoding = tiktoken.get_encoding("o200k_base")
+            except Exception as e:
+                # Encodings are downloaded on first use; offline hosts fall back
+                logger.warning(f"tiktoken encoding unavailable, using heuristic counts: {e}")
+                self._tiktoken_failed = True
+                return None
+        return self._tiktoken_encoding
+
+    def _count(self, text: str, profile: TokenizerProfile) -> int:
+        if profile.family == "openai":
+            encoding = self._get_tiktoken()
+            if encoding is not None:
+                return len(encoding.encode(text, disallowed_special=()))
+
+        if text.isascii():
+            return math.ceil(len(text) / profile.chars_per_token)
+
+        cjk = len(_CJK_RE.findall(text))
+        other = len(_NON_ASCII_RE.findall(text)) - cjk
+        ascii_chars = len(text) - cjk - other
+        return math.ceil(
+            ascii_chars / profile.chars_per_token
+            + cjk * profile.tokens_per_cjk_char
+            + other * profile.tokens_per_other_char
+        )
+
+    def count(self, text: Optional[str], model: Optional[str] = None) -> int:
+        """
+        Estimate the tokens in a piece of text.
+
+        Args:
+            text: Text to measure
+            model: Model id or family name (default family if omitted)
+
+        Returns:
+            Estimated token count
+        """
+        if not text:
+            return 0
+        family = self.family_for(model)
+        key = (family, text)
+
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return cached
+
+        tokens = self._count(text, TOKENIZER_PROFILES[family])
+
+        with self._lock:
+            self.misses += 1
+            self._cache[key] = tokens
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return tokens
+
+    def count_message(self, message: Dict[str, Any], model: Optional[str] = None) -> int:
+        """Estimate the tokens of one chat message, including role overhead"""
+        family = self.family_for(model)
+        return self.count(message.get("content") or "", family) + TOKENIZER_PROFILES[family].message_overhead
+
+    def count_messages(self, messages: Iterable[Dict[str, Any]], model: Optional[str] = None) -> int:
+        """Estimate the prompt tokens of a chat message list"""
+        family = self.family_for(model)
+        return sum(self.count_message(message, family) for message in messages) + 3  # reply priming
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Cache statistics"""
+        total = self.hits + self.misses
+        return {
+            "cache_entries": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "tiktoken": self._tiktoken_encoding is not None,
+        }
+
+
+# Global token estimator instance
+token_estimator = TokenEstimator()
@@ -118,17 +118,88 @@ class Settings(BaseSettings):
     openrouter_api_key: Optional[str] = Field(default=None, env="OPENROUTER_API_KEY")
     openrouter_default_model: str = Field(default="lite", env="OPENROUTER_DEFAULT_MODEL")
     openrouter_app_name: str = Field(default="Healthcare AI V2", env="OPENROUTER_APP_NAME")
+    openrouter_base_url: str = Field(
+        default="https://openrouter.ai/api/v1/chat/completions",
+        env="OPENROUTER_BASE_URL"
+    )
     
-    # AWS Bedrock Configuration (Future)
+    # LLM cassettes: record provider calls to a file, or replay them offline
+    # with synthetic latency ("none", "recorded[:SCALE]", "fixed:MS",
+    # "uniform:LOW,HIGH", "normal:MEAN,STD", "lognormal:MEDIAN,SIGMA")
+    llm_cassette_mode: str = Field(default="off", env="LLM_CASSETTE_MODE")
+    llm_cassette_path: str = Field(default="data/cassettes/openrouter.jsonl.gz", env="LLM_CASSETTE_PATH")
+    llm_replay_latency: str = Field(default="recorded", env="LLM_REPLAY_LATENCY")
+    llm_replay_on_miss: str = Field(default="synthesize", env="LLM_REPLAY_ON_MISS")
+    llm_replay_seed: int = Field(default=0, env="LLM_REPLAY_SEED")
+    
+    # Outbound LLM scheduling: concurrency caps and per-urgency deadlines
+    llm_max_concurrency: int = Field(default=16, env="LLM_MAX_CONCURRENCY")
+    llm_max_concurrency_per_model: int = Field(default=8, env="LLM_MAX_CONCURRENCY_PER_MODEL")
+    llm_deadline_seconds: Dict[str, float] = Field(
+        default={"emergency": 20.0, "critical": 25.0, "high": 30.0, "medium": 45.0, "low": 60.0},
+        env="LLM_DEADLINE_SECONDS"
+    )
+    # p95 latency SLO per urgency for model tier selection, and the sliding
+    # window the per-tier latency histograms cover
+    llm_latency_slo_ms: Dict[str, float] = Field(
+        default={"emergency": 8000.0, "critical": 10000.0, "high": 12000.0, "medium": 15000.0, "low": 20000.0},
+        env="LLM_LATENCY_SLO_MS"
+    )
+    llm_latency_window_seconds: float = Field(default=300.0, env="LLM_LATENCY_WINDOW_SECONDS")
+    llm_latency_min_samples: int = Field(default=20, env="LLM_LATENCY_MIN_SAMPLES")
+    # Share one scheduler slot and provider call between identical concurrent low-temperature requests
+    llm_coalesce_requests: bool = Field(default=True, env="LLM_COALESCE_REQUESTS")
+    llm_coalesce_max_temperature: float = Field(default=0.3, env="LLM_COALESCE_MAX_TEMPERATURE")
+    
+    # LLM gateway: traffic weight per provider and model tier, per-provider
+    # request budgets, and the thresholds that take a provider out of rotation
+    llm_provider_weights: Dict[str, Dict[str, float]] = Field(
+        default={
+            "openrouter": {"free": 1.0, "lite": 1.0, "premium": 1.0},
+            "bedrock": {"lite": 1.0, "premium": 1.0},
+            "stub": {"free": 1.0, "lite": 1.0, "premium": 1.0}
+        },
+        env="LLM_PROVIDER_WEIGHTS"
+    )
+    llm_provider_rate_limits: Dict[str, int] = Field(
+        default={},
+        env="LLM_PROVIDER_RATE_LIMITS"
+    )  # Requests per minute, e.g. {"bedrock": 60}; providers without an entry are unbudgeted
+    llm_spillover_error_rate: float = Field(default=0.5, env="LLM_SPILLOVER_ERROR_RATE")
+    llm_spillover_latency_ms: float = Field(default=15000.0, env="LLM_SPILLOVER_LATENCY_MS")
+    llm_spillover_window: int = Field(default=20, env="LLM_SPILLOVER_WINDOW")
+    llm_spillover_min_requests: int = Field(default=5, env="LLM_SPILLOVER_MIN_REQUESTS")
+    llm_spillover_cooldown_seconds: float = Field(default=30.0, env="LLM_SPILLOVER_COOLDOWN_SECONDS")
+    # OpenAI-compatible stand-in server added as the "stub" provider when set
+    llm_stub_provider_url: Optional[str] = Field(default=None, env="LLM_STUB_PROVIDER_URL")
+    
+    # AWS Bedrock Configuration (requires boto3)
     aws_bedrock_enabled: bool = Field(default=False, env="AWS_BEDROCK_ENABLED")
     aws_bedrock_region: str = Field(default="us-east-1", env="AWS_BEDROCK_REGION")
     aws_bedrock_default_model: str = Field(default="claude_3_haiku", env="AWS_BEDROCK_DEFAULT_MODEL")
+    aws_bedrock_tier_models: Dict[str, str] = Field(
+        default={"lite": "claude_3_haiku", "premium": "claude_3_sonnet"},
+        env="AWS_BEDROCK_TIER_MODELS"
+    )
     
     # Hong Kong Data Configuration
     hk_data_update_interval: int = Field(default=3600, env="HK_DATA_UPDATE_INTERVAL")  # 1 hour
     hk_data_cache_ttl: int = Field(default=1800, env="HK_DATA_CACHE_TTL")  # 30 minutes
     hk_data_retry_attempts: int = Field(default=3, env="HK_DATA_RETRY_ATTEMPTS")
     hk_data_timeout: int = Field(default=30, env="HK_DATA_TIMEOUT")
+    hk_data_max_concurrency: int = Field(default=4, env="HK_DATA_MAX_CONCURRENCY")
+    # Open-data feed URLs by feed name; feeds without a URL are not fetched
+    hk_data_source_urls: Dict[str, str] = Field(
+        default={
+            "ae_waiting_times": "https://www.ha.org.hk/opendata/aed/aedwtdata-en.json",
+            "clinics": "",
+            "health_advisories": "",
+            "air_quality": ""
+        },
+        env="HK_DATA_SOURCE_URLS"
+    )
+    # Requests per minute by feed name, overriding the adapter defaults
+    hk_data_source_rate_limits: Dict[str, int] = Field(default={}, env="HK_DATA_SOURCE_RATE_LIMITS")
     
     # =============================================================================
     # FILE UPLOAD CONFIGURATION
@@ -154,7 +225,15 @@ class Settings(BaseSettings):
     default_agent_timeout: int = Field(default=30, env="DEFAULT_AGENT_TIMEOUT")
     max_conversation_history: int = Field(default=50, env="MAX_CONVERSATION_HISTORY")
     agent_confidence_threshold: float = Field(default=0.6, env="AGENT_CONFIDENCE_THRESHOLD")
-    
+
+    # Conversation Context (token budgets)
+    context_token_budget: int = Field(default=6000, env="CONTEXT_TOKEN_BUDGET")  # whole prompt
+    context_history_token_budget: int = Field(default=2500, env="CONTEXT_HISTORY_TOKEN_BUDGET")
+    context_summary_max_tokens: int = Field(default=400, env="CONTEXT_SUMMARY_MAX_TOKENS")
+    context_keep_recent_messages: int = Field(default=8, env="CONTEXT_KEEP_RECENT_MESSAGES")
+    context_summarize_batch: int = Field(default=8, env="CONTEXT_SUMMARIZE_BATCH")
+    context_model_family: str = Field(default="gemini", env="CONTEXT_MODEL_FAMILY")
+
     # Agent Routing
     enable_intelligent_routing: bool = Field(default=True, env="ENABLE_INTELLIGENT_ROUTING")
     routing_model: str = Field(default="gpt-4-turbo-preview", env="ROUTING_MODEL")
@@ -165,6 +244,34 @@ class Settings(BaseSettings):
     supported_languages: List[str] = Field(default=["en", "zh-HK", "zh-CN"], env="SUPPORTED_LANGUAGES")
     cultural_context: str = Field(default="hong_kong", env="CULTURAL_CONTEXT")
     
+    # =============================================================================
+    # WEBSOCKET CONFIGURATION
+    # =============================================================================
+    
+    # Outbound queues
+    websocket_send_queue_size: int = Field(default=256, env="WEBSOCKET_SEND_QUEUE_SIZE")
+    websocket_send_timeout: float = Field(default=10.0, env="WEBSOCKET_SEND_TIMEOUT")
+    websocket_slow_consumer_policy: str = Field(default="drop_oldest", env="WEBSOCKET_SLOW_CONSUMER_POLICY")
+    
+    # Wire protocol
+    websocket_per_message_deflate: bool = Field(default=True, env="WEBSOCKET_PER_MESSAGE_DEFLATE")
+    
+    # Cross-worker session bus
+    websocket_session_bus: str = Field(default="memory", env="WEBSOCKET_SESSION_BUS")
+    websocket_node_id: Optional[str] = Field(default=None, env="WEBSOCKET_NODE_ID")
+    websocket_node_ttl: int = Field(default=30, env="WEBSOCKET_NODE_TTL")
+    
+    # =============================================================================
+    # LIVE2D ASSET CONFIGURATION
+    # =============================================================================
+    
+    # Browser cache lifetime for assets without a content hash in the filename
+    live2d_asset_max_age: int = Field(default=3600, env="LIVE2D_ASSET_MAX_AGE")
+    
+    # In-memory cache for small hot assets
+    live2d_asset_cache_size_mb: int = Field(default=32, env="LIVE2D_ASSET_CACHE_SIZE_MB")
+    live2d_asset_cache_max_file_kb: int = Field(default=512, env="LIVE2D_ASSET_CACHE_MAX_FILE_KB")
+    
     # =============================================================================
     # LOGGING AND MONITORING CONFIGURATION
     # =============================================================================
@@ -281,6 +388,46 @@ class Settings(BaseSettings):
             raise ValueError(f"Environment must be one of: {allowed_environments}")
         return v
     
+    @field_validator("websocket_slow_consumer_policy")
+    @classmethod
+    def validate_slow_consumer_policy(cls, v: str) -> str:
+        """Validate WebSocket slow-consumer policy"""
+        allowed_policies = ["drop_oldest", "coalesce", "disconnect"]
+        v_lower = v.lower()
+        if v_lower not in allowed_policies:
+            raise ValueError(f"WebSocket slow consumer policy must be one of: {allowed_policies}")
+        return v_lower
+    
+    @field_validator("websocket_session_bus")
+    @classmethod
+    def validate_session_bus(cls, v: str) -> str:
+        """Validate WebSocket session bus backend"""
+        allowed_backends = ["memory", "redis"]
+        v_lower = v.lower()
+        if v_lower not in allowed_backends:
+            raise ValueError(f"WebSocket session bus must be one of: {allowed_backends}")
+        return v_lower
+    
+    @field_validator("llm_cassette_mode")
+    @classmethod
+    def validate_cassette_mode(cls, v: str) -> str:
+        """Validate LLM cassette mode"""
+        allowed_modes = ["off", "record", "replay"]
+        v_lower = v.lower()
+        if v_lower not in allowed_modes:
+            raise ValueError(f"LLM cassette mode must be one of: {allowed_modes}")
+        return v_lower
+    
+    @field_validator("llm_replay_on_miss")
+    @classmethod
+    def validate_replay_on_miss(cls, v: str) -> str:
+        """Validate LLM replay miss policy"""
+        allowed_policies = ["error", "synthesize"]
+        v_lower = v.lower()
+        if v_lower not in allowed_policies:
+            raise ValueError(f"LLM replay miss policy must be one of: {allowed_policies}")
+        return v_lower
+    
     @field_validator("log_level")
     @classmethod
     def validate_log_level(cls, v: str) -> str:
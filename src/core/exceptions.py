@@ -123,6 +123,18 @@ class ExternalAPIError(HealthcareAIException):
         )
 
 
+class ServiceOverloadedError(HealthcareAIException):
+    """Request shed because it cannot be served before its deadline"""
+
+    def __init__(self, detail: str = "Service overloaded", context: Optional[Dict[str, Any]] = None):
+        super().__init__(
+            detail=detail,
+            status_code=503,
+            error_type="service_overloaded",
+            context=context
+        )
+
+
 class AgentError(HealthcareAIException):
     """Agent system related errors"""
     
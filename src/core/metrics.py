@@ -0,0 +1,176 @@
+"""
+Healthcare AI V2 - Metrics Utilities
+Fixed-memory latency histograms with percentile queries
+"""
+
+import bisect
+import math
+import time
+from typing import Any, Dict, List, Optional
+
+
+class LatencyHistogram:
+    """
+    Log-bucketed latency histogram
+
+    Buckets grow geometrically and percentiles report the bucket's upper
+    bound, so an estimate overstates the true value by at most the growth
+    factor (e.g. up to 5% for 1.05) while memory stays constant no matter
+    how many samples are recorded.
+    """
+
+    def __init__(self, min_ms: float = 0.1, max_ms: float = 120_000.0, growth: float = 1.05):
+        """
+        Initialize histogram
+
+        Args:
+            min_ms: Upper bound of the first bucket
+            max_ms: Values above this land in the overflow bucket
+            growth: Ratio between consecutive bucket bounds
+        """
+        bucket_count = int(math.ceil(math.log(max_ms / min_ms, growth))) + 1
+        self._bounds: List[float] = [min_ms * growth ** i for i in range(bucket_count)]
+        self._counts: List[int] = [0] * (bucket_count + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def record(self, value_ms: float):
+        """Record one latency sample in milliseconds"""
+        self._counts[bisect.bisect_left(self._bounds, value_ms)] += 1
+        self.count += 1
+        self.total += value_ms
+        if self.min is None or value_ms < self.min:
+            self.min = value_ms
+        if self.max is None or value_ms > self.max:
+            self.max = value_ms
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, q: float) -> float:
+        """
+        Estimate a percentile
+
+        Args:
+            q: Percentile in [0, 100]
+
+        Returns:
+            Upper bound of the bucket holding the percentile, clamped to the
+            observed min/max (0.0 if empty)
+        """
+        if not self.count:
+            return 0.0
+        rank = max(1, int(math.ceil(q / 100.0 * self.count)))
+        seen = 0
+        for index, bucket_count in enumerate(self._counts):
+            seen += bucket_count
+            if seen >= rank:
+                value = self._bounds[index] if index < len(self._bounds) else self.max
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def merge(self, other: "LatencyHistogram"):
+        """Add another histogram with the same bucket layout into this one"""
+        if other._bounds != self._bounds:
+            raise ValueError("Cannot merge histograms with different bucket layouts")
+        for index, bucket_count in enumerate(other._counts):
+            self._counts[index] += bucket_count
+        self.count += other.count
+        self.total += other.total
+        if other.count:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+
+    def reset(self):
+        """Discard all samples"""
+        self._counts = [0] * len(self._counts)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Summary statistics for reporting"""
+        return {
+            "count": self.count,
+            "mean_ms": round(self.mean, 2),
+            "p50_ms": round(self.percentile(50), 2),
+            "p90_ms": round(self.percentile(90), 2),
+            "p95_ms": round(self.percentile(95), 2),
+            "p99_ms": round(self.percentile(99), 2),
+            "max_ms": round(self.max or 0.0, 2)
+        }
+
+
+class RollingLatencyHistogram:
+    """
+    Latency histogram over a sliding time window
+
+    Samples go into a current histogram that is retired every window; queries
+    merge it with the previous one, so they cover between one and two windows
+    of the most recent traffic and older drift ages out.
+    """
+
+    def __init__(self, window_seconds: float = 300.0, **histogram_args: float):
+        """
+        Initialize histogram
+
+        Args:
+            window_seconds: Length of one window
+            **histogram_args: Bucket layout passed to LatencyHistogram
+        """
+        self.window_seconds = window_seconds
+        self._histogram_args = histogram_args
+        self._current = LatencyHistogram(**histogram_args)
+        self._previous = LatencyHistogram(**histogram_args)
+        self._started = time.monotonic()
+        self._merged: Optional[LatencyHistogram] = None
+
+    def _rotate(self):
+        """Retire windows that have ended"""
+        elapsed = int((time.monotonic() - self._started) // self.window_seconds)
+        if elapsed < 1:
+            return
+        # After two or more idle windows the previous window is stale as well
+        self._previous = self._current if elapsed == 1 else LatencyHistogram(**self._histogram_args)
+        self._current = LatencyHistogram(**self._histogram_args)
+        self._started += elapsed * self.window_seconds
+        self._merged = None
+
+    def _window(self) -> LatencyHistogram:
+        """Merged view of the previous and current windows"""
+        self._rotate()
+        if self._merged is None:
+            merged = LatencyHistogram(**self._histogram_args)
+            merged.merge(self._previous)
+            merged.merge(self._current)
+            self._merged = merged
+        return self._merged
+
+    def record(self, value_ms: float):
+        """Record one latency sample in milliseconds"""
+        self._rotate()
+        self._current.record(value_ms)
+        self._merged = None
+
+    @property
+    def count(self) -> int:
+        return self._window().count
+
+    def percentile(self, q: float) -> float:
+        """Estimate a percentile over the recent window (0.0 if empty)"""
+        return self._window().percentile(q)
+
+    def reset(self):
+        """Discard all samples"""
+        self._current.reset()
+        self._previous.reset()
+        self._started = time.monotonic()
+        self._merged = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Summary statistics for the recent window"""
+        return {**self._window().snapshot(), "window_seconds": self.window_seconds}
@@ -0,0 +1,337 @@
+"""
+HK open-data ingestion engine for Healthcare AI V2
+Concurrent, incremental fetching of the open-data feeds
+
+For every run the engine:
+
+- Fetches the feeds concurrently (up to a concurrency limit), each one paced
+  to its own requests-per-minute budget
+- Sends conditional requests with the ETag / Last-Modified validators of the
+  last successful fetch; a 304 ends the feed's run
+- Streams the body through the adapter's JSON or CSV parser while hashing
+  it, yielding to the event loop every PARSE_YIELD_RECORDS records (a
+  buffered body would otherwise parse in one step); a body identical to the
+  last one is not published
+- Diffs records by key against the last run (in a worker thread, so large
+  feeds do not stall the event loop) and publishes only the added, changed
+  and removed records
+- Records each feed's outcome through the status recorder, by default
+  HKDataRepository.update_source_status in hk_data_source_status
+"""
+
+import asyncio
+import csv
+import hashlib
+import json
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+import aiohttp
+from sqlalchemy.exc import SQLAlchemyError
+
+from src.config import settings
+from src.core.exceptions import ExternalAPIError
+from src.core.logging import get_logger
+from src.data.sources.base import SourceAdapter
+
+
+logger = get_logger(__name__)
+
+# HTTP statuses worth retrying; anything else >= 400 fails the feed at once
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# Records parsed between yields to the event loop
+PARSE_YIELD_RECORDS = 200
+
+StatusRecorder = Callable[[str, bool, Optional[int], Optional[str]], Awaitable[Any]]
+
+
+@dataclass
+class SourceRun:
+    """Outcome of one feed in one run"""
+    source: str
+    status: str  # "updated", "unchanged", "not_modified" or "failed"
+    started_at: str = ""
+    duration_ms: float = 0.0
+    http_status: Optional[int] = None
+    attempts: int = 0
+    bytes_read: int = 0
+    records: int = 0
+    changed: int = 0
+    removed: int = 0
+    error: Optional[str] = None
+
+    @property
+    def succeeded(self) -> bool:
+        return self.status != "failed"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), "duration_ms": round(self.duration_ms, 1)}
+
+
+@dataclass
+class SourceState:
+    """What the engine remembers about a feed between runs"""
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    content_hash: Optional[str] = None
+    record_hashes: Dict[str, str] = field(default_factory=dict)
+    records: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    last_run: Optional[SourceRun] = None
+
+
+class RequestPacer:
+    """Spaces a feed's requests evenly within its per-minute budget"""
+
+    def __init__(self, requests_per_minute: int):
+        self.interval = 60.0 / max(1, requests_per_minute)
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        """Wait until the next request may be sent"""
+        async with self._lock:
+            delay = self._next - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._next = time.monotonic() + self.interval
+
+
+class IngestionEngine:
+    """Fetches HK open-data feeds and publishes what changed"""
+
+    def __init__(
+        self,
+        sources: Iterable[SourceAdapter],
+        repository: Any = None,
+        status_recorder: Optional[StatusRecorder] = None,
+        max_concurrency: Optional[int] = None,
+        timeout_seconds: Optional[float] = None,
+        retry_attempts: Optional[int] = None,
+        retry_backoff_seconds: float = 1.0,
+        chunk_size: int = 64 * 1024
+    ):
+        """
+        Initialize the engine.
+
+        Args:
+            sources: Feed adapters; names must be unique
+            repository: Data repository the adapters publish to (nothing is published if None)
+            status_recorder: Async callable(source_name, is_success, response_time_ms, error)
+                run after every feed (record_source_status by default)
+            max_concurrency: Feeds fetched at once (settings.hk_data_max_concurrency by default)
+            timeout_seconds: Total timeout per request (settings.hk_data_timeout by default)
+            retry_attempts: Attempts per feed on network errors and 429/5xx
+                (settings.hk_data_retry_attempts by default)
+            retry_backoff_seconds: Delay before the first retry, doubled for each further one
+            chunk_size: Bytes read from the response per parser step
+        """
+        self.sources: Dict[str, SourceAdapter] = {source.name: source for source in sources}
+        self.repository = repository
+        self.status_recorder = status_recorder or record_source_status
+        self.max_concurrency = max_concurrency or settings.hk_data_max_concurrency
+        self.timeout_seconds = timeout_seconds or settings.hk_data_timeout
+        self.retry_attempts = max(1, retry_attempts or settings.hk_data_retry_attempts)
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self.chunk_size = chunk_size
+
+        self.semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.pacers = {name: RequestPacer(source.requests_per_minute) for name, source in self.sources.items()}
+        self.states = {name: SourceState() for name in self.sources}
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.stats = {
+            "runs": 0, "requests": 0, "bytes_read": 0,
+            "updated": 0, "unchanged": 0, "not_modified": 0, "failed": 0
+        }
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=self.timeout_seconds)
+            )
+        return self.session
+
+    async def close(self):
+        if self.session and not self.session.closed:
+            await self.session.close()
+
+    async def run(self, names: Optional[Iterable[str]] = None) -> Dict[str, SourceRun]:
+        """
+        Fetch feeds concurrently and publish their changes.
+
+        Args:
+            names: Feeds to run (all by default)
+
+        Returns:
+            Feed name -> outcome
+
+        Raises:
+            KeyError: An unknown feed name was given
+        """
+        selected = [self.sources[name] for name in names] if names is not None else list(self.sources.values())
+        runs = await asyncio.gather(*(self._run_source(source) for source in selected))
+        self.stats["runs"] += 1
+        return {run.source: run for run in runs}
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "max_concurrency": self.max_concurrency,
+            "sources": {
+                name: {
+                    "url": source.url,
+                    "requests_per_minute": source.requests_per_minute,
+                    "records": len(self.states[name].records),
+                    "last_run": self.states[name].last_run.to_dict() if self.states[name].last_run else None
+                }
+                for name, source in self.sources.items()
+            }
+        }
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    async def _run_source(self, source: SourceAdapter) -> SourceRun:
+        """Fetch one feed with retries, publish and record the outcome"""
+        started_at = datetime.now(timezone.utc).isoformat()
+        started = time.perf_counter()
+        run = SourceRun(source=source.name, status="failed")
+        for attempt in range(1, self.retry_attempts + 1):
+            try:
+                run = await self._fetch(source)
+                run.attempts = attempt
+                break
+            except (aiohttp.ClientError, asyncio.TimeoutError, ExternalAPIError) as e:
+                retryable = not isinstance(e, ExternalAPIError) or e.context.get("status_code") in RETRY_STATUS_CODES
+                run = SourceRun(source=source.name, status="failed", attempts=attempt, error=str(e) or type(e).__name__)
+                if isinstance(e, ExternalAPIError):
+                    run.http_status = e.context.get("status_code")
+                if not retryable or attempt == self.retry_attempts:
+                    break
+                logger.warning(f"Feed {source.name} failed (attempt {attempt}), retrying: {run.error}")
+                await asyncio.sleep(self.retry_backoff_seconds * 2 ** (attempt - 1))
+            except (ValueError, csv.Error) as e:
+                # Malformed body; a retry would read the same content
+                run = SourceRun(source=source.name, status="failed", attempts=attempt, error=f"Unreadable feed: {e}")
+                break
+
+        run.started_at = started_at
+        run.duration_ms = (time.perf_counter() - started) * 1000
+        self.states[source.name].last_run = run
+        self.stats[run.status] += 1
+        if run.succeeded:
+            logger.info(
+                f"Feed {source.name}: {run.status}, {run.records} records "
+                f"({run.changed} changed, {run.removed} removed) in {run.duration_ms:.0f}ms"
+            )
+        else:
+            logger.error(f"Feed {source.name} failed after {run.attempts} attempt(s): {run.error}")
+
+        try:
+            await self.status_recorder(source.name, run.succeeded, int(run.duration_ms), run.error)
+        except Exception:
+            logger.exception(f"Could not record status of feed {source.name}")
+        return run
+
+    async def _fetch(self, source: SourceAdapter) -> SourceRun:
+        """One conditional fetch of a feed; publishes the changed records"""
+        state = self.states[source.name]
+        headers = {}
+        if state.etag:
+            headers["If-None-Match"] = state.etag
+        if state.last_modified:
+            headers["If-Modified-Since"] = state.last_modified
+
+        await self.pacers[source.name].wait()
+        session = await self.get_session()
+        async with self.semaphore:
+            self.stats["requests"] += 1
+            async with session.get(source.url, headers=headers) as response:
+                if response.status == 304:
+                    return SourceRun(source.name, "not_modified", http_status=304, records=len(state.records))
+                if response.status >= 400:
+                    detail = (await response.text(errors="replace"))[:200]
+                    raise ExternalAPIError(
+                        f"{source.name} feed error {response.status}: {detail}",
+                        service=source.name,
+                        context={"status_code": response.status}
+                    )
+
+                digest = hashlib.sha256()
+                bytes_read = 0
+
+                async def body():
+                    nonlocal bytes_read
+                    async for chunk in response.content.iter_chunked(self.chunk_size):
+                        digest.update(chunk)
+                        bytes_read += len(chunk)
+                        yield chunk
+
+                records: Dict[str, Dict[str, Any]] = {}
+                async for record in source.parse(body()):
+                    records[source.record_key(record)] = record
+                    if len(records) % PARSE_YIELD_RECORDS == 0:
+                        await asyncio.sleep(0)
+                etag = response.headers.get("ETag")
+                last_modified = response.headers.get("Last-Modified")
+
+        self.stats["bytes_read"] += bytes_read
+        content_hash = digest.hexdigest()
+        run = SourceRun(source.name, "unchanged", http_status=response.status, bytes_read=bytes_read, records=len(records))
+        if content_hash != state.content_hash:
+            if not records and state.records:
+                # An empty body (or an error page served as 200) must not wipe the feed
+                raise ValueError(f"no records in a {bytes_read}-byte body")
+
+            hashes, changed, removed = await asyncio.to_thread(_diff_records, records, state.record_hashes)
+            if (changed or removed) and self.repository is not None:
+                await source.publish(self.repository, list(records.values()), changed, removed)
+            if changed or removed:
+                run.status = "updated"
+            run.changed, run.removed = len(changed), len(removed)
+            state.record_hashes, state.records = hashes, records
+            state.content_hash = content_hash
+
+        state.etag, state.last_modified = etag, last_modified
+        return run
+
+
+def _record_hash(record: Dict[str, Any]) -> str:
+    return hashlib.sha256(json.dumps(record, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _diff_records(
+    records: Dict[str, Dict[str, Any]],
+    previous_hashes: Dict[str, str]
+) -> Tuple[Dict[str, str], List[Dict[str, Any]], List[str]]:
+    """Record hashes, plus the records added or changed and the keys removed since previous_hashes"""
+    hashes = {key: _record_hash(record) for key, record in records.items()}
+    changed = [records[key] for key, value in hashes.items() if previous_hashes.get(key) != value]
+    removed = [key for key in previous_hashes if key not in hashes]
+    return hashes, changed, removed
+
+
+async def record_source_status(
+    source_name: str,
+    is_success: bool,
+    response_time_ms: Optional[int] = None,
+    error: Optional[str] = None
+):
+    """Record a feed run in hk_data_source_status through the database repository"""
+    try:
+        from src.database.connection import get_sync_session
+        from src.database.repositories.hk_data_repository import HKDataRepository as DatabaseRepository
+
+        with get_sync_session() as session:
+            await DatabaseRepository(session).update_source_status(
+                source_name, is_success, response_time_ms=response_time_ms, error=error
+            )
+    except RuntimeError as e:
+        if "not initialized" not in str(e):
+            raise
+        logger.debug(f"Source status not recorded, database not initialized: {e}")
+    except SQLAlchemyError as e:
+        logger.error(f"Source status not recorded for {source_name}: {e}")
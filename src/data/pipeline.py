@@ -1,80 +1,177 @@
 """
 Data Pipeline Orchestrator for Healthcare AI V2
+Schedules the HK open-data ingestion engine and keeps its run history
 """
 
 from typing import Dict, List, Any, Optional
 from datetime import datetime
+from collections import deque
 import asyncio
 
+from src.config import settings
+from src.core.exceptions import NotFoundError
+from src.core.logging import get_logger
+from src.data.ingestion import IngestionEngine
+from src.data.sources.hk_open_data import build_default_sources
+from src.data.storage.hk_data_repository import get_hk_data_repository
+
+
+logger = get_logger(__name__)
+
+# Runs kept for get_sync_history
+SYNC_HISTORY_SIZE = 50
+
 
 class HKDataPipelineOrchestrator:
     """Orchestrator for HK data pipeline"""
-    
-    def __init__(self):
+
+    def __init__(self, engine: Optional[IngestionEngine] = None):
+        """
+        Initialize the orchestrator
+
+        Args:
+            engine: Ingestion engine (the configured feeds, publishing to the
+                HK data repository, if None)
+        """
+        self.engine = engine
         self.is_running = False
         self.last_update = None
-    
+        self.history = deque(maxlen=SYNC_HISTORY_SIZE)
+        self._sync_id = 0
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    async def get_engine(self) -> IngestionEngine:
+        if self.engine is None:
+            self.engine = IngestionEngine(build_default_sources(), repository=await get_hk_data_repository())
+        return self.engine
+
     async def start_pipeline(self) -> Dict[str, Any]:
         """Start the data pipeline"""
-        self.is_running = True
-        self.last_update = datetime.utcnow()
-        
+        if not self.is_running:
+            self.is_running = True
+            self._task = asyncio.create_task(self._run_forever())
+        started_at = datetime.utcnow()
+
         return {
             "status": "started",
             "message": "HK data pipeline started successfully",
-            "started_at": self.last_update.isoformat()
+            "started_at": started_at.isoformat(),
+            "interval_seconds": settings.hk_data_update_interval
         }
-    
+
     async def stop_pipeline(self) -> Dict[str, Any]:
         """Stop the data pipeline"""
         self.is_running = False
-        
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self.engine is not None:
+            await self.engine.close()
+
         return {
             "status": "stopped",
             "message": "HK data pipeline stopped",
             "stopped_at": datetime.utcnow().isoformat()
         }
-    
+
     async def get_pipeline_status(self) -> Dict[str, Any]:
         """Get pipeline status"""
+        engine = await self.get_engine()
         return {
             "is_running": self.is_running,
             "last_update": self.last_update.isoformat() if self.last_update else None,
-            "status": "active" if self.is_running else "inactive"
+            "status": "active" if self.is_running else "inactive",
+            "interval_seconds": settings.hk_data_update_interval,
+            "engine": engine.get_stats()
         }
-    
+
     async def run_manual_sync(self) -> Dict[str, Any]:
         """Run manual data synchronization"""
+        return await self._sync("manual_sync")
+
+    async def trigger_immediate_update(
+        self,
+        source_name: Optional[str] = None,
+        endpoint: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Run selected feeds now
+
+        Args:
+            source_name: Only feeds of this source type (a DataSourceType
+                value, e.g. "hospital_authority")
+            endpoint: Only the feed with this name (e.g. "ae_waiting_times")
+
+        Raises:
+            NotFoundError: No configured feed matches the filters
+        """
+        engine = await self.get_engine()
+        names = [
+            name for name, source in engine.sources.items()
+            if (source_name is None or source.source_type == source_name)
+            and (endpoint is None or name == endpoint)
+        ]
+        if not names:
+            raise NotFoundError(
+                "No configured HK data feed matches the request",
+                context={"source": source_name, "endpoint": endpoint}
+            )
+        return await self._sync("manual_trigger", names)
+
+    async def get_sync_history(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """Get synchronization history, newest first"""
+        return list(self.history)[-limit:][::-1]
+
+    async def _run_forever(self):
+        """Run every feed once per update interval until stopped"""
+        while self.is_running:
+            try:
+                await self._sync("auto_sync")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"HK data pipeline cycle failed: {e}")
+            await asyncio.sleep(settings.hk_data_update_interval)
+
+    async def _sync(self, sync_type: str, names: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Run the engine once and record the run in the history"""
+        started = datetime.utcnow()
         try:
-            # Simulate data sync
-            await asyncio.sleep(0.1)  # Simulate processing time
-            
-            return {
-                "success": True,
-                "message": "Manual data sync completed",
-                "synced_at": datetime.utcnow().isoformat(),
-                "records_updated": 10  # Mock data
-            }
+            engine = await self.get_engine()
+            # Overlapping runs would send duplicate requests for the same feeds
+            async with self._lock:
+                runs = await engine.run(names)
         except Exception as e:
+            logger.error(f"HK data sync failed: {e}")
             return {
                 "success": False,
                 "error": str(e),
                 "synced_at": datetime.utcnow().isoformat()
             }
-    
-    async def get_sync_history(self, limit: int = 10) -> List[Dict[str, Any]]:
-        """Get synchronization history"""
-        # Mock history data
-        return [
-            {
-                "id": 1,
-                "type": "auto_sync",
-                "status": "completed",
-                "records_updated": 8,
-                "duration_ms": 1250,
-                "timestamp": datetime.utcnow().isoformat()
-            }
-        ]
+
+        finished = datetime.utcnow()
+        self.last_update = finished
+        self._sync_id += 1
+        failed = [name for name, run in runs.items() if not run.succeeded]
+        records_updated = sum(run.changed + run.removed for run in runs.values())
+        self.history.append({
+            "id": self._sync_id,
+            "type": sync_type,
+            "status": "completed" if not failed else "completed_with_errors",
+            "records_updated": records_updated,
+            "duration_ms": int((finished - started).total_seconds() * 1000),
+            "timestamp": finished.isoformat(),
+            "sources": {name: run.status for name, run in runs.items()}
+        })
+
+        return {
+            "success": not failed,
+            "message": "Data sync completed" if not failed else f"Data sync failed for: {', '.join(failed)}",
+            "synced_at": finished.isoformat(),
+            "records_updated": records_updated,
+            "sources": {name: run.to_dict() for name, run in runs.items()}
+        }
 
 
 # Singleton instance
@@ -87,19 +184,3 @@ async def get_pipeline_orchestrator() -> HKDataPipelineOrchestrator:
     if _pipeline_orchestrator is None:
         _pipeline_orchestrator = HKDataPipelineOrchestrator()
     return _pipeline_orchestrator
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
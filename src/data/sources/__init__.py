@@ -0,0 +1 @@
+# HK open-data source adapters for Healthcare AI V2
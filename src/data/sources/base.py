@@ -0,0 +1,233 @@
+"""
+Open-data source interface for Healthcare AI V2
+Common contract for the feeds the ingestion engine fetches, plus the
+streaming JSON and CSV parsers they share
+
+Adapters describe a feed (URL, format, rate limit) and turn its raw items
+into normalized records. The engine owns HTTP, conditional requests,
+change detection and status reporting, so an adapter never touches the
+network and can be pointed at a local fixture server by passing a URL.
+"""
+
+import codecs
+import csv
+import json
+import re
+from abc import ABC, abstractmethod
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from src.core.logging import get_logger
+
+
+logger = get_logger(__name__)
+
+# Characters that can change JSON nesting; everything between them is skipped
+JSON_STRUCTURE = re.compile(r'["\[\]{}]')
+# Rest of a JSON string after its opening quote
+JSON_STRING_TAIL = re.compile(r'(?:[^"\\]|\\.)*"', re.DOTALL)
+
+
+class SourceAdapter(ABC):
+    """
+    One HK open-data feed.
+
+    Subclasses set the class attributes and implement parse_item. Records
+    must be JSON-serializable dicts; record_key identifies a record across
+    runs so the engine can tell changed and removed records apart.
+    """
+
+    name: str = "source"
+    source_type: str = "hk_government"  # DataSourceType value, matched by manual triggers
+    format: str = "json"  # "json" or "csv"
+    item_key: Optional[str] = None  # Top-level JSON key holding the item array; None for a bare array
+    key_field: str = "id"
+    requests_per_minute: int = 30
+    encoding: str = "utf-8"
+
+    def __init__(self, url: str, requests_per_minute: Optional[int] = None):
+        """
+        Initialize the adapter.
+
+        Args:
+            url: Feed URL
+            requests_per_minute: Request budget for this feed (class default if None)
+        """
+        self.url = url
+        if requests_per_minute is not None:
+            self.requests_per_minute = requests_per_minute
+
+    @abstractmethod
+    def parse_item(self, item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Normalize one raw feed item.
+
+        Returns:
+            The record, or None to drop the item
+        """
+
+    def record_key(self, record: Dict[str, Any]) -> str:
+        """Identity of a record across runs"""
+        return str(record[self.key_field])
+
+    async def parse(self, chunks: AsyncIterator[bytes]) -> AsyncIterator[Dict[str, Any]]:
+        """Stream normalized records out of the raw response body"""
+        if self.format == "csv":
+            items = iter_csv_rows(chunks, self.encoding)
+        else:
+            items = iter_json_items(chunks, self.item_key, self.encoding)
+        async for item in items:
+            if not isinstance(item, dict):
+                continue
+            record = self.parse_item(item)
+            if record is not None:
+                yield record
+
+    async def publish(
+        self,
+        repository: Any,
+        records: List[Dict[str, Any]],
+        changed: List[Dict[str, Any]],
+        removed_keys: List[str]
+    ):
+        """
+        Hand a run's outcome to the data repository.
+
+        Only called when something changed. The default keeps the full
+        current record set in the repository cache under the feed name.
+
+        Args:
+            repository: src.data.storage.hk_data_repository.HKDataRepository
+            records: Every current record of the feed
+            changed: Records added or modified by this run
+            removed_keys: record_key values no longer in the feed
+        """
+        repository.data_cache[self.name] = {"records": records, "source_url": self.url}
+
+
+async def iter_json_items(
+    chunks: AsyncIterator[bytes],
+    item_key: Optional[str] = None,
+    encoding: str = "utf-8"
+) -> AsyncIterator[Any]:
+    """
+    Yield the object elements of a JSON array as the body streams in.
+
+    The array is either the whole document or the value of the top-level
+    key item_key. Only the element being read is held in memory; other
+    top-level members are skipped.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)("replace")
+    buffer = ""
+    position = 0
+    depth = 0  # Nesting depth at position
+    array_depth = None if item_key is not None else 1  # Depth inside the target array, once found
+    item_start = None
+    in_string = False
+    string_start = 0
+    last_string = None  # Last top-level string; a key when an array follows it
+
+    async for chunk in _with_eof(chunks):
+        buffer += decoder.decode(chunk or b"", final=chunk is None)
+        while True:
+            if in_string:
+                match = JSON_STRING_TAIL.match(buffer, position)
+                if match is None:
+                    break  # String continues in the next chunk
+                position = match.end()
+                in_string = False
+                if depth == 1 and array_depth is None:
+                    last_string = json.loads(buffer[string_start:position])
+                continue
+
+            match = JSON_STRUCTURE.search(buffer, position)
+            if match is None:
+                position = len(buffer)
+                break
+            char = match.group()
+            position = match.end()
+            if char == '"':
+                in_string = True
+                string_start = position - 1
+            elif char in "[{":
+                depth += 1
+                if array_depth is None:
+                    if char == "[" and depth == 2 and last_string == item_key:
+                        array_depth = depth
+                elif depth == array_depth + 1 and item_start is None:
+                    item_start = position - 1
+            else:
+                if array_depth is not None:
+                    if depth == array_depth + 1 and item_start is not None:
+                        yield json.loads(buffer[item_start:position])
+                        item_start = None
+                    elif depth == array_depth:
+                        return
+                depth -= 1
+
+        # Drop consumed text, keeping the element or string still being read
+        keep = item_start if item_start is not None else (string_start if in_string else position)
+        if keep:
+            buffer = buffer[keep:]
+            position -= keep
+            string_start -= keep
+            if item_start is not None:
+                item_start = 0
+
+    if array_depth is None:
+        logger.warning(f"JSON feed has no top-level '{item_key}' array")
+
+
+async def iter_csv_rows(chunks: AsyncIterator[bytes], encoding: str = "utf-8") -> AsyncIterator[Dict[str, str]]:
+    """
+    Yield CSV rows as dicts keyed by the header row, as the body streams in.
+
+    Rows are handed to the csv module only once complete, so quoted fields
+    spanning lines or chunk boundaries are read correctly. A leading byte
+    order mark is dropped.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)("replace")
+    fieldnames: Optional[List[str]] = None
+    pending = ""
+    started = False
+
+    async for chunk in _with_eof(chunks):
+        pending += decoder.decode(chunk or b"", final=chunk is None)
+        if not started and pending:
+            pending = pending.lstrip("\ufeff")
+            started = True
+        if chunk is None:
+            rows, pending = [pending], ""
+        else:
+            rows, consumed = _complete_rows(pending)
+            pending = pending[consumed:]
+        for row in csv.reader(text for text in rows if text.strip()):
+            if fieldnames is None:
+                fieldnames = [name.strip() for name in row]
+                continue
+            yield dict(zip(fieldnames, (value.strip() for value in row)))
+
+
+def _complete_rows(text: str) -> Tuple[List[str], int]:
+    """Split off the CSV records of text that end outside a quoted field"""
+    rows: List[str] = []
+    start = 0
+    quotes = 0
+    line_start = 0
+    while True:
+        end = text.find("\n", line_start)
+        if end < 0:
+            return rows, start
+        quotes += text.count('"', line_start, end)
+        line_start = end + 1
+        if quotes % 2 == 0:
+            rows.append(text[start:line_start])
+            start = line_start
+            quotes = 0
+
+
+async def _with_eof(chunks: AsyncIterator[bytes]) -> AsyncIterator[Optional[bytes]]:
+    """The chunks followed by None, so parsers can flush at end of body"""
+    async for chunk in chunks:
+        if chunk:
+            yield chunk
+    yield None
@@ -0,0 +1,207 @@
+"""
+HK open-data feeds for Healthcare AI V2
+Adapters for Hospital Authority A&E waiting times, clinic listings, health
+advisories and air quality
+
+Feed URLs come from settings.hk_data_source_urls; a feed without a URL is
+not fetched. Clinic rows feed the facility indexes of the data repository
+and, once the database is initialized, the facilities table; the other feeds
+are cached on the repository under the feed name.
+"""
+
+import asyncio
+import importlib
+import re
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from src.config import settings
+from src.core.logging import get_logger
+from src.data.sources.base import SourceAdapter
+
+
+logger = get_logger(__name__)
+
+# "Over 2 hours", "Around 1 hour", "Within 15 minutes"
+WAIT_PATTERN = re.compile(r"(\d+(?:\.\d+)?)\s*(hour|hr|minute|min)", re.IGNORECASE)
+
+
+def _first(item: Dict[str, Any], *names: str) -> Optional[str]:
+    """First non-empty value among alternative column names"""
+    for name in names:
+        value = item.get(name)
+        if value not in (None, ""):
+            return value
+    return None
+
+
+def _float(value: Any) -> Optional[float]:
+    try:
+        return float(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+class AEWaitingTimesSource(SourceAdapter):
+    """Hospital Authority A&E waiting times ({"waitTime": [{"hospName", "topWait"}]})"""
+
+    name = "ae_waiting_times"
+    source_type = "hospital_authority"
+    item_key = "waitTime"
+    key_field = "hospital_name_en"
+    requests_per_minute = 4
+
+    def parse_item(self, item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        hospital = _first(item, "hospName", "hospital_name_en")
+        if not hospital:
+            return None
+        top_wait = _first(item, "topWait", "top_wait") or ""
+        match = WAIT_PATTERN.search(top_wait)
+        wait_minutes = None
+        if match:
+            amount = float(match.group(1))
+            wait_minutes = int(amount * 60 if match.group(2).lower().startswith("h") else amount)
+        return {"hospital_name_en": hospital, "top_wait": top_wait, "wait_minutes": wait_minutes}
+
+
+class ClinicListingSource(SourceAdapter):
+    """
+    Clinic listing (CSV) in the facility row layout of the facilities table.
+
+    Common alternative column names (id, name, lat, lng, ...) are accepted;
+    services are separated by semicolons.
+    """
+
+    name = "clinics"
+    source_type = "department_health"
+    format = "csv"
+    key_field = "facility_id"
+    requests_per_minute = 2
+
+    def parse_item(self, item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        facility_id = _first(item, "facility_id", "id", "code")
+        name_en = _first(item, "name_en", "name", "english_name")
+        if not facility_id or not name_en:
+            return None
+        services = _first(item, "services_offered", "services") or ""
+        return {
+            "facility_id": facility_id,
+            "name_en": name_en,
+            "name_zh_hant": _first(item, "name_zh_hant", "name_zh", "chinese_name"),
+            "facility_type": _first(item, "facility_type", "type") or "clinic",
+            "district": _first(item, "district"),
+            "address_en": _first(item, "address_en", "address"),
+            "latitude": _float(_first(item, "latitude", "lat")),
+            "longitude": _float(_first(item, "longitude", "lng", "lon")),
+            "phone_main": _first(item, "phone_main", "phone", "telephone"),
+            "services_offered": [service.strip() for service in services.split(";") if service.strip()],
+            "emergency_services": (_first(item, "emergency_services") or "").lower() in ("true", "yes", "y", "1"),
+            "operating_hours": _first(item, "operating_hours", "opening_hours"),
+            "is_active": True
+        }
+
+    async def publish(
+        self,
+        repository: Any,
+        records: List[Dict[str, Any]],
+        changed: List[Dict[str, Any]],
+        removed_keys: List[str]
+    ):
+        await super().publish(repository, records, changed, removed_keys)
+        # Build from the table first, or the first search would rebuild over these rows
+        await repository.ensure_facility_index()
+        if changed:
+            await self.store_facilities(changed)
+        await repository.publish_facility_updates(changed, removed_keys)
+
+    async def store_facilities(self, changed: List[Dict[str, Any]]):
+        """Upsert changed clinics into the facilities table, if the database is initialized"""
+        try:
+            from src.database.connection import get_async_session
+
+            async with get_async_session() as session:
+                # The database models are large; their first import runs off the event loop
+                repositories = await asyncio.to_thread(
+                    importlib.import_module, "src.database.repositories.hk_data_repository"
+                )
+                await repositories.HKDataRepository(session).bulk_upsert_facilities(changed, data_source=self.name)
+        except RuntimeError as e:
+            if "not initialized" not in str(e):
+                raise
+            logger.debug(f"Clinics not stored, database not initialized: {e}")
+        except SQLAlchemyError as e:
+            logger.error(f"Clinics not stored in the facilities table: {e}")
+
+
+class HealthAdvisorySource(SourceAdapter):
+    """Health advisories and alerts ({"advisories": [{"alert_id", "title_en", ...}]})"""
+
+    name = "health_advisories"
+    source_type = "department_health"
+    item_key = "advisories"
+    key_field = "alert_id"
+    requests_per_minute = 6
+
+    def parse_item(self, item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        alert_id = _first(item, "alert_id", "id")
+        title_en = _first(item, "title_en", "title")
+        if not alert_id or not title_en:
+            return None
+        return {
+            "alert_id": str(alert_id),
+            "alert_type": _first(item, "alert_type", "type") or "health_advisory",
+            "severity": (_first(item, "severity") or "medium").lower(),
+            "title_en": title_en,
+            "title_zh": _first(item, "title_zh", "title_zh_hant"),
+            "description_en": _first(item, "description_en", "description"),
+            "issued_at": _first(item, "issued_at", "date"),
+            "expires_at": _first(item, "expires_at"),
+            "affected_districts": item.get("affected_districts") or []
+        }
+
+
+class AirQualitySource(SourceAdapter):
+    """Air Quality Health Index by monitoring station (JSON array of stations)"""
+
+    name = "air_quality"
+    source_type = "environmental"
+    key_field = "station"
+    requests_per_minute = 6
+
+    def parse_item(self, item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        station = _first(item, "station", "StationName")
+        if not station:
+            return None
+        return {
+            "station": station,
+            "aqhi": _float(_first(item, "aqhi", "AQHI")),
+            "health_risk": _first(item, "health_risk", "HealthRisk"),
+            "recorded_at": _first(item, "recorded_at", "DateTime")
+        }
+
+
+SOURCE_ADAPTERS = {
+    adapter.name: adapter
+    for adapter in (AEWaitingTimesSource, ClinicListingSource, HealthAdvisorySource, AirQualitySource)
+}
+
+
+def build_default_sources(
+    urls: Optional[Dict[str, str]] = None,
+    rate_limits: Optional[Dict[str, int]] = None
+) -> List[SourceAdapter]:
+    """
+    Adapters for every feed that has a URL
+
+    Args:
+        urls: Feed name -> URL (settings.hk_data_source_urls by default)
+        rate_limits: Feed name -> requests per minute (settings.hk_data_source_rate_limits by default)
+    """
+    urls = urls if urls is not None else settings.hk_data_source_urls
+    rate_limits = rate_limits if rate_limits is not None else settings.hk_data_source_rate_limits
+    return [
+        adapter(urls[name], rate_limits.get(name))
+        for name, adapter in SOURCE_ADAPTERS.items()
+        if urls.get(name)
+    ]
@@ -0,0 +1,521 @@
+"""
+Facility Spatial Index for Healthcare AI V2
+In-memory nearest-facility lookup over HKHealthcareFacility coordinates
+
+Facilities are bucketed into a uniform latitude/longitude grid. A k-nearest
+query scans rings of cells outward from the query point and stops as soon as
+no unscanned cell can hold anything closer than the k-th result, so an
+emergency lookup touches a handful of cells instead of the whole table.
+Distances are great-circle (haversine) kilometres.
+
+Besides the full grid, facilities are also kept in one grid per facility
+type and one for facilities with emergency services, so filtered queries
+("nearest open A&E") only scan matching facilities.
+
+Entries are updated one row at a time (upsert/remove) when the data
+pipeline writes facility rows, so the index never needs a full rebuild
+after the initial load.
+
+Operating hours ("open now") are read from the operating_hours JSON column:
+    {"mon": "09:00-17:00", "sat": "09:00-13:00", "sun": "closed"}
+Keys are day names ("mon" or "monday"), "daily", "weekdays" or "weekends";
+values are comma-separated HH:MM-HH:MM ranges (overnight ranges wrap),
+"24 hours" or "closed". Facilities without parseable hours only count as
+open when they provide emergency services (A&E runs round the clock).
+"""
+
+import bisect
+import heapq
+import math
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from zoneinfo import ZoneInfo
+
+from src.core.logging import get_logger
+
+
+logger = get_logger(__name__)
+
+EARTH_RADIUS_KM = 6371.0088
+HK_TIMEZONE = ZoneInfo("Asia/Hong_Kong")
+
+# Grid cell size in degrees (about 1.1 km of latitude)
+DEFAULT_CELL_DEGREES = 0.01
+
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+DAY_NAMES = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+DAY_GROUPS = {"daily": range(7), "weekdays": range(5), "weekends": range(5, 7)}
+ALWAYS_OPEN = ("24 hours", "24h", "24/7", "24 hrs", "00:00-24:00")
+
+ALL_GRID = "all"
+EMERGENCY_GRID = "emergency"
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance in kilometres"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _parse_clock(value: str) -> int:
+    """Minutes since midnight for "HH:MM" (24:00 allowed)"""
+    hours, _, minutes = value.strip().partition(":")
+    total = int(hours) * 60 + int(minutes or 0)
+    if not 0 <= total <= MINUTES_PER_DAY:
+        raise ValueError(f"Invalid time: {value}")
+    return total
+
+
+def parse_operating_hours(operating_hours: Any) -> Optional[List[Tuple[int, int]]]:
+    """
+    Weekly opening intervals from an operating_hours value
+
+    Args:
+        operating_hours: operating_hours column value (see module docstring)
+
+    Returns:
+        Sorted, non-overlapping (start, end) minute-of-week intervals, or
+        None if the hours are missing or cannot be parsed
+    """
+    if not operating_hours:
+        return None
+    if isinstance(operating_hours, str):
+        operating_hours = {"daily": operating_hours}
+    if not isinstance(operating_hours, dict):
+        return None
+
+    intervals: List[Tuple[int, int]] = []
+    try:
+        for key, value in operating_hours.items():
+            key = str(key).strip().lower()
+            days = DAY_GROUPS.get(key)
+            if days is None:
+                if key[:3] not in DAY_NAMES:
+                    continue  # e.g. "public_holiday"
+                days = [DAY_NAMES.index(key[:3])]
+
+            text = str(value).strip().lower()
+            if text in ("closed", ""):
+                continue
+            if text in ALWAYS_OPEN:
+                ranges = [(0, MINUTES_PER_DAY)]
+            else:
+                ranges = []
+                for part in text.split(","):
+                    start, _, end = part.partition("-")
+                    ranges.append((_parse_clock(start), _parse_clock(end)))
+
+            for day in days:
+                offset = day * MINUTES_PER_DAY
+                for start, end in ranges:
+                    if end <= start:  # Overnight; the tail wraps into the next day
+                        end += MINUTES_PER_DAY
+                    start, end = offset + start, offset + end
+                    if end > MINUTES_PER_WEEK:
+                        intervals.append((0, end - MINUTES_PER_WEEK))
+                        end = MINUTES_PER_WEEK
+                    intervals.append((start, end))
+    except (ValueError, TypeError):
+        return None
+
+    merged: List[Tuple[int, int]] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def minute_of_week(moment: Optional[datetime] = None) -> int:
+    """Minutes since Monday 00:00 Hong Kong time"""
+    moment = moment or datetime.now(HK_TIMEZONE)
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(HK_TIMEZONE)
+    return moment.weekday() * MINUTES_PER_DAY + moment.hour * 60 + moment.minute
+
+
+def facility_record(facility: Any) -> Dict[str, Any]:
+    """Column values of an HKHealthcareFacility row as a dict"""
+    return {column.name: getattr(facility, column.name) for column in facility.__table__.columns}
+
+
+@dataclass
+class IndexedFacility:
+    """One facility as stored in the index"""
+    facility_id: str
+    latitude: float
+    longitude: float
+    facility_type: Optional[str]
+    emergency_services: bool
+    schedule: Optional[List[Tuple[int, int]]]
+    cell: Tuple[int, int]
+    record: Dict[str, Any]
+
+    def is_open(self, minute: int) -> bool:
+        """Whether the facility is open at a minute of the week"""
+        if self.schedule is None:
+            return self.emergency_services
+        position = bisect.bisect_right(self.schedule, (minute, MINUTES_PER_WEEK + 1)) - 1
+        return position >= 0 and self.schedule[position][0] <= minute < self.schedule[position][1]
+
+
+class _Grid:
+    """Facilities bucketed by grid cell"""
+
+    def __init__(self):
+        self.cells: Dict[Tuple[int, int], Dict[str, IndexedFacility]] = {}
+        self.size = 0
+        # Occupied cell bounds; they only grow, which keeps ring searches conservative
+        self.min_row = self.min_col = math.inf
+        self.max_row = self.max_col = -math.inf
+
+    def add(self, entry: IndexedFacility):
+        row, col = entry.cell
+        self.cells.setdefault(entry.cell, {})[entry.facility_id] = entry
+        self.size += 1
+        self.min_row, self.max_row = min(self.min_row, row), max(self.max_row, row)
+        self.min_col, self.max_col = min(self.min_col, col), max(self.max_col, col)
+
+    def discard(self, entry: IndexedFacility):
+        bucket = self.cells.get(entry.cell)
+        if bucket and bucket.pop(entry.facility_id, None) is not None:
+            self.size -= 1
+            if not bucket:
+                del self.cells[entry.cell]
+
+    def ring(self, center: Tuple[int, int], radius: int) -> Iterable[Dict[str, IndexedFacility]]:
+        """Occupied cells at Chebyshev distance radius from center, clipped to the bounds"""
+        row, col = center
+        if radius == 0:
+            bucket = self.cells.get(center)
+            if bucket:
+                yield bucket
+            return
+        first_col = max(col - radius, int(self.min_col))
+        last_col = min(col + radius, int(self.max_col))
+        for r in range(max(row - radius, int(self.min_row)), min(row + radius, int(self.max_row)) + 1):
+            if r in (row - radius, row + radius):
+                columns = range(first_col, last_col + 1)
+            else:
+                columns = [c for c in (col - radius, col + radius) if first_col <= c <= last_col]
+            for c in columns:
+                bucket = self.cells.get((r, c))
+                if bucket:
+                    yield bucket
+
+    def radius_range(self, center: Tuple[int, int]) -> Tuple[int, int]:
+        """First and last ring radius that can hold occupied cells"""
+        row, col = center
+        first = max(0, self.min_row - row, row - self.max_row, self.min_col - col, col - self.max_col)
+        last = max(row - self.min_row, self.max_row - row, col - self.min_col, self.max_col - col)
+        return int(first), int(last)
+
+
+class FacilityGeoIndex:
+    """
+    Grid index over facility coordinates
+
+    Answers k-nearest and within-radius queries with facility type,
+    emergency services and open-now filters; rows are added, replaced and
+    removed individually.
+    """
+
+    def __init__(self, cell_degrees: float = DEFAULT_CELL_DEGREES):
+        """
+        Initialize index
+
+        Args:
+            cell_degrees: Grid cell size in degrees of latitude and longitude
+        """
+        self.cell_degrees = cell_degrees
+        self.entries: Dict[str, IndexedFacility] = {}
+        self.grids: Dict[str, _Grid] = {ALL_GRID: _Grid()}
+        self.built_at: Optional[datetime] = None
+        # Largest |latitude| seen; bounds how narrow a cell can be in longitude
+        self._max_abs_latitude = 0.0
+        self.stats = {"builds": 0, "upserts": 0, "removals": 0, "skipped": 0, "queries": 0, "cells_scanned": 0}
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+
+    def build(self, records: Iterable[Dict[str, Any]]) -> int:
+        """
+        Replace the index contents
+
+        Args:
+            records: Facility rows as dicts (facility_record() for ORM rows)
+
+        Returns:
+            Number of facilities indexed
+        """
+        self.entries.clear()
+        self.grids = {ALL_GRID: _Grid()}
+        self._max_abs_latitude = 0.0
+        for record in records:
+            self.upsert(record)
+        self.stats["builds"] += 1
+        self.built_at = datetime.utcnow()
+        logger.info(f"Facility index built with {len(self.entries)} facilities")
+        return len(self.entries)
+
+    def upsert(self, record: Dict[str, Any]) -> bool:
+        """
+        Add or replace one facility
+
+        Inactive facilities and facilities without coordinates are removed
+        from the index instead.
+
+        Args:
+            record: Facility row as a dict; the storage mock's id/type/emergency
+                keys are accepted in place of facility_id/facility_type/emergency_services
+
+        Returns:
+            True if the facility is in the index afterwards
+        """
+        facility_id = record.get("facility_id", record.get("id"))
+        if facility_id is None:
+            self.stats["skipped"] += 1
+            return False
+        facility_id = str(facility_id)
+        self.remove(facility_id)
+
+        latitude, longitude = record.get("latitude"), record.get("longitude")
+        if latitude is None or longitude is None or record.get("is_active") is False:
+            self.stats["skipped"] += 1
+            return False
+
+        latitude, longitude = float(latitude), float(longitude)
+        entry = IndexedFacility(
+            facility_id=facility_id,
+            latitude=latitude,
+            longitude=longitude,
+            facility_type=record.get("facility_type", record.get("type")),
+            emergency_services=bool(record.get("emergency_services", record.get("emergency", False))),
+            schedule=parse_operating_hours(record.get("operating_hours")),
+            cell=self._cell(latitude, longitude),
+            record=record
+        )
+        self.entries[facility_id] = entry
+        for key in self._grid_keys(entry):
+            self.grids.setdefault(key, _Grid()).add(entry)
+        self._max_abs_latitude = max(self._max_abs_latitude, abs(latitude))
+        self.stats["upserts"] += 1
+        return True
+
+    def upsert_many(self, records: Iterable[Dict[str, Any]]) -> int:
+        """Add or replace several facilities; returns how many are indexed"""
+        return sum(1 for record in records if self.upsert(record))
+
+    def remove(self, facility_id: str) -> bool:
+        """Remove a facility; returns False if it was not indexed"""
+        entry = self.entries.pop(str(facility_id), None)
+        if entry is None:
+            return False
+        for key in self._grid_keys(entry):
+            self.grids[key].discard(entry)
+        self.stats["removals"] += 1
+        return True
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def nearest(
+        self,
+        latitude: float,
+        longitude: float,
+        k: int = 5,
+        facility_types: Optional[Iterable[str]] = None,
+        emergency_only: bool = False,
+        open_now: bool = False,
+        now: Optional[datetime] = None,
+        max_distance_km: Optional[float] = None
+    ) -> List[Tuple[float, Dict[str, Any]]]:
+        """
+        k nearest facilities to a point
+
+        Args:
+            latitude: Query latitude
+            longitude: Query longitude
+            k: Number of facilities
+            facility_types: Only these facility types
+            emergency_only: Only facilities with emergency services
+            open_now: Only facilities open at now
+            now: Time for the open-now filter (current Hong Kong time if omitted)
+            max_distance_km: Ignore facilities farther than this
+
+        Returns:
+            (distance_km, record) pairs, nearest first
+        """
+        self.stats["queries"] += 1
+        if k <= 0:
+            return []
+        grid, accept = self._plan(facility_types, emergency_only, open_now, now)
+        if grid is None or not grid.size:
+            return []
+
+        center = self._cell(latitude, longitude)
+        ring_km = self._min_cell_km(latitude)
+        radius, limit = grid.radius_range(center)
+        heap: List[Tuple[float, str, IndexedFacility]] = []  # Max-heap on distance (negated)
+        while radius <= limit:
+            for bucket in grid.ring(center, radius):
+                self.stats["cells_scanned"] += 1
+                for entry in bucket.values():
+                    if accept is not None and not accept(entry):
+                        continue
+                    distance = haversine_km(latitude, longitude, entry.latitude, entry.longitude)
+                    if max_distance_km is not None and distance > max_distance_km:
+                        continue
+                    item = (-distance, _descending(entry.facility_id), entry)
+                    if len(heap) < k:
+                        heapq.heappush(heap, item)
+                    elif item > heap[0]:
+                        heapq.heapreplace(heap, item)
+            # Cells in later rings are at least radius cell widths away
+            bound = radius * ring_km
+            if len(heap) == k and -heap[0][0] <= bound:
+                break
+            if max_distance_km is not None and bound > max_distance_km:
+                break
+            radius += 1
+
+        results = sorted((-negated, entry.facility_id, entry) for negated, _, entry in heap)
+        return [(distance, entry.record) for distance, _, entry in results]
+
+    def within_radius(
+        self,
+        latitude: float,
+        longitude: float,
+        radius_km: float,
+        facility_types: Optional[Iterable[str]] = None,
+        emergency_only: bool = False,
+        open_now: bool = False,
+        now: Optional[datetime] = None,
+        limit: Optional[int] = None
+    ) -> List[Tuple[float, Dict[str, Any]]]:
+        """
+        Facilities within a distance of a point
+
+        Args:
+            latitude: Query latitude
+            longitude: Query longitude
+            radius_km: Search radius in kilometres
+            facility_types: Only these facility types
+            emergency_only: Only facilities with emergency services
+            open_now: Only facilities open at now
+            now: Time for the open-now filter (current Hong Kong time if omitted)
+            limit: Return at most this many (nearest first)
+
+        Returns:
+            (distance_km, record) pairs, nearest first
+        """
+        self.stats["queries"] += 1
+        grid, accept = self._plan(facility_types, emergency_only, open_now, now)
+        if grid is None or not grid.size:
+            return []
+
+        lat_span = radius_km / (EARTH_RADIUS_KM * math.radians(1))
+        lon_span = lat_span / max(math.cos(math.radians(min(89.0, abs(latitude) + lat_span))), 1e-6)
+        min_row, min_col = self._cell(latitude - lat_span, longitude - lon_span)
+        max_row, max_col = self._cell(latitude + lat_span, longitude + lon_span)
+
+        results = []
+        for row in range(max(min_row, int(grid.min_row)), min(max_row, int(grid.max_row)) + 1):
+            for col in range(max(min_col, int(grid.min_col)), min(max_col, int(grid.max_col)) + 1):
+                bucket = grid.cells.get((row, col))
+                if not bucket:
+                    continue
+                self.stats["cells_scanned"] += 1
+                for entry in bucket.values():
+                    if accept is not None and not accept(entry):
+                        continue
+                    distance = haversine_km(latitude, longitude, entry.latitude, entry.longitude)
+                    if distance <= radius_km:
+                        results.append((distance, entry.facility_id, entry))
+
+        results.sort()
+        if limit is not None:
+            results = results[:limit]
+        return [(distance, entry.record) for distance, _, entry in results]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Index size and query counters"""
+        return {
+            **self.stats,
+            "facilities": len(self.entries),
+            "occupied_cells": len(self.grids[ALL_GRID].cells),
+            "cell_degrees": self.cell_degrees,
+            "built_at": self.built_at.isoformat() if self.built_at else None
+        }
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _cell(self, latitude: float, longitude: float) -> Tuple[int, int]:
+        return (math.floor(latitude / self.cell_degrees), math.floor(longitude / self.cell_degrees))
+
+    def _grid_keys(self, entry: IndexedFacility) -> List[str]:
+        keys = [ALL_GRID]
+        if entry.facility_type:
+            keys.append(f"type:{entry.facility_type}")
+        if entry.emergency_services:
+            keys.append(EMERGENCY_GRID)
+        return keys
+
+    def _min_cell_km(self, latitude: float) -> float:
+        """Lower bound on a cell's width in either direction around a query"""
+        lat_km = EARTH_RADIUS_KM * math.radians(self.cell_degrees)
+        widest = max(self._max_abs_latitude, abs(latitude)) + self.cell_degrees
+        # Slightly under the chord-free width so haversine rounding never ends a search early
+        return 0.999 * lat_km * math.cos(math.radians(min(89.0, widest)))
+
+    def _plan(
+        self,
+        facility_types: Optional[Iterable[str]],
+        emergency_only: bool,
+        open_now: bool,
+        now: Optional[datetime]
+    ):
+        """Pick the smallest grid covering the filters, plus a check for the rest"""
+        types: Optional[Set[str]] = set(facility_types) if facility_types else None
+        if emergency_only:
+            grid = self.grids.get(EMERGENCY_GRID)
+        elif types and len(types) == 1:
+            grid = self.grids.get(f"type:{next(iter(types))}")
+            types = None
+        else:
+            grid = self.grids[ALL_GRID]
+
+        minute = minute_of_week(now) if open_now else None
+        if types is None and minute is None:
+            return grid, None
+
+        def accept(entry: IndexedFacility) -> bool:
+            if types is not None and entry.facility_type not in types:
+                return False
+            return minute is None or entry.is_open(minute)
+
+        return grid, accept
+
+
+class _descending(str):
+    """Reverses string order so equal-distance ties keep the smallest facility_id"""
+
+    def __lt__(self, other):
+        return str.__gt__(self, other)
+
+    def __gt__(self, other):
+        return str.__lt__(self, other)
+
+
+# Global index instance
+facility_index = FacilityGeoIndex()
@@ -0,0 +1,387 @@
+"""
+Facility Search Index for Healthcare AI V2
+Bilingual in-memory inverted index for facility search
+
+Text is indexed as English word tokens and Chinese character unigrams and
+bigrams, so "queen mary", "hosp" and "瑪麗醫院" all resolve through posting
+lists instead of substring tests over the whole catalogue:
+- English query words match indexed words by prefix (a range in the sorted
+  vocabulary)
+- Chinese query runs need all their bigrams, then the run itself is
+  confirmed in the candidate's Chinese text
+- Filters (facility type, district, services, emergency services) are
+  posting sets as well, intersected smallest first
+
+Work per query is proportional to the postings touched and the matches
+ranked, not to the number of facilities. Matches are ranked by where the
+query terms hit (names before district before services), exact words
+before prefixes, then by name.
+"""
+
+import bisect
+import heapq
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from src.core.logging import get_logger
+
+
+logger = get_logger(__name__)
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+CJK_PATTERN = re.compile(r"[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+")
+
+# Ranking weight of a term hit per field
+FIELD_WEIGHTS = {"name": 3.0, "district": 2.0, "service": 1.0}
+# A prefix hit ("hosp" for "hospital") counts for less than a whole word
+PREFIX_FACTOR = 0.6
+
+NAME_KEYS = ("name_en", "name_zh", "name_zh_hant", "name_zh_hans")
+
+
+def _first(record: Dict[str, Any], *keys: str) -> Any:
+    """First present value among alternative column names"""
+    for key in keys:
+        value = record.get(key)
+        if value is not None:
+            return value
+    return None
+
+
+def word_tokens(text: str) -> List[str]:
+    """Lowercased English/number word tokens"""
+    return WORD_PATTERN.findall(text.lower())
+
+
+def cjk_terms(text: str) -> Set[str]:
+    """Chinese character unigrams and bigrams"""
+    terms: Set[str] = set()
+    for run in CJK_PATTERN.findall(text):
+        terms.update(run)
+        terms.update(run[i:i + 2] for i in range(len(run) - 1))
+    return terms
+
+
+@dataclass
+class _Document:
+    """Indexed state of one facility, kept so it can be removed again"""
+    doc_id: int
+    facility_id: str
+    sort_key: Tuple[str, str]
+    terms: Dict[str, float]
+    cjk_text: str
+    filters: List[str]
+    record: Dict[str, Any]
+
+
+class FacilitySearchIndex:
+    """
+    Inverted index over facility names, districts and services
+
+    Rows are added, replaced and removed individually, so pipeline updates
+    never require a rebuild.
+    """
+
+    def __init__(self):
+        self.documents: Dict[int, _Document] = {}
+        self.by_facility_id: Dict[str, int] = {}
+        self.postings: Dict[str, Dict[int, float]] = {}  # term -> doc_id -> field weight
+        self.filter_postings: Dict[str, Set[int]] = {}
+        self._next_id = 0
+        self._vocabulary: List[str] = []  # Sorted English words, rebuilt lazily
+        self._vocabulary_dirty = False
+        self._ordered: Optional[List[int]] = None  # Doc ids by name, rebuilt lazily
+        self.stats = {"builds": 0, "upserts": 0, "removals": 0, "queries": 0, "postings_scanned": 0}
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+
+    def build(self, records: Iterable[Dict[str, Any]]) -> int:
+        """Replace the index contents; returns the number of facilities indexed"""
+        self.documents.clear()
+        self.by_facility_id.clear()
+        self.postings.clear()
+        self.filter_postings.clear()
+        self._vocabulary_dirty = True
+        self._ordered = None
+        for record in records:
+            self.upsert(record)
+        self._ordered = sorted(self.documents, key=lambda doc_id: self.documents[doc_id].sort_key)
+        self.stats["builds"] += 1
+        logger.info(f"Facility search index built with {len(self.documents)} facilities")
+        return len(self.documents)
+
+    def upsert(self, record: Dict[str, Any]) -> bool:
+        """
+        Add or replace one facility (inactive facilities are removed)
+
+        Args:
+            record: Facility row as a dict; table columns (facility_id,
+                facility_type, emergency_services, services_offered) and the
+                storage mock's keys (id, type, emergency, services) are both accepted
+
+        Returns:
+            True if the facility is in the index afterwards
+        """
+        facility_id = _first(record, "facility_id", "id")
+        if facility_id is None:
+            return False
+        facility_id = str(facility_id)
+        self.remove(facility_id)
+        if record.get("is_active") is False:
+            return False
+
+        terms: Dict[str, float] = {}
+        cjk_parts: List[str] = []
+
+        def add_text(text: Optional[str], weight: float):
+            if not text:
+                return
+            for term in word_tokens(text):
+                terms[f"w:{term}"] = max(terms.get(f"w:{term}", 0.0), weight)
+            for term in cjk_terms(text):
+                terms[f"c:{term}"] = max(terms.get(f"c:{term}", 0.0), weight)
+            cjk_parts.append(text)
+
+        for key in NAME_KEYS:
+            add_text(record.get(key), FIELD_WEIGHTS["name"])
+        district = record.get("district")
+        add_text(district, FIELD_WEIGHTS["district"])
+        services = _first(record, "services", "services_offered") or []
+        for service in services:
+            add_text(service, FIELD_WEIGHTS["service"])
+
+        filters = []
+        facility_type = _first(record, "facility_type", "type")
+        if facility_type:
+            filters.append(f"type:{facility_type}")
+        if district:
+            filters.append(f"district:{district.lower()}")
+        filters.extend(f"service:{service.lower()}" for service in services)
+        if _first(record, "emergency_services", "emergency", "has_emergency_services"):
+            filters.append("emergency")
+
+        doc_id = self._next_id
+        self._next_id += 1
+        name = str(record.get("name_en") or _first(record, *NAME_KEYS) or "")
+        document = _Document(
+            doc_id=doc_id,
+            facility_id=facility_id,
+            sort_key=(name.lower(), facility_id),
+            terms=terms,
+            cjk_text="\n".join(cjk_parts),
+            filters=filters,
+            record=record
+        )
+        self.documents[doc_id] = document
+        self.by_facility_id[facility_id] = doc_id
+        for term, weight in terms.items():
+            posting = self.postings.setdefault(term, {})
+            if term.startswith("w:") and not posting:
+                self._vocabulary_dirty = True
+            posting[doc_id] = weight
+        for key in filters:
+            self.filter_postings.setdefault(key, set()).add(doc_id)
+        self._ordered = None
+        self.stats["upserts"] += 1
+        return True
+
+    def upsert_many(self, records: Iterable[Dict[str, Any]]) -> int:
+        """Add or replace several facilities; returns how many are indexed"""
+        return sum(1 for record in records if self.upsert(record))
+
+    def remove(self, facility_id: str) -> bool:
+        """Remove a facility; returns False if it was not indexed"""
+        doc_id = self.by_facility_id.pop(str(facility_id), None)
+        if doc_id is None:
+            return False
+        document = self.documents.pop(doc_id)
+        for term in document.terms:
+            posting = self.postings[term]
+            del posting[doc_id]
+            if not posting:
+                del self.postings[term]
+                self._vocabulary_dirty = self._vocabulary_dirty or term.startswith("w:")
+        for key in document.filters:
+            posting = self.filter_postings[key]
+            posting.discard(doc_id)
+            if not posting:
+                del self.filter_postings[key]
+        self._ordered = None
+        self.stats["removals"] += 1
+        return True
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def search(
+        self,
+        query: Optional[str] = None,
+        facility_type: Optional[str] = None,
+        district: Optional[str] = None,
+        services: Optional[Iterable[str]] = None,
+        has_emergency: Optional[bool] = None,
+        limit: int = 50
+    ) -> List[Dict[str, Any]]:
+        """
+        Ranked facility search
+
+        Args:
+            query: Free text in English and/or Chinese; every word must match
+            facility_type: Only this facility type
+            district: Only this district (case-insensitive)
+            services: Facilities must offer all of these services
+            has_emergency: True for emergency services only, False to exclude them
+            limit: Maximum number of results
+
+        Returns:
+            Facility records, best match first
+        """
+        self.stats["queries"] += 1
+        if limit <= 0:
+            return []
+
+        required = []
+        if facility_type:
+            required.append(f"type:{facility_type}")
+        if district:
+            required.append(f"district:{district.lower()}")
+        required.extend(f"service:{service.lower()}" for service in services or [])
+        if has_emergency:
+            required.append("emergency")
+
+        allowed: Optional[Set[int]] = None
+        if required:
+            sets = [self.filter_postings.get(key, set()) for key in required]
+            sets.sort(key=len)
+            allowed = set(sets[0])
+            for other in sets[1:]:
+                if not allowed:
+                    break
+                allowed &= other
+            self.stats["postings_scanned"] += len(sets[0])
+        excluded = self.filter_postings.get("emergency", set()) if has_emergency is False else None
+
+        words = word_tokens(query or "")
+        runs = CJK_PATTERN.findall(query or "")
+        if not words and not runs:
+            return self._browse(allowed, excluded, limit)
+
+        scores = self._match(words, runs, allowed, excluded)
+        best = heapq.nsmallest(limit, scores.items(), key=lambda item: (-item[1], self.documents[item[0]].sort_key))
+        return [self.documents[doc_id].record for doc_id, _ in best]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Index size and query counters"""
+        return {
+            **self.stats,
+            "facilities": len(self.documents),
+            "terms": len(self.postings),
+            "filter_keys": len(self.filter_postings)
+        }
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _match(
+        self,
+        words: List[str],
+        runs: List[str],
+        allowed: Optional[Set[int]],
+        excluded: Optional[Set[int]]
+    ) -> Dict[int, float]:
+        """Score every document matching all query terms"""
+        terms = [self._word_term(word) for word in words] + [self._run_term(run) for run in runs]
+
+        # The rarest term (or the filter set, if smaller) supplies the candidates;
+        # every other term is probed per candidate instead of being materialized
+        driver = min(terms, key=lambda term: term[2])
+        if allowed is not None and len(allowed) <= driver[2]:
+            candidates: Iterable[int] = allowed
+        elif driver[0] == "run":
+            candidates = min(driver[1], key=len)
+        else:
+            candidates = set().union(*(posting for posting, _ in driver[1]))
+        self.stats["postings_scanned"] += len(candidates)
+
+        results: Dict[int, float] = {}
+        for doc_id in candidates:
+            if allowed is not None and doc_id not in allowed:
+                continue
+            if excluded is not None and doc_id in excluded:
+                continue
+            total = 0.0
+            for term in terms:
+                score = self._term_score(term, doc_id)
+                if score is None:
+                    break
+                total += score
+            else:
+                results[doc_id] = total
+        return results
+
+    def _word_term(self, word: str) -> Tuple[str, List[Tuple[Dict[int, float], float]], int]:
+        """Postings of the indexed words an English query word is a prefix of"""
+        if self._vocabulary_dirty:
+            self._vocabulary = sorted(term[2:] for term in self.postings if term.startswith("w:"))
+            self._vocabulary_dirty = False
+        postings = []
+        for position in range(bisect.bisect_left(self._vocabulary, word), len(self._vocabulary)):
+            candidate = self._vocabulary[position]
+            if not candidate.startswith(word):
+                break
+            postings.append((self.postings[f"w:{candidate}"], 1.0 if candidate == word else PREFIX_FACTOR))
+        return ("word", postings, sum(len(posting) for posting, _ in postings))
+
+    def _run_term(self, run: str) -> Tuple[str, List[Dict[int, float]], int, str]:
+        """Unigram or bigram postings of a Chinese query run"""
+        keys = [f"c:{run}"] if len(run) == 1 else [f"c:{run[i:i + 2]}" for i in range(len(run) - 1)]
+        postings = [self.postings.get(key, {}) for key in keys]
+        return ("run", postings, min(len(posting) for posting in postings), run)
+
+    def _term_score(self, term: Tuple, doc_id: int) -> Optional[float]:
+        """Score of one query term in a document, or None if it does not match"""
+        if term[0] == "word":
+            best = None
+            for posting, factor in term[1]:
+                weight = posting.get(doc_id)
+                if weight is not None and (best is None or weight * factor > best):
+                    best = weight * factor
+            return best
+
+        weights = []
+        for posting in term[1]:
+            weight = posting.get(doc_id)
+            if weight is None:
+                return None
+            weights.append(weight)
+        # Bigrams alone do not fix their order for runs of three or more characters
+        if len(term[3]) > 2 and term[3] not in self.documents[doc_id].cjk_text:
+            return None
+        return min(weights)
+
+    def _browse(self, allowed: Optional[Set[int]], excluded: Optional[Set[int]], limit: int) -> List[Dict[str, Any]]:
+        """Filter-only listing, by name"""
+        if allowed is not None:
+            doc_ids = [doc_id for doc_id in allowed if excluded is None or doc_id not in excluded]
+            doc_ids = heapq.nsmallest(limit, doc_ids, key=lambda doc_id: self.documents[doc_id].sort_key)
+            return [self.documents[doc_id].record for doc_id in doc_ids]
+
+        if self._ordered is None:
+            self._ordered = sorted(self.documents, key=lambda doc_id: self.documents[doc_id].sort_key)
+        results = []
+        for doc_id in self._ordered:
+            if excluded is not None and doc_id in excluded:
+                continue
+            results.append(self.documents[doc_id].record)
+            if len(results) == limit:
+                break
+        return results
+
+
+# Global index instance
+facility_search_index = FacilitySearchIndex()
@@ -2,15 +2,44 @@
 Hong Kong Data Repository for Healthcare AI V2
 """
 
-from typing import Dict, List, Any, Optional
+import asyncio
+import importlib
+from typing import Dict, Iterable, List, Any, Optional
 from datetime import datetime
 
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+
+from src.core.logging import get_logger
+from src.data.storage.facility_index import FacilityGeoIndex, facility_index, facility_record
+from src.data.storage.facility_search import FacilitySearchIndex, facility_search_index
+
+
+logger = get_logger(__name__)
+
+# Facility rows applied to the indexes per event-loop turn by publish_facility_updates
+FACILITY_UPDATE_BATCH = 100
+
+
+def _import_database_modules():
+    """The database connection and models modules"""
+    return (
+        importlib.import_module("src.database.connection"),
+        importlib.import_module("src.database.models_comprehensive")
+    )
+
 
 class HKDataRepository:
     """Repository for Hong Kong healthcare data"""
     
-    def __init__(self):
+    def __init__(
+        self,
+        index: Optional[FacilityGeoIndex] = None,
+        search_index: Optional[FacilitySearchIndex] = None
+    ):
         self.data_cache = {}
+        self.facility_index = index or facility_index
+        self.search_index = search_index or facility_search_index
     
     async def get_all_facilities(self) -> List[Dict[str, Any]]:
         """Get all healthcare facilities"""
@@ -25,7 +54,9 @@ class HKDataRepository:
                 "address": "102 Pokfulam Road, Hong Kong",
                 "phone": "2255 3838",
                 "emergency": True,
-                "waiting_time": "2-3 hours"
+                "waiting_time": "2-3 hours",
+                "latitude": 22.2700,
+                "longitude": 114.1310
             },
             {
                 "id": 2,
@@ -36,7 +67,9 @@ class HKDataRepository:
                 "address": "30-32 Ngan Shing Street, Sha Tin, NT",
                 "phone": "2632 2211",
                 "emergency": True,
-                "waiting_time": "1-2 hours"
+                "waiting_time": "1-2 hours",
+                "latitude": 22.3799,
+                "longitude": 114.2017
             }
         ]
     
@@ -48,13 +81,141 @@ class HKDataRepository:
     async def get_nearest_facilities(
         self, 
         district: Optional[str] = None,
-        limit: int = 5
+        limit: int = 5,
+        latitude: Optional[float] = None,
+        longitude: Optional[float] = None,
+        facility_type: Optional[str] = None,
+        emergency_only: bool = False,
+        open_now: bool = False,
+        max_distance_km: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Get nearest facilities
+        
+        With coordinates, facilities are ranked by distance through the
+        spatial index and carry a distance_km key; otherwise the first
+        facilities of the district are returned.
+        
+        Args:
+            district: District filter when no coordinates are given
+            limit: Maximum number of facilities
+            latitude: Query point latitude
+            longitude: Query point longitude
+            facility_type: Only this facility type
+            emergency_only: Only facilities with emergency services
+            open_now: Only facilities open now (Hong Kong time)
+            max_distance_km: Ignore facilities farther than this
+        """
+        if latitude is None or longitude is None:
+            facilities = await self.get_all_facilities()
+            if district:
+                facilities = [f for f in facilities if f.get("district") == district]
+            return facilities[:limit]
+            
+        await self.ensure_facility_index()
+        results = self.facility_index.nearest(
+            latitude, longitude, k=limit,
+            facility_types=[facility_type] if facility_type else None,
+            emergency_only=emergency_only,
+            open_now=open_now,
+            max_distance_km=max_distance_km
+        )
+        return [{**record, "distance_km": round(distance, 3)} for distance, record in results]
+    
+    async def get_facilities_within_radius(
+        self,
+        latitude: float,
+        longitude: float,
+        radius_km: float,
+        facility_type: Optional[str] = None,
+        emergency_only: bool = False,
+        open_now: bool = False,
+        limit: Optional[int] = None
     ) -> List[Dict[str, Any]]:
-        """Get nearest facilities"""
-        facilities = await self.get_all_facilities()
-        if district:
-            facilities = [f for f in facilities if f.get("district") == district]
-        return facilities[:limit]
+        """Get facilities within radius_km of a point, nearest first, with distance_km"""
+        await self.ensure_facility_index()
+        results = self.facility_index.within_radius(
+            latitude, longitude, radius_km,
+            facility_types=[facility_type] if facility_type else None,
+            emergency_only=emergency_only,
+            open_now=open_now,
+            limit=limit
+        )
+        return [{**record, "distance_km": round(distance, 3)} for distance, record in results]
+    
+    async def ensure_facility_index(self) -> None:
+        """Build the facility indexes on first use"""
+        if self.facility_index.built_at is None:
+            await self.load_facility_index()
+    
+    async def load_facility_index(self) -> int:
+        """
+        (Re)build the spatial and search indexes from the facilities table
+        
+        Falls back to the bundled facility list when the database is not
+        initialized or the query fails.
+        
+        Returns:
+            Number of facilities indexed
+        """
+        try:
+            # The database modules are large; their first import runs off the event loop
+            connection, models = await asyncio.to_thread(_import_database_modules)
+            HKHealthcareFacility = models.HKHealthcareFacility
+            
+            async with connection.get_async_session() as session:
+                result = await session.execute(
+                    select(HKHealthcareFacility).where(HKHealthcareFacility.is_active == True)
+                )
+                records = [facility_record(row) for row in result.scalars()]
+        except (RuntimeError, SQLAlchemyError) as e:
+            logger.warning(f"Facility table unavailable, indexing bundled facilities: {e}")
+            records = await self.get_all_facilities()
+            
+        self.search_index.build(records)
+        return self.facility_index.build(records)
+    
+    def apply_facility_updates(
+        self,
+        records: Iterable[Dict[str, Any]] = (),
+        removed_ids: Iterable[str] = ()
+    ) -> Dict[str, int]:
+        """
+        Apply changed facility rows to the indexes without a rebuild
+        
+        Args:
+            records: Inserted or updated facility rows as dicts
+            removed_ids: facility_id values of deleted facilities
+        """
+        records = list(records)
+        removed_ids = list(removed_ids)
+        self.search_index.upsert_many(records)
+        for facility_id in removed_ids:
+            self.search_index.remove(facility_id)
+        indexed = self.facility_index.upsert_many(records)
+        removed = sum(1 for facility_id in removed_ids if self.facility_index.remove(facility_id))
+        return {"indexed": indexed, "removed": removed}
+    
+    async def publish_facility_updates(
+        self,
+        records: Iterable[Dict[str, Any]] = (),
+        removed_ids: Iterable[str] = ()
+    ) -> Dict[str, int]:
+        """
+        apply_facility_updates in batches of FACILITY_UPDATE_BATCH rows,
+        yielding to the event loop between batches so a large feed update
+        does not stall requests
+        
+        The indexes are read by request handlers on the event loop, so they
+        are updated there rather than in a worker thread.
+        """
+        records = list(records)
+        totals = self.apply_facility_updates(records[:FACILITY_UPDATE_BATCH], removed_ids)
+        for start in range(FACILITY_UPDATE_BATCH, len(records), FACILITY_UPDATE_BATCH):
+            await asyncio.sleep(0)
+            counts = self.apply_facility_updates(records[start:start + FACILITY_UPDATE_BATCH])
+            totals["indexed"] += counts["indexed"]
+        return totals
     
     async def get_emergency_data(self) -> Dict[str, Any]:
         """Get emergency healthcare data"""
@@ -65,17 +226,35 @@ class HKDataRepository:
             "hospitals_with_ae": await self.get_facilities_by_type("public_hospital")
         }
     
-    async def search_facilities(self, query: str) -> List[Dict[str, Any]]:
-        """Search facilities by name or location"""
-        facilities = await self.get_all_facilities()
-        query_lower = query.lower()
+    async def search_facilities(
+        self,
+        query: Optional[str] = None,
+        facility_type: Optional[str] = None,
+        district: Optional[str] = None,
+        services: Optional[List[str]] = None,
+        has_emergency: Optional[bool] = None,
+        limit: int = 50
+    ) -> List[Dict[str, Any]]:
+        """
+        Search facilities by name, district or service, best match first
         
-        return [
-            f for f in facilities 
-            if query_lower in f.get("name_en", "").lower() 
-            or query_lower in f.get("name_zh", "")
-            or query_lower in f.get("district", "").lower()
-        ]
+        Args:
+            query: English and/or Chinese text; every word must match
+            facility_type: Only this facility type
+            district: Only this district
+            services: Facilities must offer all of these services
+            has_emergency: True for emergency services only, False to exclude them
+            limit: Maximum number of results
+        """
+        await self.ensure_facility_index()
+        return self.search_index.search(
+            query=query,
+            facility_type=facility_type,
+            district=district,
+            services=services,
+            has_emergency=has_emergency,
+            limit=limit
+        )
 
 
 # Singleton instance
@@ -4,13 +4,16 @@ Hong Kong Healthcare Data Repository
 Database operations for real-time HK government data
 """
 
+import hashlib
 import json
 import logging
 from datetime import datetime, timezone, timedelta
-from typing import Dict, List, Optional, Any, Tuple
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Any, Tuple
 from sqlalchemy.orm import Session
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import and_, or_, desc, func, text, select
+from sqlalchemy import Numeric, and_, or_, desc, func, insert, text, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.exc import SQLAlchemyError
 
 from ..models_hk_data import (
@@ -18,6 +21,22 @@ from ..models_hk_data import (
     HKDataSnapshot, HKDataSourceStatus, HKDataRecord, HKDataSummary,
     UpdateType, DataSourceType
 )
+from src.data.storage.facility_index import facility_index, facility_record
+from src.data.storage.facility_search import facility_search_index
+
+
+# Facility columns the repository maintains itself; never compared or taken from input
+FACILITY_BOOKKEEPING_COLUMNS = {"id", "created_at", "updated_at", "updated_by", "last_data_update"}
+
+# Update type of the change rows emitted for a facility field (UpdateType.STATUS otherwise)
+FIELD_UPDATE_TYPES = {
+    "waiting_time_info": UpdateType.WAITING_TIME,
+    "capacity_info": UpdateType.CAPACITY,
+    "services_offered": UpdateType.SERVICES,
+    "specialties": UpdateType.SERVICES,
+    "emergency_services": UpdateType.EMERGENCY,
+    "a_e_services": UpdateType.EMERGENCY,
+}
 
 
 class HKDataRepository:
@@ -59,6 +78,11 @@ class HKDataRepository:
                 await self.db.commit()
             else:
                 self.db.commit()
+                
+            # Keep the nearest-facility and search indexes in step with the table
+            record = facility_record(facility)
+            facility_index.upsert(record)
+            facility_search_index.upsert(record)
             return facility
             
         except SQLAlchemyError as e:
@@ -69,6 +93,149 @@ class HKDataRepository:
             self.logger.error(f"Error creating/updating facility {facility_id}: {e}")
             raise
     
+    async def bulk_upsert_facilities(
+        self,
+        facilities: Iterable[Dict[str, Any]],
+        data_source: str,
+        source_timestamp: Optional[datetime] = None,
+        batch_size: int = 500
+    ) -> Dict[str, int]:
+        """
+        Insert or update many facilities with batched INSERT ... ON CONFLICT
+        
+        Each batch reads the stored rows once, skips facilities whose content
+        hash is unchanged, upserts the rest (one statement per distinct set of
+        columns, usually one) and writes an HKHealthcareUpdate row per changed
+        field, all in one transaction. A new facility gets a single change row
+        holding the whole record.
+        
+        Args:
+            facilities: Facility rows keyed by column name; facility_id is required
+                and unknown keys are ignored. Columns left out keep their stored value
+            data_source: Source name recorded on the change rows
+            source_timestamp: When the source produced the data
+            batch_size: Facilities per transaction
+        
+        Returns:
+            Counts of inserted, updated and unchanged facilities and of change rows
+        """
+        table = HKHealthcareFacility.__table__
+        writable = {column.name for column in table.columns} - FACILITY_BOOKKEEPING_COLUMNS
+        rows: Dict[str, Dict[str, Any]] = {}
+        for facility in facilities:
+            row = {key: value for key, value in facility.items() if key in writable}
+            if row.get("facility_id"):
+                row["facility_id"] = str(row["facility_id"])
+                rows[row["facility_id"]] = row  # The last row for an id wins
+        
+        counts = {"inserted": 0, "updated": 0, "unchanged": 0, "changes": 0}
+        pending = list(rows.values())
+        for start in range(0, len(pending), batch_size):
+            try:
+                batch_counts, written = await self._upsert_facility_batch(
+                    pending[start:start + batch_size], data_source, source_timestamp
+                )
+                await self._commit()
+            except SQLAlchemyError as e:
+                await self._rollback()
+                self.logger.error(f"Error bulk upserting facilities from {data_source}: {e}")
+                raise
+            for key, value in batch_counts.items():
+                counts[key] += value
+            # Keep the nearest-facility and search indexes in step with the table
+            facility_index.upsert_many(written)
+            facility_search_index.upsert_many(written)
+        
+        self.logger.info(
+            f"Bulk upserted facilities from {data_source}: {counts['inserted']} inserted, "
+            f"{counts['updated']} updated, {counts['unchanged']} unchanged, {counts['changes']} change rows"
+        )
+        return counts
+    
+    async def _upsert_facility_batch(
+        self,
+        batch: List[Dict[str, Any]],
+        data_source: str,
+        source_timestamp: Optional[datetime]
+    ) -> Tuple[Dict[str, int], List[Dict[str, Any]]]:
+        """Upsert one batch and stage its change rows; the caller commits"""
+        table = HKHealthcareFacility.__table__
+        counts = {"inserted": 0, "updated": 0, "unchanged": 0, "changes": 0}
+        result = await self._execute(
+            select(table).where(table.c.facility_id.in_([row["facility_id"] for row in batch]))
+        )
+        stored = {row["facility_id"]: dict(row) for row in result.mappings()}
+        
+        changed: List[Dict[str, Any]] = []
+        diffs: Dict[str, Optional[List[Tuple[str, Any, Any]]]] = {}
+        for row in batch:
+            existing = stored.get(row["facility_id"])
+            if existing is None:
+                diffs[row["facility_id"]] = None
+            elif _content_hash(table, row, row) == _content_hash(table, existing, row):
+                counts["unchanged"] += 1
+                continue
+            else:
+                diffs[row["facility_id"]] = [
+                    (name, existing.get(name), value) for name, value in row.items()
+                    if _comparable(table.c[name], existing.get(name)) != _comparable(table.c[name], value)
+                ]
+            changed.append(row)
+        if not changed:
+            return counts, []
+        
+        # PostgreSQL checks NOT NULL on the proposed row before resolving the conflict,
+        # so a partial row of a stored facility takes the stored values of the columns it leaves out.
+        # Multi-row VALUES need the same keys in every row, so group rows by column set
+        now = datetime.now(timezone.utc)
+        groups: Dict[frozenset, List[Dict[str, Any]]] = {}
+        for row in changed:
+            existing = stored.get(row["facility_id"], {})
+            row = {
+                **{name: value for name, value in existing.items() if name not in FACILITY_BOOKKEEPING_COLUMNS},
+                **row
+            }
+            groups.setdefault(frozenset(row), []).append(row)
+        ids: Dict[str, int] = {}
+        for columns, group in groups.items():
+            statement = pg_insert(table).values([{**row, "updated_at": now, "last_data_update": now} for row in group])
+            statement = statement.on_conflict_do_update(
+                index_elements=[table.c.facility_id],
+                set_={
+                    name: statement.excluded[name]
+                    for name in (columns | {"updated_at", "last_data_update"}) - {"facility_id"}
+                }
+            ).returning(table.c.id, table.c.facility_id)
+            result = await self._execute(statement)
+            ids.update({facility_id: row_id for row_id, facility_id in result.all()})
+        
+        change_rows = []
+        for row in changed:
+            facility_id = row["facility_id"]
+            diff = diffs[facility_id]
+            if diff is None:
+                counts["inserted"] += 1
+                diff = [("facility", None, row)]
+            else:
+                counts["updated"] += 1
+            for field_name, old_value, new_value in diff:
+                change_rows.append({
+                    "facility_id": ids[facility_id],
+                    "update_type": FIELD_UPDATE_TYPES.get(field_name, UpdateType.STATUS).value,
+                    "field_name": field_name,
+                    "old_value": _serialize_value(old_value),
+                    "new_value": _serialize_value(new_value),
+                    "value_type": _value_type(new_value if new_value is not None else old_value),
+                    "data_source": data_source,
+                    "source_timestamp": source_timestamp,
+                    "created_at": now
+                })
+        await self._execute(insert(HKHealthcareUpdate.__table__), change_rows)
+        counts["changes"] = len(change_rows)
+        
+        written = [{**stored.get(row["facility_id"], {}), **row, "id": ids[row["facility_id"]]} for row in changed]
+        return counts, written
+    
     def get_facility_by_id(self, facility_id: str) -> Optional[HKHealthcareFacility]:
         """Get facility by ID"""
         return self.db.query(HKHealthcareFacility).filter(
@@ -135,6 +302,56 @@ class HKDataRepository:
             self.logger.error(f"Error storing data update: {e}")
             raise
     
+    async def store_data_updates(self, updates: Iterable[HKDataRecord], batch_size: int = 500) -> int:
+        """
+        Store many real-time data updates with one INSERT and commit per batch
+        
+        Args:
+            updates: Updates to store
+            batch_size: Updates per transaction
+        
+        Returns:
+            Number of updates stored
+        """
+        table = HKHealthcareFacility.__table__
+        updates = list(updates)
+        stored = 0
+        for start in range(0, len(updates), batch_size):
+            batch = updates[start:start + batch_size]
+            try:
+                codes = {update.facility_id for update in batch if update.facility_id}
+                ids = {}
+                if codes:
+                    result = await self._execute(
+                        select(table.c.facility_id, table.c.id).where(table.c.facility_id.in_(codes))
+                    )
+                    ids = dict(result.all())
+                
+                now = datetime.now(timezone.utc)
+                await self._execute(insert(HKHealthcareUpdate.__table__), [
+                    {
+                        "facility_id": ids.get(update.facility_id),
+                        "update_type": update.update_type,
+                        "field_name": update.source_name,
+                        "new_value": json.dumps(update.data),
+                        "value_type": "json",
+                        "data_source": update.source_name,
+                        "source_timestamp": update.timestamp,
+                        "confidence_score": update.confidence_score,
+                        "created_at": now
+                    }
+                    for update in batch
+                ])
+                await self._commit()
+            except SQLAlchemyError as e:
+                await self._rollback()
+                self.logger.error(f"Error storing data updates: {e}")
+                raise
+            stored += len(batch)
+        
+        self.logger.info(f"Stored {stored} data updates")
+        return stored
+    
     def get_recent_updates(self, hours: int = 24, source_name: str = None) -> List[HKHealthcareUpdate]:
         """Get recent data updates"""
         cutoff_time = datetime.now(timezone.utc) - timedelta(hours=hours)
@@ -268,9 +485,13 @@ class HKDataRepository:
             ).first()
             
             if not status:
+                # Column defaults only apply on flush, so start the counters here
                 status = HKDataSourceStatus(
                     source_name=source_name,
                     source_type='hk_government',
+                    consecutive_failures=0,
+                    success_count_24h=0,
+                    failure_count_24h=0,
                     created_at=datetime.now(timezone.utc)
                 )
                 self.db.add(status)
@@ -490,3 +711,63 @@ class HKDataRepository:
             self.db.rollback()
             self.logger.error(f"Error during data cleanup: {e}")
             raise
+    
+    # ==================================================================
+    # SESSION HELPERS
+    # ==================================================================
+    
+    async def _execute(self, statement, parameters=None):
+        """Execute a statement on the sync or async session"""
+        if self.is_async:
+            return await self.db.execute(statement, parameters)
+        return self.db.execute(statement, parameters)
+    
+    async def _commit(self):
+        if self.is_async:
+            await self.db.commit()
+        else:
+            self.db.commit()
+    
+    async def _rollback(self):
+        if self.is_async:
+            await self.db.rollback()
+        else:
+            self.db.rollback()
+
+
+def _comparable(column, value: Any) -> Any:
+    """A column value in a form that compares equal to its stored round trip"""
+    if value is None:
+        return None
+    if isinstance(column.type, Numeric):
+        return round(float(value), column.type.scale if column.type.scale is not None else 6)
+    if isinstance(value, (dict, list, tuple)):
+        return json.dumps(value, sort_keys=True, default=str)
+    return value
+
+
+def _content_hash(table, row: Dict[str, Any], fields: Iterable[str]) -> str:
+    """Hash of a row restricted to the given columns"""
+    values = [(name, _comparable(table.c[name], row.get(name))) for name in sorted(fields)]
+    return hashlib.sha256(json.dumps(values, default=str).encode()).hexdigest()
+
+
+def _serialize_value(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    if isinstance(value, (dict, list, tuple, bool)):
+        return json.dumps(value, default=str, ensure_ascii=False)
+    return str(value)
+
+
+def _value_type(value: Any) -> str:
+    """value_type of a change row (check_value_type)"""
+    if isinstance(value, bool):
+        return "boolean"
+    if isinstance(value, int):
+        return "integer"
+    if isinstance(value, (float, Decimal)):
+        return "decimal"
+    if isinstance(value, (dict, list, tuple)):
+        return "json"
+    return "string"
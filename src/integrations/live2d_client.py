@@ -19,7 +19,10 @@ import json
 import asyncio
 import aiohttp
 import logging
-from typing import Any, Dict, List, Optional, Union, Callable
+import random
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple, Union
 from datetime import datetime, timedelta
 from dataclasses import dataclass, asdict
 from enum import Enum
@@ -28,6 +31,7 @@ import uuid
 from src.config import settings
 from src.core.logging import get_logger
 from src.core.exceptions import ValidationError, NetworkError
+from src.core.metrics import LatencyHistogram
 from src.agents.emotion_mapper import EmotionMapper
 from src.agents.gesture_library import GestureLibrary
 
@@ -649,6 +653,11 @@ class Live2DClient:
     - Message queuing and delivery
     - Connection management
     - Error handling and retry logic
+    
+    All requests share one pooled keep-alive session. Failed sends are
+    queued and delivered in batches by a background sender that backs off
+    exponentially while the frontend is unreachable. The sender is the only
+    consumer of the queue; process_message_queue asks it to retry at once.
     """
     
     def __init__(self, base_url: Optional[str] = None):
@@ -661,14 +670,85 @@ class Live2DClient:
         self.connection_retries = 0
         self.max_retries = 3
         
-        # Message queue for failed sends
-        self.message_queue: List[Dict[str, Any]] = []
+        # Pooled HTTP session (created on first use)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.pool_size = 20
+        self.keepalive_timeout = 30
+        self.request_timeout = 5
+        
+        # Outbound queue for failed sends, drained by a background sender
         self.queue_max_size = 100
+        self.message_queue: Deque[Tuple[str, Dict[str, Any]]] = deque(maxlen=self.queue_max_size)
+        self._queue_ready = asyncio.Event()
+        self._flush_requested = asyncio.Event()
+        self._flush_waiters: List[Tuple[asyncio.Future, int]] = []
+        self._sender_task: Optional[asyncio.Task] = None
+        self.queued_messages_delivered = 0
+        
+        # Batched delivery
+        self.batch_endpoint = "/api/live2d/batch"
+        self.batch_size = 50
+        self.batch_reprobe_seconds = 60.0
+        self._batch_retry_at = 0.0  # monotonic time before which batching is not tried
+        
+        # Retry backoff
+        self.backoff_base_seconds = 0.5
+        self.backoff_max_seconds = 30.0
         
         # Performance tracking
         self.total_messages_sent = 0
         self.failed_sends = 0
-        self.average_response_time = 0.0
+        self.response_times = LatencyHistogram()
+    
+    @property
+    def batch_supported(self) -> bool:
+        """
+        Whether queued messages go to the batch endpoint
+        
+        A 404 from the batch endpoint (e.g. an older frontend, or one that is
+        restarting) switches to single sends for batch_reprobe_seconds, after
+        which batching is tried again.
+        """
+        return time.monotonic() >= self._batch_retry_at
+    
+    @property
+    def average_response_time(self) -> float:
+        """Mean HTTP response time in milliseconds"""
+        return self.response_times.mean
+    
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Get the pooled keep-alive session, creating it on first use"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self.pool_size,
+                    keepalive_timeout=self.keepalive_timeout,
+                    ttl_dns_cache=300
+                ),
+                timeout=aiohttp.ClientTimeout(total=self.request_timeout),
+                headers={
+                    "Content-Type": "application/json",
+                    "User-Agent": "Healthcare-AI-V2/2.0.0"
+                }
+            )
+        return self._session
+    
+    async def close(self):
+        """Stop the background sender and close the pooled session"""
+        if self._sender_task is not None:
+            self._sender_task.cancel()
+            try:
+                await self._sender_task
+            except asyncio.CancelledError:
+                pass
+            self._sender_task = None
+        self._settle_flushes()
+        if self.message_queue:
+            self.logger.warning(f"Dropping {len(self.message_queue)} undelivered Live2D messages on shutdown")
+            self.message_queue.clear()
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
     
     async def send_agent_response(
         self,
@@ -705,7 +785,7 @@ class Live2DClient:
                 self.logger.debug(f"Sent agent response to Live2D: {formatted_response.message_id}")
             else:
                 self.logger.error(f"Failed to send agent response: {formatted_response.message_id}")
-                await self._queue_message(message_data)
+                await self._queue_message(message_data, "/api/live2d/agent-response")
             
             return success
             
@@ -813,86 +893,183 @@ class Live2DClient:
     
     async def _send_message(self, endpoint: str, message_data: Dict[str, Any]) -> bool:
         """Send message to Live2D frontend via HTTP"""
-        start_time = datetime.now()
+        return await self._post(endpoint, message_data, message_count=1)
+    
+    async def _post(self, endpoint: str, payload: Any, message_count: int) -> bool:
+        """
+        POST a payload over the pooled session
         
-        try:
-            url = f"{self.base_url}{endpoint}"
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    url,
-                    json=message_data,
-                    headers={
-                        "Content-Type": "application/json",
-                        "User-Agent": "Healthcare-AI-V2/2.0.0"
-                    },
-                    timeout=aiohttp.ClientTimeout(total=5)
-                ) as response:
-                    success = response.status == 200
-                    
-                    if success:
-                        self.is_connected = True
-                        self.connection_retries = 0
-                        self.total_messages_sent += 1
-                    else:
-                        self.logger.warning(f"HTTP {response.status} from Live2D frontend: {endpoint}")
-                        success = False
+        Args:
+            endpoint: Frontend endpoint path
+            payload: JSON body
+            message_count: Number of messages carried by the payload
             
-            # Update performance metrics
-            response_time = (datetime.now() - start_time).total_seconds() * 1000
-            self.average_response_time = (
-                (self.average_response_time * self.total_messages_sent + response_time) /
-                (self.total_messages_sent + 1)
-            )
+        Returns:
+            True if the frontend answered 200
+        """
+        start_time = time.perf_counter()
+        
+        try:
+            session = await self._get_session()
+            async with session.post(f"{self.base_url}{endpoint}", json=payload) as response:
+                success = response.status == 200
+                
+                if success:
+                    self.is_connected = True
+                    self.connection_retries = 0
+                    self.total_messages_sent += message_count
+                else:
+                    self.logger.warning(f"HTTP {response.status} from Live2D frontend: {endpoint}")
+                    if response.status == 404 and endpoint == self.batch_endpoint:
+                        self._batch_retry_at = time.monotonic() + self.batch_reprobe_seconds
             
+            self.response_times.record((time.perf_counter() - start_time) * 1000)
             return success
             
         except aiohttp.ClientError as e:
             self.logger.error(f"Network error sending to Live2D: {e}")
             self.is_connected = False
-            self.failed_sends += 1
+            self.failed_sends += message_count
             return False
         except asyncio.TimeoutError:
             self.logger.error(f"Timeout sending to Live2D: {endpoint}")
             self.is_connected = False
-            self.failed_sends += 1
+            self.failed_sends += message_count
             return False
         except Exception as e:
             self.logger.error(f"Unexpected error sending to Live2D: {e}")
-            self.failed_sends += 1
+            self.failed_sends += message_count
             return False
     
-    async def _queue_message(self, message_data: Dict[str, Any]):
-        """Queue message for retry when connection is restored"""
+    async def _queue_message(self, message_data: Dict[str, Any], endpoint: Optional[str] = None):
+        """Queue message for retry by the background sender"""
         if len(self.message_queue) >= self.queue_max_size:
-            # Remove oldest message to make room
-            self.message_queue.pop(0)
+            # The deque drops the oldest message to make room
             self.logger.warning("Message queue full, removing oldest message")
         
+        if endpoint is None:
+            endpoint = self._get_endpoint_for_message_type(message_data.get("type", ""))
         message_data["queued_at"] = datetime.now().isoformat()
-        self.message_queue.append(message_data)
+        self.message_queue.append((endpoint, message_data))
         self.logger.info(f"Queued message for retry. Queue size: {len(self.message_queue)}")
-    
-    async def process_message_queue(self) -> int:
-        """Process queued messages when connection is restored"""
-        if not self.message_queue:
-            return 0
         
-        processed = 0
-        failed_messages = []
+        self._queue_ready.set()
+        self._ensure_sender()
+    
+    def _ensure_sender(self):
+        """Start the background sender if it is not running"""
+        if self._sender_task is None or self._sender_task.done():
+            self._sender_task = asyncio.create_task(self._sender_loop())
+    
+    async def _sender_loop(self):
+        """
+        Drain the queue in batches, backing off exponentially while the frontend is down
         
-        for message in self.message_queue:
-            # Determine endpoint based on message type
-            message_type = message.get("type", "")
-            endpoint = self._get_endpoint_for_message_type(message_type)
+        A flush request (process_message_queue) cuts the current backoff short.
+        Pending flushes are settled whenever the queue empties or a batch fails.
+        """
+        failures = 0
+        while True:
+            if not self.message_queue:
+                self._settle_flushes()
+                self._queue_ready.clear()
+                await self._queue_ready.wait()
+                continue
             
-            if await self._send_message(endpoint, message):
-                processed += 1
+            if await self._send_batch() > 0:
+                failures = 0
+                continue
+            
+            self._settle_flushes()
+            failures += 1
+            self.connection_retries = failures
+            delay = min(self.backoff_base_seconds * 2 ** (failures - 1), self.backoff_max_seconds)
+            # asyncio.wait rather than wait_for: wait_for can swallow a
+            # cancel (close) that lands just as a flush request arrives
+            flush_requested = asyncio.ensure_future(self._flush_requested.wait())
+            try:
+                await asyncio.wait({flush_requested}, timeout=delay * random.uniform(0.5, 1.0))
+            finally:
+                flush_requested.cancel()
+    
+    def _settle_flushes(self):
+        """Answer pending flush requests with the messages delivered since each was made"""
+        self._flush_requested.clear()
+        waiters, self._flush_waiters = self._flush_waiters, []
+        for future, delivered_before in waiters:
+            if not future.done():
+                future.set_result(self.queued_messages_delivered - delivered_before)
+    
+    async def _send_batch(self) -> int:
+        """
+        Send up to batch_size queued messages
+        
+        Messages go out in a single POST to the batch endpoint; if the
+        frontend does not support batches they are sent one by one over the
+        pooled session. Messages that could not be delivered are put back at
+        the head of the queue in their original order.
+        
+        Returns:
+            Number of messages delivered
+        """
+        batch = [
+            self.message_queue.popleft()
+            for _ in range(min(self.batch_size, len(self.message_queue)))
+        ]
+        if not batch:
+            return 0
+        
+        if self.batch_supported:
+            payload = {
+                "messages": [
+                    {"endpoint": endpoint, "data": message}
+                    for endpoint, message in batch
+                ]
+            }
+            if await self._post(self.batch_endpoint, payload, message_count=len(batch)):
+                self.queued_messages_delivered += len(batch)
+                return len(batch)
+            if self.batch_supported:
+                failed = batch
             else:
-                failed_messages.append(message)
+                failed = await self._send_individually(batch)
+        else:
+            failed = await self._send_individually(batch)
         
-        # Keep failed messages in queue
-        self.message_queue = failed_messages
+        # Requeue failures ahead of anything queued meanwhile, dropping the
+        # newest if the queue overflowed
+        for item in reversed(failed):
+            if len(self.message_queue) >= self.queue_max_size:
+                self.message_queue.pop()
+            self.message_queue.appendleft(item)
+        
+        self.queued_messages_delivered += len(batch) - len(failed)
+        return len(batch) - len(failed)
+    
+    async def _send_individually(self, batch: List[Tuple[str, Dict[str, Any]]]) -> List[Tuple[str, Dict[str, Any]]]:
+        """Send messages one per request, stopping at the first failure"""
+        for index, (endpoint, message) in enumerate(batch):
+            if not await self._send_message(endpoint, message):
+                return batch[index:]
+        return []
+    
+    async def process_message_queue(self) -> int:
+        """
+        Have the background sender retry queued messages now
+        
+        Waits until the queue is empty or a batch fails.
+        
+        Returns:
+            Number of queued messages delivered meanwhile
+        """
+        if not self.message_queue:
+            return 0
+        
+        flush = asyncio.get_running_loop().create_future()
+        self._flush_waiters.append((flush, self.queued_messages_delivered))
+        self._flush_requested.set()
+        self._ensure_sender()
+        processed = await flush
         
         if processed > 0:
             self.logger.info(f"Processed {processed} queued messages. {len(self.message_queue)} remaining.")
@@ -936,7 +1113,10 @@ class Live2DClient:
                 if (self.total_messages_sent + self.failed_sends) > 0 else 0.0
             ),
             "average_response_time_ms": self.average_response_time,
+            "response_time_ms": self.response_times.snapshot(),
             "queued_messages": len(self.message_queue),
+            "queued_messages_delivered": self.queued_messages_delivered,
+            "batch_supported": self.batch_supported,
             "connection_retries": self.connection_retries
         }
 
@@ -964,7 +1144,7 @@ async def send_to_live2d_frontend(
         True if sent successfully
     """
     if client is None:
-        client = Live2DClient()
+        client = live2d_client
     
     try:
         if message_type == "agent_response":
@@ -1021,3 +1201,8 @@ def create_live2d_message(
 
 # Global Live2D client instance
 live2d_client = Live2DClient()
+
+
+async def cleanup_live2d_client():
+    """Stop the background sender and close the global client's session"""
+    await live2d_client.close()
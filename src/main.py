@@ -78,6 +78,20 @@ async def lifespan(app: FastAPI):
         except Exception as event_error:
             logger.warning(f"Security event tracker initialization failed: {event_error}")
         
+        # Compile prompt templates once (reloaded when files change)
+        try:
+            from src.agents.prompt_registry import prompt_registry
+            prompt_registry.load()
+        except Exception as prompt_error:
+            logger.warning(f"Prompt template loading failed: {prompt_error}")
+        
+        # Snapshot hotlines and A&E departments so emergency cards need no I/O
+        try:
+            from src.agents.emergency_card import emergency_card_builder
+            await emergency_card_builder.refresh()
+        except Exception as card_error:
+            logger.warning(f"Emergency card data loading failed: {card_error}")
+        
         # await initialize_rate_limiter()  # TODO: Fix import
         # logger.info("Advanced rate limiter initialized")
         
@@ -98,6 +112,20 @@ async def lifespan(app: FastAPI):
             await close_database()
             logger.info("Database connections closed")
             
+            # Stop the WebSocket session bus (Redis subscriber and heartbeat)
+            from src.web.websockets.chat import live2d_chat_handler
+            await live2d_chat_handler.connection_manager.stop_session_bus()
+            
+            # Stop the Live2D frontend client's background sender and close its session
+            from src.integrations.live2d_client import cleanup_live2d_client
+            await cleanup_live2d_client()
+            
+            # Close LLM provider sessions and the OpenRouter client (and its cassette)
+            from src.ai.gateway import cleanup_llm_gateway
+            from src.ai.openrouter_client import cleanup_openrouter_client
+            await cleanup_llm_gateway()
+            await cleanup_openrouter_client()
+            
             # Cleanup other services
             # await close_redis()
             # await stop_background_tasks()
@@ -410,17 +438,14 @@ async def api_chat(request: Request):
 
 # Handle Live2D compiled JS resource requests (without /live2d prefix)
 @app.get("/Resources/{file_path:path}")
-async def serve_live2d_compiled_resources(file_path: str):
+async def serve_live2d_compiled_resources(file_path: str, request: Request):
     """Serve Live2D Resources for compiled JS that expects /Resources/ paths"""
     try:
-        from fastapi.responses import FileResponse
-        live2d_resources_path = Path(__file__).parent / "web" / "live2d" / "frontend" / "Resources"
-        full_path = live2d_resources_path / file_path
-        
-        if full_path.exists() and full_path.is_file():
-            return FileResponse(full_path)
-        else:
+        from src.web.live2d.assets import asset_server
+        response = await asset_server.respond("Resources", file_path, request)
+        if response is None:
             raise HTTPException(status_code=404, detail=f"Resource not found: {file_path}")
+        return response
     except HTTPException:
         raise
     except Exception as e:
@@ -639,7 +664,8 @@ def cli():
             reload=reload,
             log_level=log_level,
             access_log=settings.log_api_requests,
-            use_colors=settings.is_development
+            use_colors=settings.is_development,
+            ws_per_message_deflate=settings.websocket_per_message_deflate
         )
     
     @app_cli.command()
@@ -678,5 +704,6 @@ if __name__ == "__main__":
         reload=settings.reload,
         log_level=settings.log_level.lower(),
         access_log=settings.log_api_requests,
-        use_colors=settings.is_development
+        use_colors=settings.is_development,
+        ws_per_message_deflate=settings.websocket_per_message_deflate
     )
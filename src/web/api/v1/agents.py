@@ -12,7 +12,9 @@ NOTE: This is the structure/interface layer. The actual agent implementations
 will be added in Phase 3 (Day 3) of development.
 """
 
-from typing import List, Optional, Dict, Any
+import asyncio
+import json
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
 from datetime import datetime, timedelta
 from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, WebSocket, WebSocketDisconnect
 from fastapi.responses import JSONResponse, StreamingResponse
@@ -56,6 +58,7 @@ class ChatRequest(BaseModel):
     language: Optional[str] = Field("en", pattern="^(en|zh-HK|zh-CN)$", description="Preferred language")
     context: Optional[Dict[str, Any]] = Field(None, description="Additional context information")
     agent_type: Optional[str] = Field(None, description="Preferred agent type")
+    stream: bool = Field(False, description="Stream NDJSON events: emergency card first, then the full response")
 
 
 class ChatResponse(BaseModel):
@@ -71,6 +74,8 @@ class ChatResponse(BaseModel):
     hk_data_used: List[Dict[str, Any]] = Field(..., description="HK data references used")
     routing_info: Dict[str, Any] = Field(..., description="Agent routing decision information")
     conversation_id: int = Field(..., description="Database conversation ID")
+    emergency_card: Optional[Dict[str, Any]] = Field(None, description="Instant emergency card (Safety Guardian only)")
+    trace: Optional[Dict[str, Any]] = Field(None, description="Per-stage timings of the chat turn")
 
 
 class ConversationHistoryItem(BaseModel):
@@ -379,8 +384,72 @@ async def chat_with_agents(
     current_user: Optional[User] = Depends(get_optional_user),
     db: AsyncSession = Depends(get_async_db)
 ) -> ChatResponse:
-    """Send a message to the AI agent system"""
+    """
+    Send a message to the AI agent system
+    
+    With ``stream`` set the response is NDJSON: an ``emergency_card`` event as
+    soon as the Safety Guardian is selected, then the ``agent_response`` event
+    once the full answer is ready.
+    """
+    if chat_request.stream:
+        return StreamingResponse(
+            _stream_chat(request, chat_request, current_user),
+            media_type="application/x-ndjson"
+        )
+    return await _process_chat(request, chat_request, current_user)
+
+
+async def _stream_chat(
+    request: Request,
+    chat_request: ChatRequest,
+    current_user: Optional[User]
+) -> AsyncIterator[str]:
+    """NDJSON events for a streamed chat request"""
+    events: asyncio.Queue = asyncio.Queue()
+    
+    async def on_emergency_card(card: Dict[str, Any]):
+        await events.put({"type": "emergency_card", "card": card})
+    
+    task = asyncio.create_task(_process_chat(request, chat_request, current_user, on_emergency_card))
+    task.add_done_callback(lambda _: events.put_nowait(None))
+    try:
+        while (event := await events.get()) is not None:
+            yield json.dumps(event, ensure_ascii=False) + "\n"
+        try:
+            response = task.result()
+            event = {"type": "agent_response", "response": response.model_dump(mode="json")}
+        except HTTPException as e:
+            event = {"type": "error", "status_code": e.status_code, "detail": e.detail}
+        yield json.dumps(event, ensure_ascii=False) + "\n"
+    finally:
+        # Client went away before the agent finished
+        if not task.done():
+            task.cancel()
+
+
+async def _process_chat(
+    request: Request,
+    chat_request: ChatRequest,
+    current_user: Optional[User],
+    on_emergency_card: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None
+) -> ChatResponse:
+    """
+    Route a chat message and generate the agent response
+    
+    Args:
+        request: Incoming HTTP request
+        chat_request: Chat request body
+        current_user: Authenticated user, if any
+        on_emergency_card: Called with the instant emergency card before the
+            LLM response is generated
+    
+    Returns:
+        Chat response
+    """
     start_time = datetime.now()
+    emergency_card = None
+    turn_trace = None
+    hk_data_used: List[Dict[str, Any]] = []
     
     try:
         # Sanitize user input
@@ -399,35 +468,39 @@ async def chat_with_agents(
         from src.ai.ai_service import get_ai_service
         from src.agents.orchestrator import AgentOrchestrator
         from src.agents.context_manager import ConversationContextManager
+        from src.agents.chat_turn import ChatTurnPipeline
         
         try:
             ai_service = await get_ai_service()
             orchestrator = AgentOrchestrator(ai_service)
             context_manager = ConversationContextManager()
+            pipeline = ChatTurnPipeline(orchestrator, context_manager, name="chat_rest")
             
-            # Create context for the conversation
             user_id = str(current_user.id) if current_user else f"anonymous_{hash(str(request.client.host)) % 10000:04d}"
             
-            context = context_manager.create_context(
+            # Context, routing, emergency card, response and history write as one turn
+            turn = await pipeline.run(
                 user_id=user_id,
                 session_id=session_id,
-                user_input=safe_message,
+                message=safe_message,
+                language=chat_request.language or "en",
+                preferred_agent=chat_request.agent_type,
                 additional_context={
                     "language": chat_request.language or "en",
                     "connection_type": "rest_api",
                     "user_agent": request.headers.get("user-agent", "unknown")
-                }
-            )
-            
-            # Route to appropriate agent using sophisticated orchestrator
-            selected_agent, routing_result = await orchestrator.route_request(
-                user_input=safe_message,
-                context=context,
-                preferred_agent=chat_request.agent_type
+                },
+                district=(chat_request.context or {}).get("district"),
+                on_emergency_card=on_emergency_card
             )
-            
-            # Generate response using the selected agent
-            agent_response = await selected_agent.generate_response(safe_message, context)
+            selected_agent, routing_result = turn["route"]
+            agent_response = turn["generate"]
+            emergency_card = turn["emergency_card"]
+            turn_trace = turn.trace.to_dict()
+            hk_data_used = [
+                {"id": facility.get("id"), "name": facility.get("name_en"), "district": facility.get("district")}
+                for facility in turn["hk_data"]
+            ]
             
             # Extract response data
             selected_agent_type = routing_result.selected_agent
@@ -436,16 +509,6 @@ async def chat_with_agents(
             urgency = "emergency" if routing_result.emergency_override else ("high" if confidence > 0.8 else ("medium" if confidence > 0.6 else "low"))
             response_content = agent_response.content
             
-            # Update conversation history with agent response
-            user_id = str(current_user.id) if current_user else f"anonymous_{hash(str(request.client.host)) % 10000:04d}"
-            conversation_memory = context_manager.get_or_create_conversation_memory(user_id, session_id)
-            context_manager.update_conversation_history(
-                conversation_memory, 
-                response_content, 
-                "assistant",
-                agent_id=selected_agent_type
-            )
-            
         except Exception as ai_error:
             # Fallback to wellness coach if AI system fails
             logger.warning(f"AI system error, falling back to wellness coach: {ai_error}")
@@ -469,7 +532,7 @@ async def chat_with_agents(
             "language": chat_request.language or "en",
             "processing_time_ms": processing_time,
             "user_id": current_user.id if current_user else None,
-            "hk_data_used": [],
+            "hk_data_used": hk_data_used,
             "conversation_context": []
         }
         
@@ -514,14 +577,16 @@ async def chat_with_agents(
             language=chat_request.language or "en",
             session_id=session_id,
             processing_time_ms=processing_time,
-            hk_data_used=[],
+            hk_data_used=hk_data_used,
             routing_info={
                 "selected_agent": selected_agent_type,
                 "confidence": confidence,
                 "routing_factors": getattr(routing_result, 'reasons', ["ai_agent_routing"]) if 'routing_result' in locals() else ["fallback_mode"],
                 "alternative_agents": getattr(routing_result, 'alternative_agents', ["illness_monitor", "mental_health", "safety_guardian", "wellness_coach"]) if 'routing_result' in locals() else ["illness_monitor", "mental_health", "safety_guardian", "wellness_coach"]
             },
-            conversation_id=0  # Placeholder - would be from database
+            conversation_id=0,  # Placeholder - would be from database
+            emergency_card=emergency_card,
+            trace=turn_trace
         )
         
     except Exception as e:
@@ -713,6 +778,36 @@ async def get_agent_performance(
         )
 
 
+@router.get(
+    "/prompts/metrics",
+    dependencies=[Depends(require_role("admin"))],
+    summary="Get prompt template metrics (Admin)",
+    description="Get render counts and rendered sizes per prompt template, token estimate cache, summarizer counters and chat turn stage latencies",
+    responses={
+        200: {"description": "Prompt metrics retrieved successfully"},
+        401: {"description": "Authentication required"},
+        403: {"description": "Admin access required"}
+    }
+)
+
+async def get_prompt_metrics(
+    current_user: User = Depends(require_role("admin"))
+) -> Dict[str, Any]:
+    """Get prompt registry metrics (admin only)"""
+    from src.agents.prompt_registry import prompt_registry
+    from src.agents.context_builder import conversation_summarizer
+    from src.agents.turn_pipeline import turn_metrics
+    from src.ai.token_estimator import token_estimator
+    
+    prompt_registry.check_reload()
+    return {
+        **prompt_registry.get_metrics(),
+        "token_estimator": token_estimator.get_stats(),
+        "summarizer": conversation_summarizer.get_stats(),
+        "turn_pipeline": turn_metrics.get_stats()
+    }
+
+
 # ============================================================================
 # 🔥 REAL-TIME WEBSOCKET CHAT ENDPOINT
 # ============================================================================
@@ -759,9 +854,21 @@ async def websocket_chat_endpoint(websocket: WebSocket):
         from src.agents.orchestrator import AgentOrchestrator
         from src.agents.context_manager import ConversationContextManager
         
+        from src.agents.chat_turn import ChatTurnPipeline
+        
         ai_service = await get_ai_service()
         orchestrator = AgentOrchestrator(ai_service)
         context_manager = ConversationContextManager()
+        pipeline = ChatTurnPipeline(orchestrator, context_manager, name="chat_ws")
+        
+        async def send_emergency_card(card: Dict[str, Any]):
+            # Instant emergency card goes out before the LLM call
+            await websocket.send_json({
+                "type": "emergency_card",
+                "card": card,
+                "session_id": session_data["session_id"],
+                "timestamp": datetime.now().isoformat()
+            })
         
         while True:
             # Receive message from client
@@ -790,26 +897,21 @@ async def websocket_chat_endpoint(websocket: WebSocket):
                     # Process with agent system
                     user_id = session_data["user_id"] or f"ws_anonymous_{hash(str(websocket.client)) % 10000:04d}"
                     
-                    # Create context
-                    context = context_manager.create_context(
+                    # Context, routing, emergency card, response and history write as one turn
+                    turn = await pipeline.run(
                         user_id=user_id,
                         session_id=session_data["session_id"],
-                        user_input=user_message,
+                        message=user_message,
+                        language=data.get("language", "en"),
                         additional_context={
                             "connection_type": "websocket",
                             "message_count": session_data["message_count"],
                             "last_agent": session_data["last_agent"]
-                        }
+                        },
+                        on_emergency_card=send_emergency_card
                     )
-                    
-                    # Route to agent
-                    selected_agent, routing_result = await orchestrator.route_request(
-                        user_input=user_message,
-                        context=context
-                    )
-                    
-                    # Generate response
-                    agent_response = await selected_agent.generate_response(user_message, context)
+                    selected_agent, routing_result = turn["route"]
+                    agent_response = turn["generate"]
                     
                     # Update session data
                     session_data["last_agent"] = routing_result.selected_agent
@@ -825,7 +927,9 @@ async def websocket_chat_endpoint(websocket: WebSocket):
                         "session_id": session_data["session_id"],
                         "timestamp": datetime.now().isoformat(),
                         "suggested_actions": agent_response.suggested_actions if hasattr(agent_response, 'suggested_actions') else [],
-                        "professional_alert": agent_response.professional_alert_needed if hasattr(agent_response, 'professional_alert_needed') else False
+                        "professional_alert": agent_response.professional_alert_needed if hasattr(agent_response, 'professional_alert_needed') else False,
+                        "hk_facilities": turn["hk_data"],
+                        "trace": turn.trace.to_dict()
                     }
                     
                     await websocket.send_json(response_data)
@@ -846,7 +950,7 @@ async def websocket_chat_endpoint(websocket: WebSocket):
                         agent_response=agent_response.content,
                         confidence=routing_result.confidence,
                         urgency_level=routing_result.urgency_level,
-                        processing_time_ms=0,  # WebSocket doesn't track this easily
+                        processing_time_ms=int(turn.trace.total_ms),
                         session_id=session_data["session_id"]
                     )
                     
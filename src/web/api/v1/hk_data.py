@@ -38,6 +38,15 @@ class DataSource(str, Enum):
     ENVIRONMENTAL_DATA = "environmental_data"
 
 
+# Adapter source types (DataSourceType values) behind each API data source
+PIPELINE_SOURCE_TYPES = {
+    DataSource.HOSPITAL_AUTHORITY: "hospital_authority",
+    DataSource.DEPARTMENT_HEALTH: "department_health",
+    DataSource.EMERGENCY_SERVICES: "hospital_authority",
+    DataSource.ENVIRONMENTAL_DATA: "environmental",
+}
+
+
 class UrgencyLevel(str, Enum):
     """Urgency levels for filtering"""
     LOW = "low"
@@ -461,8 +470,8 @@ async def trigger_data_update(
         
         source_name = source.value if source else None
         
-        await pipeline.trigger_immediate_update(
-            source_name=source_name,
+        result = await pipeline.trigger_immediate_update(
+            source_name=PIPELINE_SOURCE_TYPES[source] if source else None,
             endpoint=endpoint
         )
         
@@ -475,12 +484,16 @@ async def trigger_data_update(
         )
         
         return {
-            "message": "Data update triggered successfully",
+            "message": result.get("message") or result.get("error"),
+            "success": result["success"],
             "source": source_name,
             "endpoint": endpoint,
+            "feeds": result.get("sources", {}),
             "timestamp": datetime.utcnow().isoformat()
         }
         
+    except NotFoundError as e:
+        raise HTTPException(status_code=404, detail=e.detail)
     except Exception as e:
         logger.error(f"Error triggering data update: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -574,19 +587,9 @@ async def quick_search(
         
         query_lower = query.lower()
         
-        # Search facilities if requested or no type specified
+        # Search facilities if requested or no type specified (names, districts, services; en/zh)
         if not type or type == 'facility':
-            facilities = await repository.search_facilities(limit=limit)
-            
-            # Simple text matching (in production, use full-text search)
-            matching_facilities = []
-            for facility in facilities:
-                if (query_lower in facility.get('name_en', '').lower() or 
-                    query_lower in facility.get('district', '').lower() or
-                    any(query_lower in service.lower() for service in facility.get('services', []))):
-                    matching_facilities.append(facility)
-            
-            results['facilities'] = matching_facilities[:limit]
+            results['facilities'] = await repository.search_facilities(query=query, limit=limit)
         
         # Search emergency services
         if not type or type == 'emergency':
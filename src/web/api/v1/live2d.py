@@ -781,8 +781,8 @@ async def live2d_chat(
                 "authenticated": True
             })
         
-        # Process with agent system (similar to WebSocket handler)
-        if live2d_chat_handler.agent_orchestrator:
+        # Process with agent system (same turn pipeline as the WebSocket handler)
+        if live2d_chat_handler.turn_pipeline:
             # Create agent context
             from src.agents.base_agent import AgentContext
             
@@ -800,15 +800,18 @@ async def live2d_chat(
                 timestamp=datetime.now()
             )
             
-            # Route to agent
-            selected_agent, routing_result = await live2d_chat_handler.agent_orchestrator.route_request(
-                user_input=safe_message,
+            # Route, generate and map emotion/gesture as one turn
+            turn = await live2d_chat_handler.turn_pipeline.run(
+                user_id=context.user_id,
+                session_id=session_id,
+                message=safe_message,
+                language=chat_request.language,
                 context=context,
-                preferred_agent=chat_request.agent_preference
+                preferred_agent=chat_request.agent_preference,
+                district=user_context.get("district")
             )
-            
-            # Generate response
-            agent_response = await selected_agent.generate_response(safe_message, context)
+            selected_agent, routing_result = turn["route"]
+            agent_response = turn["generate"]
             
             # Format for Live2D
             live2d_response = live2d_chat_handler.message_formatter.format_agent_response(
@@ -819,7 +822,7 @@ async def live2d_chat(
                     "urgency_level": routing_result.urgency_level,
                     "confidence": routing_result.confidence,
                     "processing_time_ms": int((datetime.now() - start_time).total_seconds() * 1000),
-                    "hk_data_used": []
+                    "hk_data_used": turn["hk_data"]
                 },
                 session_id,
                 chat_request.language,
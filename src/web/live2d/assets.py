@@ -0,0 +1,493 @@
+"""
+Live2D Asset Server for Healthcare AI V2
+========================================
+
+Static file layer for the Live2D frontend: models, textures, the Cubism Core
+engine and the compiled frontend bundle.
+
+- Path index built at startup, so requests resolve without filesystem probes
+- Strong ETags with If-None-Match / If-Modified-Since (304) handling
+- Immutable caching for files listed in the bundler manifest
+  (.vite/manifest.json) and hex content-hashed names (e.g. app.3f9a1c2b.js)
+- Precompressed .br / .gz variants selected by Accept-Encoding (built by
+  scripts/maintenance/precompress_live2d_assets.py)
+- Single byte-range requests (206) with If-Range
+- Small in-memory LRU for hot small files
+"""
+
+import json
+import mimetypes
+import os
+import re
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional, Sequence, Set, Tuple
+
+import anyio
+from fastapi import Request
+from fastapi.responses import Response, StreamingResponse
+
+from ...config import settings
+from ...core.logging import get_logger
+
+logger = get_logger(__name__)
+
+LIVE2D_FRONTEND_PATH = Path(__file__).parent / "frontend"
+LIVE2D_SAMPLES_PATH = Path(__file__).parent / "Samples" / "TypeScript" / "Demo" / "dist"
+
+# Precompressed variants, in server preference order
+ENCODINGS: Tuple[Tuple[str, str], ...] = (("br", ".br"), ("gzip", ".gz"))
+
+# Hex content hashes anywhere in the name: "-3f9a1c2b." / ".3f9a1c2b."
+_HEX_HASH = re.compile(r"[-.]([0-9a-f]{8,})\.")
+_HEX_LETTER = re.compile(r"[a-f]")
+_DIGIT = re.compile(r"[0-9]")
+
+# Vite build manifests (Vite 5+, then Vite 4), relative to the build output root
+BUNDLER_MANIFESTS = (".vite/manifest.json", "manifest.json")
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+STREAM_CHUNK_SIZE = 64 * 1024
+
+mimetypes.add_type("application/octet-stream", ".moc3")
+mimetypes.add_type("application/json", ".map")
+
+
+def is_hashed_filename(name: str) -> bool:
+    """
+    Whether a filename carries a hex content hash
+
+    The hash must mix a-f letters and digits, so words (icon-deadbeef.png)
+    and dates (report-20240115.json) are not mistaken for hashes.
+    Base64url bundler hashes (index-B3kq9_aZ.js) cannot be told apart from
+    ordinary names such as logo-Animated.svg, so those files are only
+    treated as hashed when the bundler manifest lists them.
+    """
+    return any(
+        _HEX_LETTER.search(token) and _DIGIT.search(token)
+        for token in (match.group(1) for match in _HEX_HASH.finditer(name))
+    )
+
+
+def load_bundler_manifest(root: Path) -> Set[Path]:
+    """
+    Files a Vite build under root emitted with content-hashed names
+
+    Covers each chunk's file, CSS and imported assets plus the chunk's
+    source map. Returns resolved paths (empty if root has no manifest).
+    """
+    for manifest_name in BUNDLER_MANIFESTS:
+        manifest_path = root / manifest_name
+        try:
+            manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            continue
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable bundler manifest {manifest_path}: {e}")
+            continue
+
+        emitted: Set[Path] = set()
+        for chunk in manifest.values():
+            if not isinstance(chunk, dict):
+                continue
+            files = [chunk.get("file"), *chunk.get("css", []), *chunk.get("assets", [])]
+            for file in filter(None, files):
+                path = (root / file).resolve()
+                emitted.update((path, path.with_name(path.name + ".map")))
+        return emitted
+    return set()
+
+
+@dataclass(slots=True)
+class AssetVariant:
+    """A precompressed representation of an asset"""
+    path: Path
+    size: int
+    etag: str
+
+
+@dataclass(slots=True)
+class AssetEntry:
+    """An indexed asset file"""
+    path: Path
+    size: int
+    mtime_ns: int
+    etag: str
+    last_modified: str
+    content_type: str
+    immutable: bool
+    variants: Dict[str, AssetVariant] = field(default_factory=dict)
+
+
+def _make_etag(size: int, mtime_ns: int, suffix: str = "") -> str:
+    return f'"{size:x}-{mtime_ns:x}{suffix}"'
+
+
+def _build_entry(path: Path, stat: os.stat_result, immutable: bool) -> AssetEntry:
+    content_type, _ = mimetypes.guess_type(path.name)
+    entry = AssetEntry(
+        path=path,
+        size=stat.st_size,
+        mtime_ns=stat.st_mtime_ns,
+        etag=_make_etag(stat.st_size, stat.st_mtime_ns),
+        last_modified=formatdate(stat.st_mtime, usegmt=True),
+        content_type=content_type or "application/octet-stream",
+        immutable=immutable
+    )
+    for encoding, suffix in ENCODINGS:
+        variant_path = path.with_name(path.name + suffix)
+        try:
+            variant_stat = variant_path.stat()
+        except OSError:
+            continue
+        # Ignore variants older than the source (stale build output)
+        if variant_stat.st_mtime_ns >= stat.st_mtime_ns and variant_stat.st_size < stat.st_size:
+            entry.variants[encoding] = AssetVariant(
+                path=variant_path,
+                size=variant_stat.st_size,
+                etag=_make_etag(stat.st_size, stat.st_mtime_ns, f"-{encoding}")
+            )
+    return entry
+
+
+def _accepted_encodings(header: str) -> List[str]:
+    """Encodings from an Accept-Encoding header with a non-zero q-value"""
+    accepted = []
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name and quality > 0:
+            accepted.append(name.strip().lower())
+    return accepted
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """If-None-Match comparison (weak comparison, as RFC 9110 requires)"""
+    if header.strip() == "*":
+        return True
+    return any(candidate.strip().removeprefix("W/") == etag for candidate in header.split(","))
+
+
+def _parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single-range Range header
+
+    Returns:
+        Inclusive (start, end), or None if the range is unsatisfiable
+
+    Raises:
+        ValueError: If the header is malformed or asks for several ranges
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        raise ValueError("Unsupported range")
+    first, _, last = spec.strip().partition("-")
+    if not first:
+        if not last:
+            raise ValueError("Malformed range")
+        length = int(last)
+        if length <= 0 or size == 0:
+            return None
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size or end < start:
+        return None
+    return start, min(end, size - 1)
+
+
+async def _iter_file(path: Path, start: int, length: int) -> AsyncIterator[bytes]:
+    async with await anyio.open_file(path, "rb") as file:
+        await file.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = await file.read(min(STREAM_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+class AssetServer:
+    """
+    Serve files from named mounts, each backed by one or more root directories
+
+    Roots of a mount are searched in order, so earlier roots shadow later ones.
+    """
+
+    def __init__(
+        self,
+        mounts: Dict[str, Sequence[Path]],
+        max_age: int = 3600,
+        cache_size_bytes: int = 32 * 1024 * 1024,
+        cache_max_file_bytes: int = 512 * 1024,
+        revalidate: bool = False
+    ):
+        """
+        Initialize asset server (call build_index() at startup)
+
+        Args:
+            mounts: Mount name -> root directories
+            max_age: Cache lifetime in seconds for files without a content hash
+            cache_size_bytes: Memory budget of the small-file LRU
+            cache_max_file_bytes: Largest file body kept in the LRU
+            revalidate: Re-stat indexed files on every request (development)
+        """
+        self.mounts = {name: [Path(root) for root in roots] for name, roots in mounts.items()}
+        self.max_age = max_age
+        self.cache_size_bytes = cache_size_bytes
+        self.cache_max_file_bytes = cache_max_file_bytes
+        self.revalidate = revalidate
+
+        self._index: Dict[str, Dict[str, AssetEntry]] = {}
+        self._indexed = False
+        self._manifest_files: Set[Path] = set()
+        self._cache: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+        self._cache_bytes = 0
+        self.stats = {
+            "requests": 0,
+            "not_modified": 0,
+            "partial": 0,
+            "compressed": 0,
+            "cache_hits": 0,
+            "index_misses": 0
+        }
+
+    def build_index(self) -> int:
+        """
+        Walk every mount root and index its files
+
+        Returns:
+            Number of indexed files
+        """
+        self._manifest_files = set()
+        for roots in self.mounts.values():
+            for root in roots:
+                self._manifest_files |= load_bundler_manifest(root)
+
+        index: Dict[str, Dict[str, AssetEntry]] = {}
+        for mount, roots in self.mounts.items():
+            entries: Dict[str, AssetEntry] = {}
+            for root in roots:
+                if not root.is_dir():
+                    continue
+                for directory, _, filenames in os.walk(root):
+                    for filename in filenames:
+                        path = Path(directory) / filename
+                        key = path.relative_to(root).as_posix()
+                        if key in entries:
+                            continue
+                        try:
+                            entries[key] = self._make_entry(path, path.stat())
+                        except OSError:
+                            continue
+            index[mount] = entries
+
+        self._index = index
+        self._indexed = True
+        self._cache.clear()
+        self._cache_bytes = 0
+        total = sum(len(entries) for entries in index.values())
+        logger.info(f"Live2D asset index built: {total} files in {len(index)} mounts")
+        return total
+
+    def resolve(self, mount: str, file_path: str) -> Optional[AssetEntry]:
+        """
+        Look up an asset
+
+        Files added after startup are found by a one-off probe confined to the
+        mount roots and then indexed.
+        """
+        if not self._indexed:
+            self.build_index()
+        entries = self._index.setdefault(mount, {})
+        entry = entries.get(file_path)
+        if entry is not None:
+            if self.revalidate:
+                entry = self._refresh(mount, file_path, entry)
+            return entry
+
+        self.stats["index_misses"] += 1
+        for root in self.mounts.get(mount, []):
+            candidate = (root / file_path).resolve()
+            if not candidate.is_relative_to(root.resolve()) or not candidate.is_file():
+                continue
+            entry = self._make_entry(candidate, candidate.stat())
+            entries[file_path] = entry
+            return entry
+        return None
+
+    def _make_entry(self, path: Path, stat: os.stat_result) -> AssetEntry:
+        immutable = is_hashed_filename(path.name) or (
+            bool(self._manifest_files) and path.resolve() in self._manifest_files
+        )
+        return _build_entry(path, stat, immutable)
+
+    def _refresh(self, mount: str, file_path: str, entry: AssetEntry) -> Optional[AssetEntry]:
+        try:
+            stat = entry.path.stat()
+        except OSError:
+            del self._index[mount][file_path]
+            return None
+        if stat.st_mtime_ns != entry.mtime_ns or stat.st_size != entry.size:
+            entry = self._make_entry(entry.path, stat)
+            self._index[mount][file_path] = entry
+        return entry
+
+    async def _read_cached(self, path: Path, etag: str) -> bytes:
+        """Whole-file read through the LRU"""
+        key = (str(path), etag)
+        body = self._cache.get(key)
+        if body is not None:
+            self._cache.move_to_end(key)
+            self.stats["cache_hits"] += 1
+            return body
+
+        body = await anyio.Path(path).read_bytes()
+        self._cache[key] = body
+        self._cache_bytes += len(body)
+        while self._cache_bytes > self.cache_size_bytes and self._cache:
+            _, evicted = self._cache.popitem(last=False)
+            self._cache_bytes -= len(evicted)
+        return body
+
+    def _cache_control(self, entry: AssetEntry) -> str:
+        if entry.immutable:
+            return IMMUTABLE_CACHE_CONTROL
+        return f"public, max-age={self.max_age}, must-revalidate"
+
+    def _not_modified(self, request: Request, entry: AssetEntry, etag: str) -> bool:
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            return _etag_matches(if_none_match, etag) or _etag_matches(if_none_match, entry.etag)
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_modified_since:
+            try:
+                return entry.mtime_ns // 1_000_000_000 <= int(parsedate_to_datetime(if_modified_since).timestamp())
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    async def respond(self, mount: str, file_path: str, request: Request) -> Optional[Response]:
+        """
+        Build the response for an asset request
+
+        Args:
+            mount: Mount name
+            file_path: Path relative to the mount
+            request: Incoming request (conditional, range and encoding headers)
+
+        Returns:
+            Response, or None if the asset does not exist
+        """
+        entry = self.resolve(mount, file_path)
+        if entry is None:
+            return None
+        self.stats["requests"] += 1
+
+        headers = {
+            "Cache-Control": self._cache_control(entry),
+            "Last-Modified": entry.last_modified,
+            "Accept-Ranges": "bytes"
+        }
+        if entry.variants:
+            headers["Vary"] = "Accept-Encoding"
+
+        # Ranges always apply to the identity representation
+        range_header = request.headers.get("range")
+        encoding: Optional[str] = None
+        variant: Optional[AssetVariant] = None
+        if not range_header and entry.variants:
+            accepted = _accepted_encodings(request.headers.get("accept-encoding", ""))
+            for candidate, _ in ENCODINGS:
+                if candidate in accepted and candidate in entry.variants:
+                    encoding, variant = candidate, entry.variants[candidate]
+                    break
+
+        etag = variant.etag if variant is not None else entry.etag
+        headers["ETag"] = etag
+
+        if self._not_modified(request, entry, etag):
+            self.stats["not_modified"] += 1
+            return Response(status_code=304, headers=headers)
+
+        if range_header:
+            if_range = request.headers.get("if-range")
+            if if_range is None or if_range.strip() in (entry.etag, entry.last_modified):
+                return await self._range_response(entry, range_header, headers)
+
+        if variant is not None:
+            self.stats["compressed"] += 1
+            headers["Content-Encoding"] = encoding
+            return await self._body_response(variant.path, variant.size, etag, entry.content_type, headers)
+        return await self._body_response(entry.path, entry.size, etag, entry.content_type, headers)
+
+    async def _body_response(
+        self,
+        path: Path,
+        size: int,
+        etag: str,
+        content_type: str,
+        headers: Dict[str, str]
+    ) -> Response:
+        if size <= self.cache_max_file_bytes:
+            body = await self._read_cached(path, etag)
+            return Response(content=body, media_type=content_type, headers=headers)
+        headers["Content-Length"] = str(size)
+        return StreamingResponse(_iter_file(path, 0, size), media_type=content_type, headers=headers)
+
+    async def _range_response(self, entry: AssetEntry, range_header: str, headers: Dict[str, str]) -> Response:
+        try:
+            byte_range = _parse_range(range_header, entry.size)
+        except ValueError:
+            # Unsupported or malformed ranges are ignored, per RFC 9110
+            return await self._body_response(entry.path, entry.size, entry.etag, entry.content_type, headers)
+        if byte_range is None:
+            headers["Content-Range"] = f"bytes */{entry.size}"
+            return Response(status_code=416, headers=headers)
+
+        start, end = byte_range
+        length = end - start + 1
+        self.stats["partial"] += 1
+        headers["Content-Range"] = f"bytes {start}-{end}/{entry.size}"
+        headers["Content-Length"] = str(length)
+        if entry.size <= self.cache_max_file_bytes:
+            body = await self._read_cached(entry.path, entry.etag)
+            return Response(
+                content=body[start:end + 1], status_code=206, media_type=entry.content_type, headers=headers
+            )
+        return StreamingResponse(
+            _iter_file(entry.path, start, length), status_code=206, media_type=entry.content_type, headers=headers
+        )
+
+    def get_stats(self) -> Dict[str, object]:
+        """Index size, cache usage and response counters"""
+        return {
+            "indexed_files": sum(len(entries) for entries in self._index.values()),
+            "cache_entries": len(self._cache),
+            "cache_bytes": self._cache_bytes,
+            **self.stats
+        }
+
+
+# Global asset server instance
+asset_server = AssetServer(
+    mounts={
+        "static": [LIVE2D_FRONTEND_PATH, LIVE2D_SAMPLES_PATH],
+        "assets": [LIVE2D_FRONTEND_PATH / "assets"],
+        "Core": [LIVE2D_FRONTEND_PATH / "Core"],
+        "Resources": [LIVE2D_FRONTEND_PATH / "Resources"]
+    },
+    max_age=settings.live2d_asset_max_age,
+    cache_size_bytes=settings.live2d_asset_cache_size_mb * 1024 * 1024,
+    cache_max_file_bytes=settings.live2d_asset_cache_max_file_kb * 1024,
+    revalidate=settings.debug
+)
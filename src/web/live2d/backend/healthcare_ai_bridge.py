@@ -305,7 +305,7 @@ class HealthcareAIBridge:
         user_context: Optional[Dict] = None
     ) -> Dict[str, Any]:
         """
-        Get response from Healthcare AI V2 backend using subprocess curl (simpler approach)
+        Get response from Healthcare AI V2 backend using async subprocess curl (simpler approach)
         """
         try:
             # Prepare request payload with user context
@@ -328,35 +328,41 @@ class HealthcareAIBridge:
             url = f"{self.healthcare_api_url}/api/v1/agents/chat"
             logger.info(f"🎯 Simple POST request to: {url}")
             
-            import subprocess
-            import json
-            
             # Convert payload to JSON string
             payload_json = json.dumps(payload)
             
-            # Use curl subprocess to avoid aiohttp session issues
-            cmd = [
+            # Use curl subprocess to avoid aiohttp session issues; run it
+            # without blocking the event loop (the STT server awaits this
+            # while other streams keep transcribing)
+            process = await asyncio.create_subprocess_exec(
                 "curl", "-X", "POST", url,
                 "-H", "Content-Type: application/json",
                 "-d", payload_json,
                 "--max-time", "30",
-                "--silent"
-            ]
-            
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=35)
+                "--silent",
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+            try:
+                stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=35)
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+                raise
+            stdout = stdout.decode("utf-8", errors="replace")
             
-            if result.returncode == 0 and result.stdout:
+            if process.returncode == 0 and stdout:
                 try:
-                    data = json.loads(result.stdout)
+                    data = json.loads(stdout)
                     logger.info(f"✅ Healthcare AI response received for agent: {data.get('agent_type')}")
                     return data
                 except json.JSONDecodeError as je:
                     logger.error(f"❌ JSON decode error: {je}")
-                    logger.error(f"📄 Raw response: {result.stdout}")
+                    logger.error(f"📄 Raw response: {stdout}")
                     return self._get_fallback_response(user_message, language)
             else:
-                logger.error(f"❌ Curl error: return code {result.returncode}")
-                logger.error(f"📄 Stderr: {result.stderr}")
+                logger.error(f"❌ Curl error: return code {process.returncode}")
+                logger.error(f"📄 Stderr: {stderr.decode('utf-8', errors='replace')}")
                 return self._get_fallback_response(user_message, language)
                 
         except Exception as e:
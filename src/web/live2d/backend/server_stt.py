@@ -4,21 +4,48 @@ Local STT Server with faster-whisper
 Provides offline speech-to-text for the Live2D chatbot
 """
 
-from fastapi import FastAPI, UploadFile, Form
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, UploadFile, Form, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
-import tempfile
-import subprocess
-import os
-import uuid
-import contextlib
+import json
+import time
 import logging
 
+from stt_engine import AudioDecodeError, EngineBusyError, TranscriptionEngine, decode_audio
+from stt_streaming import STREAM_FORMATS, StreamingSession, stream_metrics
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Local STT Server", version="1.0.0")
+# Choose a model:
+#  - "tiny" (~39MB) fastest but less accurate
+#  - "base" (~140MB) good balance, recommended for start
+#  - "small" (~460MB) better accuracy
+#  - "medium" (~1.5GB) even better
+#  - "large-v3" (~3GB) best accuracy
+# Parallelism: STT_WORKERS model instances, STT_MAX_PENDING queued requests
+engine = TranscriptionEngine.from_env()
+MODEL_SIZE = engine.model_size
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Load the Whisper worker pool (fully local)"""
+    try:
+        logger.info(f"🎧 Loading Whisper model: {MODEL_SIZE} x {engine.workers} workers")
+        await engine.start()
+        logger.info(f"✅ Whisper model loaded: {MODEL_SIZE}")
+    except ImportError:
+        logger.error("❌ faster-whisper not installed. Please run: pip install faster-whisper")
+    except Exception as e:
+        logger.error(f"❌ Error loading Whisper model: {e}")
+    yield
+    engine.shutdown()
+
+
+app = FastAPI(title="Local STT Server", version="1.0.0", lifespan=lifespan)
 
 # Enable CORS for all origins (adjust for production)
 app.add_middleware(
@@ -29,29 +56,6 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize Whisper model
-try:
-    from faster_whisper import WhisperModel
-    
-    # Choose a model:
-    #  - "tiny" (~39MB) fastest but less accurate
-    #  - "base" (~140MB) good balance, recommended for start
-    #  - "small" (~460MB) better accuracy
-    #  - "medium" (~1.5GB) even better
-    #  - "large-v3" (~3GB) best accuracy
-    MODEL_SIZE = os.environ.get("WHISPER_MODEL", "base")
-    
-    logger.info(f"🎧 Loading Whisper model: {MODEL_SIZE}")
-    model = WhisperModel(MODEL_SIZE, device="cpu", compute_type="int8")  # fully local
-    logger.info(f"✅ Whisper model loaded: {MODEL_SIZE}")
-    
-except ImportError as e:
-    logger.error("❌ faster-whisper not installed. Please run: pip install faster-whisper")
-    model = None
-except Exception as e:
-    logger.error(f"❌ Error loading Whisper model: {e}")
-    model = None
-
 # Language mapping for Whisper
 LANG_MAP = {
     "zh-HK": "zh",      # Cantonese -> Chinese (Whisper handles both)
@@ -61,48 +65,23 @@ LANG_MAP = {
     "zh": "zh"          # Chinese fallback
 }
 
-def convert_to_wav16k(input_file):
-    """Convert any audio file to 16kHz WAV using ffmpeg"""
-    output_file = tempfile.NamedTemporaryFile(delete=False, suffix=".wav").name
-    
-    try:
-        # Convert with ffmpeg to 16kHz mono WAV
-        cmd = [
-            "ffmpeg", "-y", "-i", input_file,
-            "-ac", "1",          # mono
-            "-ar", "16000",      # 16kHz sample rate
-            "-acodec", "pcm_s16le",  # 16-bit PCM
-            output_file
-        ]
-        
-        result = subprocess.run(
-            cmd, 
-            stdout=subprocess.DEVNULL, 
-            stderr=subprocess.DEVNULL, 
-            check=True
-        )
-        
-        return output_file
-        
-    except subprocess.CalledProcessError as e:
-        logger.error(f"❌ FFmpeg conversion failed: {e}")
-        raise Exception("Audio conversion failed. Make sure ffmpeg is installed.")
-    except FileNotFoundError:
-        logger.error("❌ FFmpeg not found. Please install ffmpeg.")
-        raise Exception("FFmpeg not found. Please install ffmpeg and ensure it's in PATH.")
-
 @app.get("/health")
 def health_check():
     """Health check endpoint"""
-    whisper_status = "available" if model else "not_available"
+    whisper_status = "available" if engine.ready else "not_available"
     
     return JSONResponse({
         "status": "healthy",
-        "whisper_model": MODEL_SIZE if model else None,
+        "whisper_model": MODEL_SIZE if engine.ready else None,
         "whisper_status": whisper_status,
-        "message": f"Local STT Server running with {MODEL_SIZE} model" if model else "Whisper model not loaded"
+        "message": f"Local STT Server running with {MODEL_SIZE} model" if engine.ready else "Whisper model not loaded"
     })
 
+@app.get("/stt/metrics")
+def stt_metrics():
+    """Worker pool queue depth, throughput and latency percentiles"""
+    return JSONResponse({**engine.get_metrics(), "streaming": stream_metrics.snapshot()})
+
 @app.post("/stt/stream")
 async def transcribe_audio_stream(audio: UploadFile, lang: str = Form("en-US")):
     """
@@ -110,77 +89,59 @@ async def transcribe_audio_stream(audio: UploadFile, lang: str = Form("en-US")):
     Accepts: WebM, MP3, WAV, M4A, etc.
     Returns: JSON with transcribed text
     """
-    if not model:
+    if not engine.ready:
         return JSONResponse(
             {"error": "Whisper model not available"}, 
             status_code=503
         )
     
-    # Get file extension from filename or default to webm
-    file_extension = ".webm"
-    if audio.filename:
-        _, ext = os.path.splitext(audio.filename)
-        if ext:
-            file_extension = ext
-    
-    # Save uploaded audio chunk
-    temp_input = tempfile.NamedTemporaryFile(delete=False, suffix=file_extension).name
+    request_start = time.perf_counter()
     
     try:
-        # Save uploaded data
         audio_data = await audio.read()
         if not audio_data:
             return JSONResponse({"text": ""})
-            
-        with open(temp_input, "wb") as f:
-            f.write(audio_data)
         
-        # Convert to WAV
-        temp_wav = convert_to_wav16k(temp_input)
+        # Decode in memory to 16kHz mono samples
+        decode_start = time.perf_counter()
+        samples = await decode_audio(audio_data, audio.filename)
+        engine.record_decode((time.perf_counter() - decode_start) * 1000)
         
         # Map language
         whisper_lang = LANG_MAP.get(lang, "en")
         
-        # Transcribe with Whisper
+        # Transcribe on a worker
         logger.info(f"🎧 Transcribing {len(audio_data)} bytes, language: {whisper_lang}")
-        
-        segments, info = model.transcribe(
-            temp_wav,
-            language=whisper_lang,
-            vad_filter=True,  # Voice Activity Detection
-            vad_parameters=dict(min_silence_duration_ms=200),
-            beam_size=1,      # Fast inference
-            best_of=1,        # Fast inference  
-            patience=0,       # Fast inference
-            temperature=0     # Deterministic
-        )
-        
-        # Extract text from segments
-        text = "".join(segment.text for segment in segments).strip()
+        result = await engine.transcribe(samples, language=whisper_lang)
+        text = result.text
         
         logger.info(f"🎧 Transcribed: '{text[:50]}{'...' if len(text) > 50 else ''}'")
         
         return JSONResponse({"text": text})
         
+    except EngineBusyError as e:
+        logger.warning(f"⚠️ STT request rejected: {e}")
+        return JSONResponse(
+            {"text": "", "error": str(e)},
+            status_code=503,
+            headers={"Retry-After": "1"}
+        )
+    except AudioDecodeError as e:
+        logger.error(f"❌ {e}")
+        return JSONResponse({"text": "", "error": str(e)})
     except Exception as e:
         logger.error(f"❌ Transcription error: {e}")
         return JSONResponse({"text": "", "error": str(e)})
-        
+    
     finally:
-        # Cleanup temporary files
-        with contextlib.suppress(Exception):
-            if 'temp_input' in locals():
-                os.remove(temp_input)
-        with contextlib.suppress(Exception):
-            if 'temp_wav' in locals():
-                os.remove(temp_wav)
+        engine.record_total((time.perf_counter() - request_start) * 1000)
 
 @app.post("/stt/file")
 async def transcribe_audio_file(audio: UploadFile, lang: str = Form("en-US")):
     """
     Transcribe a complete audio file (for testing)
     """
-    if not model:
+    if not engine.ready:
         return JSONResponse(
             {"error": "Whisper model not available"}, 
             status_code=503
@@ -190,14 +151,93 @@ async def transcribe_audio_file(audio: UploadFile, lang: str = Form("en-US")):
     # ... (implementation similar to stream endpoint)
     return await transcribe_audio_stream(audio, lang)
 
+async def forward_to_chat(text: str, language: str, session_id: str = None):
+    """Send a final transcript through the Healthcare AI bridge"""
+    from healthcare_ai_bridge import get_bridge
+    return await get_bridge().process_chat_message(text, language, session_id)
+
+@app.websocket("/stt/ws")
+async def transcribe_websocket(websocket: WebSocket):
+    """
+    Streaming transcription
+    
+    Protocol:
+        1. Client sends {"type": "start", "lang": "zh-HK", "format": "pcm16",
+           "sample_rate": 48000, "session_id": "...", "forward": true}
+           format is "pcm16" (raw 16-bit mono PCM) or "opus"/"webm"/"ogg"
+           (MediaRecorder output)
+        2. Client streams audio as binary frames
+        3. Server sends {"type": "partial"|"final", "segment": n, "text": ...}
+           and, when forwarding, {"type": "agent_response", "segment": n, ...}
+        4. Client sends {"type": "stop"}; server flushes and replies
+           {"type": "done"}
+    """
+    await websocket.accept()
+    if not engine.ready:
+        await websocket.send_json({"type": "error", "error": "Whisper model not available"})
+        await websocket.close(code=1013)
+        return
+    
+    session = None
+    try:
+        start = await websocket.receive_json()
+        audio_format = start.get("format", "pcm16")
+        if start.get("type") != "start" or audio_format not in STREAM_FORMATS:
+            await websocket.send_json({
+                "type": "error",
+                "error": f"Expected a start message with format in {sorted(STREAM_FORMATS)}"
+            })
+            await websocket.close(code=1003)
+            return
+        
+        lang = start.get("lang", "en-US")
+        session = StreamingSession(
+            engine,
+            websocket.send_json,
+            language=LANG_MAP.get(lang, "en"),
+            chat_language=lang,
+            session_id=start.get("session_id"),
+            forward=forward_to_chat if start.get("forward", True) else None
+        )
+        await session.start(audio_format, int(start.get("sample_rate", 16000)))
+        await websocket.send_json({"type": "ready"})
+        logger.info(f"🎧 Streaming STT started: {audio_format}, language: {lang}")
+        
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            if message.get("bytes"):
+                await session.feed(message["bytes"])
+            elif message.get("text"):
+                try:
+                    control = json.loads(message["text"])
+                except ValueError:
+                    continue
+                if isinstance(control, dict) and control.get("type") == "stop":
+                    break
+        
+        await session.finish()
+        session = None
+        await websocket.send_json({"type": "done"})
+        await websocket.close()
+        
+    except WebSocketDisconnect:
+        logger.info("🎧 Streaming STT client disconnected")
+    except Exception as e:
+        logger.error(f"❌ Streaming STT error: {e}")
+    finally:
+        if session is not None:
+            await session.close()
+
 if __name__ == "__main__":
     import uvicorn
     
     print("🎧 Starting Local STT Server...")
-    print(f"🎯 Whisper Model: {MODEL_SIZE}")
+    print(f"🎯 Whisper Model: {MODEL_SIZE} ({engine.workers} workers)")
     print(f"🌐 Server will run on: http://localhost:8790")
     print("📝 Install dependencies:")
-    print("   pip install fastapi uvicorn faster-whisper python-multipart")
+    print("   pip install fastapi uvicorn faster-whisper python-multipart numpy")
     print("   # Also need ffmpeg installed and in PATH")
     print("\n🚀 Starting server...")
     
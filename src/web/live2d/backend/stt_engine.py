@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+"""
+STT Transcription Engine
+Worker pool and in-memory audio decoding for the local STT server
+
+- One WhisperModel per worker; transcription runs in worker threads so the
+  event loop keeps serving requests
+- Bounded admission: requests beyond the pending limit are rejected instead
+  of piling up behind the models
+- Audio is decoded in memory: 16-bit WAV directly, anything else by piping
+  bytes through ffmpeg stdin/stdout
+- Queue depth, latency percentiles and real-time factor for monitoring
+"""
+
+import asyncio
+import io
+import logging
+import os
+import tempfile
+import time
+import wave
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+
+# Containers whose index may sit at the end of the file; ffmpeg cannot read
+# these from a pipe, so they are decoded from a temporary file instead
+SEEKABLE_CONTAINERS = {".m4a", ".mp4", ".mov", ".3gp"}
+
+# Fast, deterministic decoding options used by the STT endpoints
+DEFAULT_TRANSCRIBE_OPTIONS = dict(
+    vad_filter=True,
+    vad_parameters=dict(min_silence_duration_ms=200),
+    beam_size=1,
+    best_of=1,
+    patience=0,
+    temperature=0
+)
+
+
+class AudioDecodeError(Exception):
+    """Audio could not be decoded"""
+
+
+class EngineBusyError(Exception):
+    """Too many transcriptions are pending"""
+
+
+# ============================================================================
+# AUDIO DECODING
+# ============================================================================
+
+def pcm16_to_float32(data: bytes) -> np.ndarray:
+    """Convert little-endian 16-bit PCM to float32 samples in [-1, 1]"""
+    return np.frombuffer(data, dtype="<i2").astype(np.float32) / 32768.0
+
+
+def resample_linear(samples: np.ndarray, source_rate: int, target_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """Resample mono float32 audio with linear interpolation"""
+    if source_rate == target_rate or not len(samples):
+        return samples
+    duration = len(samples) / source_rate
+    target_length = int(round(duration * target_rate))
+    positions = np.linspace(0, len(samples) - 1, target_length, dtype=np.float64)
+    return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+
+
+def decode_wav(data: bytes) -> Optional[np.ndarray]:
+    """
+    Decode a 16-bit PCM WAV without ffmpeg
+
+    Returns:
+        16kHz mono float32 samples, or None if the WAV is not 16-bit PCM
+    """
+    try:
+        with wave.open(io.BytesIO(data), "rb") as wav:
+            if wav.getsampwidth() != 2 or wav.getcomptype() != "NONE":
+                return None
+            channels = wav.getnchannels()
+            rate = wav.getframerate()
+            frames = wav.readframes(wav.getnframes())
+    except (wave.Error, EOFError):
+        return None
+
+    samples = pcm16_to_float32(frames)
+    if channels > 1:
+        samples = samples[: len(samples) - len(samples) % channels].reshape(-1, channels).mean(axis=1)
+    return resample_linear(samples, rate)
+
+
+async def _run_ffmpeg(args: List[str], data: Optional[bytes]) -> bytes:
+    """Run ffmpeg and return its stdout"""
+    try:
+        process = await asyncio.create_subprocess_exec(
+            "ffmpeg", "-nostdin", "-hide_banner", "-loglevel", "error", *args,
+            stdin=asyncio.subprocess.PIPE if data is not None else asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+    except FileNotFoundError:
+        raise AudioDecodeError("FFmpeg not found. Please install ffmpeg and ensure it's in PATH.")
+
+    stdout, stderr = await process.communicate(data)
+    if process.returncode != 0:
+        detail = stderr.decode(errors="replace").strip().splitlines()
+        raise AudioDecodeError(f"Audio conversion failed: {detail[-1] if detail else process.returncode}")
+    return stdout
+
+
+_PCM_OUTPUT_ARGS = ["-ac", "1", "-ar", str(SAMPLE_RATE), "-f", "s16le", "-acodec", "pcm_s16le", "pipe:1"]
+
+
+async def decode_with_ffmpeg(data: bytes, input_format: Optional[str] = None) -> np.ndarray:
+    """
+    Decode any audio ffmpeg understands by piping it through stdin/stdout
+
+    Args:
+        data: Encoded audio
+        input_format: ffmpeg demuxer name (e.g. "s16le", "ogg"), if known
+    """
+    format_args = ["-f", input_format] if input_format else []
+    pcm = await _run_ffmpeg([*format_args, "-i", "pipe:0", *_PCM_OUTPUT_ARGS], data)
+    return pcm16_to_float32(pcm)
+
+
+async def _decode_from_file(data: bytes, suffix: str) -> np.ndarray:
+    """Decode a container that needs a seekable input"""
+    with tempfile.NamedTemporaryFile(suffix=suffix) as temp_input:
+        temp_input.write(data)
+        temp_input.flush()
+        pcm = await _run_ffmpeg(["-i", temp_input.name, *_PCM_OUTPUT_ARGS], None)
+    return pcm16_to_float32(pcm)
+
+
+async def decode_audio(data: bytes, filename: Optional[str] = None) -> np.ndarray:
+    """
+    Decode uploaded audio to 16kHz mono float32 samples
+
+    Args:
+        data: Encoded audio (WebM, Ogg, MP3, WAV, M4A, ...)
+        filename: Original filename, used to recognise seekable containers
+
+    Raises:
+        AudioDecodeError: If the audio cannot be decoded
+    """
+    if data[:4] == b"RIFF" and data[8:12] == b"WAVE":
+        samples = decode_wav(data)
+        if samples is not None:
+            return samples
+
+    extension = os.path.splitext(filename or "")[1].lower()
+    if extension in SEEKABLE_CONTAINERS:
+        return await _decode_from_file(data, extension)
+    return await decode_with_ffmpeg(data)
+
+
+# ============================================================================
+# METRICS
+# ============================================================================
+
+class LatencyWindow:
+    """Latency samples over a sliding window with percentile queries"""
+
+    def __init__(self, size: int = 1024):
+        self._samples: Deque[float] = deque(maxlen=size)
+
+    def record(self, value_ms: float):
+        self._samples.append(value_ms)
+
+    def snapshot(self) -> Dict[str, float]:
+        if not self._samples:
+            return {"count": 0, "p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+        ordered = sorted(self._samples)
+
+        def percentile(q: float) -> float:
+            return round(ordered[min(len(ordered) - 1, int(q / 100.0 * len(ordered)))], 2)
+
+        return {
+            "count": len(ordered),
+            "p50_ms": percentile(50),
+            "p95_ms": percentile(95),
+            "p99_ms": percentile(99),
+            "max_ms": round(ordered[-1], 2)
+        }
+
+
+# ============================================================================
+# TRANSCRIPTION ENGINE
+# ============================================================================
+
+@dataclass
+class TranscriptionResult:
+    """Result of one transcription"""
+    text: str
+    language: Optional[str]
+    audio_seconds: float
+    timings_ms: Dict[str, float] = field(default_factory=dict)
+
+
+class TranscriptionEngine:
+    """
+    Pool of WhisperModel instances served by worker threads
+
+    CTranslate2 releases the GIL during inference, so each worker thread runs
+    its own model in parallel with the others and with the event loop.
+    """
+
+    def __init__(
+        self,
+        model_size: str = "base",
+        workers: int = 1,
+        max_pending: Optional[int] = None,
+        cpu_threads: Optional[int] = None,
+        device: str = "cpu",
+        compute_type: str = "int8"
+    ):
+        """
+        Initialize engine (models are loaded by start())
+
+        Args:
+            model_size: Whisper model name
+            workers: Number of model instances / worker threads
+            max_pending: Maximum transcriptions queued or running
+            cpu_threads: Inference threads per model
+            device: CTranslate2 device
+            compute_type: CTranslate2 compute type
+        """
+        self.model_size = model_size
+        self.workers = max(1, workers)
+        self.max_pending = max_pending or self.workers * 4
+        self.cpu_threads = cpu_threads or max(1, (os.cpu_count() or 1) // self.workers)
+        self.device = device
+        self.compute_type = compute_type
+
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="stt-worker")
+        self._models: List[Any] = []
+        self._idle_models: Optional[asyncio.Queue] = None
+        self.ready = False
+
+        # Metrics
+        self.pending = 0
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.audio_seconds = 0.0
+        self.transcribe_seconds = 0.0
+        self.latency = {
+            "decode": LatencyWindow(),
+            "queue_wait": LatencyWindow(),
+            "transcribe": LatencyWindow(),
+            "total": LatencyWindow()
+        }
+
+    @classmethod
+    def from_env(cls) -> "TranscriptionEngine":
+        """Create an engine configured from environment variables"""
+        workers = int(os.environ.get("STT_WORKERS", max(1, (os.cpu_count() or 2) // 2)))
+        max_pending = os.environ.get("STT_MAX_PENDING")
+        cpu_threads = os.environ.get("STT_CPU_THREADS")
+        return cls(
+            model_size=os.environ.get("WHISPER_MODEL", "base"),
+            workers=workers,
+            max_pending=int(max_pending) if max_pending else None,
+            cpu_threads=int(cpu_threads) if cpu_threads else None
+        )
+
+    async def start(self):
+        """Load one model per worker"""
+        from faster_whisper import WhisperModel
+
+        loop = asyncio.get_running_loop()
+        self._models = await asyncio.gather(*[
+            loop.run_in_executor(
+                self._executor,
+                lambda: WhisperModel(
+                    self.model_size,
+                    device=self.device,
+                    compute_type=self.compute_type,
+                    cpu_threads=self.cpu_threads
+                )
+            )
+            for _ in range(self.workers)
+        ])
+        self._idle_models = asyncio.Queue()
+        for model in self._models:
+            self._idle_models.put_nowait(model)
+        self.ready = True
+
+    def shutdown(self):
+        """Stop the worker threads"""
+        self.ready = False
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def transcribe(
+        self,
+        samples: np.ndarray,
+        language: Optional[str] = None,
+        **options: Any
+    ) -> TranscriptionResult:
+        """
+        Transcribe 16kHz mono float32 samples on a free worker
+
+        Args:
+            samples: Audio samples
+            language: Whisper language code
+            **options: Overrides for DEFAULT_TRANSCRIBE_OPTIONS
+
+        Raises:
+            EngineBusyError: If max_pending transcriptions are already waiting
+        """
+        if not self.ready:
+            raise RuntimeError("Transcription engine not started")
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise EngineBusyError("STT engine busy")
+
+        self.pending += 1
+        queued_at = time.perf_counter()
+        try:
+            model = await self._idle_models.get()
+        except BaseException:
+            self.pending -= 1
+            raise
+        started_at = time.perf_counter()
+        self.in_flight += 1
+
+        # The model goes back to the pool when its thread finishes, not when
+        # this coroutine stops waiting: a cancelled caller must not hand a
+        # model that is still running to the next request
+        loop = asyncio.get_running_loop()
+        try:
+            future = self._executor.submit(
+                self._run_model, model, samples, language, {**DEFAULT_TRANSCRIBE_OPTIONS, **options}
+            )
+        except BaseException:
+            self.failed += 1
+            self._release_model(model)
+            raise
+        future.add_done_callback(lambda _: self._release_model_threadsafe(loop, model))
+
+        try:
+            text, detected_language = await asyncio.wrap_future(future)
+        except Exception:
+            self.failed += 1
+            raise
+
+        finished_at = time.perf_counter()
+        audio_seconds = len(samples) / SAMPLE_RATE
+        timings = {
+            "queue_wait": (started_at - queued_at) * 1000,
+            "transcribe": (finished_at - started_at) * 1000
+        }
+        self.latency["queue_wait"].record(timings["queue_wait"])
+        self.latency["transcribe"].record(timings["transcribe"])
+        self.completed += 1
+        self.audio_seconds += audio_seconds
+        self.transcribe_seconds += finished_at - started_at
+
+        return TranscriptionResult(
+            text=text,
+            language=detected_language,
+            audio_seconds=audio_seconds,
+            timings_ms=timings
+        )
+
+    def _release_model(self, model: Any):
+        """Return a model to the pool once its worker thread is done with it"""
+        self.in_flight -= 1
+        self.pending -= 1
+        self._idle_models.put_nowait(model)
+
+    def _release_model_threadsafe(self, loop: asyncio.AbstractEventLoop, model: Any):
+        """Done-callback of a worker future (runs on the worker thread)"""
+        try:
+            loop.call_soon_threadsafe(self._release_model, model)
+        except RuntimeError:
+            pass  # Event loop already closed
+
+    @staticmethod
+    def _run_model(model: Any, samples: np.ndarray, language: Optional[str], options: Dict[str, Any]):
+        """Run inference in a worker thread (segments are generated lazily)"""
+        segments, info = model.transcribe(samples, language=language, **options)
+        text = "".join(segment.text for segment in segments).strip()
+        return text, getattr(info, "language", language)
+
+    def record_decode(self, elapsed_ms: float):
+        """Record time spent decoding an upload"""
+        self.latency["decode"].record(elapsed_ms)
+
+    def record_total(self, elapsed_ms: float):
+        """Record end-to-end request time"""
+        self.latency["total"].record(elapsed_ms)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Queue depth, throughput and latency metrics"""
+        return {
+            "model": self.model_size,
+            "ready": self.ready,
+            "workers": self.workers,
+            "cpu_threads_per_worker": self.cpu_threads,
+            "busy_workers": self.in_flight,
+            "queue_depth": self.pending - self.in_flight,
+            "max_pending": self.max_pending,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "audio_seconds": round(self.audio_seconds, 2),
+            "real_time_factor": (
+                round(self.transcribe_seconds / self.audio_seconds, 3) if self.audio_seconds else None
+            ),
+            "latency": {name: window.snapshot() for name, window in self.latency.items()}
+        }
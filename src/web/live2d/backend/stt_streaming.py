@@ -0,0 +1,496 @@
+#!/usr/bin/env python3
+"""
+Streaming STT
+Incremental speech-to-text over WebSocket for the local STT server
+
+- Continuous audio in: raw 16-bit PCM frames, or Opus in a WebM/Ogg
+  container as produced by MediaRecorder (decoded by a long-running ffmpeg)
+- Energy-based voice activity detection splits the stream into utterances
+- Partial transcripts while the user is still speaking, a final transcript
+  as soon as the utterance ends
+- Finals can be forwarded straight into the Live2D chat pipeline
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+import numpy as np
+
+from stt_engine import (
+    SAMPLE_RATE,
+    EngineBusyError,
+    LatencyWindow,
+    TranscriptionEngine,
+    pcm16_to_float32
+)
+
+logger = logging.getLogger(__name__)
+
+# Stream formats accepted in the start message, mapped to ffmpeg demuxers
+# (None means raw PCM handled without ffmpeg)
+STREAM_FORMATS = {
+    "pcm16": None,
+    "opus": "webm",
+    "webm": "webm",
+    "ogg": "ogg"
+}
+
+# Utterances are already segmented, so Whisper's own VAD is skipped
+PARTIAL_OPTIONS = dict(vad_filter=False, without_timestamps=True, condition_on_previous_text=False)
+FINAL_OPTIONS = dict(vad_filter=False, condition_on_previous_text=False)
+
+SendMessage = Callable[[Dict[str, Any]], Awaitable[None]]
+ForwardFinal = Callable[[str, str, Optional[str]], Awaitable[Dict[str, Any]]]
+
+
+class VADSegmenter:
+    """
+    Split a stream of 16kHz samples into utterances
+
+    A frame counts as speech when its RMS energy is well above an adaptive
+    noise floor. An utterance starts after a short run of speech frames (with
+    some pre-roll kept so word onsets are not clipped) and ends after a run of
+    silence, or when it reaches the maximum length.
+    """
+
+    def __init__(
+        self,
+        frame_ms: int = 30,
+        start_ms: int = 90,
+        end_silence_ms: int = 600,
+        pre_roll_ms: int = 300,
+        max_segment_seconds: float = 15.0,
+        energy_ratio: float = 3.0,
+        min_energy: float = 0.005
+    ):
+        self.frame_size = SAMPLE_RATE * frame_ms // 1000
+        self.frame_ms = frame_ms
+        self.start_frames = max(1, start_ms // frame_ms)
+        self.end_silence_ms = end_silence_ms
+        self.max_segment_frames = int(max_segment_seconds * 1000 / frame_ms)
+        self.energy_ratio = energy_ratio
+        self.min_energy = min_energy
+
+        self.noise_floor = min_energy
+        self.in_speech = False
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._pre_roll: Deque[np.ndarray] = deque(maxlen=max(1, pre_roll_ms // frame_ms))
+        self._speech_run = 0
+        self._silence_ms = 0
+        self._segment: List[np.ndarray] = []
+
+    def _is_speech(self, frame: np.ndarray) -> bool:
+        energy = float(np.sqrt(np.mean(frame * frame)))
+        speech = energy > max(self.min_energy, self.noise_floor * self.energy_ratio)
+        if not speech:
+            self.noise_floor = 0.95 * self.noise_floor + 0.05 * max(energy, self.min_energy / 10)
+        return speech
+
+    def feed(self, samples: np.ndarray) -> List[np.ndarray]:
+        """
+        Add samples to the stream
+
+        Returns:
+            Utterances completed by these samples
+        """
+        completed: List[np.ndarray] = []
+        buffer = np.concatenate([self._pending, samples]) if len(self._pending) else samples
+        usable = len(buffer) - len(buffer) % self.frame_size
+
+        for start in range(0, usable, self.frame_size):
+            frame = buffer[start:start + self.frame_size]
+            speech = self._is_speech(frame)
+
+            if not self.in_speech:
+                self._pre_roll.append(frame)
+                self._speech_run = self._speech_run + 1 if speech else 0
+                if self._speech_run >= self.start_frames:
+                    self.in_speech = True
+                    self._segment = list(self._pre_roll)
+                    self._pre_roll.clear()
+                    self._silence_ms = 0
+                continue
+
+            self._segment.append(frame)
+            self._silence_ms = 0 if speech else self._silence_ms + self.frame_ms
+            if self._silence_ms >= self.end_silence_ms or len(self._segment) >= self.max_segment_frames:
+                completed.append(self._close_segment())
+
+        self._pending = buffer[usable:].copy()
+        return completed
+
+    def _close_segment(self) -> np.ndarray:
+        segment = np.concatenate(self._segment)
+        self._segment = []
+        self.in_speech = False
+        self._speech_run = 0
+        self._silence_ms = 0
+        return segment
+
+    @property
+    def speech_seconds(self) -> float:
+        """Length of the utterance in progress"""
+        return len(self._segment) * self.frame_ms / 1000 if self.in_speech else 0.0
+
+    def current_segment(self) -> Optional[np.ndarray]:
+        """Audio of the utterance in progress, if any"""
+        return np.concatenate(self._segment) if self.in_speech and self._segment else None
+
+    def flush(self) -> Optional[np.ndarray]:
+        """End the stream, returning the utterance in progress if any"""
+        return self._close_segment() if self.in_speech and self._segment else None
+
+
+class StreamingDecoder:
+    """Long-running ffmpeg process decoding a container stream to 16kHz PCM"""
+
+    def __init__(self, container: str, on_samples: Callable[[np.ndarray], Awaitable[None]]):
+        """
+        Args:
+            container: ffmpeg demuxer for the incoming stream ("webm" or "ogg")
+            on_samples: Coroutine called with each block of decoded samples
+        """
+        self.container = container
+        self._on_samples = on_samples
+        self._process: Optional[asyncio.subprocess.Process] = None
+        self._reader: Optional[asyncio.Task] = None
+
+    async def start(self):
+        self._process = await asyncio.create_subprocess_exec(
+            "ffmpeg", "-nostdin", "-hide_banner", "-loglevel", "error",
+            "-fflags", "nobuffer", "-f", self.container, "-i", "pipe:0",
+            "-ac", "1", "-ar", str(SAMPLE_RATE), "-f", "s16le", "-acodec", "pcm_s16le", "pipe:1",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL
+        )
+        self._reader = asyncio.create_task(self._read())
+
+    async def _read(self):
+        remainder = b""
+        while True:
+            chunk = await self._process.stdout.read(SAMPLE_RATE // 5 * 2)
+            if not chunk:
+                break
+            chunk = remainder + chunk
+            usable = len(chunk) - len(chunk) % 2
+            remainder = chunk[usable:]
+            await self._on_samples(pcm16_to_float32(chunk[:usable]))
+
+    async def feed(self, data: bytes):
+        self._process.stdin.write(data)
+        await self._process.stdin.drain()
+
+    async def close(self):
+        """Finish decoding buffered input and stop ffmpeg"""
+        if self._process is None:
+            return
+        if not self._process.stdin.is_closing():
+            self._process.stdin.close()
+        try:
+            await asyncio.wait_for(self._reader, timeout=5)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            self._reader.cancel()
+        if self._process.returncode is None:
+            self._process.kill()
+        await self._process.wait()
+
+
+class StreamResampler:
+    """
+    Linear-interpolation resampler for audio arriving in chunks
+
+    Output sample positions continue across chunk boundaries: the last input
+    sample and the fractional position of the next output sample are carried
+    over, so chunked output matches resampling the whole stream at once.
+    """
+
+    def __init__(self, source_rate: int, target_rate: int = SAMPLE_RATE):
+        self.step = source_rate / target_rate
+        self._tail: Optional[np.ndarray] = None
+        self._position = 0.0
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        """Resample the next chunk of the stream"""
+        if self.step == 1.0 or not len(samples):
+            return samples
+        buffer = samples if self._tail is None else np.concatenate([self._tail, samples])
+        last_index = len(buffer) - 1
+        count = int((last_index - self._position) // self.step) + 1 if self._position <= last_index else 0
+        positions = self._position + self.step * np.arange(count, dtype=np.float64)
+        resampled = np.interp(positions, np.arange(len(buffer)), buffer).astype(np.float32)
+        # The next chunk's buffer starts at this chunk's last sample
+        self._position += self.step * count - last_index
+        self._tail = buffer[-1:].copy()
+        return resampled
+
+
+class PCMStreamDecoder:
+    """Decoder for raw little-endian 16-bit mono PCM frames"""
+
+    def __init__(self, sample_rate: int, on_samples: Callable[[np.ndarray], Awaitable[None]]):
+        self.sample_rate = sample_rate
+        self._on_samples = on_samples
+        self._remainder = b""
+        self._resampler = StreamResampler(sample_rate)
+
+    async def start(self):
+        pass
+
+    async def feed(self, data: bytes):
+        data = self._remainder + data
+        usable = len(data) - len(data) % 2
+        self._remainder = data[usable:]
+        await self._on_samples(self._resampler.process(pcm16_to_float32(data[:usable])))
+
+    async def close(self):
+        pass
+
+
+class StreamingMetrics:
+    """Counters and latencies shared by all streaming sessions"""
+
+    def __init__(self):
+        self.active_streams = 0
+        self.streams = 0
+        self.partials = 0
+        self.skipped_partials = 0
+        self.finals = 0
+        self.forwarded = 0
+        self.final_latency = LatencyWindow()
+        self.forward_latency = LatencyWindow()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "active_streams": self.active_streams,
+            "streams": self.streams,
+            "partials": self.partials,
+            "skipped_partials": self.skipped_partials,
+            "finals": self.finals,
+            "forwarded": self.forwarded,
+            "final_latency": self.final_latency.snapshot(),
+            "forward_latency": self.forward_latency.snapshot()
+        }
+
+
+stream_metrics = StreamingMetrics()
+
+
+class StreamingSession:
+    """
+    One client audio stream
+
+    Decoded audio goes through the VAD segmenter. Completed utterances are
+    transcribed in order by a single final-transcript task; partials are
+    best-effort and skipped whenever they would compete with finals for a
+    worker. Finals are optionally forwarded to the chat pipeline, and the
+    agent response is sent back on the same stream.
+    """
+
+    def __init__(
+        self,
+        engine: TranscriptionEngine,
+        send: SendMessage,
+        language: Optional[str] = None,
+        chat_language: str = "auto",
+        session_id: Optional[str] = None,
+        forward: Optional[ForwardFinal] = None,
+        partial_interval: float = 0.8,
+        segmenter: Optional[VADSegmenter] = None
+    ):
+        """
+        Args:
+            engine: Shared transcription engine
+            send: Coroutine sending a JSON message to the client
+            language: Whisper language code (None to auto-detect)
+            chat_language: Language passed to the chat pipeline
+            session_id: Chat session the finals belong to
+            forward: Coroutine taking (text, chat_language, session_id) and
+                returning the agent response, or None to only transcribe
+            partial_interval: Seconds of new speech between partials
+            segmenter: Custom segmenter (defaults to VADSegmenter())
+        """
+        self.engine = engine
+        self.language = language
+        self.chat_language = chat_language
+        self.session_id = session_id
+        self.segmenter = segmenter or VADSegmenter()
+        self.partial_interval = partial_interval
+
+        self._send = send
+        self._send_lock = asyncio.Lock()
+        self._forward = forward
+        self._decoder = None
+        self._segment_index = 0
+        self._last_partial_seconds = 0.0
+        self._partial_task: Optional[asyncio.Task] = None
+        self._finals: asyncio.Queue = asyncio.Queue()
+        self._final_task: Optional[asyncio.Task] = None
+        self._forward_tasks: set = set()
+        self._closed = False
+
+    async def start(self, audio_format: str = "pcm16", sample_rate: int = SAMPLE_RATE):
+        """
+        Start decoding
+
+        Args:
+            audio_format: One of STREAM_FORMATS
+            sample_rate: Sample rate of pcm16 input
+
+        Raises:
+            ValueError: If the format is not supported
+        """
+        if audio_format not in STREAM_FORMATS:
+            raise ValueError(f"Unsupported stream format: {audio_format}")
+        container = STREAM_FORMATS[audio_format]
+        if container is None:
+            self._decoder = PCMStreamDecoder(sample_rate, self._on_samples)
+        else:
+            self._decoder = StreamingDecoder(container, self._on_samples)
+        await self._decoder.start()
+        self._final_task = asyncio.create_task(self._final_loop())
+        stream_metrics.active_streams += 1
+        stream_metrics.streams += 1
+
+    async def feed(self, data: bytes):
+        """Add a binary audio frame from the client"""
+        await self._decoder.feed(data)
+
+    async def finish(self):
+        """End of stream: finalize the last utterance and wait for all output"""
+        await self._decoder.close()
+        tail = self.segmenter.flush()
+        if tail is not None:
+            self._queue_final(tail)
+        self._finals.put_nowait(None)
+        await self._final_task
+        if self._forward_tasks:
+            await asyncio.gather(*self._forward_tasks, return_exceptions=True)
+        await self._settle_partial()
+        self._closed = True
+        stream_metrics.active_streams -= 1
+        self._final_task = None
+
+    async def close(self):
+        """
+        Abort the stream (client went away)
+
+        An in-flight partial is left to finish on its worker (its result is
+        discarded) rather than cancelled in the middle of inference.
+        """
+        self._closed = True
+        if self._decoder is not None:
+            await self._decoder.close()
+        for task in [self._final_task, *self._forward_tasks]:
+            if task is not None and not task.done():
+                task.cancel()
+        if self._final_task is not None:
+            stream_metrics.active_streams -= 1
+            self._final_task = None
+
+    async def _settle_partial(self):
+        """Wait for an in-flight partial; it never runs longer than one short transcription"""
+        if self._partial_task is not None and not self._partial_task.done():
+            await asyncio.wait([self._partial_task])
+
+    async def _emit(self, message: Dict[str, Any]):
+        if self._closed:
+            return
+        async with self._send_lock:
+            await self._send(message)
+
+    async def _on_samples(self, samples: np.ndarray):
+        for segment in self.segmenter.feed(samples):
+            self._queue_final(segment)
+        self._maybe_start_partial()
+
+    def _queue_final(self, segment: np.ndarray):
+        self._finals.put_nowait((self._segment_index, segment, time.perf_counter()))
+        self._segment_index += 1
+        self._last_partial_seconds = 0.0
+
+    def _maybe_start_partial(self):
+        if self._closed:
+            return
+        speech_seconds = self.segmenter.speech_seconds
+        if speech_seconds - self._last_partial_seconds < self.partial_interval:
+            return
+        if self._partial_task is not None and not self._partial_task.done():
+            return
+        # Never queue a partial behind other work: finals take priority
+        if self.engine.pending >= self.engine.workers or not self._finals.empty():
+            stream_metrics.skipped_partials += 1
+            return
+        audio = self.segmenter.current_segment()
+        if audio is None:
+            return
+        self._last_partial_seconds = speech_seconds
+        self._partial_task = asyncio.create_task(self._partial(self._segment_index, audio))
+
+    async def _partial(self, index: int, audio: np.ndarray):
+        try:
+            result = await self.engine.transcribe(audio, language=self.language, **PARTIAL_OPTIONS)
+        except EngineBusyError:
+            stream_metrics.skipped_partials += 1
+            return
+        except Exception as e:
+            logger.warning(f"Partial transcription failed: {e}")
+            return
+        # Drop partials overtaken by the final for the same utterance
+        if index == self._segment_index and result.text:
+            stream_metrics.partials += 1
+            await self._emit({"type": "partial", "segment": index, "text": result.text})
+
+    async def _final_loop(self):
+        while True:
+            item = await self._finals.get()
+            if item is None:
+                return
+            index, audio, ended_at = item
+            result = await self._transcribe_final(audio)
+            if result is None:
+                await self._emit({"type": "error", "segment": index, "error": "Transcription failed"})
+                continue
+
+            stream_metrics.finals += 1
+            stream_metrics.final_latency.record((time.perf_counter() - ended_at) * 1000)
+            await self._emit({
+                "type": "final",
+                "segment": index,
+                "text": result.text,
+                "language": result.language,
+                "audio_seconds": round(result.audio_seconds, 2)
+            })
+
+            if self._forward is not None and result.text:
+                task = asyncio.create_task(self._forward_final(index, result.text))
+                self._forward_tasks.add(task)
+                task.add_done_callback(self._forward_tasks.discard)
+
+    async def _transcribe_final(self, audio: np.ndarray, attempts: int = 5):
+        """Transcribe an utterance, waiting out a full engine queue"""
+        for attempt in range(attempts):
+            try:
+                return await self.engine.transcribe(audio, language=self.language, **FINAL_OPTIONS)
+            except EngineBusyError:
+                await asyncio.sleep(0.2 * (attempt + 1))
+            except Exception as e:
+                logger.error(f"Final transcription failed: {e}")
+                return None
+        logger.error("Final transcription dropped: STT engine busy")
+        return None
+
+    async def _forward_final(self, index: int, text: str):
+        started = time.perf_counter()
+        try:
+            response = await self._forward(text, self.chat_language, self.session_id)
+        except Exception as e:
+            logger.error(f"Forwarding transcript to chat failed: {e}")
+            await self._emit({"type": "error", "segment": index, "error": "Chat pipeline unavailable"})
+            return
+        stream_metrics.forwarded += 1
+        stream_metrics.forward_latency.record((time.perf_counter() - started) * 1000)
+        await self._emit({"type": "agent_response", "segment": index, "text": text, "response": response})
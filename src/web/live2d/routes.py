@@ -24,6 +24,7 @@ from pydantic import BaseModel, Field
 # from ...agents.context_manager import ConversationContextManager
 from ...core.logging import get_logger
 from ..auth.dependencies import get_optional_user
+from .assets import asset_server
 from .backend.healthcare_ai_bridge import HealthcareAIBridge
 
 logger = get_logger(__name__)
@@ -391,22 +392,16 @@ async def switch_background(request: BackgroundSwitchRequest):
         raise HTTPException(status_code=500, detail=f"Failed to switch background: {str(e)}")
 
 
-# Static file serving for Live2D assets
+# Static file serving for Live2D assets (indexed, cached, precompressed)
 @live2d_router.get("/static/{file_path:path}")
-async def serve_live2d_static(file_path: str):
+async def serve_live2d_static(file_path: str, request: Request):
     """Serve Live2D static files (models, textures, etc.)"""
     try:
-        # Try frontend directory first
-        full_path = LIVE2D_STATIC_PATH / file_path
-        if full_path.exists() and full_path.is_file():
-            return FileResponse(full_path)
-        
-        # Fallback to samples directory for Live2D core files
-        fallback_path = LIVE2D_SAMPLES_PATH / file_path
-        if fallback_path.exists() and fallback_path.is_file():
-            return FileResponse(fallback_path)
-            
-        raise HTTPException(status_code=404, detail=f"File not found: {file_path}")
+        # Frontend directory first, then samples directory for Live2D core files
+        response = await asset_server.respond("static", file_path, request)
+        if response is None:
+            raise HTTPException(status_code=404, detail=f"File not found: {file_path}")
+        return response
     except HTTPException:
         raise
     except Exception as e:
@@ -415,14 +410,13 @@ async def serve_live2d_static(file_path: str):
 
 # Additional route to serve frontend assets directly
 @live2d_router.get("/assets/{file_path:path}")
-async def serve_live2d_assets(file_path: str):
+async def serve_live2d_assets(file_path: str, request: Request):
     """Serve Live2D frontend assets (CSS, JS, images, etc.)"""
     try:
-        full_path = LIVE2D_STATIC_PATH / "assets" / file_path
-        if full_path.exists() and full_path.is_file():
-            return FileResponse(full_path)
-        else:
+        response = await asset_server.respond("assets", file_path, request)
+        if response is None:
             raise HTTPException(status_code=404, detail=f"Asset not found: {file_path}")
+        return response
     except HTTPException:
         raise
     except Exception as e:
@@ -431,30 +425,28 @@ async def serve_live2d_assets(file_path: str):
 
 # Route to serve Core Live2D files
 @live2d_router.get("/Core/{file_path:path}")
-async def serve_live2d_core(file_path: str):
+async def serve_live2d_core(file_path: str, request: Request):
     """Serve Live2D Core engine files"""
     try:
-        full_path = LIVE2D_STATIC_PATH / "Core" / file_path
-        if full_path.exists() and full_path.is_file():
-            return FileResponse(full_path)
-        else:
+        response = await asset_server.respond("Core", file_path, request)
+        if response is None:
             raise HTTPException(status_code=404, detail=f"Core file not found: {file_path}")
+        return response
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Error serving Core file {file_path}: {e}")
         raise HTTPException(status_code=500, detail="Error serving Core file")
 
-# Route to serve Resources (models, textures, etc.)
+# Route to serve Resources (models, textures, backgrounds, etc.)
 @live2d_router.get("/Resources/{file_path:path}")
-async def serve_live2d_resources(file_path: str):
+async def serve_live2d_resources(file_path: str, request: Request):
     """Serve Live2D Resources (models, textures, backgrounds, etc.)"""
     try:
-        full_path = LIVE2D_STATIC_PATH / "Resources" / file_path
-        if full_path.exists() and full_path.is_file():
-            return FileResponse(full_path)
-        else:
+        response = await asset_server.respond("Resources", file_path, request)
+        if response is None:
             raise HTTPException(status_code=404, detail=f"Resource not found: {file_path}")
+        return response
     except HTTPException:
         raise
     except Exception as e:
@@ -483,7 +475,8 @@ async def live2d_health_check():
                 "live2d_core": {"status": "available" if core_exists else "missing"},
                 "live2d_models": {"status": "available" if models_exist else "missing"},
                 "healthcare_ai": {"status": "connected" if healthcare_ai_status else "disconnected"},
-                "websocket_connections": {"active": len(connection_manager.active_connections)}
+                "websocket_connections": {"active": len(connection_manager.active_connections)},
+                "static_assets": asset_server.get_stats()
             },
             "version": "2.0.0"
         }
@@ -572,6 +565,9 @@ async def startup_live2d():
         if not LIVE2D_RESOURCES_PATH.exists():
             logger.warning(f"Live2D resources path not found: {LIVE2D_RESOURCES_PATH}")
         
+        # Index static assets so requests resolve without filesystem probes
+        asset_server.build_index()
+        
         logger.info("✅ Live2D integration system initialized successfully")
         
     except Exception as e:
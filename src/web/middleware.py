@@ -311,6 +311,10 @@ class CacheControlMiddleware(BaseHTTPMiddleware):
     async def dispatch(self, request: Request, call_next: Callable) -> Response:
         response = await call_next(request)
         
+        # Keep explicit policies set by the endpoint (e.g. Live2D asset routes)
+        if "cache-control" in response.headers:
+            return response
+        
         # Apply cache control based on path
         path = request.url.path
         
@@ -17,14 +17,13 @@ Features:
 """
 
 import asyncio
-import json
 import logging
 import time
 import uuid
-from typing import Any, Dict, List, Optional, Set
-from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Set, Union
+from datetime import datetime
 from enum import Enum
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, field, asdict
 
 from fastapi import WebSocket, WebSocketDisconnect, HTTPException, status
 from fastapi.security import HTTPBearer
@@ -39,9 +38,14 @@ from src.database.connection import get_async_db
 from src.web.auth.handlers import AuthHandler
 from src.agents.orchestrator import AgentOrchestrator
 from src.agents.base_agent import AgentContext
+from src.agents.chat_turn import ChatTurnPipeline
 from src.agents.emotion_mapper import EmotionMapper
 from src.agents.gesture_library import GestureLibrary
 from src.integrations.live2d_client import Live2DMessageFormatter
+from src.web.websockets.outbound import ConnectionSender, SlowConsumerPolicy, coalesce_key_for
+from src.web.websockets.protocol import WireCodec, dumps_json, loads_frame, negotiate_protocol
+from src.web.websockets.session_bus import SessionBus, SessionRecord, start_session_bus
+from src.web.websockets.timer_wheel import HashedTimerWheel
 
 
 logger = get_logger(__name__)
@@ -72,6 +76,7 @@ class MessageType(str, Enum):
     PONG = "pong"
     WELCOME = "welcome"
     EMERGENCY_ALERT = "emergency_alert"
+    EMERGENCY_CARD = "emergency_card"
 
 
 class ConnectionStatus(str, Enum):
@@ -135,6 +140,23 @@ class AgentResponse:
             self.timestamp = datetime.now().isoformat()
 
 
+@dataclass(slots=True)
+class ConnectionRecord:
+    """Per-connection state kept by the connection manager"""
+    client_ip: str
+    connected_at: datetime = field(default_factory=datetime.now)
+    status: ConnectionStatus = ConnectionStatus.CONNECTED
+    message_count: int = 0
+    last_activity: float = field(default_factory=time.monotonic)
+    user_id: Optional[str] = None
+    user_data: Dict[str, Any] = field(default_factory=dict)
+    language: str = "en"
+    client_type: str = "live2d"
+    conversation_history: List[Dict[str, Any]] = field(default_factory=list)
+    agent_context: Dict[str, Any] = field(default_factory=dict)
+    codec: WireCodec = field(default_factory=WireCodec)
+
+
 # ============================================================================
 # CONNECTION MANAGER
 # ============================================================================
@@ -149,13 +171,20 @@ class ConnectionManager:
     - Rate limiting per connection
     - Session persistence
     - Connection recovery
+    - Cross-worker routing via the session bus
+    
+    Bookkeeping is indexed so connect, disconnect and expiry cost does not
+    grow with the number of open connections: sessions are indexed by IP,
+    and idle timeouts and heartbeats live in a hashed timer wheel instead
+    of being found by scanning every session.
     """
     
     def __init__(self):
         self.active_connections: Dict[str, WebSocket] = {}
-        self.connection_metadata: Dict[str, Dict[str, Any]] = {}
+        self.connection_metadata: Dict[str, ConnectionRecord] = {}
+        self.sessions_by_ip: Dict[str, Set[str]] = {}
         self.rate_limiters: Dict[str, RateLimiter] = {}
-        self.message_queues: Dict[str, List[Dict[str, Any]]] = {}
+        self.senders: Dict[str, ConnectionSender] = {}
         self.logger = get_logger(f"{__name__}.ConnectionManager")
         
         # Rate limiting configuration
@@ -163,6 +192,110 @@ class ConnectionManager:
         self.max_connections_per_ip = 10
         self.connection_timeout_minutes = 30
         
+        # Idle expiry and heartbeats
+        self.heartbeat_interval_seconds = 300
+        self.timers = HashedTimerWheel(tick_seconds=1.0)
+        self._timer_task: Optional[asyncio.Task] = None
+        
+        # Outbound queue configuration
+        self.send_queue_size = settings.websocket_send_queue_size
+        self.send_timeout_seconds = settings.websocket_send_timeout
+        self.slow_consumer_policy = SlowConsumerPolicy(settings.websocket_slow_consumer_policy)
+        
+        # Cross-worker session bus (started on first use)
+        self.session_bus: Optional[SessionBus] = None
+        self._session_bus_lock = asyncio.Lock()
+    
+    async def get_session_bus(self) -> SessionBus:
+        """Get the session bus, starting it on first use"""
+        if self.session_bus is None:
+            async with self._session_bus_lock:
+                if self.session_bus is None:
+                    self.session_bus = await start_session_bus(
+                        self._deliver_local, self._deliver_broadcast
+                    )
+                    self.logger.info(
+                        f"Session bus started: {self.session_bus.backend} "
+                        f"(node {self.session_bus.node_id})"
+                    )
+        return self.session_bus
+    
+    async def stop_session_bus(self):
+        """Stop the session bus and release this node's sessions"""
+        if self.session_bus is not None:
+            await self.session_bus.stop()
+            self.session_bus = None
+    
+    def start_timers(self):
+        """Start the background task driving idle expiry and heartbeats"""
+        if self._timer_task is None or self._timer_task.done():
+            self._timer_task = asyncio.create_task(self._timer_loop())
+    
+    async def _timer_loop(self):
+        """Advance the timer wheel once per tick"""
+        while True:
+            try:
+                await asyncio.sleep(self.timers.tick_seconds)
+                await self.process_timers()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.error(f"Error processing connection timers: {e}")
+    
+    async def process_timers(self, now: Optional[float] = None) -> int:
+        """
+        Handle expired idle and heartbeat timers
+        
+        Timers are not rescheduled on every message; when one fires the
+        session's last activity decides whether it really expired or is
+        pushed back by the remaining time.
+        
+        Args:
+            now: Monotonic current time (defaults to now)
+            
+        Returns:
+            Number of sessions disconnected for inactivity
+        """
+        now = time.monotonic() if now is None else now
+        idle_timeout = self.connection_timeout_minutes * 60
+        inactive_sessions = []
+        
+        for kind, session_id in self.timers.advance(now):
+            record = self.connection_metadata.get(session_id)
+            if record is None:
+                continue
+            idle_for = now - record.last_activity
+            
+            if kind == "idle":
+                if idle_for >= idle_timeout:
+                    inactive_sessions.append(session_id)
+                else:
+                    self.timers.schedule(("idle", session_id), idle_timeout - idle_for, now)
+            
+            elif idle_for >= self.heartbeat_interval_seconds:
+                # Ping quiet connections without counting it as activity
+                sender = self.senders.get(session_id)
+                if sender is not None:
+                    sender.enqueue(
+                        record.codec.encode({"type": "ping", "timestamp": datetime.now().isoformat()}),
+                        "ping"
+                    )
+                self.timers.schedule(("heartbeat", session_id), self.heartbeat_interval_seconds, now)
+            
+            else:
+                self.timers.schedule(
+                    ("heartbeat", session_id), self.heartbeat_interval_seconds - idle_for, now
+                )
+        
+        for session_id in inactive_sessions:
+            await self.disconnect(session_id, "Inactive timeout")
+        
+        return len(inactive_sessions)
+    
+    def get_ip_sessions(self, client_ip: str) -> Set[str]:
+        """Get sessions connected to this worker from an IP"""
+        return self.sessions_by_ip.get(client_ip, set())
+        
     async def connect(self, websocket: WebSocket, session_id: str, client_ip: str) -> bool:
         """
         Accept new WebSocket connection
@@ -176,32 +309,37 @@ class ConnectionManager:
             True if connection accepted, False if rejected
         """
         try:
-            # Check connection limits per IP
-            ip_connections = sum(
-                1 for metadata in self.connection_metadata.values()
-                if metadata.get("client_ip") == client_ip
-            )
-            
-            if ip_connections >= self.max_connections_per_ip:
+            # Register session ownership and check connection limits per IP
+            # across all workers
+            session_bus = await self.get_session_bus()
+            if not await session_bus.register_session(session_id, client_ip, self.max_connections_per_ip):
                 self.logger.warning(f"Connection limit exceeded for IP {client_ip}")
                 await websocket.close(code=1008, reason="Connection limit exceeded")
                 return False
             
-            # Accept connection
-            await websocket.accept()
+            # Negotiate wire protocol and accept connection
+            protocol, subprotocol = negotiate_protocol(
+                websocket.scope.get("subprotocols", []),
+                websocket.query_params.get("protocol")
+            )
+            try:
+                await websocket.accept(subprotocol=subprotocol)
+            except Exception:
+                await session_bus.unregister_session(session_id)
+                raise
             
             # Store connection
             self.active_connections[session_id] = websocket
-            self.connection_metadata[session_id] = {
-                "client_ip": client_ip,
-                "connected_at": datetime.now(),
-                "status": ConnectionStatus.CONNECTED,
-                "message_count": 0,
-                "last_activity": datetime.now(),
-                "user_id": None,
-                "language": "en",
-                "agent_context": {}
-            }
+            self.connection_metadata[session_id] = ConnectionRecord(
+                client_ip=client_ip,
+                codec=WireCodec(protocol)
+            )
+            self.sessions_by_ip.setdefault(client_ip, set()).add(session_id)
+            
+            # Schedule idle expiry and heartbeat
+            self.timers.schedule(("idle", session_id), self.connection_timeout_minutes * 60)
+            self.timers.schedule(("heartbeat", session_id), self.heartbeat_interval_seconds)
+            self.start_timers()
             
             # Initialize rate limiter
             self.rate_limiters[session_id] = RateLimiter(
@@ -209,16 +347,32 @@ class ConnectionManager:
                 window_seconds=60
             )
             
-            # Initialize message queue
-            self.message_queues[session_id] = []
+            # Start outbound writer
+            sender = ConnectionSender(
+                session_id=session_id,
+                send=websocket.send_bytes if protocol.binary else websocket.send_text,
+                max_queue_size=self.send_queue_size,
+                policy=self.slow_consumer_policy,
+                send_timeout=self.send_timeout_seconds,
+                on_failure=self.disconnect,
+                on_discard=self._reset_codec
+            )
+            self.senders[session_id] = sender
+            sender.start()
             
-            self.logger.info(f"WebSocket connection established: {session_id}")
+            self.logger.info(f"WebSocket connection established: {session_id} ({protocol.name})")
             return True
             
         except Exception as e:
             self.logger.error(f"Error accepting WebSocket connection: {e}")
             return False
     
+    def _reset_codec(self, session_id: str):
+        """Force a full avatar state on the next frame after a frame was discarded"""
+        record = self.connection_metadata.get(session_id)
+        if record is not None:
+            record.codec.reset()
+    
     async def disconnect(self, session_id: str, reason: str = "Normal closure"):
         """
         Disconnect WebSocket connection
@@ -228,53 +382,111 @@ class ConnectionManager:
             reason: Disconnect reason
         """
         if session_id in self.active_connections:
+            websocket = self.active_connections.pop(session_id)
+            
+            # Clean up
+            record = self.connection_metadata.pop(session_id, None)
+            if record is not None:
+                ip_sessions = self.sessions_by_ip.get(record.client_ip)
+                if ip_sessions is not None:
+                    ip_sessions.discard(session_id)
+                    if not ip_sessions:
+                        del self.sessions_by_ip[record.client_ip]
+            self.timers.cancel(("idle", session_id))
+            self.timers.cancel(("heartbeat", session_id))
+            self.rate_limiters.pop(session_id, None)
+            sender = self.senders.pop(session_id, None)
+            if sender:
+                await sender.close()
+            if self.session_bus is not None:
+                await self.session_bus.unregister_session(session_id)
+            
             try:
-                websocket = self.active_connections[session_id]
                 await websocket.close(code=1000, reason=reason)
             except Exception as e:
                 self.logger.error(f"Error closing WebSocket {session_id}: {e}")
             
-            # Clean up
-            self.active_connections.pop(session_id, None)
-            self.connection_metadata.pop(session_id, None)
-            self.rate_limiters.pop(session_id, None)
-            self.message_queues.pop(session_id, None)
-            
             self.logger.info(f"WebSocket disconnected: {session_id} - {reason}")
     
     async def send_message(self, session_id: str, message: Dict[str, Any]) -> bool:
         """
         Send message to specific session
         
+        The message is encoded with the session's negotiated protocol and
+        queued on its outbound queue; its writer task delivers it in order.
+        Sessions owned by another worker are reached through the session bus.
+        
         Args:
             session_id: Target session
             message: Message to send
             
         Returns:
-            True if sent successfully
+            True if queued successfully
         """
-        if session_id not in self.active_connections:
-            return False
+        record = self.connection_metadata.get(session_id)
+        if record is None:
+            if self.session_bus is None:
+                return False
+            return await self.session_bus.send_to_session(
+                session_id, dumps_json(message), coalesce_key_for(message)
+            )
         
-        try:
-            websocket = self.active_connections[session_id]
-            await websocket.send_text(json.dumps(message, ensure_ascii=False))
-            
-            # Update activity
-            if session_id in self.connection_metadata:
-                self.connection_metadata[session_id]["last_activity"] = datetime.now()
-            
-            return True
+        return await self._enqueue(session_id, record.codec.encode(message), coalesce_key_for(message))
+    
+    async def send_serialized(self, session_id: str, payload: str, coalesce_key: Optional[str] = None) -> bool:
+        """
+        Queue an already serialized frame for a session
+        
+        Args:
+            session_id: Target session
+            payload: Message serialized as JSON (re-encoded for sessions
+                using a newer protocol)
+            coalesce_key: Key used by the coalesce slow-consumer policy
             
-        except Exception as e:
-            self.logger.error(f"Error sending message to {session_id}: {e}")
-            await self.disconnect(session_id, "Send error")
+        Returns:
+            True if queued successfully
+        """
+        if session_id not in self.senders:
+            if self.session_bus is None:
+                return False
+            return await self.session_bus.send_to_session(session_id, payload, coalesce_key)
+        
+        return await self._deliver_local(session_id, payload, coalesce_key)
+    
+    async def _deliver_local(self, session_id: str, payload: str, coalesce_key: Optional[str] = None) -> bool:
+        """Queue a JSON payload on a session owned by this worker"""
+        record = self.connection_metadata.get(session_id)
+        if record is None:
             return False
+        
+        return await self._enqueue(session_id, record.codec.transcode(payload), coalesce_key)
+    
+    async def _enqueue(self, session_id: str, frame: Union[str, bytes], coalesce_key: Optional[str]) -> bool:
+        """Queue an encoded frame on a local session's sender"""
+        sender = self.senders.get(session_id)
+        if sender is None:
+            return False
+        
+        if not sender.enqueue(frame, coalesce_key):
+            await self.disconnect(session_id, "Slow consumer")
+            return False
+        
+        # Update activity
+        record = self.connection_metadata.get(session_id)
+        if record is not None:
+            record.last_activity = time.monotonic()
+        
+        return True
     
     async def broadcast_message(self, message: Dict[str, Any], exclude_sessions: Set[str] = None):
         """
         Broadcast message to all active connections
         
+        The message is serialized once per wire protocol and queued on every
+        connection; delivery happens concurrently on each connection's writer
+        task, so a slow client cannot delay the others. The JSON payload is
+        published on the session bus for connections owned by other workers.
+        
         Args:
             message: Message to broadcast
             exclude_sessions: Sessions to exclude from broadcast
@@ -282,17 +494,64 @@ class ConnectionManager:
         if exclude_sessions is None:
             exclude_sessions = set()
         
+        payload = dumps_json(message)
+        coalesce_key = coalesce_key_for(message)
+        
+        await self._deliver_broadcast(payload, coalesce_key, exclude_sessions, message)
+        
+        if self.session_bus is not None:
+            await self.session_bus.broadcast(payload, coalesce_key, exclude_sessions)
+    
+    async def _deliver_broadcast(
+        self,
+        payload: str,
+        coalesce_key: Optional[str],
+        exclude_sessions: Set[str],
+        message: Optional[Dict[str, Any]] = None
+    ):
+        """Queue a JSON broadcast on every connection owned by this worker"""
+        frames: Dict[str, Union[str, bytes]] = {}
         failed_connections = []
         
-        for session_id in self.active_connections:
-            if session_id not in exclude_sessions:
-                success = await self.send_message(session_id, message)
-                if not success:
-                    failed_connections.append(session_id)
+        for session_id, sender in list(self.senders.items()):
+            if session_id in exclude_sessions:
+                continue
+            record = self.connection_metadata.get(session_id)
+            if record is None:
+                continue
+            
+            codec = record.codec
+            if codec.is_legacy:
+                frame = payload
+            else:
+                if message is None:
+                    message = loads_frame(payload)
+                if codec.uses_delta(message):
+                    frame = codec.encode(message)
+                else:
+                    frame = frames.get(codec.cache_key)
+                    if frame is None:
+                        frame = frames[codec.cache_key] = codec.encode_stateless(message)
+            
+            if not sender.enqueue(frame, coalesce_key):
+                failed_connections.append(session_id)
         
-        # Clean up failed connections
+        # Clean up connections rejected by the slow-consumer policy
         for session_id in failed_connections:
-            await self.disconnect(session_id, "Broadcast failure")
+            await self.disconnect(session_id, "Slow consumer")
+    
+    def get_outbound_stats(self) -> Dict[str, Any]:
+        """Get aggregate outbound queue statistics"""
+        senders = list(self.senders.values())
+        return {
+            "policy": self.slow_consumer_policy.value,
+            "queue_size_limit": self.send_queue_size,
+            "queued_frames": sum(sender.queue_depth for sender in senders),
+            "max_queue_depth": max((sender.queue_depth for sender in senders), default=0),
+            "frames_sent": sum(sender.frames_sent for sender in senders),
+            "frames_dropped": sum(sender.frames_dropped for sender in senders),
+            "frames_coalesced": sum(sender.frames_coalesced for sender in senders)
+        }
     
     def check_rate_limit(self, session_id: str) -> bool:
         """
@@ -311,12 +570,12 @@ class ConnectionManager:
     
     def update_activity(self, session_id: str):
         """Update last activity for session"""
-        if session_id in self.connection_metadata:
-            metadata = self.connection_metadata[session_id]
-            metadata["last_activity"] = datetime.now()
-            metadata["message_count"] += 1
+        record = self.connection_metadata.get(session_id)
+        if record is not None:
+            record.last_activity = time.monotonic()
+            record.message_count += 1
     
-    def authenticate_session(self, session_id: str, user_id: str, user_data: Dict[str, Any]):
+    async def authenticate_session(self, session_id: str, user_id: str, user_data: Dict[str, Any]):
         """
         Mark session as authenticated
         
@@ -325,34 +584,42 @@ class ConnectionManager:
             user_id: User identifier
             user_data: User information
         """
-        if session_id in self.connection_metadata:
-            metadata = self.connection_metadata[session_id]
-            metadata["status"] = ConnectionStatus.AUTHENTICATED
-            metadata["user_id"] = user_id
-            metadata["user_data"] = user_data
+        record = self.connection_metadata.get(session_id)
+        if record is not None:
+            record.status = ConnectionStatus.AUTHENTICATED
+            record.user_id = user_id
+            record.user_data = user_data
+            
+            if self.session_bus is not None:
+                await self.session_bus.update_session(session_id, user_id=user_id)
     
-    def get_session_info(self, session_id: str) -> Optional[Dict[str, Any]]:
+    def get_session_info(self, session_id: str) -> Optional[ConnectionRecord]:
         """Get session metadata"""
         return self.connection_metadata.get(session_id)
     
+    async def locate_session(self, session_id: str) -> Optional[SessionRecord]:
+        """
+        Find a session on any worker
+        
+        Args:
+            session_id: Session to look up
+            
+        Returns:
+            Cluster-wide session record, or None if not connected anywhere
+        """
+        session_bus = await self.get_session_bus()
+        return await session_bus.lookup_session(session_id)
+    
     def get_active_sessions(self) -> List[str]:
         """Get list of active session IDs"""
         return list(self.active_connections.keys())
     
     async def cleanup_inactive_connections(self):
-        """Clean up inactive connections"""
-        cutoff_time = datetime.now() - timedelta(minutes=self.connection_timeout_minutes)
-        inactive_sessions = []
-        
-        for session_id, metadata in self.connection_metadata.items():
-            if metadata["last_activity"] < cutoff_time:
-                inactive_sessions.append(session_id)
-        
-        for session_id in inactive_sessions:
-            await self.disconnect(session_id, "Inactive timeout")
+        """Clean up inactive connections whose idle timers have expired"""
+        disconnected = await self.process_timers()
         
-        if inactive_sessions:
-            self.logger.info(f"Cleaned up {len(inactive_sessions)} inactive connections")
+        if disconnected:
+            self.logger.info(f"Cleaned up {disconnected} inactive connections")
 
 
 # ============================================================================
@@ -382,6 +649,7 @@ class Live2DChatHandler:
         
         # Initialize agent orchestrator (will be set when AI service is available)
         self.agent_orchestrator: Optional[AgentOrchestrator] = None
+        self.turn_pipeline: Optional[ChatTurnPipeline] = None
         
         # Performance metrics
         self.total_connections = 0
@@ -396,6 +664,12 @@ class Live2DChatHandler:
             
             ai_service = await get_ai_service()
             self.agent_orchestrator = AgentOrchestrator(ai_service)
+            self.turn_pipeline = ChatTurnPipeline(
+                self.agent_orchestrator,
+                emotion_mapper=self.emotion_mapper,
+                gesture_library=self.gesture_library,
+                name="chat_live2d"
+            )
             self.logger.info("Agent orchestrator initialized for Live2D WebSocket")
             
         except Exception as e:
@@ -431,13 +705,13 @@ class Live2DChatHandler:
         
         return session_id
     
-    async def process_message(self, session_id: str, raw_message: str) -> bool:
+    async def process_message(self, session_id: str, raw_message: Union[str, bytes]) -> bool:
         """
         Process incoming WebSocket message
         
         Args:
             session_id: Session identifier
-            raw_message: Raw message from client
+            raw_message: Raw frame from client (JSON text or MessagePack bytes)
             
         Returns:
             True if processed successfully
@@ -456,8 +730,8 @@ class Live2DChatHandler:
             
             # Parse message
             try:
-                message_data = json.loads(raw_message)
-            except json.JSONDecodeError:
+                message_data = loads_frame(raw_message)
+            except ValueError:
                 await self._send_error_message(
                     session_id,
                     "Invalid JSON format",
@@ -613,7 +887,7 @@ class Live2DChatHandler:
             Agent response
         """
         try:
-            if not self.agent_orchestrator:
+            if not self.turn_pipeline:
                 # Fallback response if agent system not available
                 return self._create_fallback_response(session_id, user_message)
             
@@ -624,10 +898,10 @@ class Live2DChatHandler:
             
             # Create agent context
             context = AgentContext(
-                user_id=session_info.get("user_id", f"anonymous_{session_id}"),
+                user_id=session_info.user_id or f"anonymous_{session_id}",
                 session_id=session_id,
-                conversation_history=session_info.get("conversation_history", []),
-                user_profile=session_info.get("user_data", {}),
+                conversation_history=session_info.conversation_history,
+                user_profile=session_info.user_data,
                 cultural_context={
                     "region": "hong_kong",
                     "language": user_message.language,
@@ -637,28 +911,27 @@ class Live2DChatHandler:
                 timestamp=datetime.now()
             )
             
-            # Route to appropriate agent
-            selected_agent, routing_result = await self.agent_orchestrator.route_request(
-                user_input=user_message.message,
-                context=context
-            )
-            
-            # Generate agent response
-            agent_response = await selected_agent.generate_response(user_message.message, context)
-            
-            # Map agent response to Live2D format
-            emotion = self.emotion_mapper.map_agent_to_emotion(
-                agent_type=routing_result.selected_agent,
-                response=agent_response.content,
-                urgency=routing_result.urgency_level,
-                confidence=routing_result.confidence
-            )
+            async def send_emergency_card(card: Dict[str, Any]):
+                # Instant emergency card goes out before the LLM call
+                await self.connection_manager.send_message(session_id, {
+                    "type": MessageType.EMERGENCY_CARD,
+                    "card": card,
+                    "session_id": session_id,
+                    "timestamp": datetime.now().isoformat()
+                })
             
-            gesture = self.gesture_library.get_cultural_gesture(
-                agent_type=routing_result.selected_agent,
-                context=user_message.message,
-                language=user_message.language
+            # Routing, emergency card, response, emotion and gesture as one turn
+            turn = await self.turn_pipeline.run(
+                user_id=context.user_id,
+                session_id=session_id,
+                message=user_message.message,
+                language=user_message.language,
+                context=context,
+                district=(user_message.context or {}).get("district") or session_info.user_data.get("district"),
+                on_emergency_card=send_emergency_card
             )
+            selected_agent, routing_result = turn["route"]
+            agent_response = turn["generate"]
             
             # Create Live2D response
             live2d_response = AgentResponse(
@@ -666,13 +939,14 @@ class Live2DChatHandler:
                 message=agent_response.content,
                 agent_type=routing_result.selected_agent,
                 agent_name=selected_agent.get_activation_message(context),
-                emotion=emotion,
-                gesture=gesture,
+                emotion=turn["emotion"],
+                gesture=turn["gesture"],
                 urgency=routing_result.urgency_level,
                 language=user_message.language,
+                hk_facilities=turn["hk_data"],
                 session_id=session_id,
                 confidence=routing_result.confidence,
-                processing_time_ms=getattr(agent_response, 'processing_time_ms', 0)
+                processing_time_ms=int(turn.trace.total_ms)
             )
             
             # Update conversation history
@@ -743,9 +1017,6 @@ class Live2DChatHandler:
         if not session_info:
             return
         
-        if "conversation_history" not in session_info:
-            session_info["conversation_history"] = []
-        
         # Add to conversation history
         conversation_item = {
             "timestamp": datetime.now().isoformat(),
@@ -757,11 +1028,11 @@ class Live2DChatHandler:
             "gesture": response.gesture
         }
         
-        session_info["conversation_history"].append(conversation_item)
+        session_info.conversation_history.append(conversation_item)
         
         # Keep only last 50 exchanges
-        if len(session_info["conversation_history"]) > 50:
-            session_info["conversation_history"] = session_info["conversation_history"][-50:]
+        if len(session_info.conversation_history) > 50:
+            session_info.conversation_history = session_info.conversation_history[-50:]
     
     async def _handle_typing_start(self, session_id: str, message_data: Dict[str, Any]) -> bool:
         """Handle typing start indicator"""
@@ -810,7 +1081,7 @@ class Live2DChatHandler:
                 }
                 
                 # Mark session as authenticated
-                self.connection_manager.authenticate_session(session_id, user_id, user_data)
+                await self.connection_manager.authenticate_session(session_id, user_id, user_data)
                 
                 # Send success response
                 await self.connection_manager.send_message(session_id, {
@@ -911,14 +1182,19 @@ class Live2DChatHandler:
             "active_connections": len(self.connection_manager.get_active_sessions()),
             "total_messages_processed": self.total_messages_processed,
             "average_response_time_ms": self.average_response_time_ms,
+            "outbound": self.connection_manager.get_outbound_stats(),
+            "session_bus": (
+                self.connection_manager.session_bus.get_stats()
+                if self.connection_manager.session_bus else None
+            ),
             "connection_metadata": {
                 session_id: {
-                    "status": metadata["status"],
-                    "connected_at": metadata["connected_at"].isoformat(),
-                    "message_count": metadata["message_count"],
-                    "user_id": metadata.get("user_id")
+                    "status": record.status,
+                    "connected_at": record.connected_at.isoformat(),
+                    "message_count": record.message_count,
+                    "user_id": record.user_id
                 }
-                for session_id, metadata in self.connection_manager.connection_metadata.items()
+                for session_id, record in self.connection_manager.connection_metadata.items()
             }
         }
 
@@ -16,6 +16,7 @@ Features:
 
 import asyncio
 import logging
+import uuid
 from typing import Dict, Any, Optional
 from datetime import datetime
 
@@ -29,6 +30,7 @@ from src.core.exceptions import SecurityError, ValidationError
 from src.core.security import RateLimiter
 from src.web.auth.handlers import AuthHandler
 from src.web.websockets.chat import live2d_chat_handler
+from src.web.websockets.protocol import dumps_json
 
 
 logger = get_logger(__name__)
@@ -40,7 +42,12 @@ security = HTTPBearer(auto_error=False)
 # ============================================================================
 
 class WebSocketSecurity:
-    """Security handler for WebSocket connections"""
+    """
+    Security handler for WebSocket connections
+    
+    Per-IP connection limits are enforced across all workers through the
+    session bus; connection_counts mirrors this worker's share for stats.
+    """
     
     def __init__(self):
         self.auth_handler = AuthHandler()
@@ -51,8 +58,7 @@ class WebSocketSecurity:
         self.max_messages_per_minute = 60
         
     def check_ip_allowed(self, client_ip: str) -> bool:
-        """Check if IP is allowed to connect"""
-        # Check if IP is temporarily blocked
+        """Check if IP is not temporarily blocked"""
         if client_ip in self.blocked_ips:
             block_time = self.blocked_ips[client_ip]
             if datetime.now() < block_time:
@@ -61,16 +67,38 @@ class WebSocketSecurity:
                 # Remove expired block
                 del self.blocked_ips[client_ip]
         
-        # Check connection limit per IP
-        current_connections = self.connection_counts.get(client_ip, 0)
-        return current_connections < self.max_connections_per_ip
+        return True
     
-    def track_connection(self, client_ip: str):
-        """Track new connection for IP"""
+    async def acquire_connection(self, client_ip: str, connection_id: str) -> bool:
+        """
+        Check that an IP may connect and take one of its connection slots
+        
+        Args:
+            client_ip: Client IP address
+            connection_id: Unique identifier of the connection
+            
+        Returns:
+            True if the connection is allowed
+        """
+        if not self.check_ip_allowed(client_ip):
+            return False
+        
+        # Check connection limit per IP across all workers
+        session_bus = await live2d_chat_handler.connection_manager.get_session_bus()
+        if not await session_bus.acquire_ip_slot(
+            "security", client_ip, connection_id, self.max_connections_per_ip
+        ):
+            return False
+        
         self.connection_counts[client_ip] = self.connection_counts.get(client_ip, 0) + 1
+        return True
     
-    def release_connection(self, client_ip: str):
-        """Release connection for IP"""
+    async def release_connection(self, client_ip: str, connection_id: str):
+        """Release a connection slot taken with acquire_connection"""
+        session_bus = live2d_chat_handler.connection_manager.session_bus
+        if session_bus is not None:
+            await session_bus.release_ip_slot("security", client_ip, connection_id)
+        
         if client_ip in self.connection_counts:
             self.connection_counts[client_ip] -= 1
             if self.connection_counts[client_ip] <= 0:
@@ -144,20 +172,22 @@ async def websocket_live2d_chat(
     - token: Optional JWT authentication token
     - language: Language preference (en, zh-HK)
     - client_type: Type of client connecting (live2d, web, mobile)
+    - protocol: Wire protocol (live2d.v1.json, live2d.v2.json,
+      live2d.v2.msgpack) for clients that cannot set a WebSocket subprotocol
     """
     client_ip = websocket.client.host if websocket.client else "unknown"
+    connection_id = str(uuid.uuid4())
+    connection_acquired = False
     session_id = None
     
     try:
         # Security checks
-        if not ws_security.check_ip_allowed(client_ip):
+        connection_acquired = await ws_security.acquire_connection(client_ip, connection_id)
+        if not connection_acquired:
             await websocket.close(code=1008, reason="Connection limit exceeded or IP blocked")
             logger.warning(f"WebSocket connection rejected for IP {client_ip}")
             return
         
-        # Track connection
-        ws_security.track_connection(client_ip)
-        
         # Initialize agents if needed
         if not live2d_chat_handler.agent_orchestrator:
             await live2d_chat_handler.initialize_agents()
@@ -168,7 +198,7 @@ async def websocket_live2d_chat(
         # Authenticate if token provided
         auth_info = await ws_security.authenticate_websocket(websocket, token)
         if auth_info:
-            live2d_chat_handler.connection_manager.authenticate_session(
+            await live2d_chat_handler.connection_manager.authenticate_session(
                 session_id,
                 auth_info["user_id"],
                 auth_info
@@ -178,8 +208,8 @@ async def websocket_live2d_chat(
         # Set session language preference
         session_info = live2d_chat_handler.connection_manager.get_session_info(session_id)
         if session_info:
-            session_info["language"] = language
-            session_info["client_type"] = client_type
+            session_info.language = language
+            session_info.client_type = client_type
         
         # Log connection
         log_api_request(
@@ -200,20 +230,20 @@ async def websocket_live2d_chat(
         # Message processing loop
         while True:
             try:
-                # Receive message with timeout
-                try:
-                    raw_message = await asyncio.wait_for(
-                        websocket.receive_text(),
-                        timeout=300.0  # 5 minute timeout
-                    )
-                except asyncio.TimeoutError:
-                    # Send ping to check if connection is alive
-                    await websocket.send_text('{"type":"ping","timestamp":"' + datetime.now().isoformat() + '"}')
-                    continue
+                # Receive text (JSON) or binary (MessagePack) frame; quiet
+                # connections are pinged by the connection manager's
+                # heartbeat timers
+                frame = await websocket.receive()
+                if frame["type"] == "websocket.disconnect":
+                    raise WebSocketDisconnect(frame.get("code", 1000))
+                raw_message = frame["text"] if frame.get("text") is not None else frame.get("bytes")
                 
                 # Check rate limiting
                 if not ws_security.check_rate_limit(client_ip):
-                    await websocket.send_text('{"type":"error","message":"Rate limit exceeded","error_code":"RATE_LIMIT"}')
+                    await live2d_chat_handler.connection_manager.send_serialized(
+                        session_id,
+                        '{"type":"error","message":"Rate limit exceeded","error_code":"RATE_LIMIT"}'
+                    )
                     continue
                 
                 # Process message
@@ -227,9 +257,11 @@ async def websocket_live2d_chat(
                 break
             except Exception as e:
                 logger.error(f"Error processing WebSocket message: {e}")
-                try:
-                    await websocket.send_text(f'{{"type":"error","message":"Message processing error","error_code":"PROCESSING_ERROR","timestamp":"{datetime.now().isoformat()}"}}')
-                except:
+                sent = await live2d_chat_handler.connection_manager.send_serialized(
+                    session_id,
+                    f'{{"type":"error","message":"Message processing error","error_code":"PROCESSING_ERROR","timestamp":"{datetime.now().isoformat()}"}}'
+                )
+                if not sent:
                     break  # Connection broken
     
     except WebSocketDisconnect:
@@ -247,7 +279,8 @@ async def websocket_live2d_chat(
         if session_id:
             await live2d_chat_handler.disconnect_session(session_id, "Connection closed")
         
-        ws_security.release_connection(client_ip)
+        if connection_acquired:
+            await ws_security.release_connection(client_ip, connection_id)
         
         # Log disconnection
         log_api_request(
@@ -270,10 +303,13 @@ async def websocket_health_monitor(websocket: WebSocket):
     Provides real-time system status updates for monitoring dashboards
     """
     client_ip = websocket.client.host if websocket.client else "unknown"
+    connection_id = str(uuid.uuid4())
+    connection_acquired = False
     
     try:
         # Security check (more restrictive for monitoring)
-        if not ws_security.check_ip_allowed(client_ip):
+        connection_acquired = await ws_security.acquire_connection(client_ip, connection_id)
+        if not connection_acquired:
             await websocket.close(code=1008, reason="Access denied")
             return
         
@@ -285,7 +321,7 @@ async def websocket_health_monitor(websocket: WebSocket):
             "timestamp": datetime.now().isoformat(),
             "status": "connected"
         }
-        await websocket.send_text(str(status_data).replace("'", '"'))
+        await websocket.send_text(dumps_json(status_data))
         
         # Health monitoring loop
         while True:
@@ -305,7 +341,7 @@ async def websocket_health_monitor(websocket: WebSocket):
                     "system_status": "healthy"
                 }
                 
-                await websocket.send_text(str(health_update).replace("'", '"'))
+                await websocket.send_text(dumps_json(health_update))
             
             except WebSocketDisconnect:
                 break
@@ -317,7 +353,8 @@ async def websocket_health_monitor(websocket: WebSocket):
         logger.error(f"Health monitor WebSocket error: {e}")
     
     finally:
-        ws_security.release_connection(client_ip)
+        if connection_acquired:
+            await ws_security.release_connection(client_ip, connection_id)
 
 
 # ============================================================================
@@ -328,6 +365,9 @@ async def broadcast_system_update(update_data: Dict[str, Any]):
     """
     Broadcast system update to all connected WebSocket clients
     
+    Clients connected to other workers receive the update through the
+    session bus, so this can be called from any worker.
+    
     Args:
         update_data: Update data to broadcast
     """
@@ -358,6 +398,7 @@ async def get_websocket_statistics() -> Dict[str, Any]:
                 "rate_limiters_active": len(ws_security.rate_limiters),
                 "connection_counts": dict(ws_security.connection_counts)
             },
+            "session_bus": connection_stats.get("session_bus"),
             "performance_metrics": connection_stats.get("connection_metadata", {}),
             "agent_system_status": {
                 "orchestrator_initialized": bool(live2d_chat_handler.agent_orchestrator),
@@ -432,6 +473,12 @@ async def initialize_websocket_system():
         # Initialize Live2D chat handler
         await live2d_chat_handler.initialize_agents()
         
+        # Join the cross-worker session bus
+        await live2d_chat_handler.connection_manager.get_session_bus()
+        
+        # Start idle expiry and heartbeat timers
+        live2d_chat_handler.connection_manager.start_timers()
+        
         # Start cleanup task
         asyncio.create_task(cleanup_websocket_resources())
         
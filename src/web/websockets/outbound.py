@@ -0,0 +1,236 @@
+"""
+WebSocket Outbound Queues - Healthcare AI V2
+============================================
+
+Per-connection outbound queues for Live2D WebSocket sessions.
+
+Each connection gets a bounded queue of pre-serialized frames drained by its
+own writer task, so a broadcast is a non-blocking enqueue per recipient and a
+stalled client can only ever delay itself. When a queue is full the configured
+slow-consumer policy decides what happens:
+
+- drop_oldest: discard the oldest pending droppable frame
+- coalesce: replace a pending frame of the same kind (e.g. an older
+  system_status) with the newer one, otherwise discard the oldest
+  droppable frame
+- disconnect: close the connection
+
+Only idempotent state frames (status, typing, ping) carry a coalesce key and
+may be dropped or replaced. Chat and emergency payloads are never discarded;
+a connection that cannot keep up with them is closed by the send timeout.
+"""
+
+import asyncio
+from collections import deque
+from enum import Enum
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple, Union
+
+from src.core.logging import get_logger
+
+
+logger = get_logger(__name__)
+
+
+# Message types whose latest frame supersedes earlier ones of the same type
+COALESCABLE_MESSAGE_TYPES = frozenset({
+    "system_status", "typing_indicator", "agent_thinking", "avatar_state", "ping", "pong"
+})
+
+
+def coalesce_key_for(message: Dict[str, Any]) -> Optional[str]:
+    """
+    Coalesce key for an outgoing message
+
+    Returns:
+        The message type for idempotent state messages, None for frames
+        that must be delivered (chat responses, emergency alerts and cards)
+    """
+    message_type = message.get("type")
+    if isinstance(message_type, Enum):
+        message_type = message_type.value
+    return message_type if message_type in COALESCABLE_MESSAGE_TYPES else None
+
+
+class SlowConsumerPolicy(str, Enum):
+    """What to do when a connection's outbound queue is full"""
+    DROP_OLDEST = "drop_oldest"
+    COALESCE = "coalesce"
+    DISCONNECT = "disconnect"
+
+
+class ConnectionSender:
+    """
+    Bounded outbound queue with a dedicated writer task for one connection
+
+    Frames are serialized by the caller once and enqueued as text or bytes;
+    the writer task sends them in order. Enqueueing never awaits the socket.
+    """
+
+    def __init__(
+        self,
+        session_id: str,
+        send: Callable[[Union[str, bytes]], Awaitable[Any]],
+        max_queue_size: int = 256,
+        policy: SlowConsumerPolicy = SlowConsumerPolicy.DROP_OLDEST,
+        send_timeout: float = 10.0,
+        on_failure: Optional[Callable[[str, str], Awaitable[Any]]] = None,
+        on_discard: Optional[Callable[[str], Any]] = None
+    ):
+        """
+        Initialize sender
+
+        Args:
+            session_id: Session this sender belongs to
+            send: Coroutine function that writes one frame to the socket
+            max_queue_size: Maximum number of pending frames
+            policy: Slow-consumer policy applied when the queue is full
+            send_timeout: Seconds a single frame may take before the
+                connection is considered stalled
+            on_failure: Callback(session_id, reason) invoked when the
+                connection must be dropped
+            on_discard: Callback(session_id) invoked whenever a queued or
+                new frame is dropped or replaced, so stateful encoders can
+                resynchronize
+        """
+        self.session_id = session_id
+        self._send = send
+        self.max_queue_size = max_queue_size
+        self.policy = policy
+        self.send_timeout = send_timeout
+        self._on_failure = on_failure
+        self._on_discard = on_discard
+
+        self._queue: Deque[Tuple[Optional[str], Union[str, bytes]]] = deque()
+        self._ready = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.closed = False
+
+        # Statistics
+        self.frames_sent = 0
+        self.frames_dropped = 0
+        self.frames_coalesced = 0
+
+    def start(self):
+        """Start the writer task"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._writer())
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of frames waiting to be sent"""
+        return len(self._queue)
+
+    def enqueue(self, payload: Union[str, bytes], coalesce_key: Optional[str] = None) -> bool:
+        """
+        Queue a serialized frame for sending
+
+        Args:
+            payload: Serialized frame
+            coalesce_key: Frames with the same key supersede each other
+                under the coalesce policy; frames without a key are never
+                dropped or replaced (see coalesce_key_for)
+
+        Returns:
+            False if the connection is closed or must be disconnected
+        """
+        if self.closed:
+            return False
+
+        if len(self._queue) >= self.max_queue_size:
+            if self.policy == SlowConsumerPolicy.DISCONNECT:
+                self.closed = True
+                self.frames_dropped += len(self._queue) + 1
+                self._queue.clear()
+                return False
+            if not self._make_room(coalesce_key, payload):
+                return True
+
+        self._queue.append((coalesce_key, payload))
+        self._ready.set()
+        return True
+
+    def _make_room(self, coalesce_key: Optional[str], payload: Union[str, bytes]) -> bool:
+        """
+        Apply the slow-consumer policy to a full queue
+
+        Returns:
+            True if the new frame should still be appended
+        """
+        if self.policy == SlowConsumerPolicy.COALESCE and coalesce_key is not None:
+            for index, (pending_key, _) in enumerate(self._queue):
+                if pending_key == coalesce_key:
+                    self._queue[index] = (coalesce_key, payload)
+                    self.frames_coalesced += 1
+                    self._discarded()
+                    return False
+
+        for index, (pending_key, _) in enumerate(self._queue):
+            if pending_key is not None:
+                del self._queue[index]
+                self.frames_dropped += 1
+                self._discarded()
+                return True
+
+        if coalesce_key is not None:
+            # Nothing droppable is pending, so the new state frame is the one lost
+            self.frames_dropped += 1
+            self._discarded()
+            return False
+
+        # Must-deliver frame over the limit; a stalled socket hits the send timeout
+        return True
+
+    def _discarded(self):
+        """Notify the owner that the client will not see every encoded frame"""
+        if self._on_discard:
+            self._on_discard(self.session_id)
+
+    async def _writer(self):
+        """Drain the queue to the socket"""
+        try:
+            while not self.closed:
+                if not self._queue:
+                    self._ready.clear()
+                    await self._ready.wait()
+                    continue
+
+                _, payload = self._queue.popleft()
+                await asyncio.wait_for(self._send(payload), timeout=self.send_timeout)
+                self.frames_sent += 1
+
+        except asyncio.CancelledError:
+            raise
+        except asyncio.TimeoutError:
+            await self._fail("Send timeout")
+        except Exception as e:
+            logger.debug(f"Writer for {self.session_id} stopped: {e}")
+            await self._fail("Send error")
+
+    async def _fail(self, reason: str):
+        """Mark the sender closed and notify the owner"""
+        self.closed = True
+        self._queue.clear()
+        if self._on_failure:
+            await self._on_failure(self.session_id, reason)
+
+    async def close(self):
+        """Stop the writer task and discard pending frames"""
+        self.closed = True
+        self._queue.clear()
+        self._ready.set()
+        task = self._task
+        if task and task is not asyncio.current_task() and not task.done():
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get sender statistics"""
+        return {
+            "queue_depth": self.queue_depth,
+            "frames_sent": self.frames_sent,
+            "frames_dropped": self.frames_dropped,
+            "frames_coalesced": self.frames_coalesced
+        }
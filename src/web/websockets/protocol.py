@@ -0,0 +1,264 @@
+"""
+Live2D WebSocket Wire Protocol - Healthcare AI V2
+=================================================
+
+Negotiated framing for the Live2D chat channel.
+
+Clients pick a protocol through the WebSocket subprotocol header (or the
+``protocol`` query parameter); clients that offer nothing get v1, the original
+verbose JSON frames.
+
+- live2d.v1.json: full JSON frames
+- live2d.v2.json: compact JSON frames with avatar-state deltas
+- live2d.v2.msgpack: v2 frames as binary MessagePack (requires msgpack)
+
+v2 delta rules, per connection:
+
+- avatar fields (agent, emotion, gesture, urgency, language, voice) are only
+  sent when they differ from the last value sent on the connection
+- nested ``avatar_state`` blocks only carry changed keys
+- other fields with a null value are omitted
+
+Delta state assumes every encoded frame reaches the client. Delta message
+types carry no coalesce key, so the outbound queue never drops or replaces
+them, and the connection manager calls ``WireCodec.reset`` whenever it
+discards any frame so the next delta frame carries the full avatar state.
+
+Compression is permessage-deflate, negotiated by the ASGI server.
+"""
+
+import json
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional production dependency
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+
+Frame = Union[str, bytes]
+
+
+class WireFormat(str, Enum):
+    """Frame encoding"""
+    JSON = "json"
+    MSGPACK = "msgpack"
+
+
+# Message types whose avatar fields are delta-encoded under v2
+DELTA_MESSAGE_TYPES = frozenset({"agent_response", "emergency_alert"})
+
+# Top-level fields treated as avatar state
+AVATAR_STATE_FIELDS = frozenset({
+    "agent_type", "agent_name", "emotion", "gesture", "urgency", "language",
+    "voice_tone", "voice_settings"
+})
+
+_MISSING = object()
+
+
+def _message_type(message: Dict[str, Any]) -> Optional[str]:
+    """Message type as a plain string (MessageType members hash by name)"""
+    message_type = message.get("type")
+    return message_type.value if isinstance(message_type, Enum) else message_type
+
+
+def _default(value: Any) -> Any:
+    """Fallback serializer for values the stdlib encoder does not handle"""
+    if isinstance(value, Enum):
+        return value.value
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps_json(message: Any) -> str:
+    """
+    Serialize a message to JSON text using the fastest available encoder
+
+    Args:
+        message: JSON-compatible message
+
+    Returns:
+        Compact JSON text (non-ASCII characters are kept as-is)
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(message, default=_default).decode("utf-8")
+        except TypeError:
+            # e.g. non-string dict keys, which the stdlib encoder coerces
+            pass
+    return json.dumps(message, ensure_ascii=False, separators=(",", ":"), default=_default)
+
+
+def loads_frame(frame: Frame) -> Any:
+    """
+    Decode an incoming frame
+
+    Text frames are JSON; binary frames are MessagePack.
+
+    Raises:
+        ValueError: If the frame cannot be decoded
+    """
+    if isinstance(frame, (bytes, bytearray)):
+        if msgpack is None:
+            raise ValueError("Binary frames are not supported")
+        return msgpack.unpackb(frame, raw=False)
+    if orjson is not None:
+        return orjson.loads(frame)
+    return json.loads(frame)
+
+
+@dataclass(frozen=True)
+class ProtocolSpec:
+    """A wire protocol version and encoding"""
+    name: str
+    version: int
+    wire_format: WireFormat
+
+    @property
+    def binary(self) -> bool:
+        """Whether frames are sent as binary WebSocket messages"""
+        return self.wire_format == WireFormat.MSGPACK
+
+
+PROTOCOL_V1_JSON = ProtocolSpec("live2d.v1.json", 1, WireFormat.JSON)
+PROTOCOL_V2_JSON = ProtocolSpec("live2d.v2.json", 2, WireFormat.JSON)
+PROTOCOL_V2_MSGPACK = ProtocolSpec("live2d.v2.msgpack", 2, WireFormat.MSGPACK)
+
+DEFAULT_PROTOCOL = PROTOCOL_V1_JSON
+
+
+def supported_protocols() -> Dict[str, ProtocolSpec]:
+    """Protocols this server can speak, by subprotocol name"""
+    protocols = {spec.name: spec for spec in (PROTOCOL_V1_JSON, PROTOCOL_V2_JSON)}
+    if msgpack is not None:
+        protocols[PROTOCOL_V2_MSGPACK.name] = PROTOCOL_V2_MSGPACK
+    return protocols
+
+
+def negotiate_protocol(
+    offered: List[str],
+    requested: Optional[str] = None
+) -> Tuple[ProtocolSpec, Optional[str]]:
+    """
+    Choose a protocol for a new connection
+
+    Args:
+        offered: Subprotocols offered by the client, in preference order
+        requested: Protocol name from the query string, if any
+
+    Returns:
+        Tuple of (protocol, subprotocol to echo in the handshake or None)
+    """
+    protocols = supported_protocols()
+    for name in offered:
+        if name in protocols:
+            return protocols[name], name
+    if requested and requested in protocols:
+        return protocols[requested], None
+    return DEFAULT_PROTOCOL, None
+
+
+@dataclass
+class WireCodec:
+    """
+    Per-connection encoder
+
+    Holds the avatar state last sent on the connection so v2 frames can omit
+    unchanged fields.
+    """
+    protocol: ProtocolSpec = DEFAULT_PROTOCOL
+    _last_state: Dict[str, Any] = field(default_factory=dict, repr=False)
+
+    @property
+    def binary(self) -> bool:
+        return self.protocol.binary
+
+    @property
+    def is_legacy(self) -> bool:
+        """True for v1 connections, whose frames are plain JSON of the message"""
+        return self.protocol.version == 1
+
+    @property
+    def cache_key(self) -> str:
+        """Connections with the same key produce identical stateless frames"""
+        return self.protocol.name
+
+    def encode(self, message: Dict[str, Any]) -> Frame:
+        """
+        Encode an outgoing message for this connection
+
+        Args:
+            message: Message dictionary
+
+        Returns:
+            Text frame for JSON protocols, binary frame for MessagePack
+        """
+        if self.protocol.version >= 2:
+            message = self._compact(message)
+        return self._serialize(message)
+
+    def encode_stateless(self, message: Dict[str, Any]) -> Frame:
+        """Encode a message without touching delta state (for shared frames)"""
+        if self.protocol.version >= 2:
+            message = {key: value for key, value in message.items() if value is not None}
+        return self._serialize(message)
+
+    def transcode(self, payload: str) -> Frame:
+        """
+        Re-encode a v1 JSON payload for this connection
+
+        Args:
+            payload: JSON text as produced for v1 connections
+        """
+        if self.is_legacy:
+            return payload
+        return self.encode(loads_frame(payload))
+
+    def uses_delta(self, message: Dict[str, Any]) -> bool:
+        """Whether encoding this message depends on per-connection state"""
+        return self.protocol.version >= 2 and _message_type(message) in DELTA_MESSAGE_TYPES
+
+    def _serialize(self, message: Dict[str, Any]) -> Frame:
+        if self.protocol.wire_format == WireFormat.MSGPACK:
+            return msgpack.packb(message, default=_default, use_bin_type=True)
+        return dumps_json(message)
+
+    def _compact(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        """Drop nulls and, for avatar messages, unchanged avatar state"""
+        if _message_type(message) not in DELTA_MESSAGE_TYPES:
+            return {key: value for key, value in message.items() if value is not None}
+
+        last_state = self._last_state
+        compact: Dict[str, Any] = {}
+        for key, value in message.items():
+            if key in AVATAR_STATE_FIELDS:
+                if last_state.get(key, _MISSING) == value:
+                    continue
+                last_state[key] = value
+            elif key == "avatar_state" and isinstance(value, dict):
+                previous = last_state.get(key, {})
+                changed = {
+                    sub_key: sub_value for sub_key, sub_value in value.items()
+                    if previous.get(sub_key, _MISSING) != sub_value
+                }
+                last_state[key] = {**previous, **value}
+                if changed:
+                    compact[key] = changed
+                continue
+            elif value is None:
+                continue
+            compact[key] = value
+        return compact
+
+    def reset(self):
+        """Forget delta state so the next frame carries the full avatar state"""
+        self._last_state.clear()
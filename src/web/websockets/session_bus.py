@@ -0,0 +1,578 @@
+"""
+WebSocket Session Bus - Healthcare AI V2
+========================================
+
+Cross-worker coordination for Live2D WebSocket sessions.
+
+Each uvicorn worker owns the sockets it accepted, but session ownership,
+per-IP connection slots and broadcasts are shared through the bus so that:
+
+- a message for a session is routed to whichever worker owns it
+- per-IP connection limits are enforced across all workers
+- any worker can broadcast to every connected client
+
+Two implementations are provided:
+
+- RedisSessionBus: Redis pub/sub plus atomic slot accounting, for
+  multi-worker deployments
+- InMemorySessionBus: single-process implementation; several instances can
+  share one InMemoryBusHub to simulate multiple workers in tests
+"""
+
+import asyncio
+import json
+import os
+import socket
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+
+from src.config import settings
+from src.core.logging import get_logger
+
+
+logger = get_logger(__name__)
+
+
+SessionDelivery = Callable[[str, str, Optional[str]], Awaitable[bool]]
+BroadcastDelivery = Callable[[str, Optional[str], Set[str]], Awaitable[None]]
+
+
+def default_node_id() -> str:
+    """Node identifier for this worker process"""
+    return settings.websocket_node_id or f"{socket.gethostname()}-{os.getpid()}"
+
+
+@dataclass
+class SessionRecord:
+    """Cluster-wide record of a WebSocket session"""
+    session_id: str
+    node_id: str
+    client_ip: str
+    connected_at: str
+    user_id: Optional[str] = None
+
+
+class SessionBus(ABC):
+    """
+    Interface shared by all session bus implementations
+
+    Payloads travel pre-serialized so the owning worker can queue them on the
+    socket without re-encoding.
+    """
+
+    def __init__(self, node_id: Optional[str] = None):
+        self.node_id = node_id or default_node_id()
+        self._deliver_to_session: Optional[SessionDelivery] = None
+        self._deliver_broadcast: Optional[BroadcastDelivery] = None
+
+        # Statistics
+        self.routed_messages = 0
+        self.broadcasts_published = 0
+        self.broadcasts_received = 0
+
+    async def start(self, deliver_to_session: SessionDelivery, deliver_broadcast: BroadcastDelivery):
+        """
+        Start the bus
+
+        Args:
+            deliver_to_session: Callback(session_id, payload, coalesce_key)
+                for messages addressed to a session owned by this node
+            deliver_broadcast: Callback(payload, coalesce_key,
+                exclude_sessions) for broadcasts published by other nodes
+        """
+        self._deliver_to_session = deliver_to_session
+        self._deliver_broadcast = deliver_broadcast
+
+    async def stop(self):
+        """Stop the bus"""
+
+    @abstractmethod
+    async def register_session(self, session_id: str, client_ip: str, max_per_ip: int) -> bool:
+        """
+        Register a session owned by this node, enforcing the global per-IP limit
+
+        Returns:
+            False if the IP already has max_per_ip sessions cluster-wide
+        """
+
+    @abstractmethod
+    async def unregister_session(self, session_id: str):
+        """Remove a session owned by this node"""
+
+    @abstractmethod
+    async def update_session(self, session_id: str, **fields: Any):
+        """Update fields of a session record (e.g. user_id after auth)"""
+
+    @abstractmethod
+    async def lookup_session(self, session_id: str) -> Optional[SessionRecord]:
+        """Find a live session anywhere in the cluster"""
+
+    @abstractmethod
+    async def acquire_ip_slot(self, namespace: str, client_ip: str, token: str, limit: int) -> bool:
+        """
+        Atomically take one of `limit` connection slots for an IP
+
+        Args:
+            namespace: Slot namespace (independent limits per namespace)
+            client_ip: Client IP address
+            token: Unique token identifying the holder
+            limit: Maximum concurrent holders cluster-wide
+        """
+
+    @abstractmethod
+    async def release_ip_slot(self, namespace: str, client_ip: str, token: str):
+        """Release a slot taken with acquire_ip_slot"""
+
+    @abstractmethod
+    async def ip_slot_count(self, namespace: str, client_ip: str) -> int:
+        """Number of slots currently held for an IP"""
+
+    @abstractmethod
+    async def send_to_session(self, session_id: str, payload: str, coalesce_key: Optional[str] = None) -> bool:
+        """
+        Route a serialized message to the node owning the session
+
+        Returns:
+            True if the message was delivered or handed to the owning node
+        """
+
+    @abstractmethod
+    async def broadcast(
+        self,
+        payload: str,
+        coalesce_key: Optional[str] = None,
+        exclude_sessions: Optional[Set[str]] = None
+    ):
+        """Publish a serialized broadcast to every other node"""
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get bus statistics"""
+        return {
+            "backend": self.backend,
+            "node_id": self.node_id,
+            "routed_messages": self.routed_messages,
+            "broadcasts_published": self.broadcasts_published,
+            "broadcasts_received": self.broadcasts_received
+        }
+
+    @property
+    @abstractmethod
+    def backend(self) -> str:
+        """Backend name"""
+
+
+# ============================================================================
+# IN-MEMORY IMPLEMENTATION
+# ============================================================================
+
+class InMemoryBusHub:
+    """Shared state for InMemorySessionBus nodes living in one process"""
+
+    def __init__(self):
+        self.nodes: Dict[str, "InMemorySessionBus"] = {}
+        self.sessions: Dict[str, SessionRecord] = {}
+        self.ip_slots: Dict[Tuple[str, str], Set[str]] = {}
+
+
+class InMemorySessionBus(SessionBus):
+    """Session bus for a single process, or simulated workers sharing a hub"""
+
+    def __init__(self, node_id: Optional[str] = None, hub: Optional[InMemoryBusHub] = None):
+        super().__init__(node_id)
+        self.hub = hub or InMemoryBusHub()
+
+    @property
+    def backend(self) -> str:
+        return "memory"
+
+    async def start(self, deliver_to_session: SessionDelivery, deliver_broadcast: BroadcastDelivery):
+        await super().start(deliver_to_session, deliver_broadcast)
+        self.hub.nodes[self.node_id] = self
+
+    async def stop(self):
+        self.hub.nodes.pop(self.node_id, None)
+        for session_id in [
+            sid for sid, record in self.hub.sessions.items() if record.node_id == self.node_id
+        ]:
+            await self.unregister_session(session_id)
+
+    async def register_session(self, session_id: str, client_ip: str, max_per_ip: int) -> bool:
+        if not await self.acquire_ip_slot("sessions", client_ip, session_id, max_per_ip):
+            return False
+        self.hub.sessions[session_id] = SessionRecord(
+            session_id=session_id,
+            node_id=self.node_id,
+            client_ip=client_ip,
+            connected_at=datetime.now().isoformat()
+        )
+        return True
+
+    async def unregister_session(self, session_id: str):
+        record = self.hub.sessions.pop(session_id, None)
+        if record:
+            await self.release_ip_slot("sessions", record.client_ip, session_id)
+
+    async def update_session(self, session_id: str, **fields: Any):
+        record = self.hub.sessions.get(session_id)
+        if record:
+            for key, value in fields.items():
+                setattr(record, key, value)
+
+    async def lookup_session(self, session_id: str) -> Optional[SessionRecord]:
+        return self.hub.sessions.get(session_id)
+
+    async def acquire_ip_slot(self, namespace: str, client_ip: str, token: str, limit: int) -> bool:
+        holders = self.hub.ip_slots.setdefault((namespace, client_ip), set())
+        if token in holders:
+            return True
+        if len(holders) >= limit:
+            return False
+        holders.add(token)
+        return True
+
+    async def release_ip_slot(self, namespace: str, client_ip: str, token: str):
+        holders = self.hub.ip_slots.get((namespace, client_ip))
+        if holders is not None:
+            holders.discard(token)
+            if not holders:
+                del self.hub.ip_slots[(namespace, client_ip)]
+
+    async def ip_slot_count(self, namespace: str, client_ip: str) -> int:
+        return len(self.hub.ip_slots.get((namespace, client_ip), ()))
+
+    async def send_to_session(self, session_id: str, payload: str, coalesce_key: Optional[str] = None) -> bool:
+        record = self.hub.sessions.get(session_id)
+        if not record:
+            return False
+        owner = self.hub.nodes.get(record.node_id)
+        if owner is None or owner._deliver_to_session is None:
+            return False
+        if owner is not self:
+            self.routed_messages += 1
+        return await owner._deliver_to_session(session_id, payload, coalesce_key)
+
+    async def broadcast(
+        self,
+        payload: str,
+        coalesce_key: Optional[str] = None,
+        exclude_sessions: Optional[Set[str]] = None
+    ):
+        self.broadcasts_published += 1
+        for node in list(self.hub.nodes.values()):
+            if node is not self and node._deliver_broadcast is not None:
+                node.broadcasts_received += 1
+                await node._deliver_broadcast(payload, coalesce_key, set(exclude_sessions or ()))
+
+
+# ============================================================================
+# REDIS IMPLEMENTATION
+# ============================================================================
+
+# Take a slot if fewer than ARGV[2] live holders exist; holders whose node has
+# stopped heartbeating are pruned first so a crashed worker cannot leak slots.
+# The set gets a heartbeat-length TTL here and is kept alive by the heartbeat
+# of every node holding a slot in it.
+_ACQUIRE_SLOT_SCRIPT = """
+local members = redis.call('SMEMBERS', KEYS[1])
+local count = 0
+for _, member in ipairs(members) do
+    if member == ARGV[1] then
+        return 1
+    end
+    local node = string.match(member, '^(.-)|')
+    if node and redis.call('EXISTS', ARGV[3] .. node .. ARGV[4]) == 1 then
+        count = count + 1
+    else
+        redis.call('SREM', KEYS[1], member)
+    end
+end
+if count >= tonumber(ARGV[2]) then
+    return 0
+end
+redis.call('SADD', KEYS[1], ARGV[1])
+redis.call('EXPIRE', KEYS[1], ARGV[5])
+return 1
+"""
+
+
+class RedisSessionBus(SessionBus):
+    """
+    Session bus backed by Redis pub/sub for multi-worker deployments
+
+    Session records and IP slot sets expire after heartbeat_ttl seconds
+    unless the owning node's heartbeat refreshes them, so a crashed worker
+    leaves nothing behind for longer than that.
+    """
+
+    def __init__(
+        self,
+        redis_url: Optional[str] = None,
+        node_id: Optional[str] = None,
+        key_prefix: str = "ws",
+        heartbeat_ttl: Optional[int] = None
+    ):
+        super().__init__(node_id)
+        self.redis_url = redis_url or settings.redis_url_str
+        self.prefix = key_prefix
+        self.heartbeat_ttl = heartbeat_ttl or settings.websocket_node_ttl
+        self.redis_client = None
+        self._pubsub = None
+        self._listener_task: Optional[asyncio.Task] = None
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._acquire_slot = None
+        self._local_sessions: Set[str] = set()
+        self._held_slots: Dict[str, Set[str]] = {}  # Slot set key -> tokens held by this node
+
+    @property
+    def backend(self) -> str:
+        return "redis"
+
+    # Key helpers
+
+    def _alive_key(self, node_id: str) -> str:
+        return f"{self.prefix}:node:{node_id}:alive"
+
+    def _node_channel(self, node_id: str) -> str:
+        return f"{self.prefix}:node:{node_id}"
+
+    @property
+    def _broadcast_channel(self) -> str:
+        return f"{self.prefix}:broadcast"
+
+    def _session_key(self, session_id: str) -> str:
+        return f"{self.prefix}:session:{session_id}"
+
+    def _slot_key(self, namespace: str, client_ip: str) -> str:
+        return f"{self.prefix}:ip:{namespace}:{client_ip}"
+
+    def _slot_member(self, token: str) -> str:
+        return f"{self.node_id}|{token}"
+
+    # Lifecycle
+
+    async def start(self, deliver_to_session: SessionDelivery, deliver_broadcast: BroadcastDelivery):
+        import redis.asyncio as redis
+
+        await super().start(deliver_to_session, deliver_broadcast)
+
+        self.redis_client = redis.from_url(
+            self.redis_url,
+            decode_responses=True,
+            socket_timeout=5,
+            socket_connect_timeout=5
+        )
+        try:
+            await self.redis_client.ping()
+            await self._heartbeat()
+
+            self._acquire_slot = self.redis_client.register_script(_ACQUIRE_SLOT_SCRIPT)
+
+            self._pubsub = self.redis_client.pubsub()
+            await self._pubsub.subscribe(self._node_channel(self.node_id), self._broadcast_channel)
+        except Exception:
+            if self._pubsub:
+                await self._pubsub.close()
+                self._pubsub = None
+            await self.redis_client.close()
+            self.redis_client = None
+            raise
+
+        self._listener_task = asyncio.create_task(self._listen())
+        self._heartbeat_task = asyncio.create_task(self._heartbeat_loop())
+        logger.info(f"Redis session bus started on node {self.node_id}")
+
+    async def stop(self):
+        tasks = [task for task in (self._listener_task, self._heartbeat_task) if task]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._listener_task = self._heartbeat_task = None
+        for session_id in list(self._local_sessions):
+            await self.unregister_session(session_id)
+        if self._pubsub:
+            await self._pubsub.close()
+        if self.redis_client:
+            await self.redis_client.delete(self._alive_key(self.node_id))
+            await self.redis_client.close()
+
+    async def _heartbeat(self):
+        """Mark this node alive and extend the TTL of everything it owns"""
+        async with self.redis_client.pipeline(transaction=False) as pipe:
+            pipe.set(self._alive_key(self.node_id), "1", ex=self.heartbeat_ttl)
+            for session_id in self._local_sessions:
+                pipe.expire(self._session_key(session_id), self.heartbeat_ttl)
+            for slot_key in self._held_slots:
+                pipe.expire(slot_key, self.heartbeat_ttl)
+            await pipe.execute()
+
+    async def _heartbeat_loop(self):
+        while True:
+            try:
+                await asyncio.sleep(max(1, self.heartbeat_ttl // 3))
+                await self._heartbeat()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Session bus heartbeat failed: {e}")
+
+    async def _listen(self):
+        while True:
+            try:
+                async for message in self._pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    await self._handle_envelope(json.loads(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Session bus listener error: {e}")
+                await asyncio.sleep(1)
+
+    async def _handle_envelope(self, envelope: Dict[str, Any]):
+        if envelope.get("origin") == self.node_id:
+            return
+        if envelope["kind"] == "session" and self._deliver_to_session:
+            await self._deliver_to_session(
+                envelope["session_id"], envelope["payload"], envelope.get("coalesce_key")
+            )
+        elif envelope["kind"] == "broadcast" and self._deliver_broadcast:
+            self.broadcasts_received += 1
+            await self._deliver_broadcast(
+                envelope["payload"], envelope.get("coalesce_key"), set(envelope.get("exclude", []))
+            )
+
+    async def _node_alive(self, node_id: str) -> bool:
+        return bool(await self.redis_client.exists(self._alive_key(node_id)))
+
+    # Sessions
+
+    async def register_session(self, session_id: str, client_ip: str, max_per_ip: int) -> bool:
+        if not await self.acquire_ip_slot("sessions", client_ip, session_id, max_per_ip):
+            return False
+        record = SessionRecord(
+            session_id=session_id,
+            node_id=self.node_id,
+            client_ip=client_ip,
+            connected_at=datetime.now().isoformat()
+        )
+        session_key = self._session_key(session_id)
+        async with self.redis_client.pipeline(transaction=True) as pipe:
+            pipe.hset(session_key, mapping={k: v for k, v in asdict(record).items() if v is not None})
+            pipe.expire(session_key, self.heartbeat_ttl)
+            await pipe.execute()
+        self._local_sessions.add(session_id)
+        return True
+
+    async def unregister_session(self, session_id: str):
+        self._local_sessions.discard(session_id)
+        client_ip = await self.redis_client.hget(self._session_key(session_id), "client_ip")
+        await self.redis_client.delete(self._session_key(session_id))
+        if client_ip:
+            await self.release_ip_slot("sessions", client_ip, session_id)
+
+    async def update_session(self, session_id: str, **fields: Any):
+        values = {k: str(v) for k, v in fields.items() if v is not None}
+        if values:
+            await self.redis_client.hset(self._session_key(session_id), mapping=values)
+
+    async def lookup_session(self, session_id: str) -> Optional[SessionRecord]:
+        data = await self.redis_client.hgetall(self._session_key(session_id))
+        if not data or not await self._node_alive(data["node_id"]):
+            return None
+        return SessionRecord(**data)
+
+    # Connection slots
+
+    async def acquire_ip_slot(self, namespace: str, client_ip: str, token: str, limit: int) -> bool:
+        slot_key = self._slot_key(namespace, client_ip)
+        result = await self._acquire_slot(
+            keys=[slot_key],
+            args=[self._slot_member(token), limit, f"{self.prefix}:node:", ":alive", self.heartbeat_ttl]
+        )
+        if result:
+            self._held_slots.setdefault(slot_key, set()).add(token)
+        return bool(result)
+
+    async def release_ip_slot(self, namespace: str, client_ip: str, token: str):
+        slot_key = self._slot_key(namespace, client_ip)
+        tokens = self._held_slots.get(slot_key)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._held_slots[slot_key]
+        await self.redis_client.srem(slot_key, self._slot_member(token))
+
+    async def ip_slot_count(self, namespace: str, client_ip: str) -> int:
+        return await self.redis_client.scard(self._slot_key(namespace, client_ip))
+
+    # Messaging
+
+    async def send_to_session(self, session_id: str, payload: str, coalesce_key: Optional[str] = None) -> bool:
+        if session_id in self._local_sessions and self._deliver_to_session:
+            return await self._deliver_to_session(session_id, payload, coalesce_key)
+
+        owner = await self.redis_client.hget(self._session_key(session_id), "node_id")
+        if not owner:
+            return False
+
+        envelope = json.dumps({
+            "kind": "session",
+            "origin": self.node_id,
+            "session_id": session_id,
+            "payload": payload,
+            "coalesce_key": coalesce_key
+        }, ensure_ascii=False)
+        receivers = await self.redis_client.publish(self._node_channel(owner), envelope)
+        self.routed_messages += 1
+        return receivers > 0
+
+    async def broadcast(
+        self,
+        payload: str,
+        coalesce_key: Optional[str] = None,
+        exclude_sessions: Optional[Set[str]] = None
+    ):
+        envelope = json.dumps({
+            "kind": "broadcast",
+            "origin": self.node_id,
+            "payload": payload,
+            "coalesce_key": coalesce_key,
+            "exclude": sorted(exclude_sessions or ())
+        }, ensure_ascii=False)
+        await self.redis_client.publish(self._broadcast_channel, envelope)
+        self.broadcasts_published += 1
+
+
+async def start_session_bus(
+    deliver_to_session: SessionDelivery,
+    deliver_broadcast: BroadcastDelivery,
+    backend: Optional[str] = None
+) -> SessionBus:
+    """
+    Create and start the configured session bus
+
+    Falls back to the in-memory bus if Redis is configured but unreachable,
+    in which case limits and broadcasts only cover this worker.
+
+    Args:
+        deliver_to_session: Callback for messages to locally owned sessions
+        deliver_broadcast: Callback for broadcasts from other nodes
+        backend: "redis" or "memory" (defaults to settings)
+
+    Returns:
+        The started session bus
+    """
+    backend = backend or settings.websocket_session_bus
+    if backend == "redis":
+        bus = RedisSessionBus()
+        try:
+            await bus.start(deliver_to_session, deliver_broadcast)
+            return bus
+        except Exception as e:
+            logger.warning(f"Redis session bus unavailable, using in-memory bus: {e}")
+
+    bus = InMemorySessionBus()
+    await bus.start(deliver_to_session, deliver_broadcast)
+    return bus
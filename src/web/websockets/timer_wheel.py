@@ -0,0 +1,112 @@
+"""
+Hashed Timer Wheel - Healthcare AI V2
+=====================================
+
+Constant-time timers for WebSocket session deadlines.
+
+Idle timeouts and heartbeat deadlines are kept in a hashed timer wheel rather
+than found by scanning every session:
+
+- schedule, reschedule and cancel are O(1)
+- each tick only inspects the timers hashed into its bucket
+- timers further out than one revolution wait in their bucket until their
+  expiry tick comes round
+"""
+
+import time
+from typing import Dict, Hashable, List, Optional, Tuple
+
+
+class HashedTimerWheel:
+    """
+    Hashed timer wheel keyed by arbitrary hashable keys
+
+    Each key holds at most one pending timer; scheduling an existing key
+    replaces its deadline. Expiry is driven by the owner calling advance().
+    """
+
+    def __init__(self, tick_seconds: float = 1.0, wheel_size: int = 512, start: Optional[float] = None):
+        """
+        Initialize timer wheel
+
+        Args:
+            tick_seconds: Timer resolution in seconds
+            wheel_size: Number of buckets
+            start: Monotonic start time (defaults to now)
+        """
+        self.tick_seconds = tick_seconds
+        self.wheel_size = wheel_size
+        self._origin = time.monotonic() if start is None else start
+        self._current_tick = 0
+        self._buckets: List[Dict[Hashable, int]] = [{} for _ in range(wheel_size)]
+        self._timers: Dict[Hashable, Tuple[int, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._timers)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._timers
+
+    def _tick_for(self, when: float) -> int:
+        return int((when - self._origin) / self.tick_seconds)
+
+    def schedule(self, key: Hashable, delay: float, now: Optional[float] = None):
+        """
+        Schedule (or reschedule) a timer
+
+        Args:
+            key: Timer key
+            delay: Seconds until expiry
+            now: Monotonic current time (defaults to now)
+        """
+        self.cancel(key)
+        now = time.monotonic() if now is None else now
+        # Round up so a timer never fires early, and always at least one tick out
+        expiry_tick = max(self._tick_for(now + delay) + 1, self._current_tick + 1)
+        bucket = expiry_tick % self.wheel_size
+        self._buckets[bucket][key] = expiry_tick
+        self._timers[key] = (bucket, expiry_tick)
+
+    def cancel(self, key: Hashable) -> bool:
+        """
+        Cancel a pending timer
+
+        Returns:
+            True if a timer was pending
+        """
+        entry = self._timers.pop(key, None)
+        if entry is None:
+            return False
+        self._buckets[entry[0]].pop(key, None)
+        return True
+
+    def advance(self, now: Optional[float] = None) -> List[Hashable]:
+        """
+        Advance the wheel to the current time and collect expired timers
+
+        Args:
+            now: Monotonic current time (defaults to now)
+
+        Returns:
+            Keys of expired timers, in expiry order per bucket
+        """
+        now = time.monotonic() if now is None else now
+        target_tick = self._tick_for(now)
+        if target_tick <= self._current_tick:
+            return []
+
+        expired: List[Hashable] = []
+        # After a full revolution every bucket has been visited once
+        first_tick = max(self._current_tick + 1, target_tick - self.wheel_size + 1)
+        for tick in range(first_tick, target_tick + 1):
+            bucket = self._buckets[tick % self.wheel_size]
+            if not bucket:
+                continue
+            due = [key for key, expiry_tick in bucket.items() if expiry_tick <= target_tick]
+            for key in due:
+                del bucket[key]
+                del self._timers[key]
+            expired.extend(due)
+
+        self._current_tick = target_tick
+        return expired